@@ -0,0 +1,260 @@
+"""Bulk scans and bulk actions over every user in USERS_DIR.
+
+Rebuilds and migrations used to walk users one at a time (the archived
+``migrate_users.py`` round-tripped each state over HTTP). Here each user is
+handled by a bounded thread pool: reading, parsing and validating a state
+file is mostly I/O, and a thread pool needs no pickling of states and no
+process fork inside the API server. At most ``2 × max_workers`` users are in
+flight, so memory stays flat however many users there are, and results are
+yielded in uuid order as soon as every earlier user is done.
+
+- ``scan()`` loads, validates and summarizes every user (streamed by
+  ``GET /api/admin/users/stream`` as NDJSON).
+- ``run_action()`` applies one of ``ACTIONS`` (state) or ``LOG_ACTIONS``
+  (log files) to every (or the listed) user, saving through ``save_state``
+  only when something changed, and reports progress into the task record
+  (``POST /api/admin/users/bulk``).
+
+Bulk actions run on the ``"admin"`` task-queue key, not on the user's own
+key; each user's load → modify → save runs under that user's
+``deps.state_lock``, like every other state writer.
+"""
+
+from __future__ import annotations
+
+import os
+import uuid as _uuid
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional
+
+from backend.api import deps as _deps
+from backend.api import user_index
+from backend.api.tasks import task_queue
+from backend.engine import json_codec
+from backend.engine.assessment_v1 import compute_assessment_profile
+from backend.engine.outdoor_log import compact_outdoor_log
+
+ADMIN_TASK_KEY = "admin"
+DEFAULT_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+# Week plans older than this many weeks are dropped by prune_caches
+# (reports look back at most a month).
+PRUNE_KEEP_WEEKS = 8
+
+
+def user_ids() -> List[str]:
+    """Every user directory holding a state file, sorted."""
+    users_dir = Path(_deps.USERS_DIR)
+    try:
+        entries = sorted(os.scandir(users_dir), key=lambda e: e.name)
+    except OSError:
+        return []
+    return [e.name for e in entries if e.is_dir() and os.path.isfile(os.path.join(e.path, "user_state.json"))]
+
+
+def parallel_map(
+    fn: Callable[[str], Dict[str, Any]],
+    ids: Iterable[str],
+    max_workers: int = DEFAULT_WORKERS,
+) -> Iterator[Dict[str, Any]]:
+    """Yield ``fn(uid)`` for every id, in input order, with a bounded window."""
+    window: Deque[Future] = deque()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="climb-bulk") as pool:
+        for uid in ids:
+            window.append(pool.submit(fn, uid))
+            if len(window) >= 2 * max_workers:
+                yield window.popleft().result()
+        while window:
+            yield window.popleft().result()
+
+
+def validate_state(state: Any) -> List[str]:
+    """Structural problems that would break the API for this state."""
+    if not isinstance(state, dict):
+        return ["state is not a JSON object"]
+    errors = []
+    if state.get("schema_version") != _deps.EMPTY_TEMPLATE["schema_version"]:
+        errors.append(f"unsupported schema_version {state.get('schema_version')!r}")
+    for key, expected in (("goal", dict), ("equipment", dict), ("feedback_log", list), ("week_plans", dict)):
+        value = state.get(key)
+        if value is not None and not isinstance(value, expected):
+            errors.append(f"{key} should be {expected.__name__}")
+    gyms = (state.get("equipment") or {}).get("gyms") if isinstance(state.get("equipment"), dict) else None
+    if gyms and any(isinstance(g, dict) and not g.get("gym_id") for g in gyms):
+        errors.append("gym without gym_id")
+    return errors
+
+
+def scan_user(user_id: str) -> Dict[str, Any]:
+    """Load, validate and summarize one user (never raises)."""
+    path = Path(_deps.USERS_DIR) / user_id / "user_state.json"
+    try:
+        raw = path.read_bytes()
+        state = json_codec.loads(raw)
+    except (OSError, ValueError) as e:
+        return {"uuid": user_id, "ok": False, "errors": [f"unreadable: {e}"]}
+    errors = validate_state(state)
+    record: Dict[str, Any] = {"uuid": user_id, "ok": not errors, "errors": errors, "bytes": len(raw)}
+    if isinstance(state, dict):
+        record.update(
+            grade=user_index._extract_grade(state),
+            onboarding_date=user_index._extract_onboarding_date(state),
+            feedback_entries=len(state.get("feedback_log") or []),
+            cached_weeks=len(state.get("week_plans") or {}),
+        )
+    return record
+
+
+def scan(max_workers: int = DEFAULT_WORKERS) -> Iterator[Dict[str, Any]]:
+    """Scan every user; yields one record per user, then a ``done`` record."""
+    counts = {"users": 0, "ok": 0, "invalid": 0}
+    for record in parallel_map(scan_user, user_ids(), max_workers):
+        counts["users"] += 1
+        counts["ok" if record["ok"] else "invalid"] += 1
+        yield {"type": "user", **record}
+    yield {"type": "done", **counts}
+
+
+# ── Actions ─────────────────────────────────────────────────────────────
+# Each action mutates the state in place and returns True if it changed.
+
+
+def _action_migrate_gym_ids(state: Dict[str, Any]) -> bool:
+    return _deps._migrate_gym_ids(state)
+
+
+def _action_migrate_state(state: Dict[str, Any]) -> bool:
+    return _deps.migrate_state(state)
+
+
+def _action_recompute_assessment(state: Dict[str, Any]) -> bool:
+    goal = state.get("goal") or {}
+    assessment = state.get("assessment")
+    if not goal or not isinstance(assessment, dict):
+        return False
+    profile = compute_assessment_profile(assessment, goal)
+    if assessment.get("profile") == profile:
+        return False
+    assessment["profile"] = profile
+    return True
+
+
+def _action_prune_caches(state: Dict[str, Any]) -> bool:
+    cutoff = (date.fromisoformat(_deps.this_monday()) - timedelta(weeks=PRUNE_KEEP_WEEKS)).isoformat()
+    week_plans = state.get("week_plans") or {}
+    stale = [k for k in week_plans if k < cutoff]
+    for k in stale:
+        del week_plans[k]
+    plan_logs = state.get("plan_logs") or {}
+    stale_logs = [k for k in plan_logs if k < cutoff]
+    for k in stale_logs:
+        del plan_logs[k]
+    return bool(stale or stale_logs)
+
+
+ACTIONS: Dict[str, Callable[[Dict[str, Any]], bool]] = {
+    "migrate_gym_ids": _action_migrate_gym_ids,
+    "migrate_state": _action_migrate_state,
+    "recompute_assessment": _action_recompute_assessment,
+    "prune_caches": _action_prune_caches,
+}
+
+
+# Actions on a user's log files rather than the state; same return contract.
+
+
+def _action_compact_outdoor_logs(user_id: str, dry_run: bool) -> bool:
+    """Fold every outdoor tombstone, whatever the file's tombstone ratio."""
+    log_dir = str(Path(_deps.USERS_DIR) / user_id / "logs")
+    if dry_run:
+        return _has_outdoor_tombstones(log_dir)
+    return compact_outdoor_log(log_dir, min_ratio=0.0)["files_rewritten"] > 0
+
+
+def _has_outdoor_tombstones(log_dir: str) -> bool:
+    try:
+        names = os.listdir(log_dir)
+    except OSError:
+        return False
+    for fn in names:
+        if fn.startswith("outdoor_sessions_") and fn.endswith(".jsonl"):
+            with open(os.path.join(log_dir, fn), "rb") as fh:
+                if any(b'"tombstone"' in line for line in fh):
+                    return True
+    return False
+
+
+LOG_ACTIONS: Dict[str, Callable[[str, bool], bool]] = {
+    "compact_outdoor_logs": _action_compact_outdoor_logs,
+}
+
+
+def apply_action(action: str, user_id: str, dry_run: bool = False) -> Dict[str, Any]:
+    """Run *action* on one user; saves only when the state changed."""
+    try:
+        if action in LOG_ACTIONS:
+            changed = LOG_ACTIONS[action](user_id, dry_run)
+            return {"uuid": user_id, "status": "changed" if changed else "unchanged"}
+        with _deps.state_lock(user_id):
+            # Migrations are left to the migrate_state action, which reports them
+            state = _deps.load_state(user_id, migrate=False)
+            changed = ACTIONS[action](state)
+            if changed and not dry_run:
+                _deps.save_state(state, user_id)
+    except Exception as e:  # one broken user must not stop the batch
+        return {"uuid": user_id, "status": "error", "error": str(e)}
+    return {"uuid": user_id, "status": "changed" if changed else "unchanged"}
+
+
+def _is_uuid(user_id: str) -> bool:
+    try:
+        _uuid.UUID(user_id, version=4)
+    except (TypeError, ValueError, AttributeError):
+        return False
+    return True
+
+
+def run_action(
+    action: str,
+    ids: Optional[List[str]] = None,
+    dry_run: bool = False,
+    max_workers: int = DEFAULT_WORKERS,
+) -> Dict[str, Any]:
+    """Apply *action* to every user (or *ids*); reports progress to the running task.
+
+    Listed ids that are not UUIDs of existing users are reported as
+    ``not_found`` errors without touching the disk (loading an unknown id
+    would create its state file).
+    """
+    errors: List[Dict[str, Any]] = []
+    if ids is None:
+        targets = user_ids()
+    else:
+        known = set(user_ids())
+        targets = []
+        for uid in dict.fromkeys(ids):
+            if _is_uuid(uid) and uid in known:
+                targets.append(uid)
+            else:
+                errors.append({"uuid": uid, "status": "error", "error": "not_found"})
+    counts = {
+        "total": len(targets) + len(errors), "processed": len(errors),
+        "changed": 0, "unchanged": 0, "error": len(errors),
+    }
+    task_queue.report_progress(**counts)
+    for result in parallel_map(lambda uid: apply_action(action, uid, dry_run), targets, max_workers):
+        counts["processed"] += 1
+        counts[result["status"]] += 1
+        if result["status"] == "error":
+            errors.append(result)
+        task_queue.report_progress(**counts)
+    return {"action": action, "dry_run": dry_run, **counts, "errors": errors[:100]}
+
+
+def submit_action(action: str, ids: Optional[List[str]] = None, dry_run: bool = False) -> str:
+    """Queue a bulk action on the admin task key; returns the task id."""
+    if action not in ACTIONS and action not in LOG_ACTIONS:
+        raise ValueError(f"Unknown bulk action: {action}")
+    return task_queue.submit(ADMIN_TASK_KEY, f"bulk:{action}", run_action, action, ids, dry_run)
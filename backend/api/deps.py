@@ -2,17 +2,23 @@
 
 from __future__ import annotations
 
-import json
+import functools
+import hashlib
 import os
+import threading
 import uuid as _uuid
-from uuid import uuid4
 from copy import deepcopy
 from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Any, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Literal, Optional, Set, Tuple
 
 from fastapi import HTTPException, Request
 
+from backend.api import side_log
+from backend.engine import json_codec
+from backend.engine.metrics import STATE_IO_BYTES, STATE_IO_SECONDS
+from backend.engine.quotes_engine import quote_cursors_from_history
+
 REPO_ROOT = Path(__file__).resolve().parents[2]
 DATA_DIR = Path(os.environ.get("DATA_DIR", str(REPO_ROOT / "backend" / "data")))
 STATE_PATH = DATA_DIR / "user_state.json"
@@ -33,29 +39,78 @@ EMPTY_TEMPLATE: Dict[str, Any] = {
     "baselines": {},
     "recent_sessions": [],
     "stimulus_recency": {},
+    "exercise_recency": [],
     "fatigue_proxy": {},
     "working_loads": {"entries": [], "rules": {}},
     "tests": {},
     "body": {},
     "current_week_plan": None,
     "week_plans": {},
+    "plan_logs": {},
     "outdoor_spots": [],
-    "quote_history": [],
+    "quote_cursors": {},
     "history_index": {"outdoor_log_paths": []},
 }
 
 
+# Response shapes for state-mutating endpoints (feedback, PUT /api/state):
+#   full    — the whole merged state (legacy default)
+#   changed — only the top-level keys modified during the request
+#   minimal — status only
+ResponseMode = Literal["minimal", "changed", "full"]
+
+
+def changed_top_level_keys(before: Dict[str, Any], after: Dict[str, Any]) -> Set[str]:
+    """Return the top-level keys whose value differs between two state snapshots.
+
+    Identity is checked first so untouched sub-documents (typically the large
+    week_plans cache) are skipped without a deep comparison.
+    """
+    changed: Set[str] = set()
+    for key in before.keys() | after.keys():
+        old = before.get(key)
+        new = after.get(key)
+        if old is new:
+            continue
+        if key not in before or key not in after or old != new:
+            changed.add(key)
+    return changed
+
+
+def state_response(
+    state: Dict[str, Any],
+    dirty_keys: Iterable[str],
+    mode: ResponseMode,
+) -> Dict[str, Any]:
+    """Shape the state part of a mutation response according to *mode*.
+
+    ``full`` is handled by the caller (each endpoint has its own legacy
+    shape); this returns the ``status`` envelope for ``minimal`` and
+    ``changed``.
+    """
+    if mode == "minimal":
+        return {"status": "ok"}
+    keys = sorted(k for k in set(dirty_keys) if k in state)
+    return {
+        "status": "ok",
+        "changed_keys": keys,
+        "changes": {k: state[k] for k in keys},
+    }
+
+
 def invalidate_week_cache(state: Dict[str, Any]) -> None:
     """Clear all cached week plans. Call after any action that changes plan inputs.
 
     Stashes the old current-week plan in ``_prev_week_plan`` so that completed
     and manually-added sessions can be merged back into the next generated plan.
+    Edit logs of the cleared plans (``plan_logs``) go with them.
     """
     old = state.get("current_week_plan")
     if old:
         state["_prev_week_plan"] = old
     state["current_week_plan"] = None
     state["week_plans"] = {}
+    state["plan_logs"] = {}
 
 
 def get_user_id(request: Request) -> Optional[str]:
@@ -81,39 +136,121 @@ def _user_state_path(user_id: Optional[str]) -> Path:
     return STATE_PATH
 
 
+# One reentrant lock per state file. Every load-modify-save of a user's state
+# (state-mutating endpoints, queued tasks, admin bulk actions) runs under it,
+# so a save never overwrites a state another writer loaded and changed in the
+# meantime.
+_state_locks: Dict[str, threading.RLock] = {}
+_state_locks_guard = threading.Lock()
+
+
+def state_lock(user_id: Optional[str]) -> threading.RLock:
+    """Lock serializing load-modify-save cycles on *user_id*'s state."""
+    with _state_locks_guard:
+        return _state_locks.setdefault(str(_user_state_path(user_id)), threading.RLock())
+
+
+def locked_state(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Run a state-mutating endpoint under ``state_lock(user_id)``.
+
+    The endpoint must take ``user_id`` (as FastAPI passes it, by keyword).
+    """
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        with state_lock(kwargs.get("user_id")):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+# ── State migrations ────────────────────────────────────────────────────
+# One-time fixes of older state files, applied in order. ``migration_version``
+# in the state counts the steps already applied. ``load_state`` runs pending
+# steps in memory only — reads never write — and the result is persisted by
+# the next ``save_state`` (or the admin ``migrate_state`` bulk action). A step
+# may therefore run on several loads before it is saved: it must be
+# deterministic and idempotent. Gym ids are also filled on every load, since
+# gyms without one keep arriving (PUT /api/state, import, onboarding).
+
+
 def _migrate_gym_ids(state: Dict[str, Any]) -> bool:
-    """Ensure every gym has a stable gym_id (B88 migration). Returns True if state was modified."""
-    gyms = state.get("equipment", {}).get("gyms")
+    """Ensure every gym has a stable gym_id (B88 migration). Returns True if state was modified.
+
+    The id is derived from the gym's position and name, so replaying the
+    migration on an unsaved state yields the same ids.
+    """
+    gyms = (state.get("equipment") or {}).get("gyms")
     if not gyms:
         return False
+    taken = {g.get("gym_id") for g in gyms if isinstance(g, dict) and g.get("gym_id")}
     changed = False
-    for gym in gyms:
-        if not gym.get("gym_id"):
-            gym["gym_id"] = uuid4().hex[:8]
-            changed = True
+    for i, gym in enumerate(gyms):
+        if not isinstance(gym, dict) or gym.get("gym_id"):
+            continue
+        seed = f"{i}:{gym.get('name') or ''}"
+        gym_id = hashlib.sha1(seed.encode("utf-8")).hexdigest()[:8]
+        while gym_id in taken:
+            seed += "+"
+            gym_id = hashlib.sha1(seed.encode("utf-8")).hexdigest()[:8]
+        gym["gym_id"] = gym_id
+        taken.add(gym_id)
+        changed = True
     return changed
 
 
-def load_state(user_id: Optional[str] = None) -> Dict[str, Any]:
+def _migrate_quote_cursors(state: Dict[str, Any]) -> bool:
+    """Replace the 30-entry ``quote_history`` by per-pool rotation cursors."""
+    if "quote_history" not in state:
+        return False
+    history = state.pop("quote_history") or []
+    cursors = state.setdefault("quote_cursors", {})
+    for key, position in quote_cursors_from_history(history).items():
+        cursors.setdefault(key, position)
+    return True
+
+
+STATE_MIGRATIONS: List[Tuple[str, Callable[[Dict[str, Any]], bool]]] = [
+    ("gym_ids", _migrate_gym_ids),
+    ("quote_cursors", _migrate_quote_cursors),
+]
+
+
+def migrate_state(state: Dict[str, Any]) -> bool:
+    """Apply the pending STATE_MIGRATIONS in place. Returns True if any ran."""
+    version = state.get("migration_version") or 0
+    if version >= len(STATE_MIGRATIONS):
+        return False
+    for _, step in STATE_MIGRATIONS[version:]:
+        step(state)
+    state["migration_version"] = len(STATE_MIGRATIONS)
+    return True
+
+
+def load_state(user_id: Optional[str] = None, *, migrate: bool = True) -> Dict[str, Any]:
     """Load user state from disk. Returns empty template if file missing.
 
     If user_id is provided, reads from the per-user directory.
     If the per-user file doesn't exist, copies the template and returns it.
+    Pending migrations and side-log records are applied to the returned
+    state only; the file is not rewritten. Gyms without a ``gym_id`` get
+    one. ``migrate=False`` leaves migrations and gym ids to the caller (the
+    bulk ``migrate_state`` and ``migrate_gym_ids`` actions).
     """
     path = _user_state_path(user_id)
     if path.exists():
-        state = json.loads(path.read_text(encoding="utf-8"))
-        if _migrate_gym_ids(state):
-            save_state(state, user_id)
+        with STATE_IO_SECONDS.time(op="load"):
+            raw = path.read_bytes()
+            state = json_codec.loads(raw)
+        STATE_IO_BYTES.observe(len(raw), op="load")
+        if migrate:
+            migrate_state(state)
+            _migrate_gym_ids(state)
+        side_log.apply_pending(state, path)
         return state
     if user_id:
         # New user: bootstrap from template
         state = deepcopy(EMPTY_TEMPLATE)
         path.parent.mkdir(parents=True, exist_ok=True)
-        path.write_text(
-            json.dumps(state, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
-            encoding="utf-8",
-        )
+        path.write_bytes(json_codec.dumps_state(state))
         return state
     return deepcopy(EMPTY_TEMPLATE)
 
@@ -121,14 +258,57 @@ def load_state(user_id: Optional[str] = None) -> Dict[str, Any]:
 def save_state(state: Dict[str, Any], user_id: Optional[str] = None) -> None:
     """Write user state to disk.
 
-    If user_id is provided, writes to the per-user directory.
+    If user_id is provided, writes to the per-user directory. Side-log
+    records appended since the state was loaded are folded in first.
     """
     path = _user_state_path(user_id)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(
-        json.dumps(state, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
-        encoding="utf-8",
-    )
+    side_log.apply_pending(state, path)
+    with STATE_IO_SECONDS.time(op="save"):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        raw = json_codec.dumps_state(state)
+        path.write_bytes(raw)
+    STATE_IO_BYTES.observe(len(raw), op="save")
+    _STATE_REVISIONS[str(path)] = _STATE_REVISIONS.get(str(path), 0) + 1
+    if state.get("side_log_seq"):
+        side_log.truncate(path, state["side_log_seq"])
+    if user_id:
+        from backend.api import user_index
+
+        user_index.record_state(user_id, state)
+
+
+def append_side_log(user_id: Optional[str], op: str, value: Any) -> None:
+    """Record a small mutation without rewriting the state (see side_log).
+
+    Once the side log grows past ``side_log.FOLD_AFTER_BYTES`` a fold (load +
+    save) is queued on the user's task queue.
+    """
+    size = side_log.append(_user_state_path(user_id), op, value)
+    if size > side_log.FOLD_AFTER_BYTES:
+        from backend.api.tasks import task_key, task_queue
+
+        task_queue.submit(task_key(user_id), "side_log_fold", _fold_side_log, user_id)
+
+
+def _fold_side_log(user_id: Optional[str]) -> None:
+    with state_lock(user_id):
+        save_state(load_state(user_id), user_id)
+
+
+def clear_side_log(user_id: Optional[str]) -> None:
+    """Drop pending side-log records; call before replacing the whole state."""
+    side_log.clear(_user_state_path(user_id))
+
+
+# In-process write counter per state file. File mtimes are only as fine as the
+# kernel clock tick, so two quick same-size writes can share an mtime; the
+# counter tells them apart for conditional GETs (see backend/api/etag.py).
+_STATE_REVISIONS: Dict[str, int] = {}
+
+
+def state_revision(user_id: Optional[str] = None) -> int:
+    """Number of save_state() calls for this user's file in this process."""
+    return _STATE_REVISIONS.get(str(_user_state_path(user_id)), 0)
 
 
 def next_monday(from_date: Optional[date] = None) -> str:
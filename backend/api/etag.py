@@ -0,0 +1,111 @@
+"""Conditional GET support (ETag / If-None-Match).
+
+ETags are content *versions*, not body hashes, so they can be computed with a
+few ``stat`` calls before any state is parsed or any plan generated:
+
+- user state  → mtime + size of the user's state file plus the in-process
+  revision counter bumped by every ``save_state``, and the mtime + size of
+  its side log (replayed on load)
+- logs        → name + size + mtime of every ``*.jsonl`` in the log dir
+  (logs are append-only, so the size is the write offset)
+- catalog     → content hash of every catalog file, computed once per process
+  (the catalog only changes on deploy)
+
+Endpoints combine the parts they depend on, call ``not_modified`` before doing
+work and return its 304 response when the client copy is still current.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from functools import lru_cache
+from typing import Optional
+
+from fastapi import Request, Response
+
+from backend.api import deps, side_log
+from backend.engine.metrics import record_cache
+
+CATALOG_DIR = deps.REPO_ROOT / "backend" / "catalog"
+
+
+def state_version(user_id: Optional[str]) -> str:
+    """Version token of the user's state file ("none" when it does not exist)."""
+    try:
+        st = os.stat(deps._user_state_path(user_id))
+    except OSError:
+        return "state:none"
+    side = side_log.version(deps._user_state_path(user_id))
+    return f"state:{st.st_mtime_ns}-{st.st_size}-{deps.state_revision(user_id)}-{side}"
+
+
+def log_version(log_dir: str) -> str:
+    """Version token covering every JSONL log in *log_dir*."""
+    parts = []
+    try:
+        with os.scandir(log_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".jsonl") and entry.is_file():
+                    st = entry.stat()
+                    parts.append(f"{entry.name}:{st.st_size}:{st.st_mtime_ns}")
+    except OSError:
+        return "logs:none"
+    parts.sort()
+    return "logs:" + ",".join(parts)
+
+
+@lru_cache(maxsize=1)
+def catalog_version() -> str:
+    """Content hash of the whole catalog tree (cached for the process lifetime)."""
+    digest = hashlib.sha1()
+    for root, dirs, files in os.walk(CATALOG_DIR):
+        dirs.sort()
+        for name in sorted(files):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(root, name)
+            digest.update(os.path.relpath(path, CATALOG_DIR).encode("utf-8"))
+            with open(path, "rb") as f:
+                digest.update(f.read())
+    return "catalog:" + digest.hexdigest()
+
+
+def make_etag(*parts: str) -> str:
+    """Weak ETag from version parts (weak: the same version may be re-encoded)."""
+    digest = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:24]
+    return f'W/"{digest}"'
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def set_etag(response: Response, etag: str) -> None:
+    """Attach *etag* to a 200 response and ask clients to revalidate."""
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "no-cache"
+
+
+def not_modified(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """Return a 304 response if the client already holds *etag*.
+
+    Otherwise sets the ETag on *response* (the endpoint's injected response)
+    and returns None so the endpoint carries on.
+    """
+    header = request.headers.get("if-none-match")
+    if header:
+        record_cache("http_etag", _matches(header, etag))
+    if header and _matches(header, etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    set_etag(response, etag)
+    return None
@@ -2,13 +2,17 @@
 
 import logging
 import os
+import time
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 
 from backend.api.deps import DATA_DIR, USERS_DIR
+from backend.api.profiling import profile_requests
+from backend.api.responses import CodecJSONResponse
+from backend.engine import catalog_snapshot, metrics
 from backend.api.routers import (
     admin,
     assessment,
@@ -22,6 +26,7 @@ from backend.api.routers import (
     reports,
     session,
     state,
+    tasks,
     user,
     week,
 )
@@ -61,13 +66,26 @@ def _check_data_dir() -> None:
     logger.warning("=" * 60)
 
 
+def _warm_catalogs() -> None:
+    """Load (or build) the compiled catalog snapshot before the first request."""
+    t0 = time.perf_counter()
+    status = catalog_snapshot.warm()
+    logger.warning("Catalog snapshot: %s (%.0f ms)", status, (time.perf_counter() - t0) * 1000)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     _check_data_dir()
+    _warm_catalogs()
     yield
 
 
-app = FastAPI(title="climb-agent", version="0.1.0", lifespan=lifespan)
+app = FastAPI(
+    title="climb-agent",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=CodecJSONResponse,
+)
 
 # CORS — allow Next.js dev server + Vercel production
 app.add_middleware(
@@ -82,6 +100,28 @@ app.add_middleware(
 )
 
 
+app.middleware("http")(profile_requests)
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    """Per-route latency histogram, labelled by route template (not raw path)."""
+    t0 = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        metrics.HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - t0,
+            method=request.method,
+            route=getattr(route, "path", "unmatched"),
+            status=str(status),
+        )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Catch unhandled exceptions and return a clean JSON error."""
@@ -106,6 +146,13 @@ app.include_router(reports.router)
 app.include_router(quotes.router)
 app.include_router(user.router)
 app.include_router(admin.router)
+app.include_router(tasks.router)
+
+
+@app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """Prometheus text exposition of in-process metrics."""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
 
 
 @app.get("/health")
@@ -2,7 +2,7 @@
 
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Literal, Optional
 
 from pydantic import BaseModel, Field
 
@@ -68,6 +68,7 @@ class OverrideRequest(BaseModel):
     slot: str = "evening"
     phase_id: Optional[str] = None
     week_plan: Optional[Dict[str, Any]] = None
+    start_date: Optional[str] = None  # stored week to edit when week_plan is omitted
     target_date: Optional[str] = None
     gym_id: Optional[str] = None
     session_index: Optional[int] = None
@@ -77,6 +78,7 @@ class EventsRequest(BaseModel):
     """Body for POST /api/replanner/events."""
     events: List[Dict[str, Any]]
     week_plan: Optional[Dict[str, Any]] = None
+    start_date: Optional[str] = None  # stored week to edit when week_plan is omitted
 
 
 class QuickAddRequest(BaseModel):
@@ -87,9 +89,15 @@ class QuickAddRequest(BaseModel):
     location: str = "gym"
     phase_id: Optional[str] = None
     week_plan: Optional[Dict[str, Any]] = None
+    start_date: Optional[str] = None  # stored week to edit when week_plan is omitted
     gym_id: Optional[str] = None
 
 
+class UndoRequest(BaseModel):
+    """Body for POST /api/replanner/undo."""
+    start_date: Optional[str] = None  # defaults to the current week
+
+
 # --------------------------------------------------------------------------- #
 # Feedback
 # --------------------------------------------------------------------------- #
@@ -193,3 +201,16 @@ class WeeklyReportRequest(BaseModel):
 class MonthlyReportRequest(BaseModel):
     """Query params for GET /api/reports/monthly."""
     month: str  # YYYY-MM
+
+
+# --------------------------------------------------------------------------- #
+# Admin
+# --------------------------------------------------------------------------- #
+
+class BulkActionRequest(BaseModel):
+    """Body for POST /api/admin/users/bulk."""
+    action: Literal[
+        "migrate_gym_ids", "migrate_state", "recompute_assessment", "prune_caches", "compact_outdoor_logs",
+    ]
+    user_ids: Optional[List[str]] = None  # default: every user
+    dry_run: bool = False
@@ -0,0 +1,178 @@
+"""Opt-in per-request profiling and tracing for admins.
+
+A request carrying a valid ``X-Admin-Key`` plus ``X-Profile: 1`` runs its
+endpoint under ``cProfile``. The raw dump (``.prof``, loadable with
+``pstats``/snakeviz) and a top-N text summary (``.txt``) are written to
+``DATA_DIR/profiles/`` and the profile id is returned in the ``X-Profile-Id``
+response header. Profiles are listed by ``GET /api/admin/profiles``.
+
+With ``X-Trace: 1`` instead (or as well) the endpoint runs inside
+``tracing.collect()``: the engine's span tree is added to dict responses as
+``_debug_trace`` and folded into the timing table at
+``GET /api/admin/trace-stats``.
+
+Sync endpoints run in a worker thread and cProfile only sees the thread it is
+enabled on, so profiling cannot happen in the middleware itself: the
+middleware only marks the request (a context variable, which Starlette copies
+into the worker thread) and every router is built with ``InstrumentedRoute``,
+whose endpoint wrapper switches the profiler on right where the work happens.
+Unmarked requests pay one context-variable lookup.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import cProfile
+import functools
+import io
+import json
+import pstats
+import re
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from fastapi import Request
+from fastapi.routing import APIRoute
+
+from backend.api import deps as _deps
+from backend.engine import tracing
+
+TOP_N = 40
+
+_debug_request: contextvars.ContextVar[Optional[Dict[str, Any]]] = contextvars.ContextVar(
+    "climb_debug_request", default=None
+)
+
+
+def profiles_dir() -> Path:
+    return Path(_deps.DATA_DIR) / "profiles"
+
+
+async def profile_requests(request: Request, call_next):
+    """Middleware: mark admin requests that ask for ``X-Profile: 1`` / ``X-Trace: 1``."""
+    from backend.api.routers.admin import _is_admin
+
+    profile = request.headers.get("X-Profile") == "1"
+    trace = request.headers.get("X-Trace") == "1"
+    if not (profile or trace) or not _is_admin(request):
+        return await call_next(request)
+
+    marker: Dict[str, Any] = {
+        "method": request.method,
+        "path": request.url.path,
+        "profile": profile,
+        "trace": trace,
+    }
+    token = _debug_request.set(marker)
+    try:
+        response = await call_next(request)
+    finally:
+        _debug_request.reset(token)
+    if marker.get("profile_id"):
+        response.headers["X-Profile-Id"] = marker["profile_id"]
+    return response
+
+
+def _instrumented(route_path: str, fn: Callable[..., Any]) -> Callable[..., Any]:
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Any:
+        marker = _debug_request.get()
+        if marker is None or marker.get("done"):
+            return fn(*args, **kwargs)
+        marker["done"] = True
+        if not marker["trace"]:
+            return _run_profiled(marker, route_path, fn, args, kwargs)
+        with tracing.collect(route_path) as trace:
+            result = _run_profiled(marker, route_path, fn, args, kwargs)
+        if isinstance(result, dict):
+            result = {**result, "_debug_trace": trace.to_dict()}
+        return result
+
+    return wrapper
+
+
+def _run_profiled(
+    marker: Dict[str, Any],
+    route_path: str,
+    fn: Callable[..., Any],
+    args: tuple,
+    kwargs: Dict[str, Any],
+) -> Any:
+    if not marker["profile"]:
+        return fn(*args, **kwargs)
+    profiler = cProfile.Profile()
+    t0 = time.perf_counter()
+    try:
+        return profiler.runcall(fn, *args, **kwargs)
+    finally:
+        elapsed_ms = (time.perf_counter() - t0) * 1000.0
+        marker["profile_id"] = _write_profile(profiler, marker, route_path, elapsed_ms)
+
+
+class InstrumentedRoute(APIRoute):
+    """APIRoute whose (sync) endpoint runs inside the per-request instrumentation hooks.
+
+    The wrapper keeps the endpoint signature (``functools.wraps``), so FastAPI
+    sees the same parameters. Use as ``APIRouter(route_class=InstrumentedRoute)``.
+    """
+
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any) -> None:
+        if not asyncio.iscoroutinefunction(endpoint):
+            endpoint = _instrumented(path, endpoint)
+        super().__init__(path, endpoint, **kwargs)
+
+
+def _write_profile(profiler: cProfile.Profile, marker: Dict[str, Any], route_path: str, elapsed_ms: float) -> str:
+    out_dir = profiles_dir()
+    out_dir.mkdir(parents=True, exist_ok=True)
+    slug = re.sub(r"[^a-zA-Z0-9]+", "_", route_path).strip("_") or "root"
+    profile_id = f"{datetime.now().strftime('%Y%m%dT%H%M%S')}-{slug}-{uuid4().hex[:6]}"
+
+    profiler.dump_stats(str(out_dir / f"{profile_id}.prof"))
+
+    buf = io.StringIO()
+    buf.write(f"{marker['method']} {marker['path']}  (route {route_path})\n")
+    buf.write(f"wall time: {elapsed_ms:.1f} ms\n\n")
+    stats = pstats.Stats(profiler, stream=buf)
+    stats.sort_stats("cumulative").print_stats(TOP_N)
+    (out_dir / f"{profile_id}.txt").write_text(buf.getvalue(), encoding="utf-8")
+
+    meta = {
+        "profile_id": profile_id,
+        "method": marker["method"],
+        "path": marker["path"],
+        "route": route_path,
+        "duration_ms": round(elapsed_ms, 2),
+        "created_at": datetime.now().isoformat(timespec="seconds"),
+    }
+    (out_dir / f"{profile_id}.json").write_text(json.dumps(meta, indent=2) + "\n", encoding="utf-8")
+    return profile_id
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    """Metadata of stored profiles, newest first."""
+    out_dir = profiles_dir()
+    if not out_dir.is_dir():
+        return []
+    profiles = []
+    for meta_path in out_dir.glob("*.json"):
+        try:
+            profiles.append(json.loads(meta_path.read_text(encoding="utf-8")))
+        except (json.JSONDecodeError, OSError):
+            continue
+    profiles.sort(key=lambda p: p.get("profile_id", ""), reverse=True)
+    return profiles
+
+
+def read_summary(profile_id: str) -> Optional[str]:
+    """Top-N text summary of one profile, or None if unknown."""
+    if not re.fullmatch(r"[A-Za-z0-9_\-]+", profile_id):
+        return None
+    path = profiles_dir() / f"{profile_id}.txt"
+    if not path.is_file():
+        return None
+    return path.read_text(encoding="utf-8")
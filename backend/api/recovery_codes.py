@@ -0,0 +1,234 @@
+"""Recovery-code store: code → uuid and uuid → code, indexed in memory.
+
+On disk the store is two files in DATA_DIR:
+
+- ``recovery_codes.json`` — snapshot, ``{code: {"uuid", "created_at"}}``
+  (the historical format, so existing files keep working)
+- ``recovery_codes.jsonl`` — append-only journal of inserts since the last
+  snapshot, one ``{"code", "uuid", "created_at"}`` object per line
+
+Reads never parse the whole store after the first load: the in-memory forward
+and reverse indexes remember the snapshot's mtime/size and how far into the
+journal they have read, so a lookup costs two ``stat`` calls plus parsing any
+lines another worker appended since. A changed snapshot or a replaced journal
+(compaction) triggers a full reload.
+
+Inserts are serialized by a thread lock and, where ``fcntl`` is available, an
+exclusive ``flock`` on ``recovery_codes.lock`` so several server processes can
+share DATA_DIR. An insert is one appended line. Every ``COMPACT_EVERY``
+journal lines the snapshot is rewritten (temp file + ``os.replace``) and the
+journal replaced by an empty file; a crash in between only leaves entries
+present in both files, which replay idempotently.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from backend.engine import json_codec
+
+try:  # POSIX only; without it writes are serialized per process
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None  # type: ignore[assignment]
+
+ALPHABET = "23456789ABCDEFGHJKLMNPQRSTUVWXYZ"  # no 0/O/1/I/L
+COMPACT_EVERY = 500
+
+
+class RecoveryCodeStore:
+    """Indexed view of one snapshot + journal pair (thread-safe)."""
+
+    def __init__(self, snapshot_path: Path) -> None:
+        self.snapshot_path = Path(snapshot_path)
+        self.journal_path = self.snapshot_path.with_suffix(".jsonl")
+        self.lock_path = self.snapshot_path.with_suffix(".lock")
+        self._lock = threading.RLock()
+        self._by_code: Dict[str, Dict[str, Any]] = {}
+        self._by_uuid: Dict[str, str] = {}
+        self._snapshot_sig: Optional[Tuple[int, int]] = None
+        self._journal_ino: Optional[int] = None
+        self._journal_offset = 0
+        self._journal_lines = 0
+        self._flock_held = False
+
+    # ── Locking ─────────────────────────────────────────────────────────
+
+    @contextmanager
+    def _file_lock(self, exclusive: bool) -> Iterator[None]:
+        # Callers hold self._lock. flock() conflicts between two descriptors
+        # of the same process too, so nested use must not lock again.
+        if fcntl is None or self._flock_held:
+            yield
+            return
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a+b") as fh:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            self._flock_held = True
+            try:
+                yield
+            finally:
+                self._flock_held = False
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+    # ── Index maintenance ───────────────────────────────────────────────
+
+    @staticmethod
+    def _stat(path: Path) -> Optional[os.stat_result]:
+        try:
+            return path.stat()
+        except OSError:
+            return None
+
+    def _index(self, code: str, info: Dict[str, Any]) -> None:
+        self._by_code[code] = info
+        uuid = info.get("uuid")
+        # First code wins for a uuid, as with the old linear scan.
+        if uuid and uuid not in self._by_uuid:
+            self._by_uuid[uuid] = code
+
+    def _read_journal_from(self, offset: int) -> None:
+        with open(self.journal_path, "rb") as fh:
+            fh.seek(offset)
+            data = fh.read()
+        # Only consume complete lines; a concurrent append may be half-written.
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            if not line.strip():
+                continue
+            try:
+                entry = json_codec.loads(line)
+            except json_codec.JSONDecodeError:
+                continue
+            code = entry.pop("code", None)
+            if code:
+                self._index(code, entry)
+            self._journal_lines += 1
+        self._journal_offset = offset + end
+
+    def _reload(self) -> None:
+        with self._file_lock(exclusive=False):
+            self._by_code.clear()
+            self._by_uuid.clear()
+            self._journal_offset = 0
+            self._journal_lines = 0
+            snap = self._stat(self.snapshot_path)
+            if snap is not None:
+                codes = json_codec.loads(self.snapshot_path.read_bytes())
+                for code, info in codes.items():
+                    self._index(code, info)
+            self._snapshot_sig = (snap.st_mtime_ns, snap.st_size) if snap else None
+            journal = self._stat(self.journal_path)
+            self._journal_ino = journal.st_ino if journal else None
+            if journal is not None:
+                self._read_journal_from(0)
+
+    def _refresh(self) -> None:
+        """Bring the in-memory indexes up to date with the files."""
+        snap = self._stat(self.snapshot_path)
+        snap_sig = (snap.st_mtime_ns, snap.st_size) if snap else None
+        journal = self._stat(self.journal_path)
+        journal_ino = journal.st_ino if journal else None
+        if snap_sig != self._snapshot_sig or journal_ino != self._journal_ino:
+            self._reload()
+        elif journal is not None and journal.st_size > self._journal_offset:
+            self._read_journal_from(self._journal_offset)
+        elif journal is not None and journal.st_size < self._journal_offset:
+            self._reload()
+
+    # ── Public API ──────────────────────────────────────────────────────
+
+    def lookup(self, code: str) -> Optional[str]:
+        """UUID registered for *code*, or None."""
+        with self._lock:
+            self._refresh()
+            info = self._by_code.get(code)
+            return info.get("uuid") if info else None
+
+    def code_for(self, uuid: str) -> Optional[str]:
+        """Existing code of *uuid*, or None."""
+        with self._lock:
+            self._refresh()
+            return self._by_uuid.get(uuid)
+
+    def get_or_create(self, uuid: str) -> str:
+        """Return *uuid*'s code, creating and persisting one if needed."""
+        with self._lock:
+            self._refresh()
+            existing = self._by_uuid.get(uuid)
+            if existing:
+                return existing
+            with self._file_lock(exclusive=True):
+                self._refresh()  # another process may have added it meanwhile
+                existing = self._by_uuid.get(uuid)
+                if existing:
+                    return existing
+                code = self._generate_code()
+                info = {"uuid": uuid, "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%d")}
+                self._append({"code": code, **info})
+                self._index(code, info)
+                if self._journal_lines >= COMPACT_EVERY:
+                    self._compact()
+            return code
+
+    def _generate_code(self) -> str:
+        """Generate a unique CLIMB-XXXX-XXXX code not already in the store."""
+        for _ in range(100):
+            part1 = "".join(random.choices(ALPHABET, k=4))
+            part2 = "".join(random.choices(ALPHABET, k=4))
+            code = f"CLIMB-{part1}-{part2}"
+            if code not in self._by_code:
+                return code
+        raise RuntimeError("Could not generate unique recovery code")
+
+    def _append(self, entry: Dict[str, Any]) -> None:
+        self.journal_path.parent.mkdir(parents=True, exist_ok=True)
+        line = (json_codec.dumps_line(entry, sort_keys=True) + "\n").encode("utf-8")
+        fd = os.open(self.journal_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, line)
+            os.fsync(fd)
+            st = os.fstat(fd)
+        finally:
+            os.close(fd)
+        if self._journal_ino is None:
+            self._journal_ino = st.st_ino
+        if st.st_size == self._journal_offset + len(line):
+            self._journal_offset = st.st_size
+            self._journal_lines += 1
+        # else another writer's lines are pending; the next refresh reads them
+
+    def _compact(self) -> None:
+        """Fold the journal into the snapshot (caller holds the file lock)."""
+        self._refresh()
+        tmp = self.snapshot_path.with_suffix(".json.tmp")
+        tmp.write_bytes(json_codec.dumps_bytes(self._by_code, pretty=True, sort_keys=True) + b"\n")
+        os.replace(tmp, self.snapshot_path)
+        empty = self.journal_path.with_suffix(".jsonl.tmp")
+        empty.write_bytes(b"")
+        os.replace(empty, self.journal_path)
+        self._reload()
+
+    def compact(self) -> None:
+        with self._lock, self._file_lock(exclusive=True):
+            self._compact()
+
+
+_stores: Dict[str, RecoveryCodeStore] = {}
+_stores_lock = threading.Lock()
+
+
+def store_for(snapshot_path: Path) -> RecoveryCodeStore:
+    """Process-wide store for *snapshot_path* (one index per file)."""
+    key = str(snapshot_path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = RecoveryCodeStore(snapshot_path)
+        return store
@@ -0,0 +1,119 @@
+"""Process-wide cache of resolved sessions.
+
+Resolution is deterministic for a given session, location, gym and the parts
+of user_state the resolver reads, so results can be reused across requests
+(and precomputed in the background after feedback). The key includes a hash
+of the state with plan caches and logs stripped out, plus today's date and
+the session's own date (the recency ledger is read up to the day before it),
+so any change to loads, equipment, limitations or baselines naturally misses.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+
+from backend.api.deps import REPO_ROOT
+from backend.engine.metrics import record_cache
+from backend.engine.resolve_session import resolve_session
+
+SESSIONS_DIR = "backend/catalog/sessions/v1"
+TEMPLATES_DIR = "backend/catalog/templates/v1"
+EXERCISES_PATH = "backend/catalog/exercises/v1/exercises.json"
+
+MAX_ENTRIES = 256
+
+# Top-level keys the resolver never reads (plan caches, history logs).
+_IGNORED_KEYS = frozenset({
+    "_prev_week_plan",
+    "adaptations",
+    "current_week_plan",
+    "feedback_log",
+    "plan_logs",
+    "quote_cursors",
+    "quote_history",
+    "side_log_seq",
+    "week_plans",
+})
+
+_lock = threading.Lock()
+_cache: "OrderedDict[Tuple[str, ...], Dict[str, Any]]" = OrderedDict()
+
+
+def state_fingerprint(state: Dict[str, Any]) -> str:
+    """Stable hash of the resolver-relevant part of *state*."""
+    relevant = {k: v for k, v in state.items() if k not in _IGNORED_KEYS}
+    blob = json.dumps(relevant, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def resolve_entry(
+    session_entry: Dict[str, Any],
+    state: Dict[str, Any],
+    fingerprint: Optional[str] = None,
+    session_date: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
+    """Resolve one plan session entry, reusing a cached result when possible.
+
+    *session_date* is the date of the plan day holding the entry; exercises
+    recorded on or after it do not count as recent for this resolution.
+
+    Returns None when the session file does not exist. Resolver errors
+    propagate to the caller. The returned dict is a private copy.
+    """
+    session_id = session_entry.get("session_id", "")
+    session_path = f"{SESSIONS_DIR}/{session_id}.json"
+    if not (REPO_ROOT / session_path).exists():
+        return None
+
+    location = session_entry.get("location", "home")
+    gym_id = session_entry.get("gym_id")
+    key = (
+        session_id,
+        str(location),
+        str(gym_id),
+        fingerprint or state_fingerprint(state),
+        date.today().isoformat(),
+        str(session_date),
+    )
+    with _lock:
+        hit = _cache.get(key)
+        if hit is not None:
+            _cache.move_to_end(key)
+    record_cache("resolution", hit is not None)
+    if hit is not None:
+        return deepcopy(hit)
+
+    resolve_state = deepcopy(state)
+    resolve_state["context"] = {
+        **resolve_state.get("context", {}),
+        "location": location,
+        "gym_id": gym_id,
+    }
+    if session_date:
+        resolve_state["context"]["date"] = session_date
+    resolved = resolve_session(
+        repo_root=str(REPO_ROOT),
+        session_path=session_path,
+        templates_dir=TEMPLATES_DIR,
+        exercises_path=EXERCISES_PATH,
+        out_path="",
+        user_state_override=resolve_state,
+        write_output=False,
+    )
+    with _lock:
+        _cache[key] = deepcopy(resolved)
+        while len(_cache) > MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return resolved
+
+
+def clear() -> None:
+    """Drop every cached resolution."""
+    with _lock:
+        _cache.clear()
@@ -0,0 +1,16 @@
+"""Response classes for the climb-agent API."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+from backend.engine import json_codec
+
+
+class CodecJSONResponse(JSONResponse):
+    """JSONResponse rendered through the shared JSON codec (orjson when available)."""
+
+    def render(self, content: Any) -> bytes:
+        return json_codec.dumps_bytes(content)
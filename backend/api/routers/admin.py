@@ -2,130 +2,112 @@
 
 from __future__ import annotations
 
-import json
 import os
 import shutil
-from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Literal, Optional
 
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
+from backend.api import bulk, profiling, user_index
 from backend.api import deps as _deps
+from backend.api.models import BulkActionRequest
+from backend.api.tasks import task_queue
+from backend.engine import json_codec
+from backend.engine import tracing
 
-router = APIRouter(prefix="/api/admin", tags=["admin"])
+router = APIRouter(prefix="/api/admin", tags=["admin"], route_class=profiling.InstrumentedRoute)
 
 ADMIN_SECRET = os.environ.get("ADMIN_SECRET", "")
 
 
-def _require_admin(request: Request) -> None:
-    """Raise 403 if X-Admin-Key header is missing or wrong."""
+def _is_admin(request: Request) -> bool:
+    """True if the X-Admin-Key header matches a configured ADMIN_SECRET."""
     secret = ADMIN_SECRET
     key = request.headers.get("X-Admin-Key")
-    if not secret or key != secret:
-        raise HTTPException(status_code=403, detail="Forbidden")
+    return bool(secret) and key == secret
 
 
-def _extract_last_access(state: Dict[str, Any], state_path: Path) -> Optional[str]:
-    """Best-effort last access date from feedback_log, macrocycle, or file mtime."""
-    fl = state.get("feedback_log") or []
-    if fl:
-        return fl[0].get("date")
-
-    mc = state.get("macrocycle") or {}
-    gen = mc.get("generated_at")
-    if gen:
-        return gen[:10]
-
-    assessed = (state.get("assessment") or {}).get("last_assessed")
-    if assessed:
-        return assessed[:10]
-
-    # Fallback: file modification time
-    try:
-        mtime = state_path.stat().st_mtime
-        return datetime.fromtimestamp(mtime, tz=timezone.utc).strftime("%Y-%m-%d")
-    except OSError:
-        return None
-
-
-def _extract_grade(state: Dict[str, Any]) -> Optional[str]:
-    """Current grade from goal or assessment."""
-    grade = (state.get("goal") or {}).get("current_grade")
-    if grade:
-        return grade
-
-    discipline = (state.get("goal") or {}).get("discipline", "boulder")
-    grades = (state.get("assessment") or {}).get("grades") or {}
-    return grades.get(f"{discipline}_max_rp") or grades.get("boulder_max_rp")
-
-
-def _count_sessions(state: Dict[str, Any], user_dir: Path) -> int:
-    """Count completed sessions from feedback_log + JSONL session logs."""
-    count = len(state.get("feedback_log") or [])
-
-    logs_dir = user_dir / "logs"
-    if not logs_dir.is_dir():
-        return count
-
-    for f in logs_dir.iterdir():
-        if f.name.startswith("sessions_") and f.suffix == ".jsonl":
-            try:
-                count += sum(1 for line in f.read_text(encoding="utf-8").splitlines() if line.strip())
-            except OSError:
-                pass
-    return count
-
-
-def _extract_onboarding_date(state: Dict[str, Any]) -> Optional[str]:
-    """Onboarding date from goal.created_at or macrocycle.start_date."""
-    created = (state.get("goal") or {}).get("created_at")
-    if created:
-        return created[:10]
-
-    mc = state.get("macrocycle") or {}
-    start = mc.get("start_date")
-    if start:
-        return start[:10]
-
-    return (state.get("assessment") or {}).get("last_assessed")
-
-
-def _scan_users() -> List[Dict[str, Any]]:
-    """Scan USERS_DIR and extract summary for each user."""
-    users: List[Dict[str, Any]] = []
-    users_dir = Path(_deps.USERS_DIR)
-    if not users_dir.is_dir():
-        return users
-
-    for entry in sorted(users_dir.iterdir()):
-        if not entry.is_dir():
-            continue
-        state_path = entry / "user_state.json"
-        if not state_path.exists():
-            continue
-        try:
-            state = json.loads(state_path.read_text(encoding="utf-8"))
-        except (json.JSONDecodeError, OSError):
-            continue
-
-        users.append({
-            "uuid": entry.name,
-            "last_access": _extract_last_access(state, state_path),
-            "grade": _extract_grade(state),
-            "sessions_completed": _count_sessions(state, entry),
-            "onboarding_date": _extract_onboarding_date(state),
-        })
-
-    return users
+def _require_admin(request: Request) -> None:
+    """Raise 403 if X-Admin-Key header is missing or wrong."""
+    if not _is_admin(request):
+        raise HTTPException(status_code=403, detail="Forbidden")
 
 
 @router.get("/users")
-def list_users(request: Request):
-    """List all users with summary info. Requires X-Admin-Key header."""
+def list_users(
+    request: Request,
+    limit: int = Query(100, ge=1, le=1000),
+    offset: int = Query(0, ge=0),
+    sort: Literal["uuid", "last_access", "grade", "sessions_completed", "onboarding_date"] = Query("uuid"),
+    order: Literal["asc", "desc"] = Query("asc"),
+    grade: Optional[str] = Query(None),
+    active_since: Optional[str] = Query(None, description="YYYY-MM-DD; last_access on or after"),
+    q: Optional[str] = Query(None, description="Substring of the user uuid"),
+    refresh: bool = Query(False, description="Re-stat every state file before reading"),
+):
+    """List users with summary info, one page at a time. Requires X-Admin-Key header.
+
+    Served from the materialized summary index (see backend/api/user_index.py);
+    ``total`` is the number of users matching the filters.
+    """
+    _require_admin(request)
+    users, total = user_index.query(
+        limit=limit,
+        offset=offset,
+        sort=sort,
+        order=order,
+        grade=grade,
+        active_since=active_since,
+        q=q,
+        refresh=refresh,
+    )
+    return {"users": users, "total": total, "limit": limit, "offset": offset}
+
+
+@router.post("/users/rebuild-index")
+def rebuild_user_index(request: Request):
+    """Re-parse every user into the summary index. Requires X-Admin-Key header.
+
+    Returns how many rows were added, updated (differed from disk) or removed.
+    """
+    _require_admin(request)
+    return user_index.rebuild()
+
+
+@router.get("/users/stream")
+def stream_users(request: Request, workers: int = Query(bulk.DEFAULT_WORKERS, ge=1, le=32)):
+    """Scan every user in parallel, streamed as NDJSON. Requires X-Admin-Key header.
+
+    One ``{"type": "user", ...}`` line per user (uuid order) with validation
+    errors and a short summary, then a final ``{"type": "done", ...}`` line.
+    """
+    _require_admin(request)
+    lines = (json_codec.dumps_line(record) + "\n" for record in bulk.scan(workers))
+    return StreamingResponse(lines, media_type="application/x-ndjson")
+
+
+@router.post("/users/bulk")
+def bulk_action(req: BulkActionRequest, request: Request):
+    """Queue a bulk action over every (or the listed) user. Requires X-Admin-Key header.
+
+    Returns a task id; poll GET /api/admin/tasks/{task_id} for progress and
+    the final counts.
+    """
+    _require_admin(request)
+    task_id = bulk.submit_action(req.action, req.user_ids, req.dry_run)
+    return {"task_id": task_id, "action": req.action, "dry_run": req.dry_run}
+
+
+@router.get("/tasks/{task_id}")
+def get_admin_task(task_id: str, request: Request):
+    """Status, progress and result of a bulk task. Requires X-Admin-Key header."""
     _require_admin(request)
-    users = _scan_users()
-    return {"users": users, "total": len(users)}
+    record = task_queue.get(task_id)
+    if record is None or record["key"] != bulk.ADMIN_TASK_KEY:
+        raise HTTPException(status_code=404, detail=f"Unknown task: {task_id}")
+    return record
 
 
 @router.delete("/users/{uuid}")
@@ -136,4 +118,46 @@ def delete_user(uuid: str, request: Request):
     if not user_dir.is_dir():
         raise HTTPException(status_code=404, detail=f"User {uuid} not found")
     shutil.rmtree(user_dir)
+    user_index.forget(uuid)
     return {"status": "deleted", "uuid": uuid}
+
+
+@router.get("/profiles")
+def list_profiles(request: Request):
+    """List stored request profiles (newest first). Requires X-Admin-Key header.
+
+    Profiles are recorded by sending X-Profile: 1 with an admin key on any
+    API request.
+    """
+    _require_admin(request)
+    profiles = profiling.list_profiles()
+    return {"profiles": profiles, "total": len(profiles)}
+
+
+@router.get("/profiles/{profile_id}", response_class=PlainTextResponse)
+def get_profile_summary(profile_id: str, request: Request):
+    """Top-N cumulative-time summary of one profile. Requires X-Admin-Key header."""
+    _require_admin(request)
+    summary = profiling.read_summary(profile_id)
+    if summary is None:
+        raise HTTPException(status_code=404, detail=f"Profile {profile_id} not found")
+    return PlainTextResponse(summary)
+
+
+@router.get("/trace-stats")
+def get_trace_stats(request: Request):
+    """Per-span timing table aggregated over traced requests. Requires X-Admin-Key header.
+
+    Requests are traced by sending X-Trace: 1 with an admin key; spans are
+    sorted by total time, with self time excluding child spans.
+    """
+    _require_admin(request)
+    return tracing.timing_table()
+
+
+@router.delete("/trace-stats")
+def reset_trace_stats(request: Request):
+    """Clear the aggregated timing table. Requires X-Admin-Key header."""
+    _require_admin(request)
+    tracing.reset_timing_table()
+    return {"status": "reset"}
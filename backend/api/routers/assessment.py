@@ -6,14 +6,16 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from backend.api.deps import get_user_id, load_state, save_state
+from backend.api.deps import get_user_id, load_state, locked_state, save_state
 from backend.api.models import AssessmentRequest
+from backend.api.profiling import InstrumentedRoute
 from backend.engine.assessment_v1 import compute_assessment_profile
 
-router = APIRouter(prefix="/api/assessment", tags=["assessment"])
+router = APIRouter(prefix="/api/assessment", tags=["assessment"], route_class=InstrumentedRoute)
 
 
 @router.post("/compute")
+@locked_state
 def compute_assessment(req: AssessmentRequest, user_id: Optional[str] = Depends(get_user_id)):
     """Compute 6-axis assessment profile and save into state."""
     state = load_state(user_id)
@@ -2,34 +2,41 @@
 
 from __future__ import annotations
 
-import json
 from pathlib import Path
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Request, Response
 
 from backend.api.deps import REPO_ROOT
+from backend.api.etag import catalog_version, make_etag, not_modified
+from backend.api.profiling import InstrumentedRoute
 from backend.engine.resolve_session import ensure_exercise_list, load_json
 
-router = APIRouter(prefix="/api/catalog", tags=["catalog"])
+router = APIRouter(prefix="/api/catalog", tags=["catalog"], route_class=InstrumentedRoute)
 
 EXERCISES_PATH = REPO_ROOT / "backend" / "catalog" / "exercises" / "v1" / "exercises.json"
 SESSIONS_DIR = REPO_ROOT / "backend" / "catalog" / "sessions" / "v1"
 
 
 @router.get("/exercises")
-def list_exercises():
+def list_exercises(request: Request, response: Response):
     """Return all exercises from the catalog."""
+    cached = not_modified(request, response, make_etag(catalog_version(), "exercises"))
+    if cached is not None:
+        return cached
     raw = load_json(str(EXERCISES_PATH))
     exercises = ensure_exercise_list(raw)
     return {"exercises": exercises, "count": len(exercises)}
 
 
 @router.get("/sessions")
-def list_sessions():
+def list_sessions(request: Request, response: Response):
     """Return all session definitions (id + metadata, not full body)."""
+    cached = not_modified(request, response, make_etag(catalog_version(), "sessions"))
+    if cached is not None:
+        return cached
     sessions = []
     for p in sorted(SESSIONS_DIR.glob("*.json")):
-        data = json.loads(p.read_text(encoding="utf-8"))
+        data = load_json(str(p))
         sessions.append({
             "id": p.stem,
             "name": data.get("session_name") or data.get("name") or p.stem,
@@ -3,12 +3,24 @@
 from __future__ import annotations
 
 from datetime import date as date_type
-from typing import Optional
+from typing import Optional, Tuple
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 
-from backend.api.deps import get_user_id, load_state, save_state
+from backend.api.deps import (
+    ResponseMode,
+    changed_top_level_keys,
+    get_user_id,
+    load_state,
+    locked_state,
+    save_state,
+    state_lock,
+    state_response,
+)
 from backend.api.models import FeedbackRequest
+from backend.api.profiling import InstrumentedRoute
+from backend.api.resolution_cache import resolve_entry
+from backend.api.tasks import task_key, task_queue
 from backend.engine.adaptive_replan import (
     append_feedback_log,
     apply_adaptive_replan,
@@ -18,14 +30,29 @@ from backend.engine.adaptive_replan import (
 from backend.engine.closed_loop_v1 import apply_day_result_to_user_state
 from backend.engine.progression_v1 import apply_feedback, canonical_feedback_label
 from backend.engine.resolve_session import normalize_limitations, _check_exercise_limitation
+from backend.engine.session_history import feedback_exercise_ids, record_exercise_recency
 
-router = APIRouter(prefix="/api/feedback", tags=["feedback"])
+router = APIRouter(prefix="/api/feedback", tags=["feedback"], route_class=InstrumentedRoute)
 
 
 @router.post("")
-def post_feedback(req: FeedbackRequest, user_id: Optional[str] = Depends(get_user_id)):
-    """Apply session feedback: progression updates + closed-loop state changes."""
+@locked_state
+def post_feedback(
+    req: FeedbackRequest,
+    response: ResponseMode = Query("full", description="minimal | changed | full"),
+    user_id: Optional[str] = Depends(get_user_id),
+):
+    """Apply session feedback: progression updates + closed-loop state changes.
+
+    The response is sent once the feedback is saved; adaptive replanning
+    runs afterwards on the user's task queue (``task_id`` in the body, see
+    GET /api/tasks/{task_id}).
+
+    ``response=changed`` returns only the top-level state keys modified by
+    this request; ``response=minimal`` returns the status alone.
+    """
     state = load_state(user_id)
+    loaded = state
 
     # 1. Apply progression feedback (updates working loads)
     try:
@@ -44,27 +71,22 @@ def post_feedback(req: FeedbackRequest, user_id: Optional[str] = Depends(get_use
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Closed-loop update failed: {e}")
 
+    # Steps 1-2 return fresh copies, so diff against the loaded document once
+    # and track the in-place steps below explicitly.
+    dirty_keys = changed_top_level_keys(loaded, state)
+
     # 3. Append to feedback log (B25)
     exercises_by_id = load_exercises_by_id()
     append_feedback_log(state, req.log_entry, req.resolved_day, exercises_by_id)
+    dirty_keys.add("feedback_log")
 
-    # 4. Check adaptive replanning (B25)
-    plan = state.get("current_week_plan")
-    if plan and plan.get("weeks"):
-        current_date = req.log_entry.get("date") or date_type.today().isoformat()
-        feedback_history = state.get("feedback_log", [])
-        result = check_adaptive_replan(plan, feedback_history, current_date)
-        if result["actions"]:
-            updated_plan = apply_adaptive_replan(plan, result["actions"])
-            state["current_week_plan"] = updated_plan
-            # Sync to per-week cache so navigation doesn't lose the change
-            start_key = updated_plan.get("start_date", "")
-            if start_key:
-                if "week_plans" not in state:
-                    state["week_plans"] = {}
-                state["week_plans"][start_key] = updated_plan
-
-    # 5. Limitation severity suggestions (B38)
+    # 3b. Exercise-recency ledger (read by the resolver for variety)
+    if req.status != "skipped":
+        feedback_date = str(req.log_entry.get("date") or date_type.today().isoformat())
+        if record_exercise_recency(state, feedback_date, feedback_exercise_ids(req.log_entry), exercises_by_id):
+            dirty_keys.add("exercise_recency")
+
+    # 4. Limitation severity suggestions (B38)
     limitation_suggestions = []
     limitation_map = normalize_limitations(state)
     if limitation_map:
@@ -86,7 +108,66 @@ def post_feedback(req: FeedbackRequest, user_id: Optional[str] = Depends(get_use
                 })
 
     save_state(state, user_id)
-    response = {"status": "ok", "state": state}
+
+    # 5. Adaptive replan + warm-up run after the response (B25)
+    current_date = req.log_entry.get("date") or date_type.today().isoformat()
+    task_id = task_queue.submit(
+        task_key(user_id), "feedback_followups", run_feedback_followups, user_id, current_date,
+    )
+
+    if response == "full":
+        body = {"status": "ok", "state": state}
+    else:
+        body = state_response(state, dirty_keys, response)
+    body["task_id"] = task_id
     if limitation_suggestions:
-        response["limitation_suggestions"] = limitation_suggestions
-    return response
+        body["limitation_suggestions"] = limitation_suggestions
+    return body
+
+
+def run_feedback_followups(user_id: Optional[str], current_date: str) -> None:
+    """Post-feedback work that the user does not wait for.
+
+    Runs on the per-user task queue, after the feedback itself is saved:
+    adaptive replanning (persisted only when it changes the plan) and
+    pre-resolving the next planned session so the next week/today view hits
+    the resolution cache.
+    """
+    # Same lock as the request handlers: a save here must not drop their updates
+    with state_lock(user_id):
+        state = load_state(user_id)
+
+        plan = state.get("current_week_plan")
+        if plan and plan.get("weeks"):
+            feedback_history = state.get("feedback_log", [])
+            result = check_adaptive_replan(plan, feedback_history, current_date)
+            if result["actions"]:
+                updated_plan = apply_adaptive_replan(plan, result["actions"])
+                state["current_week_plan"] = updated_plan
+                # Sync to per-week cache so navigation doesn't lose the change
+                start_key = updated_plan.get("start_date", "")
+                if start_key:
+                    if "week_plans" not in state:
+                        state["week_plans"] = {}
+                    state["week_plans"][start_key] = updated_plan
+                    # Changed outside the edit log: it no longer replays to this plan
+                    (state.get("plan_logs") or {}).pop(start_key, None)
+                save_state(state, user_id)
+                plan = updated_plan
+
+    if plan and plan.get("weeks"):
+        found = _next_planned_session(plan, current_date)
+        if found is not None:
+            session_date, next_entry = found
+            resolve_entry(next_entry, state, session_date=session_date)
+
+
+def _next_planned_session(plan: dict, after_date: str) -> Optional[Tuple[str, dict]]:
+    """(date, session) of the first not-yet-completed session dated after *after_date*."""
+    for day in plan["weeks"][0].get("days", []):
+        if str(day.get("date") or "") <= after_date:
+            continue
+        for session in day.get("sessions") or []:
+            if session.get("status") not in {"done", "skipped"}:
+                return day["date"], session
+    return None
@@ -12,16 +12,19 @@ from backend.api.deps import (
     get_user_id,
     invalidate_week_cache,
     load_state,
+    locked_state,
     this_monday,
     save_state,
 )
 from backend.api.models import MacrocycleRequest
+from backend.api.profiling import InstrumentedRoute
 from backend.engine.macrocycle_v1 import generate_macrocycle
 
-router = APIRouter(prefix="/api/macrocycle", tags=["macrocycle"])
+router = APIRouter(prefix="/api/macrocycle", tags=["macrocycle"], route_class=InstrumentedRoute)
 
 
 @router.post("/generate")
+@locked_state
 def generate(req: MacrocycleRequest, user_id: Optional[str] = Depends(get_user_id)):
     """Generate a macrocycle and save it into state.
 
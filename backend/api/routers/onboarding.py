@@ -8,13 +8,14 @@ from typing import Any, Dict, Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from backend.api.deps import REPO_ROOT, get_user_id, invalidate_week_cache, load_state, next_monday, this_monday, save_state
+from backend.api.deps import REPO_ROOT, get_user_id, invalidate_week_cache, load_state, locked_state, next_monday, this_monday, save_state
 from backend.api.models import OnboardingData, StartWeekRequest
+from backend.api.profiling import InstrumentedRoute
 from backend.engine.assessment_v1 import GRADE_ORDER, compute_assessment_profile
 from backend.engine.macrocycle_v1 import generate_macrocycle
 from backend.engine.progression_v1 import estimate_missing_baselines
 
-router = APIRouter(prefix="/api/onboarding", tags=["onboarding"])
+router = APIRouter(prefix="/api/onboarding", tags=["onboarding"], route_class=InstrumentedRoute)
 
 # Boulder grades (Fontainebleau)
 BOULDER_GRADE_ORDER = [
@@ -177,6 +178,7 @@ def _build_user_state_from_onboarding(data: OnboardingData) -> Dict[str, Any]:
         "recent_sessions": [],
         "recent_sessions_window_days": 14,
         "stimulus_recency": {},
+        "exercise_recency": [],
         "fatigue_proxy": {},
         "working_loads": {"entries": [], "rules": {}},
         "tests": {},
@@ -207,6 +209,7 @@ def _build_current_level(grades: Dict[str, Any]) -> Dict[str, Any]:
 
 
 @router.post("/complete")
+@locked_state
 def onboarding_complete(data: OnboardingData, user_id: Optional[str] = Depends(get_user_id)):
     """Atomic onboarding: save state + estimate baselines + assessment + macrocycle.
 
@@ -260,6 +263,7 @@ def onboarding_complete(data: OnboardingData, user_id: Optional[str] = Depends(g
 
 
 @router.post("/start-week")
+@locked_state
 def onboarding_start_week(body: StartWeekRequest, user_id: Optional[str] = Depends(get_user_id)):
     """Shift macrocycle start_date back so the user begins at week N."""
     from datetime import datetime, timedelta
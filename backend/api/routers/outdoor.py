@@ -6,18 +6,20 @@ import os
 import uuid
 from typing import Any, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 
-from backend.api.deps import DATA_DIR, USERS_DIR, get_user_id, load_state, save_state
+from backend.api.deps import DATA_DIR, USERS_DIR, get_user_id, load_state, locked_state, save_state
+from backend.api.etag import log_version, make_etag, not_modified, state_version
 from backend.api.models import OutdoorSpotCreate, OutdoorSessionLog, ConvertSlotRequest
+from backend.api.profiling import InstrumentedRoute
+from backend.engine.assessment_v1 import GRADE_ORDER
 from backend.engine.outdoor_log import (
     append_outdoor_session,
-    compute_outdoor_load_score,
-    compute_outdoor_stats,
-    load_outdoor_sessions,
+    list_outdoor_sessions,
+    outdoor_stats,
 )
 
-router = APIRouter(prefix="/api/outdoor", tags=["outdoor"])
+router = APIRouter(prefix="/api/outdoor", tags=["outdoor"], route_class=InstrumentedRoute)
 
 _FALLBACK_LOG_DIR = str(DATA_DIR / "logs")
 
@@ -34,13 +36,17 @@ def _log_dir(user_id: Optional[str]) -> str:
 # ── Spots CRUD ──────────────────────────────────────────────────────────
 
 @router.get("/spots")
-def get_outdoor_spots(user_id: Optional[str] = Depends(get_user_id)):
+def get_outdoor_spots(request: Request, response: Response, user_id: Optional[str] = Depends(get_user_id)):
     """Return all saved outdoor climbing spots."""
+    cached = not_modified(request, response, make_etag(state_version(user_id), "spots"))
+    if cached is not None:
+        return cached
     state = load_state(user_id)
     return {"spots": state.get("outdoor_spots", [])}
 
 
 @router.post("/spots")
+@locked_state
 def add_outdoor_spot(req: OutdoorSpotCreate, user_id: Optional[str] = Depends(get_user_id)):
     """Add a new outdoor spot to user state."""
     state = load_state(user_id)
@@ -68,6 +74,7 @@ def add_outdoor_spot(req: OutdoorSpotCreate, user_id: Optional[str] = Depends(ge
 
 
 @router.delete("/spots/{spot_id}")
+@locked_state
 def delete_outdoor_spot(spot_id: str, user_id: Optional[str] = Depends(get_user_id)):
     """Remove an outdoor spot by id."""
     state = load_state(user_id)
@@ -112,21 +119,62 @@ def post_outdoor_log(req: OutdoorSessionLog, user_id: Optional[str] = Depends(ge
 
 
 @router.get("/sessions")
-def get_outdoor_sessions(since: Optional[str] = Query(None), user_id: Optional[str] = Depends(get_user_id)):
-    """List outdoor sessions, optionally filtered by date."""
-    sessions = load_outdoor_sessions(_log_dir(user_id), since_date=since)
-    # Enrich each session with its load score
-    for s in sessions:
-        s["load_score"] = compute_outdoor_load_score(s)
-    return {"sessions": sessions, "count": len(sessions)}
+def get_outdoor_sessions(
+    request: Request,
+    response: Response,
+    since: Optional[str] = Query(None),
+    until: Optional[str] = Query(None),
+    spot_id: Optional[str] = Query(None),
+    discipline: Optional[str] = Query(None),
+    grade_min: Optional[str] = Query(None),
+    grade_max: Optional[str] = Query(None),
+    cursor: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    user_id: Optional[str] = Depends(get_user_id),
+):
+    """List outdoor sessions in date order, filtered and optionally paginated.
+
+    Without ``limit`` every matching session is returned. With it, pass the
+    returned ``next_cursor`` as ``cursor`` to fetch the following page.
+    """
+    for grade in (grade_min, grade_max):
+        if grade and grade not in GRADE_ORDER:
+            raise HTTPException(status_code=422, detail=f"Unknown grade: {grade}")
+    log_dir = _log_dir(user_id)
+    params = (since, until, spot_id, discipline, grade_min, grade_max, cursor, limit)
+    cached = not_modified(request, response, make_etag(log_version(log_dir), "sessions", *map(str, params)))
+    if cached is not None:
+        return cached
+    try:
+        sessions, next_cursor = list_outdoor_sessions(
+            log_dir,
+            since_date=since,
+            until_date=until,
+            spot_id=spot_id,
+            discipline=discipline,
+            grade_min=grade_min,
+            grade_max=grade_max,
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"sessions": sessions, "count": len(sessions), "next_cursor": next_cursor}
 
 
 @router.get("/stats")
-def get_outdoor_stats(since: Optional[str] = Query(None), user_id: Optional[str] = Depends(get_user_id)):
+def get_outdoor_stats(
+    request: Request,
+    response: Response,
+    since: Optional[str] = Query(None),
+    user_id: Optional[str] = Depends(get_user_id),
+):
     """Get aggregated outdoor climbing statistics."""
-    sessions = load_outdoor_sessions(_log_dir(user_id), since_date=since)
-    stats = compute_outdoor_stats(sessions)
-    return stats
+    log_dir = _log_dir(user_id)
+    cached = not_modified(request, response, make_etag(log_version(log_dir), "stats", str(since)))
+    if cached is not None:
+        return cached
+    return outdoor_stats(log_dir, since_date=since)
 
 
 # ── Slot conversion ─────────────────────────────────────────────────────
@@ -6,25 +6,24 @@ from typing import Optional
 
 from fastapi import APIRouter, Depends, Query
 
-from backend.api.deps import get_user_id, load_state, save_state
-from backend.engine.quotes_engine import get_quote_for_session, update_quote_history
+from backend.api.deps import append_side_log, get_user_id, load_state
+from backend.api.profiling import InstrumentedRoute
+from backend.engine.quotes_engine import next_quote
 
-router = APIRouter(prefix="/api/quotes", tags=["quotes"])
+router = APIRouter(prefix="/api/quotes", tags=["quotes"], route_class=InstrumentedRoute)
 
 
 @router.get("/daily")
 def get_daily_quote(context: str = Query("general", description="Quote context tag"), user_id: Optional[str] = Depends(get_user_id)):
-    """Get a motivational quote for the given context."""
-    state = load_state(user_id)
-    recent_ids = state.get("quote_history", [])
+    """Get a motivational quote for the given context.
 
-    quote = get_quote_for_session(
-        context=context,
-        recent_quote_ids=recent_ids,
-    )
+    Quotes rotate through the context's pool; the cursor advance is recorded
+    in the user's side log, not by rewriting the state (see
+    backend/api/side_log.py).
+    """
+    state = load_state(user_id)
+    quote, pool_key = next_quote(context, state.get("quote_cursors"))
 
-    # Update history
-    update_quote_history(state, quote["id"])
-    save_state(state, user_id)
+    append_side_log(user_id, "quote_advance", pool_key)
 
     return quote
@@ -2,43 +2,43 @@
 
 from __future__ import annotations
 
-import json
-import os
-from copy import deepcopy
-from typing import Optional
+from typing import Optional, Tuple
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from backend.api.deps import DATA_DIR, REPO_ROOT, USERS_DIR, current_phase_and_week, get_user_id, load_state, save_state
-from backend.api.models import EventsRequest, OverrideRequest, QuickAddRequest
-from backend.engine.outdoor_log import compute_outdoor_load_score, load_outdoor_sessions, remove_outdoor_session
-from backend.engine.replanner_v1 import apply_day_add, apply_day_override, apply_events, suggest_sessions
-from backend.engine.resolve_session import resolve_session
+from backend.api.deps import DATA_DIR, USERS_DIR, current_phase_and_week, get_user_id, load_state, locked_state, save_state
+from backend.api.models import EventsRequest, OverrideRequest, QuickAddRequest, UndoRequest
+from backend.api.profiling import InstrumentedRoute
+from backend.api.resolution_cache import resolve_entry, state_fingerprint
+from backend.api.tasks import task_key, task_queue
+from backend.engine import plan_log
+from backend.engine.outdoor_log import (
+    compact_outdoor_log,
+    compute_outdoor_load_score,
+    latest_outdoor_session,
+    remove_outdoor_session,
+)
+from backend.engine.replanner_v1 import suggest_sessions
+from backend.engine.session_meta import SESSION_META, required_equipment
 
-router = APIRouter(prefix="/api/replanner", tags=["replanner"])
-
-SESSIONS_DIR = "backend/catalog/sessions/v1"
-TEMPLATES_DIR = "backend/catalog/templates/v1"
-EXERCISES_PATH = "backend/catalog/exercises/v1/exercises.json"
+router = APIRouter(prefix="/api/replanner", tags=["replanner"], route_class=InstrumentedRoute)
 
 
 def _session_display_name(session_id: str) -> str:
-    """Return the human-readable name for a session, reading from its JSON file."""
-    path = REPO_ROOT / SESSIONS_DIR / f"{session_id}.json"
-    if path.exists():
-        try:
-            data = json.loads(path.read_text(encoding="utf-8"))
-            name = data.get("session_name") or data.get("name")
-            if name:
-                return name
-        except Exception:
-            pass
+    """Return the human-readable name of a catalog session."""
+    meta = SESSION_META.get(session_id)
+    if meta is not None:
+        return meta["name"]
     # Fallback: format session_id as title
     return session_id.replace("_", " ").title()
 
 
-def _persist_week_plan(updated: dict, state: dict, user_id) -> None:
-    """Save modified plan to per-week cache and (if current) to legacy cache."""
+def _persist_week_plan(updated: dict, state: dict, user_id, log: Optional[dict] = None) -> None:
+    """Save modified plan to per-week cache and (if current) to legacy cache.
+
+    *log* is the plan's edit log (see plan_log). Edits saved without one are
+    not replayable, so the week's log is dropped.
+    """
     start_key = updated.get("start_date", "")
     if not start_key:
         return
@@ -46,6 +46,10 @@ def _persist_week_plan(updated: dict, state: dict, user_id) -> None:
     if "week_plans" not in state:
         state["week_plans"] = {}
     state["week_plans"][start_key] = updated
+    if log is not None:
+        state.setdefault("plan_logs", {})[start_key] = log
+    else:
+        (state.get("plan_logs") or {}).pop(start_key, None)
 
     # Also update legacy current_week_plan if this IS the current week
     macrocycle = state.get("macrocycle")
@@ -64,73 +68,82 @@ def _persist_week_plan(updated: dict, state: dict, user_id) -> None:
     save_state(state, user_id)
 
 
+def _stored_week(state: dict, start_date: Optional[str]) -> Optional[dict]:
+    """Stored plan of the week starting *start_date* (default: current week)."""
+    if not start_date:
+        return state.get("current_week_plan")
+    plan = (state.get("week_plans") or {}).get(start_date)
+    if plan is None:
+        current = state.get("current_week_plan")
+        if current and current.get("start_date") == start_date:
+            plan = current
+    return plan
+
+
+def _editable_week(week_plan: Optional[dict], start_date: Optional[str], state: dict) -> Tuple[dict, dict]:
+    """Plan an edit applies to, and the log that records it.
+
+    A plan sent by the client is edited as sent; when it is not the version
+    the stored log ends at (the week was regenerated or edited elsewhere) the
+    log restarts from it. Without one, the stored week is edited.
+    """
+    plan = week_plan or _stored_week(state, start_date)
+    if not plan:
+        raise HTTPException(
+            status_code=422,
+            detail="week_plan is required — generate one from GET /api/week/{week_num} first",
+        )
+    log = (state.get("plan_logs") or {}).get(plan.get("start_date", ""))
+    if log is None or not plan_log.is_head(log, plan):
+        log = plan_log.start(plan)
+    return plan, log
+
+
 def _auto_resolve(week_plan: dict, state: dict) -> None:
     """Resolve all sessions in a week plan inline (same logic as week router)."""
+    fingerprint = state_fingerprint(state)
     for week_block in week_plan.get("weeks", []):
         for day_entry in week_block.get("days", []):
             for session_entry in day_entry.get("sessions", []):
-                session_id = session_entry.get("session_id", "")
-                session_path = os.path.join(SESSIONS_DIR, f"{session_id}.json")
-                full_path = REPO_ROOT / session_path
-                if not full_path.exists():
-                    session_entry["resolved"] = None
+                if session_entry.get("status") in ("done", "skipped") and session_entry.get("resolved"):
                     continue
                 try:
-                    resolve_state = deepcopy(state)
-                    resolve_state["context"] = {
-                        **resolve_state.get("context", {}),
-                        "location": session_entry.get("location", "home"),
-                        "gym_id": session_entry.get("gym_id"),
-                    }
-                    resolved = resolve_session(
-                        repo_root=str(REPO_ROOT),
-                        session_path=session_path,
-                        templates_dir=TEMPLATES_DIR,
-                        exercises_path=EXERCISES_PATH,
-                        out_path="",
-                        user_state_override=resolve_state,
-                        write_output=False,
+                    session_entry["resolved"] = resolve_entry(
+                        session_entry, state, fingerprint, day_entry.get("date"),
                     )
-                    session_entry["resolved"] = resolved
                 except Exception:
                     session_entry["resolved"] = None
 
 
 @router.post("/override")
+@locked_state
 def override(req: OverrideRequest, user_id: Optional[str] = Depends(get_user_id)):
     """Apply a day override (change a day's session by intent)."""
     state = load_state(user_id)
-
-    week_plan = req.week_plan
-    if not week_plan:
-        raise HTTPException(
-            status_code=422,
-            detail="week_plan is required — generate one from GET /api/week/{week_num} first",
-        )
+    week_plan, log = _editable_week(req.week_plan, req.start_date, state)
 
     # B96: pass gyms so override can check equipment compatibility
     equipment = state.get("equipment", {})
     gyms = equipment.get("gyms", [])
 
     try:
-        updated = apply_day_override(
-            week_plan,
-            intent=req.intent,
-            location=req.location,
-            reference_date=req.reference_date,
-            slot=req.slot,
-            phase_id=req.phase_id,
-            target_date=req.target_date,
-            gym_id=req.gym_id,
-            gyms=gyms,
-            session_index=req.session_index,
-        )
+        updated, _ = plan_log.append(log, week_plan, "override", {
+            "intent": req.intent,
+            "location": req.location,
+            "reference_date": req.reference_date,
+            "slot": req.slot,
+            "phase_id": req.phase_id,
+            "target_date": req.target_date,
+            "gym_id": req.gym_id,
+            "gyms": gyms,
+            "session_index": req.session_index,
+        })
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Override failed: {e}")
 
-    _persist_week_plan(updated, state, user_id)
+    _persist_week_plan(updated, state, user_id, log)
 
     # Auto-resolve all sessions so the frontend gets exercises inline
     _auto_resolve(updated, state)
@@ -171,47 +184,33 @@ def get_suggestions(target_date: str, location: str = "gym", user_id: Optional[s
     # Enrich suggestions with human-readable names and equipment info
     for s in suggestions:
         s["session_name"] = _session_display_name(s["session_id"])
-        path = REPO_ROOT / SESSIONS_DIR / f"{s['session_id']}.json"
-        if path.exists():
-            try:
-                data = json.loads(path.read_text(encoding="utf-8"))
-                s["required_equipment"] = data.get("required_equipment", [])
-            except Exception:
-                s["required_equipment"] = []
-        else:
-            s["required_equipment"] = []
+        s["required_equipment"] = list(required_equipment(s["session_id"]))
 
     return {"suggestions": suggestions}
 
 
 @router.post("/quick-add")
+@locked_state
 def quick_add(req: QuickAddRequest, user_id: Optional[str] = Depends(get_user_id)):
     """Add an extra session to a day without replacing existing ones."""
     state = load_state(user_id)
-
-    week_plan = req.week_plan
-    if not week_plan:
-        raise HTTPException(
-            status_code=422,
-            detail="week_plan is required — generate one from GET /api/week/{week_num} first",
-        )
+    week_plan, log = _editable_week(req.week_plan, req.start_date, state)
 
     try:
-        updated, warnings = apply_day_add(
-            week_plan,
-            session_id=req.session_id,
-            target_date=req.target_date,
-            slot=req.slot,
-            location=req.location,
-            phase_id=req.phase_id,
-            gym_id=req.gym_id,
-        )
+        updated, warnings = plan_log.append(log, week_plan, "quick_add", {
+            "session_id": req.session_id,
+            "target_date": req.target_date,
+            "slot": req.slot,
+            "location": req.location,
+            "phase_id": req.phase_id,
+            "gym_id": req.gym_id,
+        })
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Quick-add failed: {e}")
 
-    _persist_week_plan(updated, state, user_id)
+    _persist_week_plan(updated, state, user_id, log)
 
     _auto_resolve(updated, state)
 
@@ -219,16 +218,11 @@ def quick_add(req: QuickAddRequest, user_id: Optional[str] = Depends(get_user_id
 
 
 @router.post("/events")
+@locked_state
 def events(req: EventsRequest, user_id: Optional[str] = Depends(get_user_id)):
     """Apply a list of events (move, mark_done, mark_skipped, etc.) to a week plan."""
     state = load_state(user_id)
-
-    week_plan = req.week_plan
-    if not week_plan:
-        raise HTTPException(
-            status_code=422,
-            detail="week_plan is required — generate one from GET /api/week/{week_num} first",
-        )
+    week_plan, log = _editable_week(req.week_plan, req.start_date, state)
 
     availability = state.get("availability")
     planning_prefs = state.get("planning_prefs")
@@ -238,34 +232,74 @@ def events(req: EventsRequest, user_id: Optional[str] = Depends(get_user_id)):
     log_dir = str(USERS_DIR / user_id / "logs") if user_id else str(DATA_DIR / "logs")
     for ev in req.events:
         if ev.get("event_type") == "complete_outdoor" and ev.get("date"):
-            outdoor_sessions = load_outdoor_sessions(log_dir, since_date=ev["date"])
-            matching = [s for s in outdoor_sessions if s.get("date") == ev["date"]]
-            if matching:
-                ev["outdoor_load_score"] = compute_outdoor_load_score(matching[-1])
+            latest = latest_outdoor_session(log_dir, ev["date"])
+            if latest is not None:
+                ev["outdoor_load_score"] = latest.get("load_score") or compute_outdoor_load_score(latest)
 
     try:
-        updated = apply_events(
-            week_plan,
-            req.events,
-            availability=availability,
-            planning_prefs=planning_prefs,
-            gyms=gyms,
-        )
+        updated, _ = plan_log.append(log, week_plan, "events", {
+            "events": req.events,
+            "availability": availability,
+            "planning_prefs": planning_prefs,
+            "gyms": gyms,
+        })
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Events application failed: {e}")
 
-    # Remove outdoor log entries for any undo_outdoor events so re-logging
-    # doesn't produce duplicates.
+    # Tombstone outdoor log entries for any undo_outdoor events so re-logging
+    # doesn't produce duplicates; the log is compacted in the background.
     log_dir = str(USERS_DIR / user_id / "logs") if user_id else str(DATA_DIR / "logs")
+    tombstoned = 0
     for ev in req.events:
         if ev.get("event_type") == "undo_outdoor" and ev.get("date"):
-            remove_outdoor_session(log_dir, ev["date"])
+            tombstoned += remove_outdoor_session(log_dir, ev["date"])
+    if tombstoned:
+        task_queue.submit(task_key(user_id), "outdoor_compaction", compact_outdoor_log, log_dir)
 
-    _persist_week_plan(updated, state, user_id)
+    _persist_week_plan(updated, state, user_id, log)
 
     # Auto-resolve all sessions so the frontend gets exercises inline
     _auto_resolve(updated, state)
 
     return {"week_plan": updated}
+
+
+@router.get("/history")
+def history(start_date: Optional[str] = None, user_id: Optional[str] = Depends(get_user_id)):
+    """Recorded edits of a stored week (default: current week), oldest first."""
+    state = load_state(user_id)
+    plan = _stored_week(state, start_date)
+    if not plan:
+        raise HTTPException(status_code=422, detail="No stored plan for this week")
+    log = (state.get("plan_logs") or {}).get(plan.get("start_date", ""))
+    head = log is not None and plan_log.is_head(log, plan)
+    return {
+        "start_date": plan.get("start_date"),
+        "plan_revision": plan.get("plan_revision"),
+        "entries": plan_log.history(log) if head else [],
+        "can_undo": head and plan_log.can_undo(log),
+    }
+
+
+@router.post("/undo")
+@locked_state
+def undo(req: UndoRequest, user_id: Optional[str] = Depends(get_user_id)):
+    """Undo the last recorded edit of a stored week (default: current week)."""
+    state = load_state(user_id)
+    plan = _stored_week(state, req.start_date)
+    log = (state.get("plan_logs") or {}).get((plan or {}).get("start_date", ""))
+    if not plan or log is None or not plan_log.is_head(log, plan):
+        raise HTTPException(status_code=422, detail="No recorded edits to undo for this week")
+
+    try:
+        updated = plan_log.undo(log)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    _persist_week_plan(updated, state, user_id, log)
+
+    _auto_resolve(updated, state)
+
+    return {"week_plan": updated}
@@ -5,12 +5,14 @@ from __future__ import annotations
 import os
 from typing import Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, Query, Request, Response
 
 from backend.api.deps import DATA_DIR, USERS_DIR, get_user_id, load_state
+from backend.api.etag import log_version, make_etag, not_modified, state_version
+from backend.api.profiling import InstrumentedRoute
 from backend.engine.report_engine import generate_monthly_report, generate_weekly_report
 
-router = APIRouter(prefix="/api/reports", tags=["reports"])
+router = APIRouter(prefix="/api/reports", tags=["reports"], route_class=InstrumentedRoute)
 
 _FALLBACK_LOG_DIR = str(DATA_DIR / "logs")
 
@@ -25,16 +27,36 @@ def _log_dir(user_id: Optional[str]) -> str:
 
 
 @router.get("/weekly")
-def get_weekly_report(week_start: str = Query(..., description="YYYY-MM-DD Monday"), user_id: Optional[str] = Depends(get_user_id)):
+def get_weekly_report(
+    request: Request,
+    response: Response,
+    week_start: str = Query(..., description="YYYY-MM-DD Monday"),
+    user_id: Optional[str] = Depends(get_user_id),
+):
     """Generate a weekly training report."""
+    log_dir = _log_dir(user_id)
+    etag = make_etag(state_version(user_id), log_version(log_dir), "weekly", week_start)
+    cached = not_modified(request, response, etag)
+    if cached is not None:
+        return cached
     state = load_state(user_id)
-    report = generate_weekly_report(state, _log_dir(user_id), week_start)
+    report = generate_weekly_report(state, log_dir, week_start)
     return report
 
 
 @router.get("/monthly")
-def get_monthly_report(month: str = Query(..., description="YYYY-MM"), user_id: Optional[str] = Depends(get_user_id)):
+def get_monthly_report(
+    request: Request,
+    response: Response,
+    month: str = Query(..., description="YYYY-MM"),
+    user_id: Optional[str] = Depends(get_user_id),
+):
     """Generate a monthly training report."""
+    log_dir = _log_dir(user_id)
+    etag = make_etag(state_version(user_id), log_version(log_dir), "monthly", month)
+    cached = not_modified(request, response, etag)
+    if cached is not None:
+        return cached
     state = load_state(user_id)
-    report = generate_monthly_report(state, _log_dir(user_id), month)
+    report = generate_monthly_report(state, log_dir, month)
     return report
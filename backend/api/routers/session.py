@@ -2,18 +2,18 @@
 
 from __future__ import annotations
 
-import json
 import os
 from copy import deepcopy
 from typing import Optional
 
 from fastapi import APIRouter, Depends, HTTPException
 
-from backend.api.deps import DATA_DIR, REPO_ROOT, USERS_DIR, get_user_id, load_state, save_state
+from backend.api.deps import DATA_DIR, REPO_ROOT, USERS_DIR, get_user_id, load_state, locked_state, save_state
 from backend.api.models import AddExerciseRequest, SessionResolveRequest
-from backend.engine.resolve_session import resolve_session
+from backend.api.profiling import InstrumentedRoute
+from backend.engine.resolve_session import load_json, resolve_session
 
-router = APIRouter(prefix="/api/session", tags=["session"])
+router = APIRouter(prefix="/api/session", tags=["session"], route_class=InstrumentedRoute)
 
 SESSIONS_DIR = "backend/catalog/sessions/v1"
 TEMPLATES_DIR = "backend/catalog/templates/v1"
@@ -22,9 +22,7 @@ EXERCISES_PATH = "backend/catalog/exercises/v1/exercises.json"
 
 def _load_exercises_catalog() -> dict:
     """Load the full exercises catalog and return {id: exercise_dict}."""
-    path = REPO_ROOT / EXERCISES_PATH
-    with open(path, encoding="utf-8") as f:
-        data = json.load(f)
+    data = load_json(str(REPO_ROOT / EXERCISES_PATH))
     return {e["id"]: e for e in data.get("exercises", [])}
 
 
@@ -64,6 +62,7 @@ def resolve(req: SessionResolveRequest, user_id: Optional[str] = Depends(get_use
 
 
 @router.post("/add-exercise")
+@locked_state
 def add_exercise(req: AddExerciseRequest, user_id: Optional[str] = Depends(get_user_id)):
     """Add an exercise to an already-resolved session in the week plan."""
     state = load_state(user_id)
@@ -7,12 +7,26 @@ import os
 from copy import deepcopy
 from typing import Any, Dict, Optional
 
-from fastapi import APIRouter, Depends
-
-from backend.api.deps import DATA_DIR, EMPTY_TEMPLATE, USERS_DIR, get_user_id, load_state, save_state
+from fastapi import APIRouter, Depends, Query, Request, Response
+
+from backend.api.deps import (
+    DATA_DIR,
+    EMPTY_TEMPLATE,
+    USERS_DIR,
+    ResponseMode,
+    changed_top_level_keys,
+    clear_side_log,
+    get_user_id,
+    load_state,
+    locked_state,
+    save_state,
+    state_response,
+)
+from backend.api.etag import make_etag, not_modified, set_etag, state_version
+from backend.api.profiling import InstrumentedRoute
 from backend.engine.state_checks import is_macrocycle_stale
 
-router = APIRouter(prefix="/api/state", tags=["state"])
+router = APIRouter(prefix="/api/state", tags=["state"], route_class=InstrumentedRoute)
 
 
 def _deep_merge(base: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
@@ -26,18 +40,38 @@ def _deep_merge(base: Dict[str, Any], patch: Dict[str, Any]) -> Dict[str, Any]:
 
 
 @router.get("")
-def get_state(user_id: Optional[str] = Depends(get_user_id)):
-    """Return the full user_state.json."""
-    return load_state(user_id)
+def get_state(request: Request, response: Response, user_id: Optional[str] = Depends(get_user_id)):
+    """Return the full user_state.json (304 when the client copy is current)."""
+    cached = not_modified(request, response, make_etag(state_version(user_id)))
+    if cached is not None:
+        return cached
+    state = load_state(user_id)
+    # Loading may bootstrap or migrate the file; tag the version actually served
+    set_etag(response, make_etag(state_version(user_id)))
+    return state
 
 
 @router.put("")
-def put_state(patch: Dict[str, Any], user_id: Optional[str] = Depends(get_user_id)):
-    """Deep-merge patch into existing state."""
+@locked_state
+def put_state(
+    patch: Dict[str, Any],
+    response: ResponseMode = Query("full", description="minimal | changed | full"),
+    user_id: Optional[str] = Depends(get_user_id),
+):
+    """Deep-merge patch into existing state.
+
+    ``response=full`` (default) returns the merged state; ``changed`` returns
+    only the patched top-level keys that actually changed; ``minimal`` returns
+    the status alone.
+    """
     state = load_state(user_id)
+    before = {k: deepcopy(state[k]) for k in patch if k in state} if response == "changed" else {}
     _deep_merge(state, patch)
     save_state(state, user_id)
-    return state
+    if response == "full":
+        return state
+    after = {k: state[k] for k in patch}
+    return state_response(state, changed_top_level_keys(before, after), response)
 
 
 @router.get("/status")
@@ -61,9 +95,11 @@ def _clear_outdoor_logs(user_id: Optional[str]) -> int:
 
 
 @router.delete("")
+@locked_state
 def delete_state(user_id: Optional[str] = Depends(get_user_id)):
     """Reset state to minimal empty template and clear outdoor logs."""
     state = deepcopy(EMPTY_TEMPLATE)
+    clear_side_log(user_id)
     save_state(state, user_id)
     _clear_outdoor_logs(user_id)
     return {"status": "reset", "state": state}
@@ -0,0 +1,29 @@
+"""Tasks router — status of background work queued by other endpoints."""
+
+from __future__ import annotations
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+
+from backend.api.deps import get_user_id
+from backend.api.profiling import InstrumentedRoute
+from backend.api.tasks import task_key, task_queue
+
+router = APIRouter(prefix="/api/tasks", tags=["tasks"], route_class=InstrumentedRoute)
+
+
+@router.get("")
+def list_tasks(user_id: Optional[str] = Depends(get_user_id)):
+    """Recent background tasks for the caller, oldest first."""
+    key = task_key(user_id)
+    return {"tasks": task_queue.list_for(key), "idle": task_queue.is_idle(key)}
+
+
+@router.get("/{task_id}")
+def get_task(task_id: str, user_id: Optional[str] = Depends(get_user_id)):
+    """Status of one background task (queued | running | done | failed)."""
+    record = task_queue.get(task_id)
+    if record is None or record["key"] != task_key(user_id):
+        raise HTTPException(status_code=404, detail=f"Unknown task: {task_id}")
+    return record
@@ -4,7 +4,6 @@ from __future__ import annotations
 
 import json
 import os
-import random
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
@@ -14,42 +13,25 @@ from fastapi.responses import Response
 from backend.api.deps import (
     DATA_DIR,
     USERS_DIR,
+    clear_side_log,
     get_user_id,
     load_state,
+    locked_state,
     save_state,
 )
+from backend.api.profiling import InstrumentedRoute
+from backend.api.recovery_codes import RecoveryCodeStore, store_for
 
 # ── Recovery code helpers ───────────────────────────────────────────────
 
-_ALPHABET = "23456789ABCDEFGHJKLMNPQRSTUVWXYZ"  # no 0/O/1/I/L
 _CODES_PATH = DATA_DIR / "recovery_codes.json"
 
 
-def _load_codes() -> Dict[str, Any]:
-    if _CODES_PATH.exists():
-        return json.loads(_CODES_PATH.read_text(encoding="utf-8"))
-    return {}
+def _codes() -> RecoveryCodeStore:
+    return store_for(_CODES_PATH)
 
 
-def _save_codes(codes: Dict[str, Any]) -> None:
-    _CODES_PATH.parent.mkdir(parents=True, exist_ok=True)
-    _CODES_PATH.write_text(
-        json.dumps(codes, ensure_ascii=False, indent=2) + "\n",
-        encoding="utf-8",
-    )
-
-
-def _generate_code(codes: Dict[str, Any]) -> str:
-    """Generate a unique CLIMB-XXXX-XXXX code not already in *codes*."""
-    for _ in range(100):
-        part1 = "".join(random.choices(_ALPHABET, k=4))
-        part2 = "".join(random.choices(_ALPHABET, k=4))
-        code = f"CLIMB-{part1}-{part2}"
-        if code not in codes:
-            return code
-    raise RuntimeError("Could not generate unique recovery code")
-
-router = APIRouter(prefix="/api/user", tags=["user"])
+router = APIRouter(prefix="/api/user", tags=["user"], route_class=InstrumentedRoute)
 
 # ── Required top-level keys in a valid user_state ──────────────────────
 
@@ -114,6 +96,7 @@ def export_state(user_id: Optional[str] = Depends(get_user_id)):
 
 
 @router.post("/import")
+@locked_state
 def import_state(
     body: Dict[str, Any],
     user_id: Optional[str] = Depends(get_user_id),
@@ -124,6 +107,7 @@ def import_state(
     except ValueError as e:
         raise HTTPException(status_code=422, detail=str(e))
 
+    clear_side_log(user_id)
     save_state(body, user_id)
     _append_import_event(user_id)
     return {"status": "imported"}
@@ -140,21 +124,7 @@ def get_or_create_recovery_code(
     if not user_id:
         raise HTTPException(status_code=400, detail="X-User-ID header required")
 
-    codes = _load_codes()
-
-    # Check if this UUID already has a code
-    for code, info in codes.items():
-        if info.get("uuid") == user_id:
-            return {"recovery_code": code}
-
-    # Generate new code
-    code = _generate_code(codes)
-    codes[code] = {
-        "uuid": user_id,
-        "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%d"),
-    }
-    _save_codes(codes)
-    return {"recovery_code": code}
+    return {"recovery_code": _codes().get_or_create(user_id)}
 
 
 @router.post("/recover")
@@ -168,9 +138,8 @@ def recover_account(body: Dict[str, Any]):
     if not code:
         raise HTTPException(status_code=400, detail="recovery_code required")
 
-    codes = _load_codes()
-    info = codes.get(code)
-    if not info:
+    uuid = _codes().lookup(code)
+    if not uuid:
         raise HTTPException(status_code=404, detail="Recovery code not found")
 
-    return {"uuid": info["uuid"]}
+    return {"uuid": uuid}
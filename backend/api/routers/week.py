@@ -3,50 +3,46 @@
 from __future__ import annotations
 
 import logging
-import os
-from copy import deepcopy
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from typing import Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 
 from backend.api.deps import (
-    REPO_ROOT,
     current_phase_and_week,
     get_user_id,
     load_state,
+    locked_state,
     save_state,
     week_num_to_phase_context,
 )
+from backend.api.etag import catalog_version, make_etag, not_modified, set_etag, state_version
 from backend.api.models import TestReminderResponse
+from backend.api.profiling import InstrumentedRoute
+from backend.api.resolution_cache import resolve_entry, state_fingerprint
 from backend.engine.macrocycle_v1 import compute_pretrip_dates
+from backend.engine.plan_merge import diff_slots
 from backend.engine.planner_v2 import generate_phase_week, should_show_test_reminder
 from backend.engine.replanner_v1 import merge_prev_week_sessions, regenerate_preserving_completed
-from backend.engine.resolve_session import resolve_session
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/api/week", tags=["week"])
-
-SESSIONS_DIR = "backend/catalog/sessions/v1"
-TEMPLATES_DIR = "backend/catalog/templates/v1"
-EXERCISES_PATH = "backend/catalog/exercises/v1/exercises.json"
-
+router = APIRouter(prefix="/api/week", tags=["week"], route_class=InstrumentedRoute)
 
 def _auto_resolve(week_plan: dict, state: dict) -> None:
     """Resolve all sessions in a week plan inline.
 
     Preserves user-added exercises (source: "user_added") that were appended
     via POST /api/session/add-exercise — they are re-appended after the
-    deterministic resolution so they survive cache round-trips.
+    deterministic resolution so they survive cache round-trips. Done and
+    skipped sessions that already carry a resolution keep it.
     """
+    fingerprint = state_fingerprint(state)
     for week_block in week_plan.get("weeks", []):
         for day_entry in week_block.get("days", []):
             for session_entry in day_entry.get("sessions", []):
-                session_id = session_entry.get("session_id", "")
-                session_path = os.path.join(SESSIONS_DIR, f"{session_id}.json")
-                full_path = REPO_ROOT / session_path
-
+                if session_entry.get("status") in ("done", "skipped") and session_entry.get("resolved"):
+                    continue
                 # Collect user-added exercises before re-resolving
                 prev_resolved = session_entry.get("resolved") or {}
                 prev_rs = prev_resolved.get("resolved_session", {})
@@ -55,27 +51,10 @@ def _auto_resolve(week_plan: dict, state: dict) -> None:
                     if inst.get("source") == "user_added"
                 ]
 
-                if not full_path.exists():
-                    session_entry["resolved"] = None
-                    continue
                 try:
-                    resolve_state = deepcopy(state)
-                    resolve_state["context"] = {
-                        **resolve_state.get("context", {}),
-                        "location": session_entry.get("location", "home"),
-                        "gym_id": session_entry.get("gym_id"),
-                    }
-                    resolved = resolve_session(
-                        repo_root=str(REPO_ROOT),
-                        session_path=session_path,
-                        templates_dir=TEMPLATES_DIR,
-                        exercises_path=EXERCISES_PATH,
-                        out_path="",
-                        user_state_override=resolve_state,
-                        write_output=False,
-                    )
+                    resolved = resolve_entry(session_entry, state, fingerprint, day_entry.get("date"))
                     # Re-append user-added exercises
-                    if user_added:
+                    if resolved is not None and user_added:
                         rs = resolved.get("resolved_session", {})
                         rs.setdefault("exercise_instances", []).extend(user_added)
                     session_entry["resolved"] = resolved
@@ -110,12 +89,28 @@ def _current_week_num(macrocycle: dict) -> int:
 
 
 @router.get("/{week_num}")
-def get_week(week_num: int, force: bool = False, user_id: Optional[str] = Depends(get_user_id)):
+@locked_state
+def get_week(
+    week_num: int,
+    request: Request,
+    response: Response,
+    force: bool = False,
+    user_id: Optional[str] = Depends(get_user_id),
+):
     """Generate the plan for a given week (1-based). week_num=0 → current week.
 
     When force=True and this is the current week, regenerate from scratch but
-    preserve any sessions already marked done/skipped.
+    preserve any sessions already marked done/skipped. The response then
+    lists the (date, slot) pairs that changed under ``changes``.
+
+    Non-forced requests carry an ETag over state, catalog and today's date and
+    answer 304 before any generation or resolution when it still matches.
     """
+    if not force:
+        cached = not_modified(request, response, _week_etag(user_id, week_num))
+        if cached is not None:
+            return cached
+
     state = load_state(user_id)
 
     macrocycle = state.get("macrocycle")
@@ -145,6 +140,7 @@ def get_week(week_num: int, force: bool = False, user_id: Optional[str] = Depend
     week_plan = None
     week_start_key = ctx["start_date"]
     week_plans = state.get("week_plans") or {}
+    changes = None
 
     # Store old plan before force-regeneration
     old_plan = week_plans.get(week_start_key) if force else None
@@ -208,7 +204,9 @@ def get_week(week_num: int, force: bool = False, user_id: Optional[str] = Depend
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Week generation failed: {e}")
 
-        # When force-regenerating, preserve completed sessions from old plan
+        # When force-regenerating, preserve completed sessions from old plan.
+        # Both merges work on a copy: one that fails halfway must not leave a
+        # half-merged plan to be cached and saved.
         if (
             old_plan
             and old_plan.get("start_date") == week_plan.get("start_date")
@@ -216,7 +214,7 @@ def get_week(week_num: int, force: bool = False, user_id: Optional[str] = Depend
             try:
                 week_plan = regenerate_preserving_completed(old_plan, week_plan)
             except Exception:
-                logger.warning("Failed to preserve completed sessions, using fresh plan")
+                logger.warning("Failed to preserve completed sessions")
 
         # Merge preservable sessions (done/skipped + quick-add) from stashed
         # plan that was saved before cache invalidation (e.g. after macrocycle
@@ -230,10 +228,14 @@ def get_week(week_num: int, force: bool = False, user_id: Optional[str] = Depend
                 logger.warning("Failed to merge sessions from previous plan")
             state.pop("_prev_week_plan", None)
 
-        # Cache the freshly generated plan
+        if old_plan:
+            changes = diff_slots(old_plan, week_plan)
+
+        # Cache the freshly generated plan; edits of the old one are not undoable
         if "week_plans" not in state:
             state["week_plans"] = {}
         state["week_plans"][week_start_key] = week_plan
+        (state.get("plan_logs") or {}).pop(week_start_key, None)
         if is_current_week:
             state["current_week_plan"] = week_plan
         save_state(state, user_id)
@@ -254,11 +256,27 @@ def get_week(week_num: int, force: bool = False, user_id: Optional[str] = Depend
     }
     if test_reminder:
         result["test_reminder"] = test_reminder
+    if changes is not None:
+        result["changes"] = changes
 
+    # Generation may have saved the state: tag the version actually served
+    set_etag(response, _week_etag(user_id, week_num))
     return result
 
 
+def _week_etag(user_id: Optional[str], week_num: int) -> str:
+    """ETag for GET /api/week/{week_num}.
+
+    Today's date is part of the version: week_num=0, past-day skipping and the
+    current-week cache all depend on it.
+    """
+    return make_etag(
+        state_version(user_id), catalog_version(), "week", str(week_num), date.today().isoformat(),
+    )
+
+
 @router.post("/test-reminder-response")
+@locked_state
 def test_reminder_response(body: TestReminderResponse, user_id: Optional[str] = Depends(get_user_id)):
     """Handle user response to a periodic test reminder."""
     state = load_state(user_id)
@@ -0,0 +1,136 @@
+"""Per-user side log for frequent, low-value state mutations.
+
+Some reads record something small about themselves — serving a quote
+advances the user's rotation cursor so tomorrow's differs. Saving the whole
+state for that turned read endpoints into full-document rewrites. Instead
+such mutations are appended as one line to ``user_state.sidelog.jsonl``
+next to the state file::
+
+    {"seq": <int>, "op": "quote_advance", "value": "hard_day"}
+
+and replayed on top of the state whenever it is loaded. ``save_state`` folds
+them in for good: it replays anything appended since the load, writes the
+state with ``side_log_seq`` set to the last folded ``seq``, then drops the
+folded lines. Records with ``seq <= side_log_seq`` are already in the state
+and never applied twice, so a crash between the two writes is harmless.
+
+``seq`` is a nanosecond timestamp (bumped past the last line when the clock
+lags), so it keeps increasing after the file has been emptied by a fold.
+``OPS`` maps each op to the function that applies it; it must only hold
+functions that are cheap and safe to replay on any state.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from backend.engine import json_codec
+from backend.engine.jsonl_tail import read_tail
+from backend.engine.quotes_engine import advance_quote_cursor
+
+# Above this size an append asks for a fold (see deps.append_side_log).
+FOLD_AFTER_BYTES = 16 * 1024
+
+OPS: Dict[str, Callable[[Dict[str, Any], Any], None]] = {
+    "quote_advance": advance_quote_cursor,
+}
+
+_locks: Dict[str, threading.Lock] = {}
+_locks_guard = threading.Lock()
+
+
+def _lock(path: Path) -> threading.Lock:
+    with _locks_guard:
+        return _locks.setdefault(str(path), threading.Lock())
+
+
+def path_for(state_path: Path) -> Path:
+    """Side log of the state file at *state_path*."""
+    return state_path.with_suffix(".sidelog.jsonl")
+
+
+def _records(path: Path) -> List[Dict[str, Any]]:
+    try:
+        data = path.read_bytes()
+    except FileNotFoundError:
+        return []
+    records = []
+    for line in data.splitlines():
+        if not line.strip():
+            continue
+        try:
+            record = json_codec.loads(line)
+        except json_codec.JSONDecodeError:
+            continue
+        if isinstance(record, dict) and isinstance(record.get("seq"), int):
+            records.append(record)
+    return records
+
+
+def append(state_path: Path, op: str, value: Any) -> int:
+    """Append one mutation; returns the side log's size in bytes."""
+    if op not in OPS:
+        raise ValueError(f"Unknown side-log op: {op}")
+    path = path_for(state_path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with _lock(path):
+        last = next(read_tail(str(path), limit=1, loader="side_log"), None)
+        seq = max(time.time_ns(), (last or {}).get("seq", 0) + 1)
+        with open(path, "ab") as f:
+            f.write((json_codec.dumps_line({"seq": seq, "op": op, "value": value}) + "\n").encode("utf-8"))
+            return f.tell()
+
+
+def apply_pending(state: Dict[str, Any], state_path: Path) -> bool:
+    """Replay records newer than ``state["side_log_seq"]``; True if any."""
+    done = state.get("side_log_seq") or 0
+    applied = False
+    for record in _records(path_for(state_path)):
+        if record["seq"] <= done:
+            continue
+        fn = OPS.get(record.get("op"))
+        if fn is not None:
+            fn(state, record.get("value"))
+        done = record["seq"]
+        applied = True
+    if applied:
+        state["side_log_seq"] = done
+    return applied
+
+
+def truncate(state_path: Path, upto_seq: int) -> None:
+    """Drop records with ``seq <= upto_seq`` (folded into the saved state)."""
+    path = path_for(state_path)
+    with _lock(path):
+        records = _records(path)
+        if not records:
+            return
+        keep = [r for r in records if r["seq"] > upto_seq]
+        if len(keep) == len(records):
+            return
+        tmp = path.with_suffix(".tmp")
+        tmp.write_bytes(b"".join((json_codec.dumps_line(r) + "\n").encode("utf-8") for r in keep))
+        os.replace(tmp, path)
+
+
+def clear(state_path: Path) -> None:
+    """Discard every pending record (the state is being replaced)."""
+    path = path_for(state_path)
+    with _lock(path):
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def version(state_path: Path) -> str:
+    """Size/mtime token of the side log, for ETags."""
+    try:
+        st = path_for(state_path).stat()
+    except OSError:
+        return "none"
+    return f"{st.st_mtime_ns}-{st.st_size}"
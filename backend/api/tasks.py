@@ -0,0 +1,144 @@
+"""In-process background task queue with per-user ordering.
+
+Follow-up work that the caller does not need to wait for (adaptive replan
+after feedback, cache warm-up) is submitted here instead of running inside
+the request. Tasks for the same key (the user id, or ``"legacy"``) run
+strictly in submission order, one at a time; different users run in
+parallel on a small thread pool.
+
+The queue lives in process memory: tasks still pending at shutdown are lost.
+Every task must therefore be safe to skip — the persisted state must already
+be valid without it.
+"""
+
+from __future__ import annotations
+
+import itertools
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+LEGACY_KEY = "legacy"
+MAX_RECORDS = 500
+
+
+def task_key(user_id: Optional[str]) -> str:
+    """Queue key for a user (None → the legacy single-user state)."""
+    return user_id or LEGACY_KEY
+
+
+class TaskQueue:
+    """Per-key FIFO queues drained on a shared thread pool."""
+
+    def __init__(self, max_workers: int = 2) -> None:
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="climb-task")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._pending: Dict[str, Deque[Tuple[str, Callable[..., Any], tuple, dict]]] = {}
+        self._active: set = set()
+        self._records: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._ids = itertools.count(1)
+        self._running = threading.local()
+
+    # ── Submission ──────────────────────────────────────────────────────
+
+    def submit(self, key: str, kind: str, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> str:
+        """Queue ``fn(*args, **kwargs)`` behind every earlier task for *key*."""
+        with self._lock:
+            task_id = f"t{next(self._ids)}"
+            self._records[task_id] = {
+                "task_id": task_id,
+                "key": key,
+                "kind": kind,
+                "status": "queued",
+                "queued_at": datetime.now().isoformat(timespec="seconds"),
+                "finished_at": None,
+                "error": None,
+            }
+            while len(self._records) > MAX_RECORDS:
+                self._records.popitem(last=False)
+            self._pending.setdefault(key, deque()).append((task_id, fn, args, kwargs))
+            if key not in self._active:
+                self._active.add(key)
+                self._executor.submit(self._drain, key)
+        return task_id
+
+    def _drain(self, key: str) -> None:
+        while True:
+            with self._lock:
+                queue = self._pending.get(key)
+                if not queue:
+                    self._pending.pop(key, None)
+                    self._active.discard(key)
+                    self._idle.notify_all()
+                    return
+                task_id, fn, args, kwargs = queue.popleft()
+                self._set(task_id, status="running")
+            self._running.task_id = task_id
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                logger.exception("Background task %s (%s) failed", task_id, key)
+                with self._lock:
+                    self._set(task_id, status="failed", error=str(e))
+            else:
+                with self._lock:
+                    self._set(task_id, status="done")
+                    if isinstance(result, dict):
+                        self._set(task_id, result=result)
+            finally:
+                self._running.task_id = None
+
+    def _set(self, task_id: str, **fields: Any) -> None:
+        record = self._records.get(task_id)
+        if record is None:
+            return
+        record.update(fields)
+        if fields.get("status") in ("done", "failed"):
+            record["finished_at"] = datetime.now().isoformat(timespec="seconds")
+
+    def report_progress(self, **fields: Any) -> None:
+        """From inside a running task: merge *fields* into its ``progress``.
+
+        A no-op when called outside a task, so task bodies can also be run
+        synchronously.
+        """
+        task_id = getattr(self._running, "task_id", None)
+        if task_id is None:
+            return
+        with self._lock:
+            record = self._records.get(task_id)
+            if record is not None:
+                record["progress"] = {**(record.get("progress") or {}), **fields}
+
+    # ── Introspection ───────────────────────────────────────────────────
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            record = self._records.get(task_id)
+            return dict(record) if record else None
+
+    def list_for(self, key: str) -> List[Dict[str, Any]]:
+        """Known tasks for *key*, oldest first."""
+        with self._lock:
+            return [dict(r) for r in self._records.values() if r["key"] == key]
+
+    def is_idle(self, key: str) -> bool:
+        with self._lock:
+            return key not in self._active
+
+    def wait_idle(self, key: Optional[str] = None, timeout: Optional[float] = 10.0) -> bool:
+        """Block until *key* (or every key) has no queued or running task."""
+        with self._idle:
+            return self._idle.wait_for(
+                lambda: (key not in self._active) if key is not None else not self._active,
+                timeout=timeout,
+            )
+
+
+task_queue = TaskQueue()
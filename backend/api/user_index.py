@@ -0,0 +1,405 @@
+"""Materialized per-user summary index for the admin dashboard.
+
+``GET /api/admin/users`` used to parse every ``user_state.json`` and read
+every session log on each request. The summary fields it shows (last_access,
+grade, sessions_completed, onboarding_date) are now kept in a SQLite table at
+``DATA_DIR/admin_index.sqlite3``:
+
+- ``save_state`` upserts the row of the user it just wrote (``record_state``),
+  from the state already in memory; session logs are only recounted when
+  their signature (name + size + mtime) changed. No API path appends to
+  ``sessions_*.jsonl`` (they are imported files), so that signature check is
+  also how a refresh or rebuild notices new log lines.
+- reads first ``sync()`` the index with the disk, cheaply: only when the
+  users directory itself changed (user added or removed) are directories
+  listed and state files ``stat``-ed, and only new or changed files are
+  parsed. ``refresh=True`` forces that stat pass (e.g. after files were
+  edited outside the app).
+- ``rebuild()`` drops everything and re-parses every user (admin endpoint
+  ``POST /api/admin/users/rebuild-index`` and ``scripts/rebuild_user_index.py``),
+  reporting rows that disagreed with the disk.
+
+The index is a cache: deleting the file is always safe.
+
+Each thread keeps one connection per index file and the schema is created
+once per process, so the ``record_state`` on every save is a single upsert.
+A user's ``logs`` directory is only listed again when its mtime changed.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.api import deps as _deps
+from backend.engine import json_codec
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "admin_index.sqlite3"
+SUMMARY_FIELDS = ("uuid", "last_access", "grade", "sessions_completed", "onboarding_date")
+SORT_FIELDS = frozenset(SUMMARY_FIELDS)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    uuid               TEXT PRIMARY KEY,
+    last_access        TEXT,
+    grade              TEXT,
+    sessions_completed INTEGER NOT NULL DEFAULT 0,
+    onboarding_date    TEXT,
+    feedback_count     INTEGER NOT NULL DEFAULT 0,
+    log_sessions       INTEGER NOT NULL DEFAULT 0,
+    logs_sig           TEXT NOT NULL DEFAULT '',
+    state_mtime_ns     INTEGER NOT NULL DEFAULT 0,
+    state_size         INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS users_last_access ON users(last_access);
+CREATE INDEX IF NOT EXISTS users_grade ON users(grade);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+
+def index_path() -> Path:
+    return Path(_deps.DATA_DIR) / INDEX_FILENAME
+
+
+_local = threading.local()
+_schema_ready: set = set()
+_schema_guard = threading.Lock()
+# Bumped by close(); connections opened before it are reopened on next use
+_generation = 0
+
+
+def _connect() -> sqlite3.Connection:
+    """This thread's connection to the index, opened (and the schema created) once.
+
+    Reopened when DATA_DIR moved, the index file was deleted or ``close()``
+    was called.
+    """
+    path = index_path()
+    key = str(path)
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        if _local.key == key and _local.generation == _generation and path.exists():
+            return conn
+        conn.close()
+        _local.conn = None
+    path.parent.mkdir(parents=True, exist_ok=True)
+    existed = path.exists()
+    conn = sqlite3.connect(key, timeout=5.0)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA synchronous=NORMAL")
+    with _schema_guard:
+        if key not in _schema_ready or not existed:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            _schema_ready.add(key)
+    _local.conn, _local.key, _local.generation = conn, key, _generation
+    return conn
+
+
+def close() -> None:
+    """Close this thread's connection; other threads reopen theirs on next use."""
+    global _generation
+    with _schema_guard:
+        _generation += 1
+        _schema_ready.clear()
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+
+
+# ── Summary extraction ─────────────────────────────────────────────────
+
+
+def _extract_last_access(state: Dict[str, Any], state_mtime: Optional[float]) -> Optional[str]:
+    """Best-effort last access date from feedback_log, macrocycle, or file mtime."""
+    fl = state.get("feedback_log") or []
+    if fl:
+        return fl[0].get("date")
+
+    mc = state.get("macrocycle") or {}
+    gen = mc.get("generated_at")
+    if gen:
+        return gen[:10]
+
+    assessed = (state.get("assessment") or {}).get("last_assessed")
+    if assessed:
+        return assessed[:10]
+
+    # Fallback: file modification time
+    if state_mtime is None:
+        return None
+    return datetime.fromtimestamp(state_mtime, tz=timezone.utc).strftime("%Y-%m-%d")
+
+
+def _extract_grade(state: Dict[str, Any]) -> Optional[str]:
+    """Current grade from goal or assessment."""
+    grade = (state.get("goal") or {}).get("current_grade")
+    if grade:
+        return grade
+
+    discipline = (state.get("goal") or {}).get("discipline", "boulder")
+    grades = (state.get("assessment") or {}).get("grades") or {}
+    return grades.get(f"{discipline}_max_rp") or grades.get("boulder_max_rp")
+
+
+def _extract_onboarding_date(state: Dict[str, Any]) -> Optional[str]:
+    """Onboarding date from goal.created_at or macrocycle.start_date."""
+    created = (state.get("goal") or {}).get("created_at")
+    if created:
+        return created[:10]
+
+    mc = state.get("macrocycle") or {}
+    start = mc.get("start_date")
+    if start:
+        return start[:10]
+
+    return (state.get("assessment") or {}).get("last_assessed")
+
+
+# logs dir -> (mtime_ns, session log paths) as of the last listing
+_log_listings: Dict[str, Tuple[int, List[Path]]] = {}
+
+
+def _session_logs(user_dir: Path) -> List[Path]:
+    logs_dir = user_dir / "logs"
+    try:
+        mtime_ns = os.stat(logs_dir).st_mtime_ns
+    except OSError:
+        _log_listings.pop(str(logs_dir), None)
+        return []
+    cached = _log_listings.get(str(logs_dir))
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+    try:
+        names = sorted(os.listdir(logs_dir))
+    except OSError:
+        return []
+    logs = [logs_dir / n for n in names if n.startswith("sessions_") and n.endswith(".jsonl")]
+    _log_listings[str(logs_dir)] = (mtime_ns, logs)
+    return logs
+
+
+def _logs_signature(logs: List[Path]) -> str:
+    parts = []
+    for path in logs:
+        try:
+            st = path.stat()
+        except OSError:
+            continue
+        parts.append(f"{path.name}:{st.st_size}:{st.st_mtime_ns}")
+    return "|".join(parts)
+
+
+def _count_log_sessions(logs: List[Path]) -> int:
+    """Count non-empty lines across the JSONL session logs."""
+    count = 0
+    for path in logs:
+        try:
+            with path.open("rb") as fh:
+                count += sum(1 for line in fh if line.strip())
+        except OSError:
+            pass
+    return count
+
+
+def _summarize(
+    user_id: str,
+    state: Dict[str, Any],
+    st: os.stat_result,
+    previous: Optional[sqlite3.Row],
+) -> Dict[str, Any]:
+    user_dir = Path(_deps.USERS_DIR) / user_id
+    logs = _session_logs(user_dir)
+    logs_sig = _logs_signature(logs)
+    if previous is not None and previous["logs_sig"] == logs_sig:
+        log_sessions = previous["log_sessions"]
+    else:
+        log_sessions = _count_log_sessions(logs)
+    feedback_count = len(state.get("feedback_log") or [])
+    return {
+        "uuid": user_id,
+        "last_access": _extract_last_access(state, st.st_mtime),
+        "grade": _extract_grade(state),
+        "sessions_completed": feedback_count + log_sessions,
+        "onboarding_date": _extract_onboarding_date(state),
+        "feedback_count": feedback_count,
+        "log_sessions": log_sessions,
+        "logs_sig": logs_sig,
+        "state_mtime_ns": st.st_mtime_ns,
+        "state_size": st.st_size,
+    }
+
+
+_UPSERT = """
+INSERT INTO users (uuid, last_access, grade, sessions_completed, onboarding_date,
+                   feedback_count, log_sessions, logs_sig, state_mtime_ns, state_size)
+VALUES (:uuid, :last_access, :grade, :sessions_completed, :onboarding_date,
+        :feedback_count, :log_sessions, :logs_sig, :state_mtime_ns, :state_size)
+ON CONFLICT(uuid) DO UPDATE SET
+    last_access = excluded.last_access,
+    grade = excluded.grade,
+    sessions_completed = excluded.sessions_completed,
+    onboarding_date = excluded.onboarding_date,
+    feedback_count = excluded.feedback_count,
+    log_sessions = excluded.log_sessions,
+    logs_sig = excluded.logs_sig,
+    state_mtime_ns = excluded.state_mtime_ns,
+    state_size = excluded.state_size
+"""
+
+
+def _get_row(conn: sqlite3.Connection, user_id: str) -> Optional[sqlite3.Row]:
+    return conn.execute("SELECT * FROM users WHERE uuid = ?", (user_id,)).fetchone()
+
+
+# ── Incremental maintenance ────────────────────────────────────────────
+
+
+def record_state(user_id: str, state: Dict[str, Any]) -> None:
+    """Upsert *user_id*'s summary from the state that was just saved.
+
+    Called by ``save_state``; never raises (the index can always be rebuilt).
+    """
+    try:
+        st = os.stat(Path(_deps.USERS_DIR) / user_id / "user_state.json")
+        with _connect() as conn:
+            conn.execute(_UPSERT, _summarize(user_id, state, st, _get_row(conn, user_id)))
+    except (OSError, sqlite3.Error):
+        logger.warning("admin index: could not record %s", user_id, exc_info=True)
+
+
+def forget(user_id: str) -> None:
+    """Drop *user_id* from the index (user deleted)."""
+    with _connect() as conn:
+        conn.execute("DELETE FROM users WHERE uuid = ?", (user_id,))
+
+
+def _users_dir_version() -> str:
+    try:
+        st = os.stat(_deps.USERS_DIR)
+    except OSError:
+        return "none"
+    return f"{st.st_mtime_ns}-{st.st_nlink}"
+
+
+def _reconcile(conn: sqlite3.Connection, *, force_parse: bool) -> Dict[str, int]:
+    """Bring the index in line with USERS_DIR; returns counts of what changed."""
+    users_dir = Path(_deps.USERS_DIR)
+    seen: set = set()
+    stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0, "skipped": 0}
+    try:
+        entries = sorted(os.scandir(users_dir), key=lambda e: e.name)
+    except OSError:
+        entries = []
+
+    for entry in entries:
+        if not entry.is_dir():
+            continue
+        state_path = Path(entry.path) / "user_state.json"
+        try:
+            st = state_path.stat()
+        except OSError:
+            continue
+        row = _get_row(conn, entry.name)
+        if (
+            not force_parse
+            and row is not None
+            and row["state_mtime_ns"] == st.st_mtime_ns
+            and row["state_size"] == st.st_size
+        ):
+            seen.add(entry.name)
+            stats["unchanged"] += 1
+            continue
+        try:
+            state = json_codec.loads(state_path.read_bytes())
+        except (json_codec.JSONDecodeError, OSError, ValueError):
+            stats["skipped"] += 1
+            continue
+        if not isinstance(state, dict):
+            stats["skipped"] += 1
+            continue
+        summary = _summarize(entry.name, state, st, row)
+        if row is not None and all(row[k] == summary[k] for k in SUMMARY_FIELDS):
+            stats["unchanged"] += 1
+        else:
+            stats["updated" if row is not None else "added"] += 1
+        conn.execute(_UPSERT, summary)
+        seen.add(entry.name)
+
+    stale = [r["uuid"] for r in conn.execute("SELECT uuid FROM users") if r["uuid"] not in seen]
+    conn.executemany("DELETE FROM users WHERE uuid = ?", [(u,) for u in stale])
+    stats["removed"] = len(stale)
+    conn.execute(
+        "INSERT OR REPLACE INTO meta (key, value) VALUES ('users_dir_version', ?)",
+        (_users_dir_version(),),
+    )
+    return stats
+
+
+def sync(*, refresh: bool = False) -> None:
+    """Pick up users created or deleted outside ``save_state`` (cheap no-op otherwise)."""
+    with _connect() as conn:
+        row = conn.execute("SELECT value FROM meta WHERE key = 'users_dir_version'").fetchone()
+        if refresh or row is None or row["value"] != _users_dir_version():
+            _reconcile(conn, force_parse=False)
+
+
+def rebuild() -> Dict[str, Any]:
+    """Re-parse every user; returns how many rows differed from the disk."""
+    t0 = time.perf_counter()
+    with _connect() as conn:
+        stats = _reconcile(conn, force_parse=True)
+        total = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    return {**stats, "total": total, "duration_ms": round((time.perf_counter() - t0) * 1000.0, 1)}
+
+
+# ── Queries ────────────────────────────────────────────────────────────
+
+
+def query(
+    *,
+    limit: int = 100,
+    offset: int = 0,
+    sort: str = "uuid",
+    order: str = "asc",
+    grade: Optional[str] = None,
+    active_since: Optional[str] = None,
+    q: Optional[str] = None,
+    refresh: bool = False,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """One page of user summaries plus the number of matching users."""
+    if sort not in SORT_FIELDS:
+        raise ValueError(f"sort must be one of {sorted(SORT_FIELDS)}")
+    direction = "DESC" if order == "desc" else "ASC"
+
+    where: List[str] = []
+    params: List[Any] = []
+    if grade:
+        where.append("grade = ?")
+        params.append(grade)
+    if active_since:
+        where.append("last_access >= ?")
+        params.append(active_since)
+    if q:
+        where.append("uuid LIKE ?")
+        params.append(f"%{q}%")
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+
+    sync(refresh=refresh)
+    conn = _connect()
+    total = conn.execute(f"SELECT COUNT(*) FROM users {clause}", params).fetchone()[0]
+    rows = conn.execute(
+        f"SELECT {', '.join(SUMMARY_FIELDS)} FROM users {clause} "
+        f"ORDER BY {sort} IS NULL, {sort} {direction}, uuid ASC LIMIT ? OFFSET ?",
+        [*params, limit, offset],
+    ).fetchall()
+    return [dict(r) for r in rows], total
@@ -10,12 +10,11 @@ Never auto-upgrades.
 from __future__ import annotations
 
 import functools
-import json
 from copy import deepcopy
 from datetime import datetime, timedelta
-from pathlib import Path
 from typing import Any, Dict, List, Optional
 
+from backend.engine import catalog_snapshot
 from backend.engine.progression_v1 import canonical_feedback_label
 
 _LABEL_TO_SCORE = {
@@ -44,8 +43,7 @@ def _score_to_label(score: float) -> str:
 @functools.lru_cache(maxsize=1)
 def load_exercises_by_id() -> Dict[str, Dict[str, Any]]:
     """Load exercise catalog keyed by exercise id."""
-    path = Path("backend/catalog/exercises/v1/exercises.json")
-    data = json.loads(path.read_text(encoding="utf-8"))
+    data = catalog_snapshot.load_json("backend/catalog/exercises/v1/exercises.json")
     return {e["id"]: e for e in data["exercises"]}
 
 
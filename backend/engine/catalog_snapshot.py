@@ -0,0 +1,208 @@
+"""Compiled snapshot of the JSON catalogs for fast cold starts.
+
+Every catalog document (exercises, sessions, templates, quotes — every
+``*.json`` under ``backend/catalog``) is parsed once at build time and stored,
+pickled, in a single file next to the catalogs::
+
+    {"manifest": {"version", "hash", "built_at", "files": {rel: [size, mtime_ns]}},
+     "files": {rel: <pickled document>}}
+
+Loading it is one read; ``load_json`` then turns a catalog path into a fresh
+copy of its document with ``pickle.loads``, several times faster than parsing
+the JSON and, like parsing, safe for callers that mutate what they get.
+
+The snapshot is only used while it matches the sources: ``manifest.files``
+must list the same files, and if any size/mtime differs (a fresh checkout)
+the content ``hash`` is recomputed and compared. Anything else — no snapshot,
+an older ``SNAPSHOT_VERSION``, edited catalogs — falls back to the source JSON.
+
+Build it at deploy time or let the API build it at startup (``warm``)::
+
+    python -m backend.engine.catalog_snapshot build [--check]
+
+``CATALOG_SNAPSHOT_PATH`` overrides where it lives; set it to an empty string
+to disable the snapshot. The file is a pickle: only load snapshots this code
+built.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import pickle
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from backend.engine.metrics import record_cache
+
+SNAPSHOT_VERSION = 1
+
+CATALOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "catalog")
+DEFAULT_SNAPSHOT_PATH = os.path.join(CATALOG_DIR, "catalog_snapshot.pickle")
+
+_lock = threading.Lock()
+_loaded = False
+_files: Optional[Dict[str, bytes]] = None
+
+
+def snapshot_path() -> Optional[str]:
+    """Where the snapshot lives, or None when disabled."""
+    path = os.environ.get("CATALOG_SNAPSHOT_PATH", DEFAULT_SNAPSHOT_PATH)
+    return path or None
+
+
+def source_files(catalog_dir: str = CATALOG_DIR) -> List[str]:
+    """Catalog documents as sorted paths relative to *catalog_dir*."""
+    found = []
+    for root, _dirs, names in os.walk(catalog_dir):
+        for name in names:
+            if name.endswith(".json"):
+                found.append(os.path.relpath(os.path.join(root, name), catalog_dir).replace(os.sep, "/"))
+    return sorted(found)
+
+
+def _file_sigs(catalog_dir: str, rels: List[str]) -> Dict[str, List[int]]:
+    sigs = {}
+    for rel in rels:
+        st = os.stat(os.path.join(catalog_dir, rel))
+        sigs[rel] = [st.st_size, st.st_mtime_ns]
+    return sigs
+
+
+def content_hash(catalog_dir: str = CATALOG_DIR, rels: Optional[List[str]] = None) -> str:
+    """sha256 over every catalog document's path and bytes."""
+    h = hashlib.sha256()
+    for rel in rels if rels is not None else source_files(catalog_dir):
+        with open(os.path.join(catalog_dir, rel), "rb") as f:
+            data = f.read()
+        h.update(rel.encode("utf-8") + b"\0" + str(len(data)).encode("ascii") + b"\0" + data)
+    return h.hexdigest()
+
+
+def build(catalog_dir: str = CATALOG_DIR, path: Optional[str] = None) -> Dict[str, Any]:
+    """Parse every catalog document and write the snapshot; returns its manifest."""
+    path = path or snapshot_path()
+    if path is None:
+        raise ValueError("Catalog snapshot is disabled (CATALOG_SNAPSHOT_PATH is empty)")
+    rels = source_files(catalog_dir)
+    files = {}
+    for rel in rels:
+        with open(os.path.join(catalog_dir, rel), "r", encoding="utf-8") as f:
+            files[rel] = pickle.dumps(json.load(f), protocol=pickle.HIGHEST_PROTOCOL)
+    manifest = {
+        "version": SNAPSHOT_VERSION,
+        "hash": content_hash(catalog_dir, rels),
+        "built_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "files": _file_sigs(catalog_dir, rels),
+    }
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        pickle.dump({"manifest": manifest, "files": files}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return manifest
+
+
+def read(catalog_dir: str = CATALOG_DIR, path: Optional[str] = None) -> Optional[Dict[str, bytes]]:
+    """The snapshot's pickled documents if it matches *catalog_dir*, else None."""
+    path = path or snapshot_path()
+    if path is None:
+        return None
+    try:
+        with open(path, "rb") as f:
+            snapshot = pickle.loads(f.read())
+        manifest = snapshot["manifest"]
+        files = snapshot["files"]
+    except (OSError, pickle.UnpicklingError, EOFError, KeyError, TypeError, ValueError, AttributeError):
+        return None
+    if manifest.get("version") != SNAPSHOT_VERSION:
+        return None
+    rels = source_files(catalog_dir)
+    if sorted(manifest.get("files") or {}) != rels:
+        return None
+    if _file_sigs(catalog_dir, rels) != manifest["files"] and content_hash(catalog_dir, rels) != manifest.get("hash"):
+        return None
+    return files
+
+
+def _active() -> Optional[Dict[str, bytes]]:
+    global _loaded, _files
+    if not _loaded:
+        with _lock:
+            if not _loaded:
+                _files = read()
+                _loaded = True
+    return _files
+
+
+def warm(build_if_stale: bool = True) -> str:
+    """Load the snapshot for this process (building it first if needed).
+
+    Returns "loaded", "built", "disabled" or "unavailable" (could not build;
+    the source JSON is used).
+    """
+    global _loaded, _files
+    with _lock:
+        _files = read()
+        status = "loaded"
+        if _files is None and snapshot_path() is None:
+            status = "disabled"
+        elif _files is None and build_if_stale:
+            try:
+                build()
+            except OSError:
+                status = "unavailable"
+            else:
+                _files = read()
+                status = "built" if _files is not None else "unavailable"
+        elif _files is None:
+            status = "unavailable"
+        _loaded = True
+    return status
+
+
+def reset() -> None:
+    """Forget the loaded snapshot (the next lookup reads it again)."""
+    global _loaded, _files
+    with _lock:
+        _loaded = False
+        _files = None
+
+
+def load_json(path: str) -> Any:
+    """Parse the JSON file at *path*, from the snapshot when it holds it."""
+    rel = os.path.relpath(os.path.abspath(path), CATALOG_DIR).replace(os.sep, "/")
+    if not rel.startswith("../"):
+        files = _active()
+        blob = files.get(rel) if files is not None else None
+        record_cache("catalog_snapshot", blob is not None)
+        if blob is not None:
+            return pickle.loads(blob)
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Build the compiled catalog snapshot.")
+    parser.add_argument("command", choices=["build"])
+    parser.add_argument("--check", action="store_true", help="only report whether the snapshot is current (exit 1 if not)")
+    args = parser.parse_args(argv)
+
+    path = snapshot_path()
+    if path is None:
+        print("catalog snapshot disabled (CATALOG_SNAPSHOT_PATH is empty)")
+        return 1
+    if args.check:
+        current = read() is not None
+        print(f"{path}: {'current' if current else 'stale or missing'}")
+        return 0 if current else 1
+    manifest = build()
+    print(f"{path}: {len(manifest['files'])} documents, hash {manifest['hash'][:12]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
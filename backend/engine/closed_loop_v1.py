@@ -5,6 +5,8 @@ from copy import deepcopy
 from pathlib import Path
 from typing import Any, Dict, List, Tuple
 
+from backend.engine import json_codec
+
 
 STIMULUS_CATEGORIES: Tuple[str, ...] = (
     "finger_strength",
@@ -171,4 +173,4 @@ def apply_day_result_to_user_state(user_state: Dict[str, Any], *, resolved_day:
 def append_jsonl(path: Path, payload: Dict[str, Any]) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     with path.open("a", encoding="utf-8") as fh:
-        fh.write(json.dumps(payload, ensure_ascii=False, sort_keys=True) + "\n")
+        fh.write(json_codec.dumps_line(payload, sort_keys=True) + "\n")
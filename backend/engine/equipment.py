@@ -0,0 +1,192 @@
+"""Canonical equipment vocabulary, encoded as bitmasks.
+
+Every equipment item is one bit, so "does this place have everything the
+exercise/session needs" is ``not required & ~available``::
+
+    available = location_mask(["dumbbell", "loading_pin"], "gym")
+    covers(available, mask(["hangboard", "weight"]))   # True
+
+``VOCABULARY`` fixes the bits of the known items (onboarding choices and
+everything the catalogs require). Every other name shares ``UNKNOWN_BIT``,
+which ``covers`` and ``covers_any`` never count as available: an unknown
+requirement is never mistaken for a satisfied one, and free-text equipment
+cannot grow the bit table. Names are normalized (stripped, lower-cased) like
+the resolver does.
+
+The implication rules live here and are applied once, when a place's mask is
+built (``location_mask``):
+
+- aliases: ``loading_pin`` counts as a ``hangboard``
+- any weight subtype (dumbbell, kettlebell, barbell) provides ``weight``
+- every gym has a ``pullup_bar``
+
+``EquipmentProfile`` holds the masks of one user's home and gyms, built once
+per state, with the gym lookup rules the planner uses (by id, else the first
+gym by priority).
+"""
+
+from __future__ import annotations
+
+import functools
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+VOCABULARY: Tuple[str, ...] = (
+    # fingers
+    "hangboard", "loading_pin", "pinch_block", "campus_board",
+    # climbing
+    "gym_boulder", "gym_routes", "spraywall", "board_kilter", "board_moonboard", "homewall",
+    # bars, rings, bands
+    "pullup_bar", "rings", "band", "resistance_band",
+    # weights and machines
+    "weight", "dumbbell", "kettlebell", "barbell", "bench", "cable_machine", "leg_press",
+    # accessories
+    "ab_wheel", "foam_roller", "floor",
+)
+
+ALIASES: Dict[str, str] = {"loading_pin": "hangboard"}
+WEIGHT_SUBTYPES: Tuple[str, ...] = ("dumbbell", "kettlebell", "barbell")
+LOCATION_IMPLIED: Dict[str, Tuple[str, ...]] = {"gym": ("pullup_bar",)}
+
+_bits: Dict[str, int] = {name: 1 << i for i, name in enumerate(VOCABULARY)}
+UNKNOWN_BIT = 1 << len(VOCABULARY)
+_names: Tuple[str, ...] = VOCABULARY + ("unknown",)
+
+Equipment = Union[int, Iterable[str], None]
+
+
+def _norm(name: Any) -> str:
+    return str(name).strip().lower()
+
+
+def bit(name: str) -> int:
+    """The bit of *name*; ``UNKNOWN_BIT`` for names outside ``VOCABULARY``."""
+    return _bits.get(_norm(name), UNKNOWN_BIT)
+
+
+@functools.lru_cache(maxsize=4096)
+def _mask_of(names: Tuple[str, ...]) -> int:
+    m = 0
+    for name in names:
+        if _norm(name):
+            m |= bit(name)
+    return m
+
+
+def mask(names: Equipment) -> int:
+    """Mask of *names* as listed (no implications); ints pass through."""
+    if names is None:
+        return 0
+    if isinstance(names, int):
+        return names
+    if isinstance(names, str):
+        names = [names]
+    return _mask_of(tuple(names))
+
+
+def names(m: int) -> List[str]:
+    """Names of the bits set in *m*, in bit order."""
+    return [name for i, name in enumerate(_names) if m >> i & 1]
+
+
+def _implied(m: int, location: Optional[str]) -> List[str]:
+    out = ["weight"] if m & _mask_of(WEIGHT_SUBTYPES) else []
+    out.extend(canonical for alias, canonical in ALIASES.items() if m & bit(alias))
+    if location:
+        out.extend(LOCATION_IMPLIED.get(_norm(location), ()))
+    return out
+
+
+def expand(m: int, location: Optional[str] = None) -> int:
+    """*m* plus everything it implies (weight, aliases, per-location items)."""
+    return m | _mask_of(tuple(_implied(m, location)))
+
+
+def location_mask(items: Equipment, location: Optional[str] = None) -> int:
+    """What a place with *items* provides, implications included."""
+    return expand(mask(items), location)
+
+
+def with_implied(items: Iterable[str], location: Optional[str] = None) -> List[str]:
+    """*items* followed by the names they imply that are not listed yet."""
+    out = list(items)
+    have = mask(out)
+    for name in _implied(have, location):
+        if not have & bit(name):
+            out.append(name)
+            have |= bit(name)
+    return out
+
+
+def covers(available: int, required: int) -> bool:
+    """True if *available* has every item of *required* (never an unknown one)."""
+    return not required & ~(available & ~UNKNOWN_BIT)
+
+
+def covers_any(available: int, required_any: int) -> bool:
+    """True if *available* has at least one known item of *required_any*."""
+    return bool(required_any & available & ~UNKNOWN_BIT)
+
+
+def _by_priority(gyms: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return sorted(gyms, key=lambda g: (g.get("priority", 999), g.get("gym_id", "")))
+
+
+class EquipmentProfile:
+    """Equipment masks of one user's home and gyms (built once per state).
+
+    ``home`` is None when the home equipment is unknown; gyms are kept in
+    priority order. Gym masks include the gym implications.
+    """
+
+    __slots__ = ("home", "gyms", "_by_id")
+
+    def __init__(
+        self,
+        home_equipment: Optional[Iterable[str]] = None,
+        gyms: Optional[Sequence[Dict[str, Any]]] = None,
+    ) -> None:
+        self.home: Optional[int] = None if home_equipment is None else location_mask(home_equipment, "home")
+        self.gyms: Tuple[Tuple[Optional[str], int], ...] = tuple(
+            (g.get("gym_id"), location_mask(g.get("equipment") or [], "gym")) for g in _by_priority(gyms or [])
+        )
+        self._by_id: Dict[str, int] = {}
+        for g in gyms or []:
+            if g.get("gym_id") is not None:
+                self._by_id.setdefault(g["gym_id"], location_mask(g.get("equipment") or [], "gym"))
+
+    @classmethod
+    def from_state(cls, state: Optional[Dict[str, Any]]) -> "EquipmentProfile":
+        eq = (state or {}).get("equipment") or {}
+        return cls(eq.get("home"), eq.get("gyms"))
+
+    def gym(self, gym_id: Optional[str]) -> Optional[int]:
+        """Mask of the gym with *gym_id*, or None."""
+        return self._by_id.get(gym_id) if gym_id else None
+
+    def gym_or_default(self, gym_id: Optional[str]) -> Optional[int]:
+        """Mask of *gym_id*, else of the first gym by priority; None without gyms."""
+        found = self.gym(gym_id)
+        if found is not None:
+            return found
+        return self.gyms[0][1] if self.gyms else None
+
+    def at(self, location: str, gym_id: Optional[str] = None) -> Optional[int]:
+        """Mask available at *location* (None: unknown, assume everything)."""
+        if location == "gym":
+            return self.gym_or_default(gym_id)
+        if location == "home":
+            return self.home
+        return None
+
+    def any_gym_covers(self, required: int) -> bool:
+        return any(covers(m, required) for _, m in self.gyms)
+
+    def first_gym_with(self, required: int) -> Optional[str]:
+        """Id of the first gym by priority that has *required*, or None."""
+        for gym_id, m in self.gyms:
+            if covers(m, required):
+                return gym_id
+        return None
+
+
+UNKNOWN = EquipmentProfile()
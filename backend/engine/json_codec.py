@@ -0,0 +1,82 @@
+"""Pluggable JSON codec for state files, JSONL logs and API responses.
+
+One place decides how JSON is parsed and written:
+
+- backend: ``orjson`` when installed (several times faster on large states),
+  otherwise stdlib ``json``. Force one with ``CLIMB_JSON_BACKEND=stdlib`` or
+  ``=orjson``; the default ``auto`` picks orjson if importable.
+- state format: ``CLIMB_STATE_FORMAT=pretty`` (default, ``indent=2``, the
+  historical on-disk layout) or ``compact`` (no whitespace). Keys are always
+  sorted so files stay deterministic and diffable; readers accept both.
+
+orjson is stricter than stdlib (non-string keys, integers beyond 64 bits,
+arbitrary subclasses); any value it refuses is re-encoded with stdlib, so
+switching backends never changes what can be stored. Decode errors are raised
+as ``json.JSONDecodeError`` by both backends.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Union
+
+JSONDecodeError = json.JSONDecodeError
+
+_REQUESTED_BACKEND = os.environ.get("CLIMB_JSON_BACKEND", "auto").strip().lower()
+STATE_FORMAT = os.environ.get("CLIMB_STATE_FORMAT", "pretty").strip().lower()
+
+_orjson: Any = None
+if _REQUESTED_BACKEND in ("auto", "orjson"):
+    try:
+        import orjson as _orjson  # type: ignore[no-redef]
+    except ImportError:
+        if _REQUESTED_BACKEND == "orjson":
+            raise
+
+BACKEND = "orjson" if _orjson is not None else "stdlib"
+
+
+def loads(data: Union[str, bytes, bytearray]) -> Any:
+    """Parse a JSON document (str or UTF-8 bytes)."""
+    if _orjson is not None:
+        return _orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj: Any, *, pretty: bool = False, sort_keys: bool = False) -> bytes:
+    """Serialize *obj* to UTF-8 bytes (non-ASCII characters kept as-is)."""
+    if _orjson is not None:
+        option = 0
+        if pretty:
+            option |= _orjson.OPT_INDENT_2
+        if sort_keys:
+            option |= _orjson.OPT_SORT_KEYS
+        try:
+            return _orjson.dumps(obj, option=option)
+        except TypeError:
+            pass  # value orjson refuses — fall through to stdlib
+    return _stdlib_dumps(obj, pretty=pretty, sort_keys=sort_keys).encode("utf-8")
+
+
+def dumps(obj: Any, *, pretty: bool = False, sort_keys: bool = False) -> str:
+    """Serialize *obj* to a str (non-ASCII characters kept as-is)."""
+    if _orjson is not None:
+        return dumps_bytes(obj, pretty=pretty, sort_keys=sort_keys).decode("utf-8")
+    return _stdlib_dumps(obj, pretty=pretty, sort_keys=sort_keys)
+
+
+def _stdlib_dumps(obj: Any, *, pretty: bool, sort_keys: bool) -> str:
+    if pretty:
+        return json.dumps(obj, ensure_ascii=False, indent=2, sort_keys=sort_keys)
+    return json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, separators=(",", ":"))
+
+
+def dumps_state(state: Any) -> bytes:
+    """Encode a state document for disk, honouring CLIMB_STATE_FORMAT."""
+    return dumps_bytes(state, pretty=STATE_FORMAT != "compact", sort_keys=True) + b"\n"
+
+
+def dumps_line(obj: Any, *, sort_keys: bool = False) -> str:
+    """Encode one JSONL record (compact, no trailing newline)."""
+    return dumps(obj, sort_keys=sort_keys)
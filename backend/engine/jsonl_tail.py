@@ -0,0 +1,88 @@
+"""Newest-first reading of append-only JSONL logs.
+
+Most recency queries (this week's sessions, the exercises of the last few
+days, the latest entry for a date) only touch the end of a log. ``read_tail``
+seeks to the end of the file and reads it backwards in ``BLOCK_SIZE`` blocks,
+yielding parsed entries newest-first, so such a query costs the size of the
+answer rather than the size of the (yearly, multi-megabyte) file.
+
+``since_date`` skips entries dated before it and stops the read once
+``SINCE_MARGIN`` such entries came in a row. Session logs are appended in
+date order, give or take a day logged late; the margin keeps such an entry
+from ending the read early. Outdoor logs, where any past day can be logged
+late, are not read this way: their callers stop on a match or a count.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, Iterator, Optional
+
+from backend.engine import json_codec
+from backend.engine.metrics import JSONL_LINES_SCANNED
+
+BLOCK_SIZE = 64 * 1024
+# Consecutive entries older than since_date read before giving up
+SINCE_MARGIN = 64
+
+
+def iter_lines_reverse(path: str, block_size: int = BLOCK_SIZE) -> Iterator[bytes]:
+    """Yield the lines of *path* last-first, without their newlines."""
+    with open(path, "rb") as f:
+        pos = f.seek(0, os.SEEK_END)
+        pending = b""
+        while pos > 0:
+            step = min(block_size, pos)
+            pos -= step
+            f.seek(pos)
+            chunk = f.read(step) + pending
+            lines = chunk.split(b"\n")
+            # The first piece may continue in the previous block.
+            pending = lines[0]
+            for line in reversed(lines[1:]):
+                yield line
+        yield pending
+
+
+def read_tail(
+    path: str,
+    since_date: Optional[str] = None,
+    limit: Optional[int] = None,
+    loader: str = "tail",
+) -> Iterator[Dict[str, Any]]:
+    """Yield the JSON objects of a log newest-first.
+
+    Blank and unparseable lines are skipped. Stops after *limit* entries, or
+    after ``SINCE_MARGIN`` consecutive entries whose ``date`` is before
+    *since_date* (those are not yielded; undated entries are, and reset the
+    count). Lines read are counted in ``JSONL_LINES_SCANNED`` under
+    *loader*. A missing file yields nothing.
+    """
+    scanned = 0
+    yielded = 0
+    older = 0
+    try:
+        for raw in iter_lines_reverse(path):
+            if limit is not None and yielded >= limit:
+                return
+            if not raw.strip():
+                continue
+            scanned += 1
+            try:
+                entry = json_codec.loads(raw)
+            except json_codec.JSONDecodeError:
+                continue
+            if not isinstance(entry, dict):
+                continue
+            if since_date and entry.get("date") and entry["date"] < since_date:
+                older += 1
+                if older >= SINCE_MARGIN:
+                    return
+                continue
+            older = 0
+            yielded += 1
+            yield entry
+    except FileNotFoundError:
+        return
+    finally:
+        JSONL_LINES_SCANNED.inc(scanned, loader=loader)
@@ -1,17 +1,60 @@
-"""Outdoor session logging — append-only JSONL log for outdoor climbing sessions."""
+"""Outdoor session logging — append-only JSONL log for outdoor climbing sessions.
+
+Deleting a day's sessions (undo) appends a tombstone line
+``{"tombstone": true, "date": ...}`` instead of rewriting the yearly file:
+loaders hide every entry for that date that appears *before* the tombstone,
+so a session re-logged afterwards is visible again. ``compact_outdoor_log``
+drops tombstoned entries and the tombstones themselves, rewriting a file
+(temp file + ``os.replace``) only when its tombstone ratio reaches
+``COMPACT_TOMBSTONE_RATIO``; it runs in the background after an undo or from
+the admin bulk actions, never inside a user request.
+
+Each yearly log has an index file next to it (``outdoor_index_YYYY.json``)
+holding
+
+- every day's stats contribution (route, send and style counts, grade
+  histograms, load, spots) plus its month's running sum, so
+  ``outdoor_aggregate`` merges whole months and only walks the days of a
+  partially covered month — it never re-reads routes;
+- one row per live session (date, byte offset, spot_id, discipline, grade
+  indices), so ``list_outdoor_sessions`` filters and paginates on the index
+  and reads just the lines of the requested page.
+
+Appends add a session and tombstones drop the day, under the same lock as the
+log write. The index records the size/mtime of the log it matches; any other
+change to the log (a hand edit, a write from another process) makes it stale,
+and it is rebuilt from the log on the next read.
+
+Entries are stored with their ``load_score`` computed at write time.
+"""
 
 from __future__ import annotations
 
-import json
 import os
+import threading
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
+from backend.engine import json_codec
 from backend.engine.assessment_v1 import GRADE_ORDER, grade_index
+from backend.engine.jsonl_tail import read_tail
+from backend.engine.metrics import JSONL_LINES_SCANNED
 
 
 REQUIRED_FIELDS = {"log_version", "date", "spot_name", "discipline", "duration_minutes", "routes"}
 
+COMPACT_TOMBSTONE_RATIO = 0.2
+
+# Appends and compaction of the same file must not interleave (a line appended
+# while compaction copies the file would be lost by the replace).
+_file_locks: Dict[str, threading.Lock] = {}
+_file_locks_guard = threading.Lock()
+
+
+def _file_lock(path: str) -> threading.Lock:
+    with _file_locks_guard:
+        return _file_locks.setdefault(os.path.abspath(path), threading.Lock())
+
 # ---------------------------------------------------------------------------
 # Outdoor load score helpers
 # ---------------------------------------------------------------------------
@@ -110,6 +153,7 @@ def _log_path_for_date(log_dir: str, date_str: str) -> str:
 def append_outdoor_session(entry: Dict[str, Any], log_dir: str) -> str:
     """Validate and append an outdoor session entry to the yearly JSONL log.
 
+    The stored entry carries its ``load_score``.
     Returns the path of the log file written to.
     Raises ValueError if validation fails.
     """
@@ -119,46 +163,92 @@ def append_outdoor_session(entry: Dict[str, Any], log_dir: str) -> str:
 
     os.makedirs(log_dir, exist_ok=True)
     log_path = _log_path_for_date(log_dir, entry["date"])
+    entry = {**entry, "load_score": compute_outdoor_load_score(entry)}
 
-    with open(log_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    with _file_lock(log_path):
+        in_sync = _index_in_sync(log_path)
+        offset = _append_line(log_path, entry)
+        _update_index(log_path, in_sync, add=(entry, offset))
 
     return log_path
 
 
+def _append_line(log_path: str, obj: Dict[str, Any]) -> int:
+    """Append one JSON line; returns its byte offset (caller holds the lock)."""
+    with open(log_path, "ab") as f:
+        offset = f.tell()
+        f.write((json_codec.dumps_line(obj) + "\n").encode("utf-8"))
+    return offset
+
+
 def remove_outdoor_session(log_dir: str, date: str) -> int:
-    """Remove all outdoor session entries for a given date from the JSONL log.
+    """Hide all outdoor session entries for a given date (undo support).
 
-    Rewrites the log file excluding entries with matching date.
-    Returns the number of entries removed.
+    Appends a single tombstone line to the yearly log; nothing is rewritten.
+    Returns 1 if a tombstone was written, 0 if there is no log for that year.
     """
     log_path = _log_path_for_date(log_dir, date)
     if not os.path.isfile(log_path):
         return 0
 
-    kept: list[str] = []
-    removed = 0
-    with open(log_path, "r", encoding="utf-8") as f:
-        for line in f:
-            stripped = line.strip()
+    tombstone = {"tombstone": True, "date": date, "at": datetime.now().isoformat(timespec="seconds")}
+    with _file_lock(log_path):
+        in_sync = _index_in_sync(log_path)
+        _append_line(log_path, tombstone)
+        _update_index(log_path, in_sync, drop_date=date)
+    return 1
+
+
+LiveLine = Tuple[str, Optional[Dict[str, Any]], int]
+
+
+def _read_live_lines(path: str) -> Tuple[List[LiveLine], int, int]:
+    """Lines of one log with tombstones applied.
+
+    Returns ``(live, lines, tombstones)``: ``live`` holds ``(raw_line, entry,
+    offset)`` in file order — ``entry`` is None for lines that are not valid
+    JSON, which are kept as-is — and the counts cover every non-empty line read.
+    """
+    live: List[Optional[LiveLine]] = []
+    by_date: Dict[str, List[int]] = {}
+    lines = tombstones = 0
+    offset = 0
+    with open(path, "rb") as f:
+        for raw_bytes in f:
+            line_offset = offset
+            offset += len(raw_bytes)
+            stripped = raw_bytes.decode("utf-8").strip()
             if not stripped:
                 continue
+            lines += 1
             try:
-                entry = json.loads(stripped)
-            except json.JSONDecodeError:
-                kept.append(stripped)
+                entry = json_codec.loads(stripped)
+            except json_codec.JSONDecodeError:
+                live.append((stripped, None, line_offset))
                 continue
-            if entry.get("date") == date:
-                removed += 1
-            else:
-                kept.append(stripped)
+            date = entry.get("date", "") if isinstance(entry, dict) else ""
+            if isinstance(entry, dict) and entry.get("tombstone"):
+                tombstones += 1
+                for idx in by_date.pop(date, ()):
+                    live[idx] = None
+                continue
+            by_date.setdefault(date, []).append(len(live))
+            live.append((stripped, entry, line_offset))
+    return [item for item in live if item is not None], lines, tombstones
+
 
-    if removed > 0:
-        with open(log_path, "w", encoding="utf-8") as f:
-            for line in kept:
-                f.write(line + "\n")
+def latest_outdoor_session(log_dir: str, date: str) -> Optional[Dict[str, Any]]:
+    """Most recently logged live session for *date*, or None.
 
-    return removed
+    Reads the year's log newest-first and stops at the first entry or
+    tombstone for that date, so the usual case (the day just logged) reads a
+    single block.
+    """
+    for entry in read_tail(_log_path_for_date(log_dir, date), loader="outdoor_latest"):
+        if entry.get("date") != date:
+            continue
+        return None if entry.get("tombstone") else entry
+    return None
 
 
 def load_outdoor_sessions(
@@ -171,26 +261,54 @@ def load_outdoor_sessions(
     if not os.path.isdir(log_dir):
         return sessions
 
+    scanned = 0
     for fn in sorted(os.listdir(log_dir)):
         if not fn.startswith("outdoor_sessions_") or not fn.endswith(".jsonl"):
             continue
-        path = os.path.join(log_dir, fn)
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line:
-                    continue
-                try:
-                    entry = json.loads(line)
-                except json.JSONDecodeError:
-                    continue
-                if since_date and entry.get("date", "") < since_date:
-                    continue
-                sessions.append(entry)
+        live, lines, _ = _read_live_lines(os.path.join(log_dir, fn))
+        scanned += lines
+        for _, entry, _ in live:
+            if entry is None:
+                continue
+            if since_date and entry.get("date", "") < since_date:
+                continue
+            sessions.append(entry)
 
+    JSONL_LINES_SCANNED.inc(scanned, loader="outdoor_sessions")
     return sessions
 
 
+def compact_outdoor_log(
+    log_dir: str,
+    min_ratio: float = COMPACT_TOMBSTONE_RATIO,
+) -> Dict[str, int]:
+    """Rewrite yearly logs whose tombstone ratio is at least *min_ratio*.
+
+    Tombstoned entries and the tombstones are dropped; unparseable lines are
+    kept. Returns ``{"files_rewritten", "lines_dropped"}``.
+    """
+    result = {"files_rewritten": 0, "lines_dropped": 0}
+    if not os.path.isdir(log_dir):
+        return result
+    for fn in sorted(os.listdir(log_dir)):
+        if not fn.startswith("outdoor_sessions_") or not fn.endswith(".jsonl"):
+            continue
+        path = os.path.join(log_dir, fn)
+        with _file_lock(path):
+            live, lines, tombstones = _read_live_lines(path)
+            if not tombstones or tombstones / lines < min_ratio:
+                continue
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                for raw, _, _ in live:
+                    f.write(raw + "\n")
+            os.replace(tmp, path)
+            _write_index(path, _index_from_live(_read_live_lines(path)[0]))
+        result["files_rewritten"] += 1
+        result["lines_dropped"] += lines - len(live)
+    return result
+
+
 def compute_outdoor_stats(sessions: List[Dict[str, Any]]) -> Dict[str, Any]:
     """Compute aggregated statistics from outdoor sessions."""
     if not sessions:
@@ -253,3 +371,341 @@ def compute_outdoor_stats(sessions: List[Dict[str, Any]]) -> Dict[str, Any]:
         "total_load": total_load,
         "avg_load_per_session": avg_load,
     }
+
+
+# ---------------------------------------------------------------------------
+# Per-year index: stats aggregates and session rows
+# ---------------------------------------------------------------------------
+
+INDEX_VERSION = 2
+
+# Additive counters of a contribution; the dict-valued ones count per key.
+_SCALAR_FIELDS = ("sessions", "routes", "sent", "onsight", "onsight_styled", "flash", "load")
+_COUNT_FIELDS = ("grades", "sent_grades", "spots")
+
+
+def _empty_contribution() -> Dict[str, Any]:
+    contrib: Dict[str, Any] = {k: 0 for k in _SCALAR_FIELDS}
+    contrib.update({k: {} for k in _COUNT_FIELDS})
+    return contrib
+
+
+def _session_contribution(session: Dict[str, Any]) -> Dict[str, Any]:
+    """Counters one session adds to its day (see ``compute_outdoor_stats``)."""
+    contrib = _empty_contribution()
+    contrib["sessions"] = 1
+    contrib["load"] = compute_outdoor_load_score(session)
+    spot = session.get("spot_name")
+    if spot:
+        contrib["spots"][spot] = 1
+    for route in session.get("routes") or []:
+        contrib["routes"] += 1
+        grade = route.get("grade", "unknown")
+        contrib["grades"][grade] = contrib["grades"].get(grade, 0) + 1
+        attempts = route.get("attempts") or []
+        if not any(a.get("result") == "sent" for a in attempts):
+            continue
+        contrib["sent"] += 1
+        contrib["sent_grades"][grade] = contrib["sent_grades"].get(grade, 0) + 1
+        style = route.get("style")
+        if style == "onsight":
+            contrib["onsight"] += 1
+            contrib["onsight_styled"] += 1
+        elif style == "flash":
+            contrib["flash"] += 1
+        elif style is None and len(attempts) == 1 and attempts[0].get("result") == "sent":
+            contrib["onsight"] += 1
+    return contrib
+
+
+def _merge(into: Dict[str, Any], other: Dict[str, Any], sign: int = 1) -> None:
+    """Add (or with ``sign=-1`` subtract) *other* into *into*."""
+    for k in _SCALAR_FIELDS:
+        into[k] += sign * other[k]
+    for k in _COUNT_FIELDS:
+        counts = into[k]
+        for key, n in other[k].items():
+            total = counts.get(key, 0) + sign * n
+            if total:
+                counts[key] = total
+            else:
+                counts.pop(key, None)
+
+
+def _session_row(entry: Dict[str, Any], offset: int) -> List[Any]:
+    """Index row ``[date, offset, spot_id, discipline, grade_indices]``."""
+    grades = {(route.get("grade") if isinstance(route, dict) else None) for route in entry.get("routes") or []}
+    return [
+        entry.get("date", ""),
+        offset,
+        entry.get("spot_id"),
+        entry.get("discipline"),
+        sorted(grade_index(g) for g in grades if g in _GRADE_WEIGHT),
+    ]
+
+
+def _index_path(log_path: str) -> str:
+    head, fn = os.path.split(log_path)
+    year = fn[len("outdoor_sessions_"):-len(".jsonl")]
+    return os.path.join(head, f"outdoor_index_{year}.json")
+
+
+def _log_sig(log_path: str) -> Optional[List[int]]:
+    try:
+        st = os.stat(log_path)
+    except OSError:
+        return None
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _read_index(log_path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_index_path(log_path), "rb") as f:
+            index = json_codec.loads(f.read())
+    except (OSError, ValueError):
+        return None
+    if not isinstance(index, dict) or index.get("version") != INDEX_VERSION:
+        return None
+    return index
+
+
+def _write_index(log_path: str, index: Dict[str, Any]) -> None:
+    index["version"] = INDEX_VERSION
+    index["log_sig"] = _log_sig(log_path)
+    path = _index_path(log_path)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(json_codec.dumps_bytes(index, sort_keys=True))
+    os.replace(tmp, path)
+
+
+def _index_from_live(live: List[LiveLine]) -> Dict[str, Any]:
+    index: Dict[str, Any] = {"days": {}, "months": {}, "entries": []}
+    for _, entry, offset in live:
+        if isinstance(entry, dict):
+            _add_session(index, entry, offset)
+    return index
+
+
+def _add_session(index: Dict[str, Any], entry: Dict[str, Any], offset: int) -> None:
+    date = entry.get("date", "")
+    contrib = _session_contribution(entry)
+    for bucket, key in (("days", date), ("months", date[:7])):
+        target = index[bucket].setdefault(key, _empty_contribution())
+        _merge(target, contrib)
+    index["entries"].append(_session_row(entry, offset))
+
+
+def _drop_day(index: Dict[str, Any], date: str) -> None:
+    index["entries"] = [row for row in index["entries"] if row[0] != date]
+    day = index["days"].pop(date, None)
+    if day is None:
+        return
+    month = index["months"][date[:7]]
+    _merge(month, day, sign=-1)
+    if not month["sessions"]:
+        del index["months"][date[:7]]
+
+
+def _index_in_sync(log_path: str) -> bool:
+    index = _read_index(log_path)
+    return index is not None and index.get("log_sig") == _log_sig(log_path)
+
+
+def _update_index(
+    log_path: str,
+    in_sync: bool,
+    add: Optional[Tuple[Dict[str, Any], int]] = None,
+    drop_date: Optional[str] = None,
+) -> None:
+    """Apply one append to the index (caller holds the file lock).
+
+    *in_sync* is whether the index matched the log before the write; if not,
+    it is rebuilt from the log instead.
+    """
+    index = _read_index(log_path) if in_sync else None
+    if index is None:
+        index = _index_from_live(_read_live_lines(log_path)[0])
+    elif add is not None:
+        _add_session(index, *add)
+    elif drop_date is not None:
+        _drop_day(index, drop_date)
+    _write_index(log_path, index)
+
+
+def _load_index(log_path: str) -> Dict[str, Any]:
+    index = _read_index(log_path)
+    if index is not None and index.get("log_sig") == _log_sig(log_path):
+        return index
+    with _file_lock(log_path):
+        index = _read_index(log_path)
+        if index is None or index.get("log_sig") != _log_sig(log_path):
+            live, lines, _ = _read_live_lines(log_path)
+            JSONL_LINES_SCANNED.inc(lines, loader="outdoor_index")
+            index = _index_from_live(live)
+            _write_index(log_path, index)
+    return index
+
+
+def _year_logs(log_dir: str, since_date: Optional[str], until_date: Optional[str]) -> List[str]:
+    """Paths of the yearly logs that can hold dates in [since, until]."""
+    if not os.path.isdir(log_dir):
+        return []
+    paths = []
+    for fn in sorted(os.listdir(log_dir)):
+        if not fn.startswith("outdoor_sessions_") or not fn.endswith(".jsonl"):
+            continue
+        year = fn[len("outdoor_sessions_"):-len(".jsonl")]
+        if (since_date and year < since_date[:4]) or (until_date and year > until_date[:4]):
+            continue
+        paths.append(os.path.join(log_dir, fn))
+    return paths
+
+
+def outdoor_aggregate(
+    log_dir: str,
+    since_date: Optional[str] = None,
+    until_date: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Summed counters of every outdoor session dated in [since, until].
+
+    Months entirely inside the range are taken from their month bucket; only
+    a partially covered month is summed day by day.
+    """
+    total = _empty_contribution()
+    for log_path in _year_logs(log_dir, since_date, until_date):
+        agg = _load_index(log_path)
+        days_by_month: Optional[Dict[str, List[str]]] = None
+        for month, counters in agg["months"].items():
+            if (not since_date or f"{month}-01" >= since_date) and (not until_date or f"{month}-31" <= until_date):
+                _merge(total, counters)
+                continue
+            if days_by_month is None:
+                days_by_month = {}
+                for day in agg["days"]:
+                    days_by_month.setdefault(day[:7], []).append(day)
+            for day in days_by_month.get(month, ()):
+                if (not since_date or day >= since_date) and (not until_date or day <= until_date):
+                    _merge(total, agg["days"][day])
+    return total
+
+
+def outdoor_stats(log_dir: str, since_date: Optional[str] = None) -> Dict[str, Any]:
+    """``compute_outdoor_stats`` of the logged sessions, from the aggregates."""
+    agg = outdoor_aggregate(log_dir, since_date)
+    sessions = agg["sessions"]
+    routes = agg["routes"]
+
+    def pct(n: int) -> float:
+        return round(n / routes * 100, 1) if routes else 0.0
+
+    return {
+        "total_sessions": sessions,
+        "total_routes": routes,
+        "grade_histogram": dict(sorted(agg["grades"].items())),
+        "onsight_pct": pct(agg["onsight"]),
+        "flash_pct": pct(agg["flash"]),
+        "sent_pct": pct(agg["sent"]),
+        "top_grade_sent": max(agg["sent_grades"]) if agg["sent_grades"] else None,
+        "total_load": agg["load"],
+        "avg_load_per_session": round(agg["load"] / sessions, 1) if sessions else 0.0,
+    }
+
+
+def parse_cursor(cursor: str) -> Tuple[str, int]:
+    """Split a ``"<date>:<n>"`` listing cursor; raises ValueError if malformed."""
+    date, sep, n = cursor.rpartition(":")
+    if not sep or not n.isdigit():
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    datetime.strptime(date, "%Y-%m-%d")
+    return date, int(n)
+
+
+def list_outdoor_sessions(
+    log_dir: str,
+    since_date: Optional[str] = None,
+    until_date: Optional[str] = None,
+    spot_id: Optional[str] = None,
+    discipline: Optional[str] = None,
+    grade_min: Optional[str] = None,
+    grade_max: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = None,
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page of outdoor sessions in date order, filtered on the index.
+
+    A grade range keeps sessions with at least one route graded within it.
+    *cursor* is the ``next_cursor`` of the previous page: the last date
+    returned and how many sessions of that date were already returned.
+    Returns ``(sessions, next_cursor)``; ``next_cursor`` is None on the last
+    page. Only the lines of the returned sessions are read from the logs.
+    """
+    lo = grade_index(grade_min) if grade_min else None
+    hi = grade_index(grade_max) if grade_max else None
+    after_date, skip = parse_cursor(cursor) if cursor else ("", 0)
+
+    # Compaction replaces a log (new inode) and moves every offset; appends
+    # keep offsets valid. A page that raced a compaction is simply rebuilt.
+    for _ in range(3):
+        inodes: Dict[str, int] = {}
+        rows: List[Tuple[str, int, str]] = []
+        for log_path in _year_logs(log_dir, since_date or after_date or None, until_date):
+            try:
+                inodes[log_path] = os.stat(log_path).st_ino
+            except OSError:
+                continue
+            for date, offset, row_spot, row_discipline, grades in _load_index(log_path)["entries"]:
+                if (since_date and date < since_date) or (until_date and date > until_date) or date < after_date:
+                    continue
+                if (spot_id and row_spot != spot_id) or (discipline and row_discipline != discipline):
+                    continue
+                if (lo is not None or hi is not None) and not any(
+                    (lo is None or g >= lo) and (hi is None or g <= hi) for g in grades
+                ):
+                    continue
+                rows.append((date, offset, log_path))
+        rows.sort()
+
+        start = 0
+        remaining = skip
+        while remaining and start < len(rows) and rows[start][0] == after_date:
+            start += 1
+            remaining -= 1
+        end = len(rows) if limit is None else start + limit
+        page = rows[start:end]
+
+        sessions = _read_rows(page, inodes)
+        if sessions is None:
+            continue
+        JSONL_LINES_SCANNED.inc(len(sessions), loader="outdoor_page")
+
+        next_cursor = None
+        if end < len(rows) and page:
+            last = page[-1][0]
+            next_cursor = f"{last}:{sum(1 for r in rows[:end] if r[0] == last)}"
+        return sessions, next_cursor
+    raise RuntimeError(f"Outdoor logs in {log_dir} kept changing during listing")
+
+
+def _read_rows(rows: List[Tuple[str, int, str]], inodes: Dict[str, int]) -> Optional[List[Dict[str, Any]]]:
+    """Entries at the rows' offsets, or None if a log was replaced meanwhile."""
+    sessions = []
+    handles: Dict[str, Any] = {}
+    try:
+        for _, offset, log_path in rows:
+            f = handles.get(log_path)
+            if f is None:
+                f = handles[log_path] = open(log_path, "rb")
+                if os.fstat(f.fileno()).st_ino != inodes[log_path]:
+                    return None
+            f.seek(offset)
+            entry = json_codec.loads(f.readline())
+            if "load_score" not in entry:  # written before scores were stored
+                entry["load_score"] = compute_outdoor_load_score(entry)
+            sessions.append(entry)
+    except OSError:
+        return None
+    finally:
+        for f in handles.values():
+            f.close()
+    return sessions
@@ -0,0 +1,181 @@
+"""Event-sourced week plans: snapshots plus an append-only edit log.
+
+Every edit of a stored week (replanner events, day overrides, quick-adds)
+is recorded instead of being known only through its result::
+
+    {
+        "seq": 12,                 # last entry number handed out
+        "revision": 14,            # plan_revision of the materialized plan
+        "snapshots": [{"seq": 10, "plan": {...}}, ...],   # oldest first
+        "entries": [{"seq": 11, "op": "events", "at": "...", "args": {...}}, ...],
+    }
+
+The materialized plan itself lives where it always has (``week_plans`` in
+the user state); the log is kept next to it under ``plan_logs``. ``append``
+applies an edit to the caller's plan in place, so an edit costs what the
+edit touches rather than a copy of the week. Every ``SNAPSHOT_EVERY``
+entries the plan is snapshotted; only the newest ``KEEP_SNAPSHOTS``
+snapshots and the entries after the oldest of them are kept, which bounds
+both the log and how far ``undo`` reaches.
+
+Every recorded edit gives the plan a new ``plan_revision`` (the replanner
+functions do not all bump it), so ``is_head`` can tell the current plan
+from any earlier version a client still holds.
+
+``undo`` drops the last entry and replays the remaining ones on top of the
+newest snapshot before them. It refuses edits whose request also changed
+data outside the plan (``undo_outdoor`` tombstones the outdoor log entry),
+since replaying the plan alone would not reverse them.
+
+``OPS`` maps each op to the replanner function that applies it; entry args
+are copied before the first application, so a replay sees the same inputs
+(``set_availability`` edits the availability it is given).
+"""
+
+from __future__ import annotations
+
+from copy import deepcopy
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Tuple
+
+from backend.engine.replanner_v1 import apply_day_add, apply_day_override, apply_events
+
+SNAPSHOT_EVERY = 10
+KEEP_SNAPSHOTS = 3
+
+# Event types whose replay needs the state they were applied against
+_CONTEXT_EVENTS = frozenset({"set_availability", "change_gym"})
+_CONTEXT_KEYS = ("availability", "planning_prefs", "gyms")
+# Event types whose request also changes data outside the plan
+_EXTERNAL_EVENTS = frozenset({"undo_outdoor"})
+
+
+def _op_events(plan: Dict[str, Any], args: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    context = {k: args.get(k) for k in _CONTEXT_KEYS}
+    return apply_events(plan, args["events"], copy=False, **context), []
+
+
+def _op_override(plan: Dict[str, Any], args: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    return apply_day_override(plan, copy=False, **args), []
+
+
+def _op_quick_add(plan: Dict[str, Any], args: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    return apply_day_add(plan, copy=False, **args)
+
+
+OPS: Dict[str, Callable[[Dict[str, Any], Dict[str, Any]], Tuple[Dict[str, Any], List[str]]]] = {
+    "events": _op_events,
+    "override": _op_override,
+    "quick_add": _op_quick_add,
+}
+
+
+def start(plan: Dict[str, Any]) -> Dict[str, Any]:
+    """New log whose base snapshot is *plan*."""
+    return {
+        "seq": 0,
+        "revision": plan.get("plan_revision"),
+        "snapshots": [{"seq": 0, "plan": deepcopy(plan)}],
+        "entries": [],
+    }
+
+
+def is_head(log: Dict[str, Any], plan: Dict[str, Any]) -> bool:
+    """True if *plan* is the plan *log* materializes to (same revision)."""
+    return log.get("revision") == plan.get("plan_revision")
+
+
+def _recordable(op: str, args: Dict[str, Any]) -> Dict[str, Any]:
+    if op == "events" and not any(e.get("event_type") in _CONTEXT_EVENTS for e in args.get("events") or []):
+        args = {k: v for k, v in args.items() if k not in _CONTEXT_KEYS}
+    return deepcopy(args)
+
+
+def append(
+    log: Dict[str, Any],
+    plan: Dict[str, Any],
+    op: str,
+    args: Dict[str, Any],
+) -> Tuple[Dict[str, Any], List[str]]:
+    """Apply one edit to *plan* in place and record it. Returns (plan, warnings).
+
+    On error nothing is recorded and *plan* may be partly updated; the
+    caller discards it (routers never save a failed request).
+    """
+    if op not in OPS:
+        raise ValueError(f"Unknown plan log op: {op}")
+    recorded = _recordable(op, args)
+    plan, warnings = OPS[op](plan, args)
+    plan["plan_revision"] = max(int(plan.get("plan_revision") or 0), int(log.get("revision") or 0) + 1)
+
+    log["seq"] += 1
+    log["revision"] = plan["plan_revision"]
+    log["entries"].append({
+        "seq": log["seq"],
+        "op": op,
+        "at": datetime.now().isoformat(timespec="seconds"),
+        "args": recorded,
+    })
+    snapshots = log["snapshots"]
+    if log["seq"] - snapshots[-1]["seq"] >= SNAPSHOT_EVERY:
+        snapshots.append({"seq": log["seq"], "plan": deepcopy(plan)})
+        del snapshots[:-KEEP_SNAPSHOTS]
+        log["entries"] = [e for e in log["entries"] if e["seq"] > snapshots[0]["seq"]]
+    return plan, warnings
+
+
+def materialize(log: Dict[str, Any]) -> Dict[str, Any]:
+    """Rebuild the current plan from the newest snapshot and later entries."""
+    snapshot = log["snapshots"][-1]
+    plan = deepcopy(snapshot["plan"])
+    replayed = False
+    for entry in log["entries"]:
+        if entry["seq"] > snapshot["seq"]:
+            plan, _ = OPS[entry["op"]](plan, deepcopy(entry["args"]))
+            replayed = True
+    if replayed:
+        plan["plan_revision"] = log["revision"]
+    return plan
+
+
+def _reversible(entry: Dict[str, Any]) -> bool:
+    if entry["op"] != "events":
+        return True
+    return not any(e.get("event_type") in _EXTERNAL_EVENTS for e in entry["args"].get("events") or [])
+
+
+def can_undo(log: Dict[str, Any]) -> bool:
+    """True if ``undo`` would succeed."""
+    return bool(log["entries"]) and _reversible(log["entries"][-1])
+
+
+def undo(log: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop the last recorded edit; returns the plan as it was before it.
+
+    The returned plan gets a new, higher ``plan_revision`` so clients holding
+    the undone version see a change. Raises ValueError when there is nothing
+    left to undo or the last edit changed data outside the plan.
+    """
+    if not log["entries"]:
+        raise ValueError("Nothing to undo")
+    if not _reversible(log["entries"][-1]):
+        raise ValueError("The last edit also changed the outdoor log and cannot be undone")
+    dropped = log["entries"].pop()
+    log["snapshots"] = [s for s in log["snapshots"] if s["seq"] < dropped["seq"]]
+    plan = materialize(log)
+    plan["plan_revision"] = int(log.get("revision") or 1) + 1
+    log["revision"] = plan["plan_revision"]
+    return plan
+
+
+def history(log: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Recorded edits, oldest first, without the state they were replayed with."""
+    return [
+        {
+            "seq": e["seq"],
+            "op": e["op"],
+            "at": e["at"],
+            "args": {k: v for k, v in e["args"].items() if k not in _CONTEXT_KEYS},
+        }
+        for e in log["entries"]
+    ]
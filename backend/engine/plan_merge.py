@@ -0,0 +1,198 @@
+"""Merging a regenerated week plan with the one it replaces.
+
+Regenerating a week must not lose what the user already did with it:
+completed/skipped sessions (and, after a cache invalidation, quick-adds)
+and day-level fields such as outdoor sessions and other activities are
+carried over into the new plan. Days are matched by date
+(``preserve_completed``, forced regeneration of the same week) or by
+weekday (``preserve_by_weekday``, when the macrocycle start may have
+shifted). Within a day a carried-over session takes the slot of whatever
+the new plan put there.
+
+Both plans are indexed once by day key, so a merge is linear in the size
+of the two weeks. The result is the new plan updated in place when the
+caller owns it (``copy=False``), otherwise a copy. ``diff_slots`` lists
+the (date, slot) pairs whose sessions differ between two plans, so callers
+can redo per-slot work (resolution) for those only.
+"""
+
+from __future__ import annotations
+
+from copy import deepcopy
+from datetime import date
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.engine.planner_v2 import SLOTS
+
+DAY_LEVEL_FIELDS = (
+    "outdoor_spot_name", "outdoor_spot_id", "outdoor_discipline",
+    "outdoor_session_status", "other_activity", "other_activity_name",
+    "other_activity_slot", "other_activity_status",
+    "other_activity_feedback", "other_activity_load",
+)
+
+
+def recompute_day_status(day: Dict[str, Any]) -> None:
+    """Derive day-level status from its sessions' statuses."""
+    sessions = day.get("sessions") or []
+    if not sessions:
+        day.pop("status", None)
+        return
+    statuses = [s.get("status") for s in sessions]
+    if all(st == "done" for st in statuses):
+        day["status"] = "done"
+    elif all(st == "skipped" for st in statuses):
+        day["status"] = "skipped"
+    elif all(st in ("done", "skipped") for st in statuses):
+        day["status"] = "done"
+    else:
+        day.pop("status", None)
+
+
+def is_completed(session: Dict[str, Any]) -> bool:
+    return session.get("status") in ("done", "skipped")
+
+
+def is_preservable(session: Dict[str, Any]) -> bool:
+    """Return True if *session* should survive a plan regeneration."""
+    if is_completed(session):
+        return True
+    if "quick_add" in (session.get("constraints_applied") or []):
+        return True
+    return False
+
+
+@lru_cache(maxsize=512)
+def _weekday(date_str: str) -> int:
+    return date.fromisoformat(date_str).weekday()
+
+
+def _by_date(day: Dict[str, Any]) -> Optional[str]:
+    return day.get("date")
+
+
+def _by_weekday(day: Dict[str, Any]) -> Optional[int]:
+    try:
+        return _weekday(day["date"])
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _days(plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return (plan.get("weeks") or [{}])[0].get("days", [])
+
+
+def _session_order(s: Dict[str, Any]) -> Tuple[int, Any, str]:
+    return (SLOTS.index(s.get("slot", "evening")), s.get("priority", 99), s.get("session_id", ""))
+
+
+def _merge(
+    old_plan: Dict[str, Any],
+    result: Dict[str, Any],
+    key: Callable[[Dict[str, Any]], Any],
+    preserve: Callable[[Dict[str, Any]], bool],
+) -> bool:
+    """Carry sessions and day fields of *old_plan* into *result* (in place).
+
+    Returns False when *old_plan* had nothing to carry over.
+    """
+    # Preserved sessions per day key and slot; a later one in a slot wins
+    preserved: Dict[Any, Dict[Any, Dict[str, Any]]] = {}
+    extras: Dict[Any, Dict[str, Any]] = {}
+    for day in _days(old_plan):
+        k = key(day)
+        if k is None:
+            continue
+        for s in day.get("sessions", []):
+            if preserve(s):
+                preserved.setdefault(k, {})[s.get("slot")] = s
+        fields = {f: day[f] for f in DAY_LEVEL_FIELDS if f in day}
+        if fields:
+            extras[k] = fields
+    if not preserved and not extras:
+        return False
+
+    merged_keys = set()
+    for day in _days(result):
+        k = key(day)
+        if k is None or k in merged_keys:
+            continue
+        merged_keys.add(k)
+        by_slot = preserved.get(k)
+        if by_slot:
+            sessions = day.get("sessions", [])
+            occupied = {s.get("slot") for s in sessions}
+            # Replace the auto-generated sessions in a preserved slot, append the rest
+            day["sessions"] = [by_slot.get(s.get("slot"), s) for s in sessions]
+            day["sessions"].extend(s for slot, s in by_slot.items() if slot not in occupied)
+            day["sessions"].sort(key=_session_order)
+        if k in extras:
+            day.update(extras[k])
+    return True
+
+
+def _finish(result: Dict[str, Any]) -> None:
+    for day in _days(result):
+        recompute_day_status(day)
+    result["plan_revision"] = int(result.get("plan_revision") or 1) + 1
+
+
+def preserve_completed(
+    old_plan: Dict[str, Any],
+    new_plan: Dict[str, Any],
+    *,
+    copy: bool = True,
+) -> Dict[str, Any]:
+    """Merge completed/skipped sessions and day fields of *old_plan* by date."""
+    result = deepcopy(new_plan) if copy else new_plan
+    _merge(old_plan, result, _by_date, is_completed)
+    _finish(result)
+    return result
+
+
+def preserve_by_weekday(
+    prev_plan: Dict[str, Any],
+    new_plan: Dict[str, Any],
+    *,
+    copy: bool = True,
+) -> Dict[str, Any]:
+    """Merge preservable sessions and day fields of *prev_plan* by weekday.
+
+    Unchanged (and not re-revisioned) when *prev_plan* has nothing to keep.
+    """
+    result = deepcopy(new_plan) if copy else new_plan
+    if _merge(prev_plan, result, _by_weekday, is_preservable):
+        _finish(result)
+    return result
+
+
+def _slot_index(plan: Dict[str, Any]) -> Dict[Tuple[str, Any], Tuple[tuple, ...]]:
+    index: Dict[Tuple[str, Any], Tuple[tuple, ...]] = {}
+    for day in _days(plan):
+        for s in day.get("sessions") or []:
+            k = (day.get("date"), s.get("slot"))
+            sig = (s.get("session_id"), s.get("location"), s.get("gym_id"), s.get("status"))
+            index[k] = index.get(k, ()) + (sig,)
+    return index
+
+
+def diff_slots(old_plan: Dict[str, Any], new_plan: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """(date, slot) pairs whose sessions differ, sorted by date and slot.
+
+    Each entry is ``{"date", "slot", "before", "after"}`` with the session
+    ids in that slot (empty lists when the slot was or became free).
+    """
+    before = _slot_index(old_plan)
+    after = _slot_index(new_plan)
+    changed = []
+    for k in before.keys() | after.keys():
+        if before.get(k) != after.get(k):
+            changed.append({
+                "date": k[0],
+                "slot": k[1],
+                "before": [sig[0] for sig in before.get(k, ())],
+                "after": [sig[0] for sig in after.get(k, ())],
+            })
+    changed.sort(key=lambda c: (c["date"] or "", SLOTS.index(c["slot"]) if c["slot"] in SLOTS else len(SLOTS)))
+    return changed
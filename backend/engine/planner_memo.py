@@ -0,0 +1,125 @@
+"""Process-wide memo of ``generate_phase_week``.
+
+A phase week depends on its inputs only relative to the week itself: users
+onboarding with the same availability template, phase, pool and equipment
+get the same week, just on different dates. The memo key is a hash of the
+inputs normalized to the week:
+
+- availability and prefs as canonical JSON, plus the start weekday (the
+  planner reads availability by weekday name),
+- the allowed locations as the sorted set the planner uses,
+- home and gym equipment as ``equipment`` masks (gym ids and priorities kept,
+  since they pick the gym),
+- pre-trip dates and ``today`` as day offsets into the week (dates outside
+  it change nothing).
+
+A hit returns a deep copy of the cached week moved to the requested dates
+(``start_date``, each day's ``date``, a fresh ``generated_at``). Entries are
+evicted least-recently-used beyond ``MAX_ENTRIES``; the catalog is fixed for
+the life of the process, so nothing else invalidates them.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import inspect
+import json
+import threading
+from collections import OrderedDict
+from copy import deepcopy
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+from backend.engine.equipment import location_mask
+from backend.engine.metrics import record_cache
+
+MAX_ENTRIES = 512
+
+_lock = threading.Lock()
+_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+
+def _parse(value: str) -> date:
+    return datetime.strptime(value, "%Y-%m-%d").date()
+
+
+def week_key(args: Dict[str, Any]) -> str:
+    """Canonical hash of ``generate_phase_week`` keyword arguments."""
+    start = _parse(args["start_date"])
+    pretrip = sorted({
+        offset for offset in ((_parse(d) - start).days for d in (args.get("pretrip_dates") or []))
+        if 0 <= offset < 7
+    })
+    # Days before today are skipped; None (no skipping) is the same as offset 0
+    today = args.get("today")
+    today_offset = min(7, max(0, (_parse(today) - start).days)) if today else 0
+    home = args.get("home_equipment")
+    canonical = {
+        "phase_id": args["phase_id"],
+        "domain_weights": args["domain_weights"],
+        "session_pool": list(args["session_pool"]),
+        "weekday": start.weekday(),
+        "availability": args.get("availability"),
+        "allowed_locations": sorted(set(args.get("allowed_locations") or ["home", "gym"])),
+        "hard_cap_per_week": args.get("hard_cap_per_week"),
+        "planning_prefs": args.get("planning_prefs"),
+        "default_gym_id": args.get("default_gym_id"),
+        "gyms": [
+            [g.get("gym_id"), g.get("priority"), location_mask(g.get("equipment") or [], "gym")]
+            for g in (args.get("gyms") or [])
+        ],
+        "home": None if home is None else location_mask(home, "home"),
+        "intensity_cap": args.get("intensity_cap"),
+        "pretrip": pretrip,
+        "today": today_offset,
+        "is_last_week_of_phase": bool(args.get("is_last_week_of_phase")),
+        "inject_tests": bool(args.get("inject_tests")),
+        "planner_mode": args.get("planner_mode"),
+    }
+    blob = json.dumps(canonical, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha1(blob.encode("utf-8")).hexdigest()
+
+
+def _moved(plan: Dict[str, Any], start_date: str) -> Dict[str, Any]:
+    out = deepcopy(plan)
+    start = _parse(start_date)
+    out["start_date"] = start_date
+    out["generated_at"] = datetime.now().isoformat(timespec="seconds")
+    for week in out.get("weeks", []):
+        for offset, day in enumerate(week.get("days", [])):
+            day["date"] = (start + timedelta(days=offset)).isoformat()
+    return out
+
+
+def memoized_week(fn: Callable[..., Dict[str, Any]]) -> Callable[..., Dict[str, Any]]:
+    """Decorator memoizing a keyword-only ``generate_phase_week``."""
+    signature = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(**kwargs: Any) -> Dict[str, Any]:
+        bound = signature.bind(**kwargs)
+        bound.apply_defaults()
+        key = week_key(bound.arguments)
+        with _lock:
+            hit: Optional[Dict[str, Any]] = _cache.get(key)
+            if hit is not None:
+                _cache.move_to_end(key)
+        record_cache("phase_week", hit is not None)
+        if hit is not None:
+            return _moved(hit, kwargs["start_date"])
+
+        plan = fn(**kwargs)
+        with _lock:
+            _cache[key] = deepcopy(plan)
+            while len(_cache) > MAX_ENTRIES:
+                _cache.popitem(last=False)
+        return plan
+
+    return wrapper
+
+
+def clear() -> None:
+    """Drop every memoized week."""
+    with _lock:
+        _cache.clear()
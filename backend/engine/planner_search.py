@@ -0,0 +1,140 @@
+"""Bounded search over a phase week (``planner_mode="search"``).
+
+The greedy passes of ``planner_v2`` walk the session pool in order and never
+revisit a choice, so a session taken early can leave a later day with nothing
+that fits (which is what ``_CLIMBING_FALLBACKS`` papers over). This module
+searches the week instead: every trainable day gets one of its candidate
+sessions or stays empty, subject to the weekly rules
+
+- at most ``max_per_week`` placements of a session,
+- at most ``hard_cap`` hard days, never two in a row,
+- no finger sessions on consecutive days (48h gap),
+
+and the best week wins. Weeks are compared by days trained, then by domain
+coverage ``sum(w_d * (1 - 0.5 ** n_d))`` over the phase's domain weights (a
+second session on the same domain is worth half the first), then by pool
+order (earlier days get earlier pool sessions). Per-day rules (slot,
+location, equipment, pre-trip dates, intensity) are the caller's job: they
+decide which candidates a day gets.
+
+The search is a dynamic program over days: what the rest of the week can
+still earn depends only on the sessions used so far, the domain counts, the
+hard days used and whether the previous day was hard/finger, so each such
+state is solved once. Work is bounded by a node budget (states expanded),
+not a clock, so the same inputs always give the same week; past the budget
+the remaining days take their first feasible candidate, like the greedy.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_NODE_BUDGET = 20000
+
+
+@dataclass(frozen=True)
+class Candidate:
+    session_id: str
+    hard: bool = False
+    finger: bool = False
+    max_per_week: int = 1
+    domains: Tuple[int, ...] = ()
+
+
+@dataclass
+class SearchResult:
+    choice: Dict[int, Candidate] = field(default_factory=dict)
+    days_trained: int = 0
+    coverage: float = 0.0
+    nodes: int = 0
+    exhausted: bool = False
+
+
+def coverage(domain_counts: Sequence[int], weights: Sequence[float]) -> float:
+    return sum(w * (1.0 - 0.5 ** n) for w, n in zip(weights, domain_counts))
+
+
+# (days trained, coverage gained, chosen candidate per remaining day)
+_Value = Tuple[int, float, Tuple[Optional[Candidate], ...]]
+
+
+_EPS = 1e-9
+
+
+def _better(a: _Value, b: Optional[_Value]) -> bool:
+    # Coverage ties within float noise keep the earlier (pool order) option
+    return b is None or a[0] > b[0] or (a[0] == b[0] and a[1] > b[1] + _EPS)
+
+
+def search_week(
+    candidates: Dict[int, List[Candidate]],
+    weights: Sequence[float],
+    hard_cap: int,
+    node_budget: int = DEFAULT_NODE_BUDGET,
+) -> SearchResult:
+    """Best assignment of *candidates* (day offset → options in pool order)."""
+    days = sorted(d for d, opts in candidates.items() if opts)
+    sessions = sorted({c.session_id for d in days for c in candidates[d]})
+    index = {sid: i for i, sid in enumerate(sessions)}
+    memo: Dict[tuple, _Value] = {}
+    nodes = 0
+    exhausted = False
+
+    def best_from(i: int, used: Tuple[int, ...], counts: Tuple[int, ...], hard_days: int,
+                  prev_hard: bool, prev_finger: bool) -> _Value:
+        nonlocal nodes, exhausted
+        if i == len(days):
+            return 0, 0.0, ()
+        key = (i, used, counts, hard_days, prev_hard, prev_finger)
+        hit = memo.get(key)
+        if hit is not None:
+            return hit
+        if nodes >= node_budget:
+            exhausted = True
+        else:
+            nodes += 1
+
+        day = days[i]
+        follows = i + 1 < len(days) and days[i + 1] == day + 1
+        options: List[Optional[Candidate]] = [
+            c for c in candidates[day]
+            if used[index[c.session_id]] < c.max_per_week
+            and not (c.hard and (prev_hard or hard_days >= hard_cap))
+            and not (c.finger and prev_finger)
+        ]
+        options.append(None)
+        best: Optional[_Value] = None
+        for cand in options:
+            if cand is None:
+                days_n, gain, rest = best_from(i + 1, used, counts, hard_days, False, False)
+                value: _Value = (days_n, gain, (None,) + rest)
+            else:
+                k = index[cand.session_id]
+                next_used = used[:k] + (used[k] + 1,) + used[k + 1:]
+                next_counts = list(counts)
+                gain = 0.0
+                for d in cand.domains:
+                    gain += weights[d] * 0.5 ** (next_counts[d] + 1)
+                    next_counts[d] += 1
+                days_n, rest_gain, rest = best_from(
+                    i + 1, next_used, tuple(next_counts), hard_days + cand.hard,
+                    cand.hard and follows, cand.finger and follows,
+                )
+                value = (days_n + 1, gain + rest_gain, (cand,) + rest)
+            if _better(value, best):
+                best = value
+            if exhausted:
+                break  # out of budget: first feasible option, as the greedy would
+        assert best is not None
+        memo[key] = best
+        return best
+
+    days_n, gain, picks = best_from(0, (0,) * len(sessions), (0,) * len(weights), 0, False, False)
+    return SearchResult(
+        choice={day: cand for day, cand in zip(days, picks) if cand is not None},
+        days_trained=days_n,
+        coverage=gain,
+        nodes=nodes,
+        exhausted=exhausted,
+    )
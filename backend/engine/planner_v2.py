@@ -17,50 +17,27 @@ from dataclasses import dataclass
 from datetime import date, datetime, timedelta
 from typing import Any, Dict, List, Optional, Sequence, Tuple
 
+from backend.engine.equipment import UNKNOWN, EquipmentProfile, covers, mask
 from backend.engine.macrocycle_v1 import (
     PHASE_INTENSITY_CAP,
     PHASE_ORDER,
     _build_session_pool,
     apply_deload_week,
 )
+from backend.engine.metrics import PLANNER_SECONDS, timed
+from backend.engine.planner_memo import memoized_week
+from backend.engine.planner_search import Candidate, search_week
+from backend.engine.session_meta import SESSION_META
+from backend.engine.tracing import sequence, traced
 
 SLOTS: Tuple[str, ...] = ("morning", "lunch", "evening")
 WEEKDAYS: Tuple[str, ...] = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
 
-# Session metadata — maps session_id to its properties
+# Session metadata — maps session_id to its properties, compiled from the
+# "planner" block of each session in the catalog (see session_meta.py).
 # hard: counts against hard_cap; finger: needs 48h gap; intensity: max/high/medium/low
 # climbing: True for climbing-related sessions (placed first in pass 1)
-_SESSION_META: Dict[str, Dict[str, Any]] = {
-    "strength_long": {"hard": True, "finger": True, "intensity": "max", "climbing": True, "location": ("gym", "home"), "required_equipment": ["hangboard"]},
-    "power_contact_gym": {"hard": True, "finger": False, "intensity": "max", "climbing": True, "location": ("gym",), "required_equipment": ["gym_boulder"]},
-    "power_endurance_gym": {"hard": True, "finger": False, "intensity": "high", "climbing": True, "location": ("gym",), "required_equipment": ["gym_routes"]},
-    "endurance_aerobic_gym": {"hard": False, "finger": False, "intensity": "medium", "climbing": True, "location": ("gym",), "max_per_week": 2, "required_equipment": ["gym_routes"]},
-    "technique_focus_gym": {"hard": False, "finger": False, "intensity": "medium", "climbing": True, "location": ("gym",), "required_equipment": ["gym_boulder"]},
-    "finger_strength_home": {"hard": True, "finger": True, "intensity": "high", "climbing": True, "location": ("home",), "required_equipment": ["hangboard"]},
-    "prehab_maintenance": {"hard": False, "finger": False, "intensity": "low", "climbing": False, "location": ("home", "gym")},
-    "flexibility_full": {"hard": False, "finger": False, "intensity": "low", "climbing": False, "location": ("home", "gym")},
-    "yoga_recovery": {"hard": False, "finger": False, "intensity": "low", "climbing": False, "location": ("home",)},
-    "handstand_practice": {"hard": False, "finger": False, "intensity": "medium", "climbing": False, "location": ("home", "gym")},
-    "complementary_conditioning": {"hard": False, "finger": False, "intensity": "medium", "climbing": False, "location": ("home", "gym")},
-    "regeneration_easy": {"hard": False, "finger": False, "intensity": "low", "climbing": False, "location": ("home", "gym", "outdoor")},
-    "finger_maintenance_home": {"hard": False, "finger": True, "intensity": "medium", "climbing": True, "location": ("home",), "required_equipment": ["hangboard"]},
-    "test_max_hang_5s": {"hard": True, "finger": True, "intensity": "high", "climbing": False, "location": ("home", "gym"), "test": True, "required_equipment": ["hangboard"]},
-    "test_repeater_7_3": {"hard": True, "finger": True, "intensity": "high", "climbing": False, "location": ("home", "gym"), "test": True, "required_equipment": ["hangboard"]},
-    "test_max_weighted_pullup": {"hard": True, "finger": False, "intensity": "high", "climbing": False, "location": ("home", "gym"), "test": True, "required_equipment": ["pullup_bar"]},
-    "easy_climbing_deload": {"hard": False, "finger": False, "intensity": "low", "climbing": True, "location": ("gym",), "required_equipment": ["gym_boulder"]},
-    "finger_maintenance_gym": {"hard": False, "finger": True, "intensity": "medium", "climbing": True, "location": ("gym",), "required_equipment": ["hangboard"]},
-    "route_endurance_gym": {"hard": False, "finger": False, "intensity": "medium", "climbing": True, "location": ("gym",), "required_equipment": ["gym_routes"]},
-    "pulling_strength_gym": {"hard": True, "finger": False, "intensity": "high", "climbing": False, "location": ("gym",), "required_equipment": ["pullup_bar"]},
-    "heavy_conditioning_gym": {"hard": False, "finger": False, "intensity": "medium", "climbing": False, "location": ("gym",), "required_equipment": ["dumbbell"]},
-    "lower_body_gym": {"hard": False, "finger": False, "intensity": "medium", "climbing": False, "location": ("gym",), "required_equipment": ["dumbbell"]},
-    "finger_aerobic_base": {"hard": False, "finger": True, "intensity": "low", "climbing": False, "location": ("home",), "required_equipment": ["hangboard"]},
-    "deload_recovery": {"hard": False, "finger": False, "intensity": "low", "climbing": False, "location": ("home", "gym")},
-    "finger_endurance_short": {"hard": False, "finger": True, "intensity": "medium", "climbing": False, "location": ("home",), "required_equipment": ["hangboard"]},
-    "boulder_circuit_gym": {"hard": False, "finger": False, "intensity": "medium", "climbing": True, "location": ("gym",), "max_per_week": 2, "required_equipment": ["gym_boulder"]},
-    "upper_body_weights": {"hard": False, "finger": False, "intensity": "medium", "climbing": False, "location": ("gym", "home"), "required_equipment": [], "max_per_week": 2},
-    "legs_strength": {"hard": False, "finger": False, "intensity": "medium", "climbing": False, "location": ("gym", "home"), "required_equipment": [], "max_per_week": 2},
-    "core_training": {"hard": False, "finger": False, "intensity": "medium", "climbing": False, "location": ("gym", "home"), "required_equipment": [], "max_per_week": 3},
-}
+_SESSION_META: Dict[str, Dict[str, Any]] = SESSION_META
 
 _INTENSITY_ORDER = {"low": 0, "medium": 1, "high": 2, "max": 3}
 
@@ -72,6 +49,8 @@ _INTENSITY_TO_LOAD: Dict[str, int] = {"low": 20, "medium": 40, "high": 65, "max"
 # All require only gym_boulder — the most common gym equipment.
 _CLIMBING_FALLBACKS: Tuple[str, ...] = ("technique_focus_gym", "easy_climbing_deload")
 
+PLANNER_MODES: Tuple[str, ...] = ("greedy", "search")
+
 
 def _parse_date(value: str) -> date:
     return datetime.strptime(value, "%Y-%m-%d").date()
@@ -86,90 +65,41 @@ def _intensity_allowed(session_intensity: str, phase_cap: str) -> bool:
     return _INTENSITY_ORDER.get(session_intensity, 0) <= _INTENSITY_ORDER.get(phase_cap, 3)
 
 
-def _equipment_for_location(
-    location: str,
-    slot_info: Dict[str, Any],
-    home_equipment: Optional[List[str]],
-    gyms: Optional[Sequence[Dict[str, Any]]],
-    default_gym_id: Optional[str],
-) -> Optional[List[str]]:
-    """Return equipment list available at *location* for the given slot.
-
-    Returns None when equipment is unknown (no gym data / no home data),
-    meaning "assume everything is available" (backwards compat).
-    """
-    if location == "gym":
-        # Every gym implicitly has a pullup_bar (commit 6bf5e75).
-        gym_id = slot_info.get("gym_id") or default_gym_id
-        equip: List[str] = []
-        matched = False
-        for g in (gyms or []):
-            if gym_id and g.get("gym_id") == gym_id:
-                equip = list(g.get("equipment", []))
-                matched = True
-                break
-        if not matched and gyms:
-            sorted_g = sorted(gyms, key=lambda g: (g.get("priority", 999), g.get("gym_id", "")))
-            equip = list(sorted_g[0].get("equipment", []))
-            matched = True
-        if not matched:
-            return None  # no gym info → assume everything available
-        if "pullup_bar" not in equip:
-            equip.append("pullup_bar")
-        return equip
-    elif location == "home":
-        if home_equipment is None:
-            return None  # no home info → assume everything available
-        return list(home_equipment)
-    return None
-
-
 def _location_has_equipment(
     location: str,
-    required_equipment: List[str],
+    required_mask: int,
     slot_info: Dict[str, Any],
-    home_equipment: Optional[List[str]],
-    gyms: Optional[Sequence[Dict[str, Any]]],
+    equipment: EquipmentProfile,
     default_gym_id: Optional[str],
 ) -> bool:
-    """Check if *location* provides all items in *required_equipment*.
+    """Check if *location* provides all items in *required_mask*.
 
-    For gym locations with no specific gym_id, iterates ALL gyms by priority
-    and returns True if ANY gym satisfies the required equipment (Bug A fix).
+    For gym locations with no specific gym_id, returns True if ANY gym
+    satisfies the required equipment (Bug A fix). Unknown equipment (no gym
+    data / no home data) is assumed available (backwards compat).
     """
-    if not required_equipment:
+    if not required_mask:
         return True
     if location == "gym":
         gym_id = slot_info.get("gym_id") or default_gym_id
+        if not equipment.gyms:
+            return True
         if gym_id:
             # Specific gym requested — check only that gym
-            avail = _equipment_for_location(location, slot_info, home_equipment, gyms, default_gym_id)
-            if avail is None:
-                return True
-            return all(eq in avail for eq in required_equipment)
-        # No specific gym: check if ANY gym has all required equipment
-        if not gyms:
-            return True  # no gym info → assume available (backwards compat)
-        for g in sorted(gyms, key=lambda g: (g.get("priority", 999), g.get("gym_id", ""))):
-            equip = list(g.get("equipment", []))
-            if "pullup_bar" not in equip:
-                equip.append("pullup_bar")
-            if all(eq in equip for eq in required_equipment):
-                return True
-        return False
-    avail = _equipment_for_location(location, slot_info, home_equipment, gyms, default_gym_id)
+            return covers(equipment.gym_or_default(gym_id), required_mask)
+        return equipment.any_gym_covers(required_mask)
+    avail = equipment.at(location)
     if avail is None:
-        return True  # unknown equipment → assume available (backwards compat)
-    return all(eq in avail for eq in required_equipment)
+        return True
+    return covers(avail, required_mask)
 
 
 def _pick_location(
     session_locations: Tuple[str, ...],
     slot_info: Dict[str, Any],
     allowed_locations: Sequence[str],
-    required_equipment: Optional[List[str]] = None,
-    home_equipment: Optional[List[str]] = None,
-    gyms: Optional[Sequence[Dict[str, Any]]] = None,
+    required_mask: int = 0,
+    equipment: EquipmentProfile = UNKNOWN,
     default_gym_id: Optional[str] = None,
 ) -> Optional[str]:
     slot_locations = slot_info.get("locations") or list(allowed_locations)
@@ -180,23 +110,23 @@ def _pick_location(
     if isinstance(preferred, str):
         if preferred in viable:
             # Preferred is viable by location rules — check equipment
-            if required_equipment and not _location_has_equipment(
-                preferred, required_equipment, slot_info, home_equipment, gyms, default_gym_id
+            if required_mask and not _location_has_equipment(
+                preferred, required_mask, slot_info, equipment, default_gym_id
             ):
                 # Preferred lacks equipment → try other viable locations
                 for loc in viable:
                     if loc != preferred and _location_has_equipment(
-                        loc, required_equipment, slot_info, home_equipment, gyms, default_gym_id
+                        loc, required_mask, slot_info, equipment, default_gym_id
                     ):
                         return loc
                 return None  # no viable location has the equipment
             return preferred
         return None  # session can't satisfy location preference
     # No preference — pick first viable with equipment
-    if required_equipment:
+    if required_mask:
         viable = [
             loc for loc in viable
-            if _location_has_equipment(loc, required_equipment, slot_info, home_equipment, gyms, default_gym_id)
+            if _location_has_equipment(loc, required_mask, slot_info, equipment, default_gym_id)
         ]
         if not viable:
             return None
@@ -253,12 +183,12 @@ def _normalize_availability(
 def _select_gym_id(
     slot_info: Dict[str, Any],
     default_gym_id: Optional[str],
-    gyms: Sequence[Dict[str, Any]],
-    required_equipment: Optional[List[str]] = None,
+    equipment: EquipmentProfile,
+    required_mask: int = 0,
 ) -> Optional[str]:
     """Return the gym_id to assign to a session.
 
-    When no specific gym is requested and required_equipment is given,
+    When no specific gym is requested and required_mask is given,
     picks the first gym by priority that satisfies all required equipment (Bug A fix).
     Falls back to first-by-priority gym if none fully satisfies requirements.
     """
@@ -267,16 +197,12 @@ def _select_gym_id(
         return slot_gym
     if default_gym_id:
         return default_gym_id
-    if gyms:
-        sorted_gyms = sorted(gyms, key=lambda g: (g.get("priority", 999), g.get("gym_id", "")))
-        if required_equipment:
-            for g in sorted_gyms:
-                equip = list(g.get("equipment", []))
-                if "pullup_bar" not in equip:
-                    equip.append("pullup_bar")
-                if all(eq in equip for eq in required_equipment):
-                    return g.get("gym_id")
-        return sorted_gyms[0].get("gym_id")
+    if equipment.gyms:
+        if required_mask:
+            for gym_id, gym_mask in equipment.gyms:
+                if covers(gym_mask, required_mask):
+                    return gym_id
+        return equipment.gyms[0][0]
     return None
 
 
@@ -290,8 +216,7 @@ def _find_best_slot(
     meta: Dict[str, Any],
     locations: Sequence[str],
     prefer_evening: bool = True,
-    home_equipment: Optional[List[str]] = None,
-    gyms: Optional[Sequence[Dict[str, Any]]] = None,
+    equipment: EquipmentProfile = UNKNOWN,
     default_gym_id: Optional[str] = None,
 ) -> Optional[Tuple[str, Dict[str, Any]]]:
     """Find the best available slot for a session on a given day.
@@ -304,16 +229,15 @@ def _find_best_slot(
     else:
         slot_order = ("lunch", "morning", "evening")
 
-    req_equip = meta.get("required_equipment")
+    req_mask = meta.get("required_mask", 0)
     for slot in slot_order:
         slot_info = day_availability[slot]
         if not slot_info["available"]:
             continue
         location = _pick_location(
             meta["location"], slot_info, locations,
-            required_equipment=req_equip,
-            home_equipment=home_equipment,
-            gyms=gyms,
+            required_mask=req_mask,
+            equipment=equipment,
             default_gym_id=default_gym_id,
         )
         if location is not None:
@@ -330,22 +254,20 @@ def _make_session_entry(
     phase_id: str,
     day_key: str,
     default_gym_id: Optional[str],
-    gyms: Sequence[Dict[str, Any]],
+    equipment: EquipmentProfile,
     pass_label: str,
-    home_equipment: Optional[List[str]] = None,
 ) -> Dict[str, Any]:
     """Build a session entry dict for the week plan."""
-    req_equip = meta.get("required_equipment")
+    req_mask = meta.get("required_mask", 0)
     location = _pick_location(
         meta["location"], slot_info, locations,
-        required_equipment=req_equip,
-        home_equipment=home_equipment,
-        gyms=gyms,
+        required_mask=req_mask,
+        equipment=equipment,
         default_gym_id=default_gym_id,
     )
     gym_id = None
     if location == "gym":
-        gym_id = _select_gym_id(slot_info, default_gym_id, gyms, required_equipment=req_equip)
+        gym_id = _select_gym_id(slot_info, default_gym_id, equipment, required_mask=req_mask)
 
     return {
         "slot": slot,
@@ -365,193 +287,38 @@ def _make_session_entry(
     }
 
 
-def generate_phase_week(
+def _greedy_fill(
     *,
+    passes: Any,
     phase_id: str,
-    domain_weights: Dict[str, float],
-    session_pool: List[str],
-    start_date: str,
-    availability: Optional[Dict[str, Any]] = None,
-    allowed_locations: Optional[List[str]] = None,
-    hard_cap_per_week: int = 3,
-    planning_prefs: Optional[Dict[str, Any]] = None,
-    default_gym_id: Optional[str] = None,
-    gyms: Optional[List[Dict[str, Any]]] = None,
-    intensity_cap: Optional[str] = None,
-    pretrip_dates: Optional[List[str]] = None,
-    is_last_week_of_phase: bool = False,
-    home_equipment: Optional[List[str]] = None,
-    today: Optional[str] = None,
-    inject_tests: bool = False,
-) -> Dict[str, Any]:
-    """Generate a single week plan within a macrocycle phase.
-
-    Uses a 2-pass algorithm:
-      PASS 1: Place primary sessions (hard + climbing-related) with spacing constraints.
-      PASS 2: Fill remaining days with complementary sessions.
-    Both passes cycle through the pool (max 2 full cycles per pass).
-
-    Args:
-        phase_id: Current macrocycle phase (base, strength_power, etc.).
-        domain_weights: Domain weight dict from the macrocycle phase.
-        session_pool: Ordered list of session_ids for this phase.
-        start_date: YYYY-MM-DD Monday of the week.
-        availability: User availability dict.
-        allowed_locations: Allowed location strings.
-        hard_cap_per_week: Max hard sessions per week.
-        planning_prefs: User planning preferences.
-        default_gym_id: Default gym for gym sessions.
-        gyms: List of gym dicts with equipment.
-        intensity_cap: Phase intensity cap (overrides PHASE_INTENSITY_CAP if provided).
-        pretrip_dates: List of YYYY-MM-DD dates that are in pre-trip deload window.
-            Hard/max sessions are blocked on these dates.
-
-    Returns:
-        Week plan dict compatible with planner.v1 format.
+    cap: str,
+    primary_pool: List[str],
+    complementary_pool: List[str],
+    normalized: Dict[str, Dict[str, Dict[str, Any]]],
+    locations: List[str],
+    equipment: EquipmentProfile,
+    default_gym_id: Optional[str],
+    routes_mask: int,
+    day_dates: List[date],
+    day_keys: List[str],
+    day_sessions: List[List[Dict[str, Any]]],
+    day_has_available_slot: List[bool],
+    day_intensity_reduced: List[bool],
+    pretrip_set: set,
+    effective_hard_cap: int,
+    target_days: int,
+    session_count: Dict[str, int],
+    hard_days: int,
+    hard_day_offsets: List[int],
+    finger_day_offsets: List[int],
+) -> Tuple[int, int]:
+    """Passes 1, 1.5 and 2 of generate_phase_week (planner_mode="greedy").
+
+    Fills *day_sessions*, *session_count* and the hard/finger day offsets in
+    place; returns the updated (hard_days, days_with_sessions).
     """
-    locations = sorted(set(allowed_locations or ["home", "gym"]))
-    normalized = _normalize_availability(availability, locations)
-    cap = intensity_cap or PHASE_INTENSITY_CAP.get(phase_id, "max")
-    prefs = planning_prefs or {}
-    effective_hard_cap = min(hard_cap_per_week, prefs.get("hard_day_cap_per_week", hard_cap_per_week))
-
-    # Build set of pre-trip deload dates for fast lookup
-    pretrip_set: set = set()
-    for d_str in (pretrip_dates or []):
-        pretrip_set.add(_parse_date(d_str))
-
-    if phase_id == "deload":
-        effective_hard_cap = 0
-
-    # Filter session pool by intensity cap and available metadata
-    filtered_pool: List[str] = []
-    for sid in session_pool:
-        meta = _SESSION_META.get(sid)
-        if meta is None:
-            continue
-        if not _intensity_allowed(meta["intensity"], cap):
-            continue
-        filtered_pool.append(sid)
-
-    # Split into primary (hard/climbing) and complementary pools
-    primary_pool = [s for s in filtered_pool if _is_primary_session(_SESSION_META[s])]
-    complementary_pool = [s for s in filtered_pool if not _is_primary_session(_SESSION_META[s])]
-
-    start = _parse_date(start_date)
-    target_days = prefs.get("target_training_days_per_week", 4)
-
-    # B95: resolve "today" for skipping past days
-    today_date: Optional[date] = _parse_date(today) if today else None
-
-    # Build day structures
-    day_dates: List[date] = [start + timedelta(days=i) for i in range(7)]
-    day_keys: List[str] = [_weekday_key(d) for d in day_dates]
-    day_sessions: List[List[Dict[str, Any]]] = [[] for _ in range(7)]
-
-    # Extract other-activity flags from availability.
-    # Sources: legacy _day_meta OR per-slot preferred_location="other_sport".
-    day_other_activity: List[bool] = [False] * 7
-    day_reduce_after: List[bool] = [False] * 7
-    day_activity_name: List[Optional[str]] = [None] * 7
-    day_activity_slot: List[Optional[str]] = [None] * 7
-    for offset in range(7):
-        raw_day = (availability or {}).get(day_keys[offset]) or {}
-        if not isinstance(raw_day, dict):
-            continue
-        # Legacy _day_meta approach
-        meta = raw_day.get("_day_meta")
-        if isinstance(meta, dict) and meta.get("other_activity"):
-            day_other_activity[offset] = True
-            day_activity_name[offset] = meta.get("other_activity_name")
-            day_activity_slot[offset] = meta.get("other_activity_slot")
-            day_reduce_after[offset] = bool(meta.get("reduce_intensity_after"))
-        # Per-slot approach: preferred_location="other_sport"
-        for s_key in SLOTS:
-            slot_val = raw_day.get(s_key)
-            if isinstance(slot_val, dict) and slot_val.get("preferred_location") == "other_sport":
-                day_other_activity[offset] = True
-                day_activity_slot[offset] = s_key
-                day_activity_name[offset] = slot_val.get("other_activity_name") or day_activity_name[offset]
-                day_reduce_after[offset] = day_reduce_after[offset] or bool(slot_val.get("reduce_intensity_after"))
-
-    # Track constraints
-    hard_days = 0
-    finger_day_offsets: List[int] = []
-    hard_day_offsets: List[int] = []
-    session_count: Dict[str, int] = {}  # anti-repetition: session_id → times placed this week
-
-    # Reduce intensity on day after other-activity (when flagged)
-    # AND on the other-activity day itself (no hard sessions alongside other sport).
-    day_intensity_reduced: List[bool] = [False] * 7
-    for offset in range(7):
-        if offset > 0 and day_other_activity[offset - 1] and day_reduce_after[offset - 1]:
-            day_intensity_reduced[offset] = True
-
-    # Determine which days have available slots
-    # Track outdoor-only days — they get no sessions from the planner
-    day_is_outdoor: List[bool] = [False] * 7
-    day_has_available_slot: List[bool] = []
-    for offset in range(7):
-        # B95: skip past days — no sessions assigned to days before today
-        if today_date is not None and day_dates[offset] < today_date:
-            day_has_available_slot.append(False)
-            continue
-        day_avail = normalized[day_keys[offset]]
-        if day_other_activity[offset]:
-            # other_activity occupies one slot but does NOT block all sessions;
-            # the day is still available but intensity-reduced (no hard sessions).
-            day_intensity_reduced[offset] = True
-        # Check if ALL available slots on this day are outdoor-only
-        available_slots = [s for s in SLOTS if day_avail[s]["available"]]
-        if available_slots:
-            all_outdoor = all(
-                day_avail[s].get("preferred_location") == "outdoor"
-                or day_avail[s].get("locations") == ["outdoor"]
-                for s in available_slots
-            )
-            if all_outdoor:
-                day_is_outdoor[offset] = True
-                day_has_available_slot.append(False)  # skip for session assignment
-                continue
-        has_slot = any(day_avail[slot]["available"] for slot in SLOTS)
-        day_has_available_slot.append(has_slot)
-
-    # Cap available days to target_training_days_per_week
-    available_day_count = sum(day_has_available_slot)
-    if available_day_count > target_days:
-        day_scores: List[Tuple[int, int]] = []
-        for offset in range(7):
-            if not day_has_available_slot[offset]:
-                continue
-            day_avail = normalized[day_keys[offset]]
-            score = 0
-            for s in SLOTS:
-                si = day_avail[s]
-                if not si["available"]:
-                    continue
-                # Scoring priorities:
-                # 1. Gym preferred or gym-only slot: +100 (climbing sessions need gym)
-                # 2. Gym available but not preferred: +50
-                # 3. Home-only slot: +1 (baseline)
-                slot_locs = si.get("locations", [])
-                preferred = si.get("preferred_location")
-                is_gym = preferred == "gym" or (preferred is None and "gym" in slot_locs)
-                if is_gym:
-                    score += 100
-                elif "gym" in slot_locs:
-                    score += 50
-                else:
-                    score += 1
-                if s == "evening":
-                    score += 10
-            day_scores.append((score, offset))
-        # Stable sort: by score descending, then offset ascending
-        day_scores.sort(key=lambda x: (-x[0], x[1]))
-        keep_offsets = set(x[1] for x in day_scores[:target_days])
-        for offset in range(7):
-            if offset not in keep_offsets:
-                day_has_available_slot[offset] = False
 
+    passes.next("planner.pass_1")
     # ── PASS 1: Place primary sessions (climbing-first) ──
     primary_idx = 0
     primary_uses = 0
@@ -581,7 +348,6 @@ def generate_phase_week(
         if primary_uses >= max_primary_uses:
             break
 
-        placed = False
         attempts = 0
         while attempts < len(primary_pool) and primary_uses < max_primary_uses:
             sid = primary_pool[primary_idx % len(primary_pool)]
@@ -626,7 +392,7 @@ def generate_phase_week(
 
             day_avail = normalized[day_keys[offset]]
             result = _find_best_slot(day_avail, meta, locations, prefer_evening=True,
-                                     home_equipment=home_equipment, gyms=gyms, default_gym_id=default_gym_id)
+                                     equipment=equipment, default_gym_id=default_gym_id)
             if result is None:
                 # Equipment/location mismatch for THIS day — don't burn a pool
                 # cycle use.  The session may fit on a later day with different
@@ -638,7 +404,7 @@ def generate_phase_week(
             slot, slot_info = result
             entry = _make_session_entry(
                 slot, sid, meta, slot_info, locations, phase_id, day_keys[offset],
-                default_gym_id, gyms or [], "pass1:primary", home_equipment=home_equipment,
+                default_gym_id, equipment, "pass1:primary",
             )
             day_sessions[offset].append(entry)
             session_count[sid] = session_count.get(sid, 0) + 1
@@ -650,9 +416,9 @@ def generate_phase_week(
                 hard_day_offsets.append(offset)
             if meta["finger"]:
                 finger_day_offsets.append(offset)
-            placed = True
             break
 
+    passes.next("planner.pass_1_5")
     # ── PASS 1.5: Climbing fallback for gym days left empty by Pass 1 ──
     # Triggers only when:
     #   (a) pool has climbing sessions but NONE are gym_boulder-compatible (all require gym_routes),
@@ -693,15 +459,10 @@ def generate_phase_week(
                     continue
                 slot_gym = day_avail[s_name].get("gym_id") or default_gym_id
                 if slot_gym:
-                    for g in (gyms or []):
-                        if g.get("gym_id") == slot_gym and "gym_routes" in g.get("equipment", []):
-                            day_gym_can_do_routes = True
-                            break
-                elif gyms:
-                    for g in sorted(gyms, key=lambda g: (g.get("priority", 999), g.get("gym_id", ""))):
-                        if "gym_routes" in g.get("equipment", []):
-                            day_gym_can_do_routes = True
-                            break
+                    slot_gym_mask = equipment.gym(slot_gym)
+                    day_gym_can_do_routes = slot_gym_mask is not None and covers(slot_gym_mask, routes_mask)
+                else:
+                    day_gym_can_do_routes = equipment.any_gym_covers(routes_mask)
                 if day_gym_can_do_routes:
                     break
             if day_gym_can_do_routes:
@@ -720,14 +481,14 @@ def generate_phase_week(
                     continue
                 result = _find_best_slot(
                     day_avail, fb_meta, locations, prefer_evening=True,
-                    home_equipment=home_equipment, gyms=gyms, default_gym_id=default_gym_id,
+                    equipment=equipment, default_gym_id=default_gym_id,
                 )
                 if result:
                     slot, slot_info = result
                     entry = _make_session_entry(
                         slot, fb_sid, fb_meta, slot_info, locations, phase_id,
-                        day_keys[offset], default_gym_id, gyms or [],
-                        "pass1.5:climbing_fallback", home_equipment=home_equipment,
+                        day_keys[offset], default_gym_id, equipment,
+                        "pass1.5:climbing_fallback",
                     )
                     day_sessions[offset].append(entry)
                     session_count[fb_sid] = session_count.get(fb_sid, 0) + 1
@@ -738,6 +499,7 @@ def generate_phase_week(
                         finger_day_offsets.append(offset)
                     break
 
+    passes.next("planner.pass_2")
     # ── PASS 2: Fill remaining days with complementary sessions ──
     days_with_sessions = sum(1 for ds in day_sessions if ds)
     comp_idx = 0
@@ -771,7 +533,7 @@ def generate_phase_week(
 
             day_avail = normalized[day_keys[offset]]
             result = _find_best_slot(day_avail, meta, locations, prefer_evening=False,
-                                     home_equipment=home_equipment, gyms=gyms, default_gym_id=default_gym_id)
+                                     equipment=equipment, default_gym_id=default_gym_id)
             if result is None:
                 comp_idx += 1
                 attempts += 1
@@ -780,7 +542,7 @@ def generate_phase_week(
             slot, slot_info = result
             entry = _make_session_entry(
                 slot, sid, meta, slot_info, locations, phase_id, day_keys[offset],
-                default_gym_id, gyms or [], "pass2:complementary", home_equipment=home_equipment,
+                default_gym_id, equipment, "pass2:complementary",
             )
             day_sessions[offset].append(entry)
             session_count[sid] = session_count.get(sid, 0) + 1
@@ -789,6 +551,289 @@ def generate_phase_week(
             days_with_sessions += 1
             break
 
+    return hard_days, days_with_sessions
+
+
+@timed(PLANNER_SECONDS)
+@traced("planner.generate_phase_week")
+@memoized_week
+def generate_phase_week(
+    *,
+    phase_id: str,
+    domain_weights: Dict[str, float],
+    session_pool: List[str],
+    start_date: str,
+    availability: Optional[Dict[str, Any]] = None,
+    allowed_locations: Optional[List[str]] = None,
+    hard_cap_per_week: int = 3,
+    planning_prefs: Optional[Dict[str, Any]] = None,
+    default_gym_id: Optional[str] = None,
+    gyms: Optional[List[Dict[str, Any]]] = None,
+    intensity_cap: Optional[str] = None,
+    pretrip_dates: Optional[List[str]] = None,
+    is_last_week_of_phase: bool = False,
+    home_equipment: Optional[List[str]] = None,
+    today: Optional[str] = None,
+    inject_tests: bool = False,
+    planner_mode: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Generate a single week plan within a macrocycle phase.
+
+    Uses a 2-pass algorithm:
+      PASS 1: Place primary sessions (hard + climbing-related) with spacing constraints.
+      PASS 2: Fill remaining days with complementary sessions.
+    Both passes cycle through the pool (max 2 full cycles per pass).
+    With planner_mode="search" both passes are replaced by a bounded search
+    over the whole week (planner_search.py). Results are memoized per
+    process on the normalized inputs (planner_memo.py).
+
+    Args:
+        phase_id: Current macrocycle phase (base, strength_power, etc.).
+        domain_weights: Domain weight dict from the macrocycle phase.
+        session_pool: Ordered list of session_ids for this phase.
+        start_date: YYYY-MM-DD Monday of the week.
+        availability: User availability dict.
+        allowed_locations: Allowed location strings.
+        hard_cap_per_week: Max hard sessions per week.
+        planning_prefs: User planning preferences.
+        default_gym_id: Default gym for gym sessions.
+        gyms: List of gym dicts with equipment.
+        intensity_cap: Phase intensity cap (overrides PHASE_INTENSITY_CAP if provided).
+        pretrip_dates: List of YYYY-MM-DD dates that are in pre-trip deload window.
+            Hard/max sessions are blocked on these dates.
+        planner_mode: "greedy" (default) or "search"; when omitted,
+            planning_prefs["planner_mode"] is used.
+
+    Returns:
+        Week plan dict compatible with planner.v1 format.
+    """
+    passes = sequence("planner.pass")
+    passes.next("planner.setup")
+    locations = sorted(set(allowed_locations or ["home", "gym"]))
+    equipment = EquipmentProfile(home_equipment, gyms)
+    routes_mask = mask(["gym_routes"])
+    normalized = _normalize_availability(availability, locations)
+    cap = intensity_cap or PHASE_INTENSITY_CAP.get(phase_id, "max")
+    prefs = planning_prefs or {}
+    mode = planner_mode or prefs.get("planner_mode") or "greedy"
+    if mode not in PLANNER_MODES:
+        raise ValueError(f"Unsupported planner_mode: {mode}")
+    effective_hard_cap = min(hard_cap_per_week, prefs.get("hard_day_cap_per_week", hard_cap_per_week))
+
+    # Build set of pre-trip deload dates for fast lookup
+    pretrip_set: set = set()
+    for d_str in (pretrip_dates or []):
+        pretrip_set.add(_parse_date(d_str))
+
+    if phase_id == "deload":
+        effective_hard_cap = 0
+
+    # Filter session pool by intensity cap and available metadata
+    filtered_pool: List[str] = []
+    for sid in session_pool:
+        meta = _SESSION_META.get(sid)
+        if meta is None:
+            continue
+        if not _intensity_allowed(meta["intensity"], cap):
+            continue
+        filtered_pool.append(sid)
+
+    # Split into primary (hard/climbing) and complementary pools
+    primary_pool = [s for s in filtered_pool if _is_primary_session(_SESSION_META[s])]
+    complementary_pool = [s for s in filtered_pool if not _is_primary_session(_SESSION_META[s])]
+
+    start = _parse_date(start_date)
+    target_days = prefs.get("target_training_days_per_week", 4)
+
+    # B95: resolve "today" for skipping past days
+    today_date: Optional[date] = _parse_date(today) if today else None
+
+    # Build day structures
+    day_dates: List[date] = [start + timedelta(days=i) for i in range(7)]
+    day_keys: List[str] = [_weekday_key(d) for d in day_dates]
+    day_sessions: List[List[Dict[str, Any]]] = [[] for _ in range(7)]
+
+    # Extract other-activity flags from availability.
+    # Sources: legacy _day_meta OR per-slot preferred_location="other_sport".
+    day_other_activity: List[bool] = [False] * 7
+    day_reduce_after: List[bool] = [False] * 7
+    day_activity_name: List[Optional[str]] = [None] * 7
+    day_activity_slot: List[Optional[str]] = [None] * 7
+    for offset in range(7):
+        raw_day = (availability or {}).get(day_keys[offset]) or {}
+        if not isinstance(raw_day, dict):
+            continue
+        # Legacy _day_meta approach
+        meta = raw_day.get("_day_meta")
+        if isinstance(meta, dict) and meta.get("other_activity"):
+            day_other_activity[offset] = True
+            day_activity_name[offset] = meta.get("other_activity_name")
+            day_activity_slot[offset] = meta.get("other_activity_slot")
+            day_reduce_after[offset] = bool(meta.get("reduce_intensity_after"))
+        # Per-slot approach: preferred_location="other_sport"
+        for s_key in SLOTS:
+            slot_val = raw_day.get(s_key)
+            if isinstance(slot_val, dict) and slot_val.get("preferred_location") == "other_sport":
+                day_other_activity[offset] = True
+                day_activity_slot[offset] = s_key
+                day_activity_name[offset] = slot_val.get("other_activity_name") or day_activity_name[offset]
+                day_reduce_after[offset] = day_reduce_after[offset] or bool(slot_val.get("reduce_intensity_after"))
+
+    # Track constraints
+    hard_days = 0
+    finger_day_offsets: List[int] = []
+    hard_day_offsets: List[int] = []
+    session_count: Dict[str, int] = {}  # anti-repetition: session_id → times placed this week
+
+    # Reduce intensity on day after other-activity (when flagged)
+    # AND on the other-activity day itself (no hard sessions alongside other sport).
+    day_intensity_reduced: List[bool] = [False] * 7
+    for offset in range(7):
+        if offset > 0 and day_other_activity[offset - 1] and day_reduce_after[offset - 1]:
+            day_intensity_reduced[offset] = True
+
+    # Determine which days have available slots
+    # Track outdoor-only days — they get no sessions from the planner
+    day_is_outdoor: List[bool] = [False] * 7
+    day_has_available_slot: List[bool] = []
+    for offset in range(7):
+        # B95: skip past days — no sessions assigned to days before today
+        if today_date is not None and day_dates[offset] < today_date:
+            day_has_available_slot.append(False)
+            continue
+        day_avail = normalized[day_keys[offset]]
+        if day_other_activity[offset]:
+            # other_activity occupies one slot but does NOT block all sessions;
+            # the day is still available but intensity-reduced (no hard sessions).
+            day_intensity_reduced[offset] = True
+        # Check if ALL available slots on this day are outdoor-only
+        available_slots = [s for s in SLOTS if day_avail[s]["available"]]
+        if available_slots:
+            all_outdoor = all(
+                day_avail[s].get("preferred_location") == "outdoor"
+                or day_avail[s].get("locations") == ["outdoor"]
+                for s in available_slots
+            )
+            if all_outdoor:
+                day_is_outdoor[offset] = True
+                day_has_available_slot.append(False)  # skip for session assignment
+                continue
+        has_slot = any(day_avail[slot]["available"] for slot in SLOTS)
+        day_has_available_slot.append(has_slot)
+
+    # Cap available days to target_training_days_per_week
+    available_day_count = sum(day_has_available_slot)
+    if available_day_count > target_days:
+        day_scores: List[Tuple[int, int]] = []
+        for offset in range(7):
+            if not day_has_available_slot[offset]:
+                continue
+            day_avail = normalized[day_keys[offset]]
+            score = 0
+            for s in SLOTS:
+                si = day_avail[s]
+                if not si["available"]:
+                    continue
+                # Scoring priorities:
+                # 1. Gym preferred or gym-only slot: +100 (climbing sessions need gym)
+                # 2. Gym available but not preferred: +50
+                # 3. Home-only slot: +1 (baseline)
+                slot_locs = si.get("locations", [])
+                preferred = si.get("preferred_location")
+                is_gym = preferred == "gym" or (preferred is None and "gym" in slot_locs)
+                if is_gym:
+                    score += 100
+                elif "gym" in slot_locs:
+                    score += 50
+                else:
+                    score += 1
+                if s == "evening":
+                    score += 10
+            day_scores.append((score, offset))
+        # Stable sort: by score descending, then offset ascending
+        day_scores.sort(key=lambda x: (-x[0], x[1]))
+        keep_offsets = set(x[1] for x in day_scores[:target_days])
+        for offset in range(7):
+            if offset not in keep_offsets:
+                day_has_available_slot[offset] = False
+
+    if mode == "search":
+        passes.next("planner.search")
+        # ── SEARCH: one session per trainable day, chosen by bounded search ──
+        # Day-level rules (slot/location/equipment, reduced and pre-trip days)
+        # decide each day's candidates; planner_search handles the weekly ones.
+        weight_keys = sorted(domain_weights or {})
+        weight_index = {k: i for i, k in enumerate(weight_keys)}
+        candidates: Dict[int, List[Candidate]] = {}
+        for offset in range(7):
+            if not day_has_available_slot[offset]:
+                continue
+            day_avail = normalized[day_keys[offset]]
+            options: List[Candidate] = []
+            for sid in primary_pool + complementary_pool:
+                meta = _SESSION_META[sid]
+                if day_intensity_reduced[offset] and meta["hard"]:
+                    continue
+                if day_dates[offset] in pretrip_set and (meta["hard"] or meta["intensity"] == "max"):
+                    continue
+                if _find_best_slot(day_avail, meta, locations, prefer_evening=_is_primary_session(meta),
+                                   equipment=equipment, default_gym_id=default_gym_id) is None:
+                    continue
+                options.append(Candidate(
+                    session_id=sid,
+                    hard=meta["hard"],
+                    finger=meta["finger"],
+                    max_per_week=meta.get("max_per_week", 1),
+                    domains=tuple(weight_index[d] for d in meta.get("domains", ()) if d in weight_index),
+                ))
+            candidates[offset] = options
+
+        found = search_week(candidates, [domain_weights[k] for k in weight_keys], effective_hard_cap)
+        for offset, cand in sorted(found.choice.items()):
+            sid = cand.session_id
+            meta = _SESSION_META[sid]
+            primary = _is_primary_session(meta)
+            slot, slot_info = _find_best_slot(normalized[day_keys[offset]], meta, locations, prefer_evening=primary,
+                                              equipment=equipment, default_gym_id=default_gym_id)
+            entry = _make_session_entry(
+                slot, sid, meta, slot_info, locations, phase_id, day_keys[offset],
+                default_gym_id, equipment, "search:primary" if primary else "search:complementary",
+            )
+            day_sessions[offset].append(entry)
+            session_count[sid] = session_count.get(sid, 0) + 1
+            if meta["hard"]:
+                hard_days += 1
+                hard_day_offsets.append(offset)
+            if meta["finger"]:
+                finger_day_offsets.append(offset)
+        days_with_sessions = len(found.choice)
+    else:
+        hard_days, days_with_sessions = _greedy_fill(
+            passes=passes,
+            phase_id=phase_id,
+            cap=cap,
+            primary_pool=primary_pool,
+            complementary_pool=complementary_pool,
+            normalized=normalized,
+            locations=locations,
+            equipment=equipment,
+            default_gym_id=default_gym_id,
+            routes_mask=routes_mask,
+            day_dates=day_dates,
+            day_keys=day_keys,
+            day_sessions=day_sessions,
+            day_has_available_slot=day_has_available_slot,
+            day_intensity_reduced=day_intensity_reduced,
+            pretrip_set=pretrip_set,
+            effective_hard_cap=effective_hard_cap,
+            target_days=target_days,
+            session_count=session_count,
+            hard_days=hard_days,
+            hard_day_offsets=hard_day_offsets,
+            finger_day_offsets=finger_day_offsets,
+        )
+
+    passes.next("planner.pass_2_5")
     # ── PASS 2.5 (NEW-F9): Ensure PE phase has at least 1 finger maintenance session ──
     if phase_id == "power_endurance":
         has_finger_maintenance = any(
@@ -823,14 +868,13 @@ def generate_phase_week(
                                 if fm_meta is None:
                                     continue
                                 result = _find_best_slot(day_avail, fm_meta, locations, prefer_evening=False,
-                                                         home_equipment=home_equipment, gyms=gyms, default_gym_id=default_gym_id)
+                                                         equipment=equipment, default_gym_id=default_gym_id)
                                 if result:
                                     slot, slot_info = result
                                     fm_entry = _make_session_entry(
                                         slot, fm_sid, fm_meta, slot_info, locations,
                                         phase_id, day_keys[offset],
-                                        default_gym_id, gyms or [], "pass2.5:pe_finger_maintenance",
-                                        home_equipment=home_equipment,
+                                        default_gym_id, equipment, "pass2.5:pe_finger_maintenance",
                                     )
                                     day_sessions[offset][i] = fm_entry
                                     finger_day_offsets.append(offset)
@@ -844,14 +888,13 @@ def generate_phase_week(
                         if fm_meta is None:
                             continue
                         result = _find_best_slot(day_avail, fm_meta, locations, prefer_evening=False,
-                                                 home_equipment=home_equipment, gyms=gyms, default_gym_id=default_gym_id)
+                                                 equipment=equipment, default_gym_id=default_gym_id)
                         if result:
                             slot, slot_info = result
                             fm_entry = _make_session_entry(
                                 slot, fm_sid, fm_meta, slot_info, locations,
                                 phase_id, day_keys[offset],
-                                default_gym_id, gyms or [], "pass2.5:pe_finger_maintenance",
-                                home_equipment=home_equipment,
+                                default_gym_id, equipment, "pass2.5:pe_finger_maintenance",
                             )
                             day_sessions[offset].append(fm_entry)
                             finger_day_offsets.append(offset)
@@ -859,6 +902,7 @@ def generate_phase_week(
                             fm_placed = True
                             break
 
+    passes.next("planner.pass_3")
     # ── PASS 3 (optional): Inject test sessions ──
     # Triggers on: last week of base/strength_power, OR explicitly via inject_tests
     _run_pass3 = inject_tests or (is_last_week_of_phase and phase_id in ("base", "strength_power"))
@@ -906,7 +950,7 @@ def generate_phase_week(
                     continue
                 day_avail = normalized[day_keys[offset]]
                 result = _find_best_slot(day_avail, test_meta, locations, prefer_evening=True,
-                                         home_equipment=home_equipment, gyms=gyms, default_gym_id=default_gym_id)
+                                         equipment=equipment, default_gym_id=default_gym_id)
                 if result is None:
                     continue
                 slot, slot_info = result
@@ -926,8 +970,7 @@ def generate_phase_week(
                 test_entry = _make_session_entry(
                     slot, test_sid, test_meta, slot_info, locations,
                     phase_id, day_keys[offset],
-                    default_gym_id, gyms or [], "pass3:test_session",
-                    home_equipment=home_equipment,
+                    default_gym_id, equipment, "pass3:test_session",
                 )
                 day_sessions[offset][replace_idx] = test_entry
                 if test_meta["hard"] and not old_meta.get("hard"):
@@ -938,6 +981,7 @@ def generate_phase_week(
                 test_placed_offsets.add(offset)
                 placed = True
 
+    passes.next("planner.build_days")
     # Build plan_days
     plan_days: List[Dict[str, Any]] = []
     for offset in range(7):
@@ -1053,7 +1097,7 @@ def generate_test_week(
     Remaining available days get prehab/flexibility filler sessions.
     """
     locations = list(allowed_locations or ["gym", "home"])
-    gyms_list = list(gyms or [])
+    equipment = EquipmentProfile(home_equipment, gyms)
     norm_avail = _normalize_availability(availability, locations)
 
     start = _parse_date(start_date)
@@ -1115,16 +1159,15 @@ def generate_test_week(
         if offset in placed:
             sid = placed[offset]
             meta = _SESSION_META.get(sid, {})
-            req_equip = meta.get("required_equipment")
             # Find a slot
             slot_result = _find_best_slot(day_avail, meta, locations,
-                                          home_equipment=home_equipment, gyms=gyms_list, default_gym_id=default_gym_id)
+                                          equipment=equipment, default_gym_id=default_gym_id)
             if slot_result:
                 slot_name, slot_info = slot_result
                 location = _pick_location(meta.get("location", ("gym", "home")), slot_info, locations,
-                                          required_equipment=req_equip, home_equipment=home_equipment,
-                                          gyms=gyms_list, default_gym_id=default_gym_id)
-                gym_id = _select_gym_id(slot_info, default_gym_id, gyms_list) if location == "gym" else None
+                                          required_mask=meta.get("required_mask", 0),
+                                          equipment=equipment, default_gym_id=default_gym_id)
+                gym_id = _select_gym_id(slot_info, default_gym_id, equipment) if location == "gym" else None
                 load_score = _INTENSITY_TO_LOAD.get(meta.get("intensity", "high"), 65)
                 total_load += load_score
                 sessions.append({
@@ -1144,13 +1187,13 @@ def generate_test_week(
             filler_idx += 1
             meta = _SESSION_META.get(filler_sid, {})
             slot_result = _find_best_slot(day_avail, meta, locations,
-                                          home_equipment=home_equipment, gyms=gyms_list, default_gym_id=default_gym_id)
+                                          equipment=equipment, default_gym_id=default_gym_id)
             if slot_result:
                 slot_name, slot_info = slot_result
                 location = _pick_location(meta.get("location", ("home", "gym")), slot_info, locations,
-                                          required_equipment=meta.get("required_equipment"),
-                                          home_equipment=home_equipment, gyms=gyms_list, default_gym_id=default_gym_id)
-                gym_id = _select_gym_id(slot_info, default_gym_id, gyms_list) if location == "gym" else None
+                                          required_mask=meta.get("required_mask", 0),
+                                          equipment=equipment, default_gym_id=default_gym_id)
+                gym_id = _select_gym_id(slot_info, default_gym_id, equipment) if location == "gym" else None
                 load_score = _INTENSITY_TO_LOAD.get(meta.get("intensity", "low"), 20)
                 total_load += load_score
                 sessions.append({
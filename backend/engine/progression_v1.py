@@ -5,6 +5,7 @@ from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional, Tuple
 
 from backend.engine.assessment_v1 import _FINGER_BENCHMARK
+from backend.engine.tracing import traced
 
 FONT_GRADES: List[str] = [
     "5A", "5A+", "5B", "5B+", "5C", "5C+",
@@ -509,6 +510,7 @@ def estimate_missing_baselines(user_state: Dict[str, Any]) -> None:
         user_state["baselines"]["hangboard"] = [new_entry]
 
 
+@traced("progression.inject_targets")
 def inject_targets(resolved_day: Dict[str, Any], user_state: Dict[str, Any]) -> Dict[str, Any]:
     out = deepcopy(resolved_day)
     user_state = deepcopy(user_state)  # Work on a local copy — don't mutate caller state
@@ -2,30 +2,73 @@
 
 from __future__ import annotations
 
-import json
 import os
-from typing import Any, Dict, List, Optional
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.engine import catalog_snapshot
 
 # Path to quotes catalog (relative to repo root)
 _QUOTES_CATALOG_PATH = os.path.join(
     os.path.dirname(__file__), "..", "catalog", "quotes", "v1", "quotes_catalog_v1.json"
 )
 
-_cached_quotes: Optional[List[Dict[str, Any]]] = None
+# Session-id fragments that mark a hard day (see detect_quote_context).
+HARD_SESSION_KEYWORDS = ("strength_long", "power_contact", "finger_strength")
+_HARD_SESSION_RE = re.compile("|".join(re.escape(kw) for kw in HARD_SESSION_KEYWORDS))
 
+# Pool key of the "any quote" fallback.
+ALL_QUOTES = "*"
+
+_FALLBACK_QUOTE = {
+    "id": "fallback",
+    "text": "Every day is a sending day.",
+    "author": "Unknown",
+    "source_type": "popular",
+}
+
+
+class QuoteIndex:
+    """Quotes catalog indexed by context, each pool pre-sorted by id."""
+
+    def __init__(self, quotes: List[Dict[str, Any]]) -> None:
+        self.quotes = quotes
+        self.pools: Dict[str, List[Dict[str, Any]]] = {}
+        for q in sorted(quotes, key=lambda q: q.get("id", "")):
+            for ctx in q.get("contexts") or []:
+                self.pools.setdefault(ctx, []).append(q)
+        self.pools[ALL_QUOTES] = sorted(quotes, key=lambda q: q.get("id", ""))
+
+    def pool_key(self, context: str) -> str:
+        """Pool serving *context*: itself, else "general", else every quote."""
+        if self.pools.get(context):
+            return context
+        if self.pools.get("general"):
+            return "general"
+        return ALL_QUOTES
+
+    def pool(self, context: str) -> List[Dict[str, Any]]:
+        return self.pools[self.pool_key(context)]
+
+
+_cached_index: Optional[QuoteIndex] = None
 
-def _load_quotes() -> List[Dict[str, Any]]:
-    """Load and cache the quotes catalog."""
-    global _cached_quotes
-    if _cached_quotes is not None:
-        return _cached_quotes
 
-    path = os.path.normpath(_QUOTES_CATALOG_PATH)
-    with open(path, "r", encoding="utf-8") as f:
-        data = json.load(f)
+def _load_index() -> QuoteIndex:
+    """Load the quotes catalog and build its index (once per process)."""
+    global _cached_index
+    if _cached_index is not None:
+        return _cached_index
 
-    _cached_quotes = data.get("quotes", [])
-    return _cached_quotes
+    data = catalog_snapshot.load_json(os.path.normpath(_QUOTES_CATALOG_PATH))
+
+    _cached_index = QuoteIndex(data.get("quotes", []))
+    return _cached_index
+
+
+def _load_quotes() -> List[Dict[str, Any]]:
+    """Load and cache the quotes catalog."""
+    return _load_index().quotes
 
 
 def detect_quote_context(
@@ -44,8 +87,7 @@ def detect_quote_context(
     if phase_id == "deload":
         return "deload"
 
-    hard_keywords = {"strength_long", "power_contact", "finger_strength"}
-    if any(any(kw in sid for kw in hard_keywords) for sid in session_ids):
+    if any(_HARD_SESSION_RE.search(sid) for sid in session_ids):
         return "hard_day"
 
     if is_first_week:
@@ -54,6 +96,16 @@ def detect_quote_context(
     return "general"
 
 
+def _quote_response(selected: Dict[str, Any], context: str) -> Dict[str, Any]:
+    return {
+        "id": selected.get("id"),
+        "text": selected.get("text"),
+        "author": selected.get("author"),
+        "source_type": selected.get("source_type"),
+        "context": context,
+    }
+
+
 def get_quote_for_session(
     context: str,
     recent_quote_ids: Optional[List[str]] = None,
@@ -62,11 +114,10 @@ def get_quote_for_session(
     """Select a deterministic quote for the given context.
 
     Algorithm:
-    1. Filter quotes by context tag
-    2. Exclude recently seen quote IDs
-    3. Sort by id (deterministic)
-    4. Return first match
-    5. Fallback: if all context quotes exhausted, reset and return first
+    1. Take the context's pool (sorted by id; "general", then every quote,
+       when the context has none)
+    2. Return the first quote not recently seen
+    3. Fallback: if all context quotes exhausted, reset and return first
 
     Args:
         context: Quote context tag (hard_day, deload, general, etc.)
@@ -76,63 +127,46 @@ def get_quote_for_session(
     Returns:
         Quote dict with id, text, author, source_type
     """
-    quotes = _load_quotes()
-    recent = set(recent_quote_ids or [])
-
-    # Filter by context
-    context_quotes = [
-        q for q in quotes
-        if context in (q.get("contexts") or [])
-    ]
-
-    if not context_quotes:
-        # Fallback to "general" context
-        context_quotes = [
-            q for q in quotes
-            if "general" in (q.get("contexts") or [])
-        ]
-
-    if not context_quotes:
-        # Ultimate fallback: any quote
-        context_quotes = list(quotes)
-
-    if not context_quotes:
-        return {
-            "id": "fallback",
-            "text": "Every day is a sending day.",
-            "author": "Unknown",
-            "source_type": "popular",
-            "context": context,
-        }
-
-    # Sort by id for determinism
-    context_quotes.sort(key=lambda q: q.get("id", ""))
-
-    # Exclude recent
-    fresh = [q for q in context_quotes if q.get("id") not in recent]
+    pool = _load_index().pool(context)
+    if not pool:
+        return {**_FALLBACK_QUOTE, "context": context}
 
-    if not fresh:
-        # All exhausted — reset: take first from full context pool
-        fresh = context_quotes
-
-    selected = fresh[0]
+    recent = set(recent_quote_ids or [])
+    selected = next((q for q in pool if q.get("id") not in recent), pool[0])
+    return _quote_response(selected, context)
 
-    return {
-        "id": selected.get("id"),
-        "text": selected.get("text"),
-        "author": selected.get("author"),
-        "source_type": selected.get("source_type"),
-        "context": context,
-    }
 
+def next_quote(context: str, cursors: Optional[Dict[str, int]] = None) -> Tuple[Dict[str, Any], str]:
+    """Quote at the user's rotation cursor for *context*, in O(1).
 
-def update_quote_history(
-    state: Dict[str, Any],
-    quote_id: str,
-    max_history: int = 30,
-) -> None:
-    """Append a quote_id to user_state.quote_history and trim to max size."""
-    history = state.setdefault("quote_history", [])
-    history.append(quote_id)
-    if len(history) > max_history:
-        state["quote_history"] = history[-max_history:]
+    ``cursors`` maps pool keys to how many quotes of that pool were served;
+    the pool is walked in id order and wraps around. Returns the quote and
+    the pool key whose cursor the caller should advance
+    (``advance_quote_cursor``).
+    """
+    index = _load_index()
+    key = index.pool_key(context)
+    pool = index.pools[key]
+    if not pool:
+        return {**_FALLBACK_QUOTE, "context": context}, key
+    position = int((cursors or {}).get(key) or 0) % len(pool)
+    return _quote_response(pool[position], context), key
+
+
+def advance_quote_cursor(state: Dict[str, Any], pool_key: str) -> None:
+    """Count one more quote served from *pool_key*."""
+    cursors = state.setdefault("quote_cursors", {})
+    cursors[pool_key] = int(cursors.get(pool_key) or 0) + 1
+
+
+def quote_cursors_from_history(history: List[str]) -> Dict[str, int]:
+    """Cursors resuming each pool after its last quote in a ``quote_history``."""
+    index = _load_index()
+    cursors: Dict[str, int] = {}
+    for key, pool in index.pools.items():
+        position = {q.get("id"): i for i, q in enumerate(pool)}
+        for quote_id in reversed(history):
+            if quote_id in position:
+                cursors[key] = position[quote_id] + 1
+                break
+    return cursors
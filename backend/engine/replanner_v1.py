@@ -1,33 +1,20 @@
 from __future__ import annotations
 
-import json
-import os
 from copy import deepcopy
 from datetime import datetime, timedelta
 from typing import Any, Dict, Iterable, List, Optional, Sequence
 
 from backend.engine.macrocycle_v1 import _build_session_pool
+from backend.engine.plan_merge import preserve_by_weekday, preserve_completed
 from backend.engine.planner_v2 import _INTENSITY_TO_LOAD, _SESSION_META, generate_phase_week
-
-_REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-_SESSIONS_DIR = os.path.join(_REPO_ROOT, "backend", "catalog", "sessions", "v1")
-
-_required_equipment_cache: Dict[str, list] = {}
+from backend.engine.equipment import location_mask
+from backend.engine.session_meta import fits, required_equipment
+from backend.engine.tracing import traced
 
 
 def _get_required_equipment(session_id: str) -> list:
-    """Load required_equipment from session JSON file (cached)."""
-    if session_id in _required_equipment_cache:
-        return _required_equipment_cache[session_id]
-    path = os.path.join(_SESSIONS_DIR, f"{session_id}.json")
-    try:
-        with open(path, encoding="utf-8") as f:
-            data = json.load(f)
-            eq = data.get("required_equipment", [])
-    except (FileNotFoundError, json.JSONDecodeError):
-        eq = []
-    _required_equipment_cache[session_id] = eq
-    return eq
+    """required_equipment of a catalog session ([] for unknown ids)."""
+    return required_equipment(session_id)
 
 
 def _find_gym_change_replacement(
@@ -46,8 +33,7 @@ def _find_gym_change_replacement(
     # First fallback: complementary_conditioning
     cc_meta = _meta_for("complementary_conditioning")
     if new_location in cc_meta.get("location", ()):
-        cc_eq = set(_get_required_equipment("complementary_conditioning"))
-        if not cc_eq or (new_location != "gym") or cc_eq.issubset(gym_equipment):
+        if new_location != "gym" or fits("complementary_conditioning", location_mask(gym_equipment, "gym")):
             return "complementary_conditioning"
 
     # Universal fallback
@@ -174,6 +160,106 @@ def _build_fill_session(plan: Dict[str, Any], day: Dict[str, Any], slot: str, *,
     }
 
 
+class WeekConstraintState:
+    """Hard/finger bookkeeping of a week plan, kept current edit by edit.
+
+    Per day: ``hard`` and ``finger`` (a hard/finger-tagged session not yet
+    done; the caps police what is still ahead) and ``finger_any`` (any
+    finger-tagged session, the 48h rule of ``_compensate_finger``). Per
+    week: ``hard_days`` and ``session_counts`` (sessions not done/skipped,
+    by id), plus how many consecutive days both carry an active finger
+    session. After an edit, ``refresh(day)`` re-derives that one day, so
+    ``over_hard_cap`` and ``has_finger_conflict`` answer in O(1) instead of
+    re-walking the week. Days are assumed in date order (as planned).
+    """
+
+    def __init__(self, plan: Dict[str, Any]) -> None:
+        self.days: List[Dict[str, Any]] = (plan.get("weeks") or [{}])[0].get("days", [])
+        self.hard_cap = int(((plan.get("profile_snapshot") or {}).get("hard_cap_per_week") or 3))
+        n = len(self.days)
+        self.offsets: Dict[str, int] = {}
+        self.ordinals: List[Optional[int]] = [None] * n
+        self.hard = [False] * n
+        self.finger = [False] * n
+        self.finger_any = [False] * n
+        self.hard_days = 0
+        self.finger_conflicts = 0
+        self.session_counts: Dict[str, int] = {}
+        self._counted: List[List[str]] = [[] for _ in range(n)]
+        self._finger_ordinals: Dict[int, int] = {}
+        for i, day in enumerate(self.days):
+            try:
+                self.ordinals[i] = _parse_date(day["date"]).toordinal()
+                self.offsets.setdefault(day["date"], i)
+            except (KeyError, TypeError, ValueError):
+                pass
+            self._load(i)
+        self.finger_conflicts = sum(self._conflict(i) for i in range(1, n))
+
+    def _conflict(self, i: int) -> bool:
+        """Days i-1 and i are at most a day apart and both have active finger work."""
+        a, b = self.ordinals[i - 1], self.ordinals[i]
+        return self.finger[i - 1] and self.finger[i] and a is not None and b is not None and b - a <= 1
+
+    def _load(self, i: int) -> None:
+        hard = finger = finger_any = False
+        counted: List[str] = []
+        for s in self.days[i].get("sessions") or []:
+            tags = s.get("tags") or {}
+            status = s.get("status")
+            if tags.get("finger"):
+                finger_any = True
+            if status != "done":
+                hard = hard or bool(tags.get("hard"))
+                finger = finger or bool(tags.get("finger"))
+            if status not in ("done", "skipped"):
+                counted.append(s.get("session_id", ""))
+        self.hard[i], self.finger[i], self.finger_any[i] = hard, finger, finger_any
+        self.hard_days += hard
+        for sid in counted:
+            self.session_counts[sid] = self.session_counts.get(sid, 0) + 1
+        self._counted[i] = counted
+        ordinal = self.ordinals[i]
+        if finger_any and ordinal is not None:
+            self._finger_ordinals[ordinal] = self._finger_ordinals.get(ordinal, 0) + 1
+
+    def _unload(self, i: int) -> None:
+        self.hard_days -= self.hard[i]
+        for sid in self._counted[i]:
+            self.session_counts[sid] -= 1
+            if not self.session_counts[sid]:
+                del self.session_counts[sid]
+        ordinal = self.ordinals[i]
+        if self.finger_any[i] and ordinal is not None:
+            self._finger_ordinals[ordinal] -= 1
+            if not self._finger_ordinals[ordinal]:
+                del self._finger_ordinals[ordinal]
+
+    def refresh(self, day: Dict[str, Any]) -> None:
+        """Re-derive *day* after its sessions changed."""
+        i = self.offsets.get(day.get("date"))
+        if i is None:
+            return
+        neighbours = [j for j in (i, i + 1) if 0 < j < len(self.days)]
+        self.finger_conflicts -= sum(self._conflict(j) for j in neighbours)
+        self._unload(i)
+        self._load(i)
+        self.finger_conflicts += sum(self._conflict(j) for j in neighbours)
+
+    @property
+    def over_hard_cap(self) -> bool:
+        return self.hard_days > self.hard_cap
+
+    @property
+    def has_finger_conflict(self) -> bool:
+        return self.finger_conflicts > 0
+
+    def finger_within(self, ordinal: int, *, include_self: bool = True) -> bool:
+        """True if a day within one day of *ordinal* has a finger-tagged session."""
+        near = (ordinal - 1, ordinal, ordinal + 1) if include_self else (ordinal - 1, ordinal + 1)
+        return any(o in self._finger_ordinals for o in near)
+
+
 def suggest_sessions(
     plan: Dict[str, Any],
     target_date: str,
@@ -201,29 +287,16 @@ def suggest_sessions(
         if location in _meta_for(sid).get("location", ("home", "gym"))
     ]
 
-    # Collect already-scheduled session IDs (skip done/skipped)
-    scheduled: set[str] = set()
-    for day in (plan.get("weeks") or [{}])[0].get("days", []):
-        for s in day.get("sessions", []):
-            if s.get("status") not in ("done", "skipped"):
-                scheduled.add(s.get("session_id", ""))
-
-    # Determine hard cap
+    # Already-scheduled session IDs (skip done/skipped), hard days, finger days
+    constraints = WeekConstraintState(plan)
+    scheduled = set(constraints.session_counts)
     hard_cap = int((plan.get("profile_snapshot") or {}).get("hard_cap_per_week", 3))
-    hard_count = 0
-    finger_adjacent = False
-    for day in (plan.get("weeks") or [{}])[0].get("days", []):
-        if any((s.get("tags") or {}).get("hard") and s.get("status") != "done" for s in day.get("sessions", [])):
-            hard_count += 1
-        # Check if adjacent day has finger session
-        try:
-            target_d = _parse_date(target_date)
-            day_d = _parse_date(day["date"])
-            if abs((target_d - day_d).days) <= 1 and day["date"] != target_date:
-                if any((s.get("tags") or {}).get("finger") for s in day.get("sessions", [])):
-                    finger_adjacent = True
-        except (KeyError, ValueError):
-            pass
+    hard_count = constraints.hard_days
+    # Check if adjacent day has finger session
+    try:
+        finger_adjacent = constraints.finger_within(_parse_date(target_date).toordinal(), include_self=False)
+    except ValueError:
+        finger_adjacent = False
 
     # Check if target_date follows a hard day
     follows_hard = False
@@ -302,9 +375,13 @@ def apply_day_add(
     location: str,
     phase_id: Optional[str] = None,
     gym_id: Optional[str] = None,
+    copy: bool = True,
 ) -> tuple:
-    """Append a session to an existing day (quick-add). Returns (updated_plan, warnings)."""
-    updated = deepcopy(plan)
+    """Append a session to an existing day (quick-add). Returns (updated_plan, warnings).
+
+    With ``copy=False`` *plan* itself is updated (the caller owns it).
+    """
+    updated = deepcopy(plan) if copy else plan
     updated.setdefault("adaptations", [])
     target_day = _find_day(updated, target_date)
 
@@ -401,35 +478,11 @@ def apply_day_add(
     return (updated, warnings)
 
 
-def _recompute_day_status(day: Dict[str, Any]) -> None:
-    """Derive day-level status from its sessions' statuses."""
-    sessions = day.get("sessions") or []
-    if not sessions:
-        day.pop("status", None)
-        return
-    statuses = [s.get("status") for s in sessions]
-    if all(st == "done" for st in statuses):
-        day["status"] = "done"
-    elif all(st == "skipped" for st in statuses):
-        day["status"] = "skipped"
-    elif all(st in ("done", "skipped") for st in statuses):
-        day["status"] = "done"
-    else:
-        day.pop("status", None)
-
-
-def _is_preservable(session: Dict[str, Any]) -> bool:
-    """Return True if *session* should survive a plan regeneration."""
-    if session.get("status") in ("done", "skipped"):
-        return True
-    if "quick_add" in (session.get("constraints_applied") or []):
-        return True
-    return False
-
-
 def merge_prev_week_sessions(
     prev_plan: Dict[str, Any],
     new_plan: Dict[str, Any],
+    *,
+    copy: bool = True,
 ) -> Dict[str, Any]:
     """Merge preservable sessions from *prev_plan* into *new_plan* by weekday.
 
@@ -438,193 +491,76 @@ def merge_prev_week_sessions(
     works even when the macrocycle start_date has shifted.
 
     Preservable sessions are those that are done/skipped or added manually
-    via quick-add.
+    via quick-add. With ``copy=False`` *new_plan* is updated in place.
     """
-    result = deepcopy(new_plan)
-
-    # Build map weekday → list of preservable sessions from old plan
-    preservable: Dict[int, List[Dict[str, Any]]] = {}
-    prev_day_fields: Dict[int, Dict[str, Any]] = {}
-    for day in (prev_plan.get("weeks") or [{}])[0].get("days", []):
-        try:
-            wd = datetime.strptime(day["date"], "%Y-%m-%d").weekday()
-        except (KeyError, ValueError):
-            continue
-        sessions = [s for s in day.get("sessions", []) if _is_preservable(s)]
-        if sessions:
-            preservable.setdefault(wd, []).extend(sessions)
-        extras = {k: day[k] for k in _DAY_LEVEL_FIELDS if k in day}
-        if extras:
-            prev_day_fields[wd] = extras
-
-    if not preservable and not prev_day_fields:
-        return result
-
-    # Merge into new plan by weekday
-    for day in (result.get("weeks") or [{}])[0].get("days", []):
-        try:
-            wd = datetime.strptime(day["date"], "%Y-%m-%d").weekday()
-        except (KeyError, ValueError):
-            continue
-
-        to_merge = preservable.get(wd)
-        if to_merge:
-            occupied_slots = {s.get("slot") for s in day.get("sessions", [])}
-            for ps in to_merge:
-                ps_slot = ps.get("slot")
-                if ps_slot in occupied_slots:
-                    # Replace auto-generated session in this slot
-                    day["sessions"] = [
-                        ps if s.get("slot") == ps_slot else s
-                        for s in day["sessions"]
-                    ]
-                else:
-                    day.setdefault("sessions", []).append(ps)
-                occupied_slots.add(ps_slot)
-
-            day["sessions"].sort(
-                key=lambda s: (
-                    SLOTS.index(s.get("slot", "evening")),
-                    s.get("priority", 99),
-                    s.get("session_id", ""),
-                )
-            )
-
-        # Restore day-level fields (outdoor, other_activity)
-        extras = prev_day_fields.get(wd)
-        if extras:
-            day.update(extras)
-
-    # Recompute day-level status from merged sessions
-    for day in (result.get("weeks") or [{}])[0].get("days", []):
-        _recompute_day_status(day)
-
-    result["plan_revision"] = int(result.get("plan_revision") or 1) + 1
-    return result
-
-
-_DAY_LEVEL_FIELDS = (
-    "outdoor_spot_name", "outdoor_spot_id", "outdoor_discipline",
-    "outdoor_session_status", "other_activity", "other_activity_name",
-    "other_activity_slot", "other_activity_status",
-    "other_activity_feedback", "other_activity_load",
-)
+    return preserve_by_weekday(prev_plan, new_plan, copy=copy)
 
 
 def regenerate_preserving_completed(
     old_plan: Dict[str, Any],
     new_plan: Dict[str, Any],
+    *,
+    copy: bool = True,
 ) -> Dict[str, Any]:
-    """Merge completed/skipped sessions from *old_plan* into *new_plan*."""
-    result = deepcopy(new_plan)
-
-    # Build maps from old plan: sessions + day-level fields
-    completed_map: Dict[str, List[Dict[str, Any]]] = {}
-    day_fields_map: Dict[str, Dict[str, Any]] = {}
-    for day in (old_plan.get("weeks") or [{}])[0].get("days", []):
-        done_sessions = [
-            s for s in day.get("sessions", [])
-            if s.get("status") in ("done", "skipped")
-        ]
-        if done_sessions:
-            completed_map[day["date"]] = done_sessions
-        extras = {k: day[k] for k in _DAY_LEVEL_FIELDS if k in day}
-        if extras:
-            day_fields_map[day["date"]] = extras
-
-    # Merge into new plan
-    for date_key, completed_sessions in completed_map.items():
-        target_day = None
-        for day in (result.get("weeks") or [{}])[0].get("days", []):
-            if day.get("date") == date_key:
-                target_day = day
-                break
-        if target_day is None:
-            continue
+    """Merge completed/skipped sessions from *old_plan* into *new_plan*.
 
-        occupied_slots = {s.get("slot") for s in target_day.get("sessions", [])}
-        for cs in completed_sessions:
-            cs_slot = cs.get("slot")
-            if cs_slot in occupied_slots:
-                # Replace the auto-generated session in this slot
-                target_day["sessions"] = [
-                    cs if s.get("slot") == cs_slot else s
-                    for s in target_day["sessions"]
-                ]
-            else:
-                target_day.setdefault("sessions", []).append(cs)
-            occupied_slots.add(cs_slot)
-
-        # Re-sort by slot order
-        target_day["sessions"].sort(
-            key=lambda s: (SLOTS.index(s.get("slot", "evening")), s.get("priority", 99), s.get("session_id", ""))
-        )
-
-    # Restore day-level fields (outdoor, other_activity)
-    for date_key, extras in day_fields_map.items():
-        for day in (result.get("weeks") or [{}])[0].get("days", []):
-            if day.get("date") == date_key:
-                day.update(extras)
-                break
-
-    # Recompute day-level status from merged sessions (B98)
-    for day in (result.get("weeks") or [{}])[0].get("days", []):
-        _recompute_day_status(day)
-
-    result["plan_revision"] = int(result.get("plan_revision") or 1) + 1
-    return result
+    With ``copy=False`` *new_plan* is updated in place.
+    """
+    return preserve_completed(old_plan, new_plan, copy=copy)
 
 
-def _enforce_caps(plan: Dict[str, Any]) -> None:
-    hard_cap = int(((plan.get("profile_snapshot") or {}).get("hard_cap_per_week") or 3))
-    days = plan["weeks"][0]["days"]
-    hard_days = [d for d in days if any((s.get("tags") or {}).get("hard") and s.get("status") != "done" for s in d.get("sessions") or [])]
-    if len(hard_days) > hard_cap:
-        for day in reversed(hard_days[hard_cap:]):
-            for session in day.get("sessions") or []:
-                tags = session.get("tags") or {}
-                if tags.get("hard"):
-                    recovery_meta = _meta_for("regeneration_easy")
-                    session.update(
-                        {
-                            "session_id": "regeneration_easy",
-                            "intensity": recovery_meta["intensity"],
-                            "tags": {"hard": False, "finger": False},
-                            "constraints_applied": ["hard_cap_downshift"],
-                            "explain": ["hard cap exceeded after replanning", "deterministic downshift"],
-                        }
-                    )
+def _downshift(session: Dict[str, Any], constraint: str, reason: str) -> None:
+    recovery_meta = _meta_for("regeneration_easy")
+    session.update(
+        {
+            "session_id": "regeneration_easy",
+            "intensity": recovery_meta["intensity"],
+            "tags": {"hard": False, "finger": False},
+            "constraints_applied": [constraint],
+            "explain": [reason, "deterministic downshift"],
+        }
+    )
 
 
-def _enforce_no_consecutive_finger(plan: Dict[str, Any]) -> None:
-    days = plan["weeks"][0]["days"]
-    last_finger_date = None
-    for day in days:
-        cur = _parse_date(day["date"])
-        has_finger = any((s.get("tags") or {}).get("finger") and s.get("status") != "done" for s in day.get("sessions") or [])
-        if has_finger and last_finger_date and (cur - last_finger_date).days <= 1:
+def _enforce_caps(plan: Dict[str, Any], constraints: Optional[WeekConstraintState] = None) -> None:
+    constraints = constraints or WeekConstraintState(plan)
+    if not constraints.over_hard_cap:
+        return
+    hard_days = [day for i, day in enumerate(constraints.days) if constraints.hard[i]]
+    for day in reversed(hard_days[constraints.hard_cap:]):
+        for session in day.get("sessions") or []:
+            tags = session.get("tags") or {}
+            if tags.get("hard"):
+                _downshift(session, "hard_cap_downshift", "hard cap exceeded after replanning")
+        constraints.refresh(day)
+
+
+def _enforce_no_consecutive_finger(plan: Dict[str, Any], constraints: Optional[WeekConstraintState] = None) -> None:
+    constraints = constraints or WeekConstraintState(plan)
+    if not constraints.has_finger_conflict:
+        return
+    last_finger = None
+    for i, day in enumerate(constraints.days):
+        cur = constraints.ordinals[i]
+        has_finger = constraints.finger[i]
+        if has_finger and last_finger is not None and cur - last_finger <= 1:
             for session in day.get("sessions") or []:
                 if (session.get("tags") or {}).get("finger"):
-                    recovery_meta = _meta_for("regeneration_easy")
-                    session.update(
-                        {
-                            "session_id": "regeneration_easy",
-                            "intensity": recovery_meta["intensity"],
-                            "tags": {"hard": False, "finger": False},
-                            "constraints_applied": ["finger_spacing_downshift"],
-                            "explain": ["no consecutive finger days", "deterministic downshift"],
-                        }
-                    )
+                    _downshift(session, "finger_spacing_downshift", "no consecutive finger days")
+            constraints.refresh(day)
             has_finger = False
         if has_finger:
-            last_finger_date = cur
+            last_finger = cur
 
 
-def _reconcile(plan: Dict[str, Any]) -> None:
-    _enforce_no_consecutive_finger(plan)
-    _enforce_caps(plan)
+def _reconcile(plan: Dict[str, Any], constraints: Optional[WeekConstraintState] = None) -> None:
+    """Enforce finger spacing, then the hard cap; a no-op when neither is violated."""
+    constraints = constraints or WeekConstraintState(plan)
+    _enforce_no_consecutive_finger(plan, constraints)
+    _enforce_caps(plan, constraints)
 
 
+@traced("replanner.apply_events")
 def apply_events(
     plan: Dict[str, Any],
     events: Sequence[Dict[str, Any]],
@@ -632,9 +568,17 @@ def apply_events(
     availability: Optional[Dict[str, Any]] = None,
     planning_prefs: Optional[Dict[str, Any]] = None,
     gyms: Optional[List[Dict[str, Any]]] = None,
+    copy: bool = True,
 ) -> Dict[str, Any]:
-    updated = deepcopy(plan)
+    """Apply *events* in order and reconcile caps and finger spacing.
+
+    With ``copy=False`` *plan* itself is updated (the caller owns it; on
+    error it may be left partly updated).
+    """
+    updated = deepcopy(plan) if copy else plan
     updated.setdefault("adaptations", [])
+    # Kept current as events touch days, so _reconcile only acts on violations
+    constraints = WeekConstraintState(updated)
 
     for event in events:
         event_type = event.get("event_type")
@@ -647,6 +591,8 @@ def apply_events(
             if event.get("from_slot") not in _slots_from_day(from_day):
                 fill_kind = "accessory" if any((s.get("tags") or {}).get("hard") for s in from_day.get("sessions") or []) else "recovery"
                 from_day.setdefault("sessions", []).append(_build_fill_session(updated, from_day, event["from_slot"], kind=fill_kind))
+            constraints.refresh(from_day)
+            constraints.refresh(to_day)
 
         elif event_type == "remove_session":
             day = _find_day(updated, event["date"])
@@ -664,6 +610,7 @@ def apply_events(
             # If no sessions left, clear day-level status
             if not day.get("sessions"):
                 day.pop("status", None)
+            constraints.refresh(day)
 
         elif event_type == "mark_skipped":
             day = _find_day(updated, event["date"])
@@ -673,6 +620,7 @@ def apply_events(
             recovery["status"] = "skipped"
             day.setdefault("sessions", []).append(recovery)
             day["status"] = "skipped"
+            constraints.refresh(day)
 
         elif event_type == "mark_done":
             day = _find_day(updated, event["date"])
@@ -680,6 +628,7 @@ def apply_events(
                 if _session_matches(s, session_ref=event.get("session_ref"), slot=event.get("slot")):
                     s["status"] = "done"
                     break
+            constraints.refresh(day)
             all_sessions_done = all(s.get("status") == "done" for s in day.get("sessions") or [])
             outdoor_ok = day.get("outdoor_session_status", "done") == "done"  # no outdoor = ok
             if all_sessions_done and outdoor_ok:
@@ -694,6 +643,7 @@ def apply_events(
             # If any session is no longer done/skipped, clear day-level status
             if not all(s.get("status") in ("done", "skipped") for s in day.get("sessions") or []):
                 day.pop("status", None)
+            constraints.refresh(day)
 
         elif event_type == "complete_other_activity":
             day = _find_day(updated, event["date"])
@@ -795,6 +745,7 @@ def apply_events(
                         else:
                             next_sessions.append(session)
                     ripple_day["sessions"] = next_sessions
+                    constraints.refresh(ripple_day)
 
             sessions = day.get("sessions") or []
             all_sessions_done = all(s.get("status") in ("done", "skipped") for s in sessions) if sessions else True
@@ -825,6 +776,7 @@ def apply_events(
                     if g.get("gym_id") == new_gym_id:
                         gym_equipment = set(g.get("equipment", []))
                         break
+            gym_mask = location_mask(gym_equipment, "gym")
 
             change_warnings: list = []
             lost_finger = False
@@ -841,11 +793,9 @@ def apply_events(
 
                 # Check equipment compatibility
                 equipment_ok = True
-                if location_ok and new_location == "gym":
-                    req_eq = set(_get_required_equipment(sid))
-                    if req_eq and not req_eq.issubset(gym_equipment):
-                        equipment_ok = False
-                        missing = req_eq - gym_equipment
+                if location_ok and new_location == "gym" and not fits(sid, gym_mask):
+                    equipment_ok = False
+                    missing = set(_get_required_equipment(sid)) - gym_equipment
 
                 if not location_ok or not equipment_ok:
                     # Need replacement
@@ -871,10 +821,11 @@ def apply_events(
                     s["gym_id"] = new_gym_id if new_location == "gym" else None
                     s.pop("resolved", None)
 
+            constraints.refresh(day)
             # Finger compensation if we lost a finger session
             if lost_finger:
                 snap_phase = (updated.get("profile_snapshot") or {}).get("phase_id", "base")
-                _compensate_finger(updated, event["date"], snap_phase, new_location, new_gym_id)
+                _compensate_finger(updated, event["date"], snap_phase, new_location, new_gym_id, constraints)
 
             updated.setdefault("adaptations", []).append({
                 "type": "change_gym",
@@ -917,10 +868,11 @@ def apply_events(
                 )
                 updated["weeks"] = regenerated["weeks"]
                 updated["profile_snapshot"] = regenerated["profile_snapshot"]
+                constraints = WeekConstraintState(updated)
 
         updated["adaptations"].append({"type": "event", "event": event})
 
-    _reconcile(updated)
+    _reconcile(updated, constraints)
     updated["plan_revision"] = int(updated.get("plan_revision") or 1) + 1
     return updated
 
@@ -931,6 +883,7 @@ def _compensate_finger(
     phase_id: str,
     location: str,
     gym_id: Optional[str],
+    constraints: Optional[WeekConstraintState] = None,
 ) -> None:
     """Try to place a finger_maintenance session on a suitable day after losing one to override.
 
@@ -938,35 +891,20 @@ def _compensate_finger(
     have >= 48h gap from the nearest existing finger day, and have a replaceable
     complementary/recovery session. Mutates *plan* in place.
     """
-    days = plan["weeks"][0]["days"]
-    excluded_d = _parse_date(excluded_date)
-
-    # Collect existing finger dates (after override has been applied)
-    finger_dates: set = set()
-    for day in days:
-        if any((s.get("tags") or {}).get("finger") for s in day.get("sessions", [])):
-            finger_dates.add(_parse_date(day["date"]))
+    constraints = constraints or WeekConstraintState(plan)
+    excluded = _parse_date(excluded_date).toordinal()
 
     # Search from excluded_date+2 onwards (48h gap)
     comp_session_id = "finger_maintenance_home"
     comp_meta = _meta_for(comp_session_id)
 
-    for day in days:
-        day_d = _parse_date(day["date"])
-        if (day_d - excluded_d).days < 2:
-            continue
-
-        # Check 48h gap from ALL existing finger days
-        too_close = False
-        for fd in finger_dates:
-            if abs((day_d - fd).days) <= 1:
-                too_close = True
-                break
-        if too_close:
+    for i, day in enumerate(constraints.days):
+        ordinal = constraints.ordinals[i]
+        if ordinal - excluded < 2:
             continue
 
-        # Already has finger — skip
-        if any((s.get("tags") or {}).get("finger") for s in day.get("sessions", [])):
+        # 48h gap from ALL existing finger days (a finger day itself included)
+        if constraints.finger_within(ordinal):
             continue
 
         # Find a replaceable session (complementary/recovery, non-hard, non-done)
@@ -998,6 +936,7 @@ def _compensate_finger(
             "tags": {"hard": comp_meta["hard"], "finger": comp_meta["finger"], **({"test": True} if comp_meta.get("test") else {})},
             "explain": ["finger compensation after override", f"lost_date={excluded_date}"],
         }
+        constraints.refresh(day)
 
         plan.setdefault("adaptations", []).append({
             "type": "finger_compensation",
@@ -1030,8 +969,8 @@ def _resolve_intent_for_equipment(
         return session_id
 
     # Check equipment compatibility
-    req = _get_required_equipment(session_id)
-    if not req or all(eq in gym_equipment for eq in req):
+    available = location_mask(gym_equipment, "gym")
+    if fits(session_id, available):
         return session_id
 
     # Intent-family fallbacks: try alternatives that serve the same training goal
@@ -1053,8 +992,7 @@ def _resolve_intent_for_equipment(
         fb_meta = _SESSION_META.get(fb_sid)
         if fb_meta is None:
             continue
-        fb_req = _get_required_equipment(fb_sid)
-        if not fb_req or all(eq in gym_equipment for eq in fb_req):
+        if fits(fb_sid, available):
             return fb_sid
 
     # No compatible fallback found — use original (will work with whatever equipment is there)
@@ -1073,8 +1011,9 @@ def apply_day_override(
     gym_id: Optional[str] = None,
     gyms: Optional[List[Dict[str, Any]]] = None,
     session_index: Optional[int] = None,
+    copy: bool = True,
 ) -> Dict[str, Any]:
-    updated = deepcopy(plan)
+    updated = deepcopy(plan) if copy else plan
 
     # Resolve target day: explicit target_date or reference_date + 1
     if target_date:
@@ -1241,10 +1180,11 @@ def apply_day_override(
             (s.get("tags") or {}).get("finger") for s in original_sessions
         )
     new_has_finger = meta["finger"]
+    constraints = WeekConstraintState(updated)
     if original_had_finger and not new_has_finger:
-        _compensate_finger(updated, target_key, effective_phase, location, effective_gym_id)
+        _compensate_finger(updated, target_key, effective_phase, location, effective_gym_id, constraints)
 
-    _reconcile(updated)
+    _reconcile(updated, constraints)
 
     updated.setdefault("adaptations", []).append(
         {
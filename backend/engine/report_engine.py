@@ -2,13 +2,17 @@
 
 from __future__ import annotations
 
-import json
 import os
 from datetime import datetime, timedelta
 from typing import Any, Dict, List, Optional
 
 from backend.engine.closed_loop_v1 import STIMULUS_CATEGORIES, _session_categories
-from backend.engine.outdoor_log import compute_outdoor_load_score, load_outdoor_sessions
+from backend.engine.jsonl_tail import read_tail
+from backend.engine.outdoor_log import (
+    compute_outdoor_load_score,
+    load_outdoor_sessions,
+    outdoor_aggregate,
+)
 
 # Difficulty label→score mapping (mirrors adaptive_replan.py)
 _LABEL_TO_SCORE: Dict[str, int] = {
@@ -37,7 +41,12 @@ def _score_to_label(score: float) -> str:
 
 
 def _load_indoor_sessions(log_dir: str, since: str, until: str) -> List[Dict[str, Any]]:
-    """Load indoor session log entries within a date range."""
+    """Load indoor session log entries within a date range.
+
+    Each yearly log is read newest-first down to the first entry before
+    *since* (session logs are appended in date order), so a report costs the
+    entries after its start rather than the whole year.
+    """
     sessions: List[Dict[str, Any]] = []
     if not os.path.isdir(log_dir):
         return sessions
@@ -45,22 +54,14 @@ def _load_indoor_sessions(log_dir: str, since: str, until: str) -> List[Dict[str
     for fn in sorted(os.listdir(log_dir)):
         if not fn.startswith("sessions_") or not fn.endswith(".jsonl"):
             continue
-        path = os.path.join(log_dir, fn)
+        year = fn[len("sessions_"):-len(".jsonl")]
+        if year.isdigit() and not since[:4] <= year <= until[:4]:
+            continue
         try:
-            with open(path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        entry = json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
-                    entry_date = entry.get("date", "")
-                    if since <= entry_date <= until:
-                        sessions.append(entry)
+            tail = list(read_tail(os.path.join(log_dir, fn), since_date=since, loader="report_indoor"))
         except OSError:
             continue
+        sessions.extend(e for e in reversed(tail) if since <= e.get("date", "") <= until)
 
     return sessions
 
@@ -423,53 +424,23 @@ def _build_progression(
 # ---------------------------------------------------------------------------
 
 
-def _build_outdoor(outdoor_sessions: List[Dict[str, Any]]) -> Dict[str, Any]:
-    """Build outdoor section from outdoor session log entries."""
-    if not outdoor_sessions:
-        return {
-            "sessions": 0,
-            "total_routes": 0,
-            "sends": 0,
-            "send_pct": 0.0,
-            "top_grade_sent": None,
-            "onsight_pct": 0.0,
-            "spots": [],
-        }
-
-    total_routes = 0
-    sends = 0
-    onsights = 0
-    spots_set: set = set()
-    top_grade: Optional[str] = None
-
-    for sess in outdoor_sessions:
-        spot = sess.get("spot_name")
-        if spot:
-            spots_set.add(spot)
-        for route in sess.get("routes") or []:
-            total_routes += 1
-            attempts = route.get("attempts") or []
-            sent = any(a.get("result") == "sent" for a in attempts)
-            if sent:
-                sends += 1
-                grade = route.get("grade")
-                if grade:
-                    if top_grade is None or grade > top_grade:
-                        top_grade = grade
-                if route.get("style") == "onsight":
-                    onsights += 1
+def _build_outdoor(aggregate: Dict[str, Any]) -> Dict[str, Any]:
+    """Build outdoor section from the week's outdoor aggregate counters."""
+    total_routes = aggregate["routes"]
+    sends = aggregate["sent"]
+    named_sends = [g for g in aggregate["sent_grades"] if g]
 
     send_pct = round(sends / total_routes * 100, 1) if total_routes else 0.0
-    onsight_pct = round(onsights / total_routes * 100, 1) if total_routes else 0.0
+    onsight_pct = round(aggregate["onsight_styled"] / total_routes * 100, 1) if total_routes else 0.0
 
     return {
-        "sessions": len(outdoor_sessions),
+        "sessions": aggregate["sessions"],
         "total_routes": total_routes,
         "sends": sends,
         "send_pct": send_pct,
-        "top_grade_sent": top_grade,
+        "top_grade_sent": max(named_sends) if named_sends else None,
         "onsight_pct": onsight_pct,
-        "spots": sorted(spots_set),
+        "spots": sorted(aggregate["spots"]),
     }
 
 
@@ -715,7 +686,7 @@ def generate_weekly_report(
     progression = _build_progression(
         user_state.get("working_loads") or {}, week_start
     )
-    outdoor = _build_outdoor(outdoor_filtered)
+    outdoor = _build_outdoor(outdoor_aggregate(log_dir, since, until))
     days = _build_days(week_plan, outdoor_filtered, week_start)
     highlights = _build_highlights(
         adherence, load, difficulty, stimulus_balance,
@@ -1,18 +1,23 @@
 import json
 import os
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Collection, Dict, List, Optional, Tuple, Union
 
+from backend.engine import catalog_snapshot
 from backend.engine.cluster_utils import cluster_key_for_exercise, parse_date
+from backend.engine.equipment import covers, covers_any, mask, with_implied
+from backend.engine.metrics import RESOLVER_CALLS, RESOLVER_P0_CANDIDATES
 from backend.engine.progression_v1 import inject_targets
+from backend.engine.session_history import RecentExercises
+from backend.engine.tracing import sequence, traced
 
 
 # ---------------------------
 # IO helpers
 # ---------------------------
 def load_json(path: str) -> Any:
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    # Catalog documents come from the compiled snapshot when it is current
+    return catalog_snapshot.load_json(path)
 
 
 def ensure_exercise_list(ex_data: Any) -> List[Dict[str, Any]]:
@@ -216,6 +221,13 @@ def ex_equipment_required(ex: Dict[str, Any]) -> List[str]:
 def ex_equipment_required_any(ex: Dict[str, Any]) -> List[str]:
     return norm_list_str(ex.get("equipment_required_any"))
 
+def ex_equipment_fits(ex: Dict[str, Any], avail: int) -> bool:
+    """equipment_required all in *avail*, equipment_required_any (if set) has one in it."""
+    if not covers(avail, mask(ex_equipment_required(ex))):
+        return False
+    req_any = mask(ex_equipment_required_any(ex))
+    return not req_any or covers_any(avail, req_any)
+
 
 # ---------------------------
 # Limitation helpers (B38)
@@ -318,17 +330,18 @@ def _apply_limitation_to_instance(
         presc["multiplier"] = float(presc["multiplier"]) * 0.8
 
 
+@traced("resolver.pick_best_exercise_p0")
 def pick_best_exercise_p0(
     *,
     exercises: List[Dict[str, Any]],
     location: str,
-    available_equipment: List[str],
+    available_equipment: Union[List[str], int],
     role_req: Any,
     domain_req: Any,
     pattern_req: Any = None,
     required_equipment: Any = None,
-    exclude_ids: Optional[set] = None,
-    recent_ex_ids: Optional[List[str]] = None,
+    exclude_ids: Optional[Collection[str]] = None,
+    recent_ex_ids: Optional[Union[RecentExercises, List[str]]] = None,
     limitation_map: Optional[Dict[str, str]] = None,
 ) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
     """
@@ -343,43 +356,40 @@ def pick_best_exercise_p0(
     Deterministic tie-break: exercise_id
     """
     loc = norm_str(location)
-    avail = set(norm_list_str(available_equipment))
+    avail = mask(available_equipment)
 
     role_set = set(norm_list_str(role_req))
     dom_set = set(norm_list_str(domain_req))
     pat_set = set(norm_list_str(pattern_req))
 
     trace = {"counts": {}}
+    stages = sequence("p0.stage")
 
     # Stage 0
     base0 = exercises[:]
     trace["counts"]["start"] = len(base0)
+    RESOLVER_P0_CANDIDATES.observe(len(base0), stage="start")
 
     # Stage 1: location_allowed
+    stages.next("p0.location")
     base1 = [e for e in base0 if loc in set(ex_location_allowed(e))]
     trace["counts"]["after_location"] = len(base1)
 
     # Stage 2: equipment hard constraints
-    base2 = []
-    for e in base1:
-        req = set(ex_equipment_required(e))
-        if req and not req.issubset(avail):
-            continue
-        req_any = ex_equipment_required_any(e)
-        if req_any and set(req_any).isdisjoint(avail):
-            continue
-        base2.append(e)
+    stages.next("p0.equipment")
+    base2 = [e for e in base1 if ex_equipment_fits(e, avail)]
     trace["counts"]["after_equipment"] = len(base2)
 
     # Stage 2b: block-level equipment preference (soft — falls back if no match)
-    req_eq_block = set(norm_list_str(required_equipment))
+    req_eq_block = mask(norm_list_str(required_equipment))
     if req_eq_block:
-        base2b = [e for e in base2 if req_eq_block.issubset(set(ex_equipment_required(e)))]
+        base2b = [e for e in base2 if covers(mask(ex_equipment_required(e)), req_eq_block)]
         if base2b:
             base2 = base2b
     trace["counts"]["after_equipment_pref"] = len(base2)
 
     # Stage 3: role (ANY match)
+    stages.next("p0.role")
     base3 = base2
     if role_set:
         base3 = []
@@ -391,9 +401,11 @@ def pick_best_exercise_p0(
     if not base3:
         trace["domain_filter_applied"] = False
         trace["pattern_filter_applied"] = False
+        RESOLVER_P0_CANDIDATES.observe(0, stage="final")
         return None, trace
 
     # Stage 3b: exclude already-used exercise IDs (soft constraint)
+    stages.next("p0.dedup")
     if exclude_ids:
         base3_dedup = [e for e in base3 if norm_str(get_ex_id(e)) not in exclude_ids]
         if base3_dedup:  # only apply if alternatives exist
@@ -401,6 +413,7 @@ def pick_best_exercise_p0(
     trace["counts"]["after_dedup"] = len(base3)
 
     # Stage 4: domain only if it doesn't zero
+    stages.next("p0.domain")
     trace["domain_filter_applied"] = False
     trace["counts"]["after_domain"] = len(base3)
 
@@ -419,6 +432,7 @@ def pick_best_exercise_p0(
             trace["counts"]["after_domain"] = len(base3)
 
     # Stage 5: pattern only if it doesn't zero
+    stages.next("p0.pattern")
     trace["pattern_filter_applied"] = False
     trace["counts"]["after_pattern"] = len(base3)
 
@@ -437,6 +451,7 @@ def pick_best_exercise_p0(
             trace["counts"]["after_pattern"] = len(base3)
 
     # Stage 6: limitation filtering (after domain/pattern so we filter the right pool)
+    stages.next("p0.limitation")
     if limitation_map:
         severe_contras = {ZONE_TO_CONTRAINDICATION[z] for z, s in limitation_map.items()
                           if s == "severe" and z in ZONE_TO_CONTRAINDICATION}
@@ -452,12 +467,16 @@ def pick_best_exercise_p0(
                 base3 = base3_no_contra
         trace["counts"]["after_limitation_active"] = len(base3)
 
+    RESOLVER_P0_CANDIDATES.observe(len(base3), stage="final")
     if not base3:
         return None, trace
 
     # Deterministic pick: score_exercise for recency-aware tie-breaking,
     # then exercise_id ascending for final deterministic tie-break
+    stages.next("p0.rank")
     if recent_ex_ids:
+        if not isinstance(recent_ex_ids, RecentExercises):
+            recent_ex_ids = RecentExercises(recent_ex_ids)
         prefs_empty: Dict[str, Any] = {}
         base3.sort(key=lambda e: (
             -score_exercise(e, prefs_empty, recent_ex_ids),
@@ -563,43 +582,6 @@ def get_location_equipment(user_state: Optional[Dict[str, Any]], session: Dict[s
     return location, equipment
 
 
-def load_recent_exercise_ids(repo_root: str, days_window: int = 5) -> List[str]:
-    """
-    MVP: looks into data/logs/sessions_*.jsonl and extracts recently used exercise_ids.
-    We keep it simple: we read all lines and take last N entries; in the future filter by date properly.
-    """
-    logs_dir = os.path.join(repo_root, "data", "logs")
-    if not os.path.isdir(logs_dir):
-        return []
-
-    paths = []
-    for fn in os.listdir(logs_dir):
-        if fn.startswith("sessions_") and fn.endswith(".jsonl"):
-            paths.append(os.path.join(logs_dir, fn))
-
-    recent: List[str] = []
-    for p in sorted(paths):
-        try:
-            with open(p, "r", encoding="utf-8") as f:
-                lines = f.readlines()[-200:]  # small rolling tail
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                obj = json.loads(line)
-                # expected: obj["exercise_instances"] = [...]
-                eis = obj.get("exercise_instances") or obj.get("resolved_session", {}).get("exercise_instances") or []
-                for e in eis:
-                    ex_id = e.get("exercise_id")
-                    if ex_id:
-                        recent.append(norm_str(ex_id))
-        except Exception:
-            continue
-
-    # last ones are most recent
-    return recent[-100:]
-
-
 def _cooldown_until_date(user_state: Optional[Dict[str, Any]], cluster_key: str) -> Optional[str]:
     if not user_state:
         return None
@@ -612,14 +594,14 @@ def _cooldown_until_date(user_state: Optional[Dict[str, Any]], cluster_key: str)
 def _find_cooldown_fallback(
     exercises: List[Dict[str, Any]],
     current_ex: Dict[str, Any],
-    available_equipment: List[str],
+    available_equipment: Union[List[str], int],
 ) -> Optional[Dict[str, Any]]:
     current_domain = sorted(norm_list_str(current_ex.get("domain")))
     current_eq = sorted(norm_list_str(current_ex.get("equipment_required")))
     current_eq_any = sorted(norm_list_str(current_ex.get("equipment_required_any")))
     current_pattern = sorted(ex_patterns(current_ex))
 
-    avail = set(norm_list_str(available_equipment))
+    avail = mask(available_equipment)
 
     def same_domain_equipment(ex: Dict[str, Any]) -> bool:
         if sorted(norm_list_str(ex.get("domain"))) != current_domain:
@@ -628,11 +610,7 @@ def _find_cooldown_fallback(
             return False
         if sorted(norm_list_str(ex.get("equipment_required_any"))) != current_eq_any:
             return False
-        req = set(ex_equipment_required(ex))
-        if req and not req.issubset(avail):
-            return False
-        req_any = ex_equipment_required_any(ex)
-        return not req_any or not set(req_any).isdisjoint(avail)
+        return ex_equipment_fits(ex, avail)
 
     def same_cluster(ex: Dict[str, Any]) -> bool:
         if not same_domain_equipment(ex):
@@ -699,23 +677,19 @@ def exercise_matches_filters(ex: Dict[str, Any], filters: Dict[str, Any]) -> boo
     return True
 
 
-def compatible_with_location(ex: Dict[str, Any], available_equipment: List[str]) -> bool:
+def compatible_with_location(ex: Dict[str, Any], available_equipment: Union[List[str], int]) -> bool:
     """
     Hard constraint:
     - if exercise has equipment requirements, all must be present (conservative rule).
     If you want looser behavior later, switch to 'any' logic per exercise type.
     """
-    req = get_ex_equipment(ex)
-    if not req:
-        return True
-    avail = set(norm_list_str(available_equipment))
-    return set(req).issubset(avail)
+    return covers(mask(available_equipment), mask(get_ex_equipment(ex)))
 
 
 def score_exercise(
     ex: Dict[str, Any],
     prefs: Dict[str, Any],
-    recent_ex_ids: List[str],
+    recent_ex_ids: Union[RecentExercises, List[str]],
 ) -> float:
     """
     Simple scoring:
@@ -728,12 +702,11 @@ def score_exercise(
 
     # recent penalty (coherence)
     # If it appears in the last K selections, penalize more
-    if ex_id in recent_ex_ids[-5:]:
-        s -= 100.0
-    elif ex_id in recent_ex_ids[-15:]:
-        s -= 25.0
-    elif ex_id in recent_ex_ids:
-        s -= 5.0
+    if not isinstance(recent_ex_ids, RecentExercises):
+        recent_ex_ids = RecentExercises(recent_ex_ids)
+    distance = recent_ex_ids.distance(ex_id)
+    if distance is not None:
+        s -= 100.0 if distance < 5 else 25.0 if distance < 15 else 5.0
 
     # preference matching (strong preference but not mandatory)
     pref_edge = prefs.get("preferred_edge_mm")
@@ -758,21 +731,24 @@ def score_exercise(
 def pick_best_exercise(
     exercises: List[Dict[str, Any]],
     filters: Dict[str, Any],
-    available_equipment: List[str],
+    available_equipment: Union[List[str], int],
     prefs: Dict[str, Any],
-    recent_ex_ids: List[str],
+    recent_ex_ids: Union[RecentExercises, List[str]],
 ) -> Optional[Dict[str, Any]]:
+    avail = mask(available_equipment)
     candidates: List[Dict[str, Any]] = []
     for ex in exercises:
         if not exercise_matches_filters(ex, filters):
             continue
-        if not compatible_with_location(ex, available_equipment):
+        if not compatible_with_location(ex, avail):
             continue
         candidates.append(ex)
 
     if not candidates:
         return None
 
+    if not isinstance(recent_ex_ids, RecentExercises):
+        recent_ex_ids = RecentExercises(recent_ex_ids)
     scored = [(score_exercise(ex, prefs, recent_ex_ids), ex) for ex in candidates]
     scored.sort(key=lambda x: x[0], reverse=True)
     return scored[0][1]
@@ -786,9 +762,9 @@ def _resolve_inline_block(
     mod: Dict[str, Any],
     exercises: List[Dict[str, Any]],
     location: str,
-    available_equipment: List[str],
+    available_equipment: Union[List[str], int],
     prefs: Dict[str, Any],
-    recent_ex_ids: List[str],
+    recent_ex_ids: RecentExercises,
     user_state: Optional[Dict[str, Any]],
     target_date: Any,
     blocks_out: List[Dict[str, Any]],
@@ -824,7 +800,7 @@ def _resolve_inline_block(
         domain_req=domain_req,
         pattern_req=pattern_req,
         required_equipment=equipment_req,
-        exclude_ids=set(recent_ex_ids),
+        exclude_ids=recent_ex_ids,
         recent_ex_ids=recent_ex_ids,
         limitation_map=limitation_map,
     )
@@ -935,6 +911,7 @@ def _resolve_inline_block(
     return instance_counter
 
 
+@traced("resolver.prehab_injection")
 def _inject_prehab_for_limitations(
     *,
     exercise_instances: List[Dict[str, Any]],
@@ -942,7 +919,7 @@ def _inject_prehab_for_limitations(
     limitation_map: Dict[str, str],
     exercises: List[Dict[str, Any]],
     location: str,
-    available_equipment: List[str],
+    available_equipment: Union[List[str], int],
     instance_counter: int,
 ) -> int:
     """Auto-inject one prehab exercise per limitation zone if not already present."""
@@ -962,7 +939,7 @@ def _inject_prehab_for_limitations(
                 break
 
     loc = norm_str(location)
-    avail = set(norm_list_str(available_equipment))
+    avail = mask(available_equipment)
 
     for zone in prehab_zones:
         prehab_domain = f"prehab_{zone}"
@@ -973,7 +950,7 @@ def _inject_prehab_for_limitations(
             e for e in exercises
             if prehab_domain in norm_list_str(e.get("domain"))
             and (not ex_location_allowed(e) or loc in set(ex_location_allowed(e)))
-            and set(ex_equipment_required(e)).issubset(avail)
+            and covers(avail, mask(ex_equipment_required(e)))
         ]
         if not candidates:
             continue
@@ -1025,6 +1002,7 @@ def _inject_prehab_for_limitations(
 # ---------------------------
 # Resolve session (B + fallback)
 # ---------------------------
+@traced("resolver.resolve_session")
 def resolve_session(
     repo_root: str,
     session_path: str,
@@ -1035,6 +1013,7 @@ def resolve_session(
     user_state_override: Optional[Dict[str, Any]] = None,
     write_output: bool = True
 ) -> Dict[str, Any]:
+    RESOLVER_CALLS.inc()
     user_state = user_state_override if user_state_override is not None else load_user_state(repo_root)
     limitation_map = normalize_limitations(user_state) if user_state else {}
 
@@ -1052,25 +1031,17 @@ def resolve_session(
     # Remove implicit/obvious equipment
     available_equipment = [e for e in available_equipment if norm_str(e) != "floor"]
 
-    # Equipment implications (v1): if any weight subtype is present, expose canonical 'weight'.
-    weight_subtypes = {"dumbbell", "kettlebell", "barbell"}
-    if any(w in available_equipment for w in weight_subtypes) and "weight" not in available_equipment:
-        available_equipment.append("weight")
-
-    # Equipment aliases (v1): loading_pin → hangboard.
+    # Equipment implications (weight subtypes → weight, loading_pin → hangboard,
+    # every gym has a pullup bar); see equipment.py.
     # v2 (B106/B109): gestione unilaterale, doppio tempo, esercizi dedicati
-    EQUIPMENT_ALIASES = {"loading_pin": "hangboard"}
-    for alias, canonical in EQUIPMENT_ALIASES.items():
-        if alias in available_equipment and canonical not in available_equipment:
-            available_equipment.append(canonical)
-
-    # Equipment implications (v2): every gym has a pullup bar.
-    if location == "gym" and "pullup_bar" not in available_equipment:
-        available_equipment.append("pullup_bar")
+    available_equipment = with_implied(available_equipment, location)
+    avail_mask = mask(available_equipment)
 
 
-    # recent history (MVP)
-    recent_ex_ids = load_recent_exercise_ids(repo_root)
+    # recent history: the user's exercise-recency ledger, up to the day before
+    # the session (so its own feedback never changes how it resolves)
+    session_date = session_ctx.get("target_date") or session_ctx.get("date") or user_ctx.get("date")
+    recent_ex_ids = RecentExercises.from_state(user_state, before=str(session_date) if session_date else None)
 
     # preferences (baseline 20mm strong preference, overridable)
     prefs = {
@@ -1095,6 +1066,7 @@ def resolve_session(
 
     instance_counter = 0
 
+    modules_seq = sequence("resolver.module")
     for mod in modules:
         if isinstance(mod, str):
             template_id = mod
@@ -1104,6 +1076,7 @@ def resolve_session(
             template_version = mod.get("version") or mod.get("template_version") or "v1"
         else:
             continue
+        modules_seq.next(template_id=template_id or (mod.get("block_id") if isinstance(mod, dict) else None))
 
         # Inline block: has block_id + selection but no template_id
         if not template_id and isinstance(mod, dict) and mod.get("block_id") and mod.get("selection"):
@@ -1111,7 +1084,7 @@ def resolve_session(
                 mod=mod,
                 exercises=exercises,
                 location=location,
-                available_equipment=available_equipment,
+                available_equipment=avail_mask,
                 prefs=prefs,
                 recent_ex_ids=recent_ex_ids,
                 user_state=user_state,
@@ -1141,9 +1114,11 @@ def resolve_session(
         if not isinstance(blocks, list):
             continue
 
+        blocks_seq = sequence("resolver.block")
         for b in blocks:
             block_id = b.get("block_id") or b.get("id") or f"{template_id}_block_{len(blocks_out)+1}"
             block_uid = f"{template_id}.{block_id}"
+            blocks_seq.next(block_uid=block_uid)
             block_type = b.get("type") or b.get("category") or "main"
             mode = norm_str(b.get("mode") or "")
 
@@ -1201,10 +1176,10 @@ def resolve_session(
                     selected_ex, trace = pick_best_exercise_p0(
                         exercises=exercises,
                         location=location,
-                        available_equipment=available_equipment,
+                        available_equipment=avail_mask,
                         role_req=role_req,
                         domain_req=domain_req,
-                        exclude_ids=set(recent_ex_ids),
+                        exclude_ids=recent_ex_ids,
                         recent_ex_ids=recent_ex_ids,
                         limitation_map=limitation_map,
                     )
@@ -1220,7 +1195,7 @@ def resolve_session(
                     fallback_ex = _find_cooldown_fallback(
                         exercises=exercises,
                         current_ex=selected_ex,
-                        available_equipment=available_equipment,
+                        available_equipment=avail_mask,
                     )
                     if fallback_ex:
                         replanner_note = {
@@ -1313,6 +1288,8 @@ def resolve_session(
                 "selected_exercises": selected_list
             })
 
+    modules_seq.close()
+
     # ---------------------------
     # B38: Prehab injection for limitations (monitor/active/severe)
     # ---------------------------
@@ -1323,7 +1300,7 @@ def resolve_session(
             limitation_map=limitation_map,
             exercises=exercises,
             location=location,
-            available_equipment=available_equipment,
+            available_equipment=avail_mask,
             instance_counter=instance_counter,
         )
 
@@ -1,53 +1,136 @@
-"""Cross-session exercise recency — reads completed session logs for variety."""
+"""Cross-session exercise recency — what the user did lately, for variety.
+
+The resolver's source is the per-user ``exercise_recency`` ledger in the
+state: a bounded list of ``[date, exercise_id, cluster_key]`` rows in date
+order, appended when session feedback is recorded and trimmed to the newest
+``RECENCY_LEDGER_SIZE`` rows. ``RecentExercises`` indexes it so recency
+checks are dict lookups rather than list scans.
+"""
 
 from __future__ import annotations
 
-import json
 import os
 from datetime import datetime, timedelta
-from typing import List
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+from backend.engine.cluster_utils import cluster_key_for_exercise
+from backend.engine.jsonl_tail import read_tail
+
+RECENCY_LEDGER_SIZE = 100
+
+
+class RecentExercises:
+    """Ordered exercise-id history with O(1) "how recently" lookups.
+
+    Behaves like the oldest-first id list it replaces: ``distance(ex_id)`` is
+    how many selections came after the last use of *ex_id* (0 = the latest),
+    so ``distance(x) < 5`` is ``x in ids[-5:]``.
+    """
+
+    __slots__ = ("_last", "_count")
+
+    def __init__(self, ids: Iterable[str] = ()) -> None:
+        self._last: Dict[str, int] = {}
+        self._count = 0
+        for ex_id in ids:
+            self.append(ex_id)
+
+    @classmethod
+    def from_state(
+        cls,
+        user_state: Optional[Dict[str, Any]],
+        before: Optional[str] = None,
+    ) -> "RecentExercises":
+        """History from the state's ledger, only rows dated before *before* if given.
+
+        Resolving a session dated *before* must not see what was done on or
+        after that day (its own feedback included).
+        """
+        rows = (user_state or {}).get("exercise_recency") or []
+        return cls(
+            row[1] for row in rows
+            if isinstance(row, list) and len(row) >= 2 and (before is None or str(row[0]) < before)
+        )
+
+    def append(self, ex_id: str) -> None:
+        self._last[ex_id] = self._count
+        self._count += 1
+
+    def distance(self, ex_id: str) -> Optional[int]:
+        last = self._last.get(ex_id)
+        return None if last is None else self._count - 1 - last
+
+    def __contains__(self, ex_id: object) -> bool:
+        return ex_id in self._last
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(sorted(self._last, key=self._last.__getitem__))
+
+    def __len__(self) -> int:
+        return self._count
+
+
+def record_exercise_recency(
+    state: Dict[str, Any],
+    date: str,
+    exercise_ids: Iterable[str],
+    exercises_by_id: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> bool:
+    """Add the exercises done on *date* to the state's recency ledger.
+
+    Rows are inserted after every row dated on or before *date* (late
+    feedback for an earlier day lands in date order) and the ledger is
+    trimmed to the newest ``RECENCY_LEDGER_SIZE`` rows. Returns True if the
+    ledger changed.
+    """
+    exercises_by_id = exercises_by_id or {}
+    rows = [
+        [date, ex_id, cluster_key_for_exercise(exercises_by_id.get(ex_id) or {})]
+        for ex_id in exercise_ids
+        if ex_id
+    ]
+    if not rows:
+        return False
+    ledger: List[List[Any]] = state.setdefault("exercise_recency", [])
+    pos = len(ledger)
+    while pos and str(ledger[pos - 1][0]) > date:
+        pos -= 1
+    ledger[pos:pos] = rows
+    del ledger[:-RECENCY_LEDGER_SIZE]
+    return True
+
+
+def feedback_exercise_ids(log_entry: Dict[str, Any]) -> List[str]:
+    """Exercise ids of a feedback log entry, in order, without duplicates."""
+    ids = _extract_exercise_ids(log_entry)
+    for item in (log_entry.get("actual") or {}).get("exercise_feedback_v1") or []:
+        eid = item.get("exercise_id") if isinstance(item, dict) else None
+        if eid:
+            ids.append(eid.strip().lower())
+    return list(dict.fromkeys(ids))
 
 
 def get_recent_exercise_ids(log_dir: str, days: int = 7) -> List[str]:
     """Read recent session logs and extract exercise_ids used.
 
-    Scans sessions_*.jsonl files in log_dir for entries within the last `days` days.
-    Returns ordered list (most recent first, then chronological within day).
+    Reads the yearly sessions_*.jsonl files that can hold the last `days`
+    days, each newest-first up to the first older entry (the logs are
+    appended in date order). Returns the ids in log order, oldest first.
     """
     if not os.path.isdir(log_dir):
         return []
 
     cutoff = (datetime.now() - timedelta(days=days)).strftime("%Y-%m-%d")
     recent: List[str] = []
-
-    paths = []
     for fn in sorted(os.listdir(log_dir)):
-        if fn.startswith("sessions_") and fn.endswith(".jsonl"):
-            paths.append(os.path.join(log_dir, fn))
-
-    for path in paths:
-        try:
-            with open(path, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if not line:
-                        continue
-                    try:
-                        obj = json.loads(line)
-                    except json.JSONDecodeError:
-                        continue
-
-                    # Filter by date if available
-                    entry_date = obj.get("date", "")
-                    if entry_date and entry_date < cutoff:
-                        continue
-
-                    # Extract exercise_ids from various possible structures
-                    exercise_ids = _extract_exercise_ids(obj)
-                    recent.extend(exercise_ids)
-        except OSError:
+        if not fn.startswith("sessions_") or not fn.endswith(".jsonl"):
             continue
-
+        year = fn[len("sessions_"):-len(".jsonl")]
+        if year.isdigit() and year < cutoff[:4]:
+            continue
+        entries = list(read_tail(os.path.join(log_dir, fn), since_date=cutoff, loader="session_history"))
+        for obj in reversed(entries):
+            recent.extend(_extract_exercise_ids(obj))
     return recent
 
 
@@ -0,0 +1,82 @@
+"""Planner metadata of the session catalog, compiled once per process.
+
+Every session document in ``backend/catalog/sessions/v1`` carries a
+``planner`` block::
+
+    "planner": {"hard": true, "finger": true, "intensity": "max",
+                "climbing": true, "location": ["gym", "home"], "max_per_week": 2,
+                "domains": ["finger_strength", "pulling_strength"]}
+
+``SESSION_META`` maps each session id to the compiled row the planner and
+replanner read: the planner block (``max_per_week`` defaults to 1,
+``location`` and ``domains`` — the phase domain-weight keys the session
+trains — become tuples), ``test`` from the document's ``tags``, the
+display ``name``, and ``required_equipment`` — the document's, unless the
+planner block overrides it (``regeneration_easy`` is the universal fallback
+and is planned without its gym equipment). ``required_mask`` encodes the
+required equipment in the bits of ``backend.engine.equipment`` so a
+compatibility check is one integer AND (``fits``).
+
+Documents come through ``catalog_snapshot``, so with a current snapshot the
+table is built without parsing any JSON. The catalog does not change while
+the process runs; ``reload()`` rebuilds the table in place for tests.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Any, Dict, List
+
+from backend.engine import catalog_snapshot, equipment
+
+SESSIONS_DIR = os.path.join(catalog_snapshot.CATALOG_DIR, "sessions", "v1")
+
+SESSION_META: Dict[str, Dict[str, Any]] = {}
+
+
+def fits(session_id: str, available_mask: int) -> bool:
+    """True if *available_mask* covers everything *session_id* requires."""
+    meta = SESSION_META.get(session_id)
+    return meta is None or equipment.covers(available_mask, meta["required_mask"])
+
+
+def required_equipment(session_id: str) -> List[str]:
+    meta = SESSION_META.get(session_id)
+    return meta["required_equipment"] if meta else []
+
+
+def _compile(session_id: str, doc: Dict[str, Any]) -> Dict[str, Any]:
+    planner = doc["planner"]
+    meta: Dict[str, Any] = {
+        "hard": bool(planner.get("hard")),
+        "finger": bool(planner.get("finger")),
+        "intensity": planner.get("intensity") or "low",
+        "climbing": bool(planner.get("climbing")),
+        "location": tuple(planner.get("location") or ("home", "gym")),
+        "domains": tuple(planner.get("domains") or ()),
+        "required_equipment": list(planner.get("required_equipment", doc.get("required_equipment")) or []),
+        "max_per_week": int(planner.get("max_per_week", 1)),
+        "name": doc.get("session_name") or doc.get("name") or session_id,
+    }
+    meta["required_mask"] = equipment.mask(meta["required_equipment"])
+    if (doc.get("tags") or {}).get("test"):
+        meta["test"] = True
+    return meta
+
+
+def reload() -> None:
+    """(Re)build ``SESSION_META`` from the catalog."""
+    table: Dict[str, Dict[str, Any]] = {}
+    for name in sorted(os.listdir(SESSIONS_DIR)):
+        if not name.endswith(".json"):
+            continue
+        doc = catalog_snapshot.load_json(os.path.join(SESSIONS_DIR, name))
+        if isinstance(doc, dict) and isinstance(doc.get("planner"), dict):
+            table[name[:-5]] = _compile(name[:-5], doc)
+
+    # Updated in place: planner_v2 and replanner_v1 hold references to it
+    SESSION_META.clear()
+    SESSION_META.update(table)
+
+
+reload()
@@ -0,0 +1,271 @@
+"""Lightweight timing spans for the engine.
+
+``metrics`` answers "how slow is this route on average"; ``filter_trace``
+answers "what did the resolver pick". This module answers "where did the time
+go in *this* call": engine code opens nested spans, and while a trace is being
+collected they form an in-memory tree with wall-clock durations.
+
+Three ways to open a span:
+
+- ``with span("resolver.inject_targets"): ...``
+- ``@traced("planner.generate_phase_week")`` on a function
+- ``seq = sequence("resolver.block")`` then ``seq.next(block_id=...)`` at the
+  top of each loop iteration — every ``next()`` ends the previous span, so long
+  loop bodies (and sequential passes) can be timed without re-indenting them.
+  Leaving the enclosing span ends whatever the sequence left open.
+
+Collection is opt-in per call tree (``collect()``, used by the API for admin
+requests with ``X-Trace: 1``). When nothing is collecting — the normal case —
+every entry point is a single context-variable lookup returning a shared no-op.
+
+Finished traces are also folded into a process-wide per-span-name table
+(count, total, self and max time) exposed by ``timing_table()``.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Spans recorded per trace before further spans are dropped (counted only).
+MAX_SPANS = 5000
+
+
+class Span:
+    __slots__ = ("name", "attrs", "start", "end", "children")
+
+    def __init__(self, name: str, attrs: Optional[Dict[str, Any]] = None) -> None:
+        self.name = name
+        self.attrs = attrs or None
+        self.start = time.perf_counter()
+        self.end: Optional[float] = None
+        self.children: List["Span"] = []
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end if self.end is not None else time.perf_counter()
+        return (end - self.start) * 1000.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"name": self.name, "ms": round(self.duration_ms, 3)}
+        if self.attrs:
+            out["attrs"] = self.attrs
+        if self.children:
+            out["children"] = [c.to_dict() for c in self.children]
+        return out
+
+
+class Trace:
+    """Span tree for one call tree; the open spans form a stack."""
+
+    def __init__(self, name: str) -> None:
+        self.root = Span(name)
+        self._stack: List[Span] = [self.root]
+        self.span_count = 0
+        self.dropped = 0
+
+    def _open(self, name: str, attrs: Optional[Dict[str, Any]]) -> Optional[Span]:
+        if self.span_count >= MAX_SPANS:
+            self.dropped += 1
+            return None
+        node = Span(name, attrs)
+        self._stack[-1].children.append(node)
+        self._stack.append(node)
+        self.span_count += 1
+        return node
+
+    def _depth(self) -> int:
+        return len(self._stack)
+
+    def _unwind(self, depth: int) -> None:
+        """End every open span above *depth* (innermost first)."""
+        now = time.perf_counter()
+        while len(self._stack) > depth:
+            node = self._stack.pop()
+            if node.end is None:
+                node.end = now
+
+    def finish(self) -> None:
+        self._unwind(1)
+        self.root.end = time.perf_counter()
+
+    def to_dict(self) -> Dict[str, Any]:
+        out = self.root.to_dict()
+        out["span_count"] = self.span_count
+        if self.dropped:
+            out["dropped_spans"] = self.dropped
+        return out
+
+
+_current: contextvars.ContextVar[Optional[Trace]] = contextvars.ContextVar("climb_trace", default=None)
+
+
+def enabled() -> bool:
+    return _current.get() is not None
+
+
+# ── span entry points ───────────────────────────────────────────────────
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc: Any) -> bool:
+        return False
+
+    def next(self, name: Optional[str] = None, **attrs: Any) -> None:
+        return None
+
+    def close(self) -> None:
+        return None
+
+
+_NOOP = _NoopSpan()
+
+
+class _ActiveSpan:
+    __slots__ = ("_trace", "_name", "_attrs", "_depth")
+
+    def __init__(self, trace: Trace, name: str, attrs: Dict[str, Any]) -> None:
+        self._trace = trace
+        self._name = name
+        self._attrs = attrs
+        self._depth = 0
+
+    def __enter__(self) -> None:
+        self._depth = self._trace._depth()
+        self._trace._open(self._name, self._attrs)
+
+    def __exit__(self, *exc: Any) -> bool:
+        self._trace._unwind(self._depth)
+        return False
+
+
+def span(name: str, **attrs: Any):
+    """Context manager timing its body as a child of the innermost open span."""
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    return _ActiveSpan(trace, name, attrs)
+
+
+def traced(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorator: run each call of the function inside ``span(name)``."""
+
+    def decorator(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            trace = _current.get()
+            if trace is None:
+                return fn(*args, **kwargs)
+            with _ActiveSpan(trace, name, {}):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+class _Sequence:
+    __slots__ = ("_trace", "_name", "_depth")
+
+    def __init__(self, trace: Trace, name: str) -> None:
+        self._trace = trace
+        self._name = name
+        self._depth = trace._depth()
+
+    def next(self, name: Optional[str] = None, **attrs: Any) -> None:
+        """End the previous span of this sequence and open the next one."""
+        self._trace._unwind(self._depth)
+        self._trace._open(name or self._name, attrs)
+
+    def close(self) -> None:
+        self._trace._unwind(self._depth)
+
+
+def sequence(name: str):
+    """Consecutive sibling spans under the innermost open span (see module doc)."""
+    trace = _current.get()
+    if trace is None:
+        return _NOOP
+    return _Sequence(trace, name)
+
+
+# ── collection ──────────────────────────────────────────────────────────
+
+
+@contextmanager
+def collect(name: str = "request") -> Iterator[Trace]:
+    """Collect every span opened in the body (same context) into a Trace."""
+    trace = Trace(name)
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+        trace.finish()
+        _STATS.add(trace)
+
+
+class _TimingStats:
+    """Per-span-name aggregate over every finished trace in this process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._rows: Dict[str, List[float]] = {}  # name → [count, total_ms, self_ms, max_ms]
+        self.traces = 0
+
+    def add(self, trace: Trace) -> None:
+        with self._lock:
+            self.traces += 1
+            stack = list(trace.root.children)
+            while stack:
+                node = stack.pop()
+                total = node.duration_ms
+                own = total - sum(c.duration_ms for c in node.children)
+                row = self._rows.setdefault(node.name, [0, 0.0, 0.0, 0.0])
+                row[0] += 1
+                row[1] += total
+                row[2] += own
+                row[3] = max(row[3], total)
+                stack.extend(node.children)
+
+    def table(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = [(name, list(row)) for name, row in self._rows.items()]
+        rows.sort(key=lambda item: (-item[1][1], item[0]))
+        return [
+            {
+                "name": name,
+                "count": int(count),
+                "total_ms": round(total, 3),
+                "self_ms": round(own, 3),
+                "mean_ms": round(total / count, 3) if count else 0.0,
+                "max_ms": round(peak, 3),
+            }
+            for name, (count, total, own, peak) in rows
+        ]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._rows.clear()
+            self.traces = 0
+
+
+_STATS = _TimingStats()
+
+
+def timing_table() -> Dict[str, Any]:
+    """Aggregated per-span timings, slowest total first."""
+    return {"traces": _STATS.traces, "spans": _STATS.table()}
+
+
+def reset_timing_table() -> None:
+    _STATS.reset()
@@ -1,7 +1,19 @@
 import sys
 from pathlib import Path
 
+import pytest
+
 # Ensure repo root is importable so `import backend...` works in pytest
 REPO_ROOT = Path(__file__).resolve().parents[2]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
+
+
+@pytest.fixture(autouse=True)
+def _isolated_admin_index(tmp_path, monkeypatch):
+    """Keep the admin index (written by every save_state) out of backend/data."""
+    from backend.api import user_index
+
+    monkeypatch.setattr(user_index, "index_path", lambda: tmp_path / user_index.INDEX_FILENAME)
+    yield
+    user_index.close()
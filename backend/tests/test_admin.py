@@ -16,6 +16,7 @@ from backend.api.main import app
 client = TestClient(app)
 
 SECRET = "test-admin-secret-42"
+USER_A = "3f2b8c1e-5d4a-4b6e-9c7f-1a2b3c4d5e6f"
 
 
 @pytest.fixture(autouse=True)
@@ -152,3 +153,299 @@ class TestAdminUsers:
         r = client.get("/api/admin/users", headers={"X-Admin-Key": SECRET})
         assert r.json()["total"] == 1
         assert r.json()["users"][0]["uuid"] == "good-user"
+
+
+# ── Summary index ──────────────────────────────────────────────────────
+
+
+def _seed_users(tmp_path: Path) -> None:
+    for uid, grade, last in (
+        ("aaa-111", "7a", "2026-03-01"),
+        ("bbb-222", "6b", "2026-01-10"),
+        ("ccc-333", "7a", "2026-02-15"),
+    ):
+        state = deepcopy(deps.EMPTY_TEMPLATE)
+        state["goal"] = {"current_grade": grade, "created_at": "2026-01-01"}
+        state["feedback_log"] = [{"date": last, "session_id": "s", "difficulty": "ok"}]
+        _create_user(tmp_path, uid, state)
+
+
+class TestAdminUserIndex:
+    def test_pagination_and_total(self, isolate):
+        _seed_users(isolate)
+        r = client.get("/api/admin/users?limit=2&offset=1", headers={"X-Admin-Key": SECRET})
+        data = r.json()
+        assert data["total"] == 3
+        assert [u["uuid"] for u in data["users"]] == ["bbb-222", "ccc-333"]
+        assert data["limit"] == 2 and data["offset"] == 1
+
+    def test_sort_and_filters(self, isolate):
+        _seed_users(isolate)
+        h = {"X-Admin-Key": SECRET}
+        r = client.get("/api/admin/users?sort=last_access&order=desc", headers=h)
+        assert [u["uuid"] for u in r.json()["users"]] == ["aaa-111", "ccc-333", "bbb-222"]
+
+        r = client.get("/api/admin/users?grade=7a&active_since=2026-02-01", headers=h)
+        assert r.json()["total"] == 2
+
+        r = client.get("/api/admin/users?q=bbb", headers=h)
+        assert [u["uuid"] for u in r.json()["users"]] == ["bbb-222"]
+
+        assert client.get("/api/admin/users?sort=password", headers=h).status_code == 422
+
+    def test_save_state_updates_index_without_rescan(self, isolate, monkeypatch):
+        _seed_users(isolate)
+        h = {"X-Admin-Key": SECRET}
+        client.get("/api/admin/users", headers=h)
+
+        state = deps.load_state("aaa-111")
+        state["goal"]["current_grade"] = "7b"
+        deps.save_state(state, "aaa-111")
+
+        # A read must not re-parse state files once the index is current.
+        from backend.api import user_index
+
+        def _no_reconcile(*a, **k):
+            raise AssertionError("unexpected reconcile")
+
+        monkeypatch.setattr(user_index, "_reconcile", _no_reconcile)
+        users = client.get("/api/admin/users?grade=7b", headers=h).json()["users"]
+        assert [u["uuid"] for u in users] == ["aaa-111"]
+
+    def test_repeated_saves_reuse_connection_and_log_listing(self, isolate, monkeypatch):
+        from backend.api import user_index
+
+        _seed_users(isolate)
+        state = deps.load_state("aaa-111")
+        deps.save_state(state, "aaa-111")
+        conn = user_index._connect()
+
+        listed = []
+        real_listdir = user_index.os.listdir
+        monkeypatch.setattr(user_index.os, "listdir", lambda p: listed.append(p) or real_listdir(p))
+        logs = isolate / "users" / "aaa-111" / "logs"
+        logs.mkdir()
+        deps.save_state(state, "aaa-111")
+        deps.save_state(state, "aaa-111")
+        assert len(listed) == 1
+        assert user_index._connect() is conn
+
+        (logs / "sessions_2026.jsonl").write_text('{"a": 1}\n', encoding="utf-8")
+        deps.save_state(state, "aaa-111")
+        assert len(listed) == 2
+        assert user_index._get_row(conn, "aaa-111")["log_sessions"] == 1
+
+    def test_session_logs_counted(self, isolate):
+        _seed_users(isolate)
+        logs = isolate / "users" / "aaa-111" / "logs"
+        logs.mkdir()
+        (logs / "sessions_2026.jsonl").write_text('{"a": 1}\n{"a": 2}\n\n', encoding="utf-8")
+        r = client.get("/api/admin/users?q=aaa&refresh=true", headers={"X-Admin-Key": SECRET})
+        assert r.json()["users"][0]["sessions_completed"] == 3
+
+    def test_rebuild_reports_drift_and_delete_forgets(self, isolate):
+        _seed_users(isolate)
+        h = {"X-Admin-Key": SECRET}
+        client.get("/api/admin/users", headers=h)
+
+        # Edited behind the app's back: only a rebuild (or refresh) notices.
+        state_path = isolate / "users" / "bbb-222" / "user_state.json"
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+        state["goal"]["current_grade"] = "8a"
+        state_path.write_text(json.dumps(state), encoding="utf-8")
+
+        result = client.post("/api/admin/users/rebuild-index", headers=h).json()
+        assert result["updated"] == 1
+        assert result["total"] == 3
+        assert client.get("/api/admin/users?grade=8a", headers=h).json()["total"] == 1
+
+        assert client.delete("/api/admin/users/bbb-222", headers=h).status_code == 200
+        assert client.get("/api/admin/users", headers=h).json()["total"] == 2
+
+    def test_rebuild_requires_admin(self):
+        assert client.post("/api/admin/users/rebuild-index").status_code == 403
+
+
+# ── Bulk scan / actions ────────────────────────────────────────────────
+
+
+class TestAdminBulk:
+    def test_stream_scan_ndjson(self, isolate):
+        _seed_users(isolate)
+        bad = isolate / "users" / "bad-user"
+        bad.mkdir()
+        (bad / "user_state.json").write_text("{nope", encoding="utf-8")
+
+        r = client.get("/api/admin/users/stream?workers=2", headers={"X-Admin-Key": SECRET})
+        assert r.status_code == 200
+        assert r.headers["content-type"].startswith("application/x-ndjson")
+        lines = [json.loads(line) for line in r.text.splitlines()]
+        assert [l["uuid"] for l in lines[:-1]] == ["aaa-111", "bad-user", "bbb-222", "ccc-333"]
+        assert lines[1]["ok"] is False
+        assert lines[0]["grade"] == "7a"
+        assert lines[-1] == {"type": "done", "users": 4, "ok": 3, "invalid": 1}
+
+    def test_stream_requires_admin(self):
+        assert client.get("/api/admin/users/stream").status_code == 403
+
+    def test_bulk_migrate_gym_ids_with_progress(self, isolate):
+        from backend.api.tasks import task_queue
+
+        _seed_users(isolate)
+        state_path = isolate / "users" / "bbb-222" / "user_state.json"
+        state = json.loads(state_path.read_text(encoding="utf-8"))
+        state["equipment"]["gyms"] = [{"name": "Gym", "equipment": []}]
+        state_path.write_text(json.dumps(state), encoding="utf-8")
+
+        h = {"X-Admin-Key": SECRET}
+        r = client.post("/api/admin/users/bulk", json={"action": "migrate_gym_ids", "dry_run": True}, headers=h)
+        task_queue.wait_idle("admin")
+        dry = client.get(f"/api/admin/tasks/{r.json()['task_id']}", headers=h).json()
+        assert dry["result"]["changed"] == 1
+        assert "gym_id" not in json.loads(state_path.read_text(encoding="utf-8"))["equipment"]["gyms"][0]
+
+        r = client.post("/api/admin/users/bulk", json={"action": "migrate_gym_ids"}, headers=h)
+        task_queue.wait_idle("admin")
+        task = client.get(f"/api/admin/tasks/{r.json()['task_id']}", headers=h).json()
+        assert task["status"] == "done"
+        assert task["progress"] == {"total": 3, "processed": 3, "changed": 1, "unchanged": 2, "error": 0}
+        assert json.loads(state_path.read_text(encoding="utf-8"))["equipment"]["gyms"][0]["gym_id"]
+
+    def test_bulk_prune_caches_keeps_recent_weeks(self, isolate):
+        from backend.api.tasks import task_queue
+
+        state = deepcopy(deps.EMPTY_TEMPLATE)
+        state["week_plans"] = {"2020-01-06": {}, deps.this_monday(): {}}
+        _create_user(isolate, USER_A, state)
+
+        h = {"X-Admin-Key": SECRET}
+        r = client.post("/api/admin/users/bulk", json={"action": "prune_caches", "user_ids": [USER_A]}, headers=h)
+        task_queue.wait_idle("admin")
+        assert client.get(f"/api/admin/tasks/{r.json()['task_id']}", headers=h).json()["result"]["changed"] == 1
+        saved = json.loads((isolate / "users" / USER_A / "user_state.json").read_text(encoding="utf-8"))
+        assert list(saved["week_plans"]) == [deps.this_monday()]
+
+    def test_bulk_action_waits_for_the_user_state_lock(self, isolate):
+        import threading
+
+        from backend.api import bulk
+
+        state = deepcopy(deps.EMPTY_TEMPLATE)
+        state["week_plans"] = {"2020-01-06": {}}
+        _create_user(isolate, "aaa-111", state)
+
+        results = []
+        with deps.state_lock("aaa-111"):
+            worker = threading.Thread(target=lambda: results.append(bulk.apply_action("prune_caches", "aaa-111")))
+            worker.start()
+            worker.join(0.2)
+            assert worker.is_alive()
+            # A request saving while the action waits is not overwritten
+            current = deps.load_state("aaa-111")
+            current["goal"] = {"current_grade": "7a"}
+            deps.save_state(current, "aaa-111")
+        worker.join(10)
+
+        assert results == [{"uuid": "aaa-111", "status": "changed"}]
+        saved = deps.load_state("aaa-111")
+        assert saved["goal"] == {"current_grade": "7a"}
+        assert saved["week_plans"] == {}
+
+    def test_bulk_rejects_unknown_and_invalid_ids_without_creating_them(self, isolate):
+        from backend.api.tasks import task_queue
+
+        _create_user(isolate, USER_A, deepcopy(deps.EMPTY_TEMPLATE))
+        missing = "7c9e6679-7425-40de-944b-e07fc1f90ae7"
+        h = {"X-Admin-Key": SECRET}
+        r = client.post(
+            "/api/admin/users/bulk",
+            json={"action": "prune_caches", "user_ids": [USER_A, missing, "../escape", "aaa-111"]},
+            headers=h,
+        )
+        task_queue.wait_idle("admin")
+        result = client.get(f"/api/admin/tasks/{r.json()['task_id']}", headers=h).json()["result"]
+        assert result["total"] == 4 and result["unchanged"] == 1 and result["error"] == 3
+        assert {e["uuid"] for e in result["errors"]} == {missing, "../escape", "aaa-111"}
+        assert all(e["error"] == "not_found" for e in result["errors"])
+        assert sorted(p.name for p in (isolate / "users").iterdir()) == [USER_A]
+        assert not (isolate / "escape").exists()
+
+    def test_bulk_unknown_action_422(self):
+        r = client.post("/api/admin/users/bulk", json={"action": "drop_tables"}, headers={"X-Admin-Key": SECRET})
+        assert r.status_code == 422
+
+
+# ── Profiling (X-Profile) ──────────────────────────────────────────────
+
+
+class TestAdminProfiles:
+    def test_profile_header_requires_admin(self, isolate):
+        r = client.get("/api/catalog/sessions", headers={"X-Profile": "1"})
+        assert r.status_code == 200
+        assert "x-profile-id" not in r.headers
+        assert not (isolate / "profiles").exists()
+
+    def test_profiled_request_writes_dump_and_summary(self, isolate):
+        r = client.get(
+            "/api/catalog/sessions",
+            headers={"X-Admin-Key": SECRET, "X-Profile": "1"},
+        )
+        assert r.status_code == 200
+        assert r.json()["count"] > 0
+        profile_id = r.headers["x-profile-id"]
+        assert (isolate / "profiles" / f"{profile_id}.prof").is_file()
+
+        listed = client.get("/api/admin/profiles", headers={"X-Admin-Key": SECRET}).json()
+        assert listed["total"] == 1
+        meta = listed["profiles"][0]
+        assert meta["profile_id"] == profile_id
+        assert meta["route"] == "/api/catalog/sessions"
+
+        summary = client.get(f"/api/admin/profiles/{profile_id}", headers={"X-Admin-Key": SECRET})
+        assert summary.status_code == 200
+        assert "list_sessions" in summary.text
+
+    def test_profiles_listing_requires_admin(self):
+        assert client.get("/api/admin/profiles").status_code == 403
+
+    def test_unknown_profile_404(self):
+        r = client.get("/api/admin/profiles/nope", headers={"X-Admin-Key": SECRET})
+        assert r.status_code == 404
+
+
+class TestAdminTracing:
+    def test_trace_header_requires_admin(self):
+        r = client.post(
+            "/api/session/resolve",
+            json={"session_id": "strength_long"},
+            headers={"X-Trace": "1"},
+        )
+        assert r.status_code == 200
+        assert "_debug_trace" not in r.json()
+
+    def test_traced_request_returns_span_tree(self):
+        client.delete("/api/admin/trace-stats", headers={"X-Admin-Key": SECRET})
+        r = client.post(
+            "/api/session/resolve",
+            json={"session_id": "strength_long"},
+            headers={"X-Admin-Key": SECRET, "X-Trace": "1"},
+        )
+        assert r.status_code == 200
+        body = r.json()
+        assert "resolved" in body
+        tree = body["_debug_trace"]
+        assert tree["name"] == "/api/session/resolve"
+        resolver = tree["children"][0]
+        assert resolver["name"] == "resolver.resolve_session"
+        names = {c["name"] for c in resolver["children"]}
+        assert "resolver.module" in names
+
+        stats = client.get("/api/admin/trace-stats", headers={"X-Admin-Key": SECRET}).json()
+        assert stats["traces"] == 1
+        by_name = {row["name"]: row for row in stats["spans"]}
+        assert by_name["resolver.resolve_session"]["count"] == 1
+        assert by_name["resolver.pick_best_exercise_p0"]["count"] >= 1
+        assert "p0.role" in by_name
+
+    def test_trace_stats_requires_admin(self):
+        assert client.get("/api/admin/trace-stats").status_code == 403
@@ -12,6 +12,7 @@ from fastapi.testclient import TestClient
 
 from backend.api import deps
 from backend.api.main import app
+from backend.api.tasks import task_queue
 
 client = TestClient(app)
 
@@ -29,6 +30,8 @@ def isolate_state(tmp_path, monkeypatch):
         tmp_state.write_text(json.dumps(deps.EMPTY_TEMPLATE, indent=2))
     monkeypatch.setattr(deps, "STATE_PATH", tmp_state)
     yield tmp_state
+    # Background follow-ups must finish while STATE_PATH is still patched
+    task_queue.wait_idle()
 
 
 # -----------------------------------------------------------------------
@@ -61,6 +64,14 @@ class TestState:
         # Original fields preserved
         assert data["user"].get("name") is not None
 
+    def test_put_gym_without_id_gets_one(self):
+        r = client.put("/api/state", json={"equipment": {"gyms": [{"name": "New Gym", "equipment": []}]}})
+        assert r.status_code == 200
+        gym_id = client.get("/api/state").json()["equipment"]["gyms"][0].get("gym_id")
+        assert gym_id
+        # Stable across loads until it is saved
+        assert deps.load_state()["equipment"]["gyms"][0]["gym_id"] == gym_id
+
     def test_delete_state_resets(self):
         r = client.delete("/api/state")
         assert r.status_code == 200
@@ -88,6 +99,27 @@ class TestState:
         remaining = list(log_dir.glob("outdoor_sessions_*.jsonl"))
         assert remaining == [], f"Outdoor logs should be cleared after reset: {remaining}"
 
+    def test_put_state_response_changed(self):
+        r = client.put("/api/state?response=changed", json={
+            "user": {"preferred_name": "Changed"},
+            "goal": client.get("/api/state").json()["goal"],
+        })
+        assert r.status_code == 200
+        data = r.json()
+        assert data["changed_keys"] == ["user"]
+        assert data["changes"]["user"]["preferred_name"] == "Changed"
+        assert "week_plans" not in data["changes"]
+
+    def test_put_state_response_minimal(self):
+        r = client.put("/api/state?response=minimal", json={"user": {"preferred_name": "M"}})
+        assert r.status_code == 200
+        assert r.json() == {"status": "ok"}
+        assert client.get("/api/state").json()["user"]["preferred_name"] == "M"
+
+    def test_put_state_response_invalid(self):
+        r = client.put("/api/state?response=everything", json={})
+        assert r.status_code == 422
+
 
 # -----------------------------------------------------------------------
 # Catalog
@@ -621,6 +653,8 @@ class TestReplanner:
         assert len(updated_day["sessions"]) == original_count
         done_s = next(s for s in updated_day["sessions"] if s["session_id"] == session["session_id"])
         assert done_s["status"] == "done"
+        # a completed session keeps the exercises it was resolved with
+        assert done_s["resolved"] == session["resolved"]
 
     def test_events_mark_skipped_sets_day_status(self):
         """API-level: mark_skipped should set day status to 'skipped' and replace with recovery."""
@@ -721,6 +755,37 @@ class TestReplanner:
         assert state.get("current_week_plan") is not None
         assert state["current_week_plan"].get("weeks") is not None
 
+    def test_history_and_undo_of_stored_week(self):
+        """Events on the stored week (no week_plan in the body) are recorded and undoable."""
+        week_plan = self._get_week_plan()
+        start_date = week_plan["start_date"]
+        day = next(d for d in week_plan["weeks"][0]["days"] if d.get("sessions"))
+        session = day["sessions"][0]
+
+        r = client.post("/api/replanner/events", json={
+            "start_date": start_date,
+            "events": [{
+                "event_type": "mark_done",
+                "date": day["date"],
+                "slot": session["slot"],
+                "session_ref": session["session_id"],
+            }],
+        })
+        assert r.status_code == 200
+
+        r = client.get("/api/replanner/history", params={"start_date": start_date})
+        assert r.status_code == 200
+        assert [e["op"] for e in r.json()["entries"]] == ["events"]
+        assert r.json()["can_undo"] is True
+
+        r = client.post("/api/replanner/undo", json={"start_date": start_date})
+        assert r.status_code == 200
+        undone_day = next(d for d in r.json()["week_plan"]["weeks"][0]["days"] if d["date"] == day["date"])
+        assert "status" not in undone_day["sessions"][0]
+
+        assert client.get("/api/replanner/history", params={"start_date": start_date}).json()["entries"] == []
+        assert client.post("/api/replanner/undo", json={"start_date": start_date}).status_code == 422
+
 
 # -----------------------------------------------------------------------
 # Feedback
@@ -738,6 +803,85 @@ class TestFeedback:
         assert r.status_code == 200
         assert r.json()["status"] == "ok"
 
+    def test_feedback_default_returns_full_state(self):
+        r = client.post("/api/feedback", json={
+            "log_entry": {"date": "2026-03-02", "actual": {"exercise_feedback_v1": []}},
+            "status": "done",
+        })
+        assert "schema_version" in r.json()["state"]
+
+    def test_feedback_response_changed(self):
+        r = client.post("/api/feedback?response=changed", json={
+            "log_entry": {
+                "date": "2026-03-02",
+                "session_id": "strength_long",
+                "actual": {"exercise_feedback_v1": []},
+            },
+            "status": "done",
+        })
+        assert r.status_code == 200
+        data = r.json()
+        assert "state" not in data
+        assert "feedback_log" in data["changed_keys"]
+        assert set(data["changes"]) == set(data["changed_keys"])
+        assert data["changes"]["feedback_log"][0]["session_id"] == "strength_long"
+        assert "week_plans" not in data["changed_keys"]
+
+    def test_feedback_response_minimal(self):
+        r = client.post("/api/feedback?response=minimal", json={
+            "log_entry": {"date": "2026-03-02", "actual": {"exercise_feedback_v1": []}},
+            "status": "done",
+        })
+        assert r.status_code == 200
+        assert set(r.json()) == {"status", "task_id"}
+        assert client.get("/api/state").json()["feedback_log"]
+
+    def test_feedback_records_exercise_recency(self):
+        entry = {
+            "date": "2026-03-02",
+            "actual": {"exercise_feedback_v1": [{"exercise_id": "pullup", "feedback_label": "ok"}]},
+        }
+        r = client.post("/api/feedback?response=changed", json={"log_entry": entry, "status": "done"})
+        assert r.json()["changes"]["exercise_recency"][-1][:2] == ["2026-03-02", "pullup"]
+
+        r = client.post("/api/feedback?response=changed", json={"log_entry": entry, "status": "skipped"})
+        assert "exercise_recency" not in r.json()["changed_keys"]
+
+    def test_feedback_adaptive_replan_runs_in_background(self):
+        plan = {
+            "start_date": "2026-03-02",
+            "weeks": [{"days": [
+                {"date": "2026-03-02", "sessions": []},
+                {"date": "2026-03-03", "sessions": [{
+                    "slot": "evening", "session_id": "strength_long", "location": "gym",
+                    "gym_id": None, "tags": {"hard": True, "finger": True},
+                }]},
+            ]}],
+        }
+        client.put("/api/state", json={"current_week_plan": plan, "feedback_log": []})
+        r = client.post("/api/feedback?response=minimal", json={
+            "log_entry": {
+                "date": "2026-03-02",
+                "session_id": "power_contact_gym",
+                "actual": {"exercise_feedback_v1": [
+                    {"exercise_id": "x", "feedback_label": "very_hard"},
+                ]},
+            },
+            "status": "done",
+        })
+        task_id = r.json()["task_id"]
+        assert task_queue.wait_idle("legacy", timeout=10)
+
+        status = client.get(f"/api/tasks/{task_id}").json()
+        assert status["status"] == "done"
+        state = client.get("/api/state").json()
+        replanned = state["current_week_plan"]["weeks"][0]["days"][1]["sessions"][0]
+        assert replanned["session_id"] == "complementary_conditioning"
+        assert state["current_week_plan"]["adaptations"][0]["type"] == "adaptive_replan"
+
+    def test_task_status_unknown_returns_404(self):
+        assert client.get("/api/tasks/t-nope").status_code == 404
+
 
 # -----------------------------------------------------------------------
 # Start-week (onboarding)
@@ -0,0 +1,90 @@
+"""Tests for the compiled catalog snapshot (backend/engine/catalog_snapshot.py)."""
+
+from __future__ import annotations
+
+import json
+import os
+import pickle
+
+import pytest
+
+from backend.engine import catalog_snapshot
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    root = tmp_path / "catalog"
+    (root / "sessions" / "v1").mkdir(parents=True)
+    (root / "exercises" / "v1").mkdir(parents=True)
+    (root / "sessions" / "v1" / "a.json").write_text(json.dumps({"session_id": "a", "modules": []}))
+    (root / "exercises" / "v1" / "exercises.json").write_text(json.dumps({"exercises": [{"id": "x"}]}))
+    return str(root)
+
+
+@pytest.fixture
+def snap(tmp_path, monkeypatch):
+    path = str(tmp_path / "snapshot.pickle")
+    monkeypatch.setenv("CATALOG_SNAPSHOT_PATH", path)
+    catalog_snapshot.reset()
+    yield path
+    catalog_snapshot.reset()
+
+
+def test_build_and_read_roundtrip(catalog, snap):
+    manifest = catalog_snapshot.build(catalog)
+    assert sorted(manifest["files"]) == ["exercises/v1/exercises.json", "sessions/v1/a.json"]
+
+    files = catalog_snapshot.read(catalog)
+    assert pickle.loads(files["sessions/v1/a.json"]) == {"session_id": "a", "modules": []}
+
+
+def test_touched_but_identical_sources_still_match(catalog, snap):
+    catalog_snapshot.build(catalog)
+    path = os.path.join(catalog, "sessions", "v1", "a.json")
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+    assert catalog_snapshot.read(catalog) is not None
+
+
+def test_changed_sources_fall_back(catalog, snap):
+    catalog_snapshot.build(catalog)
+    with open(os.path.join(catalog, "sessions", "v1", "a.json"), "w") as f:
+        json.dump({"session_id": "a", "modules": ["changed"]}, f)
+    assert catalog_snapshot.read(catalog) is None
+
+    catalog_snapshot.build(catalog)
+    with open(os.path.join(catalog, "sessions", "v1", "b.json"), "w") as f:
+        json.dump({}, f)
+    assert catalog_snapshot.read(catalog) is None
+
+
+def test_other_version_or_garbage_ignored(catalog, snap, monkeypatch):
+    catalog_snapshot.build(catalog)
+    monkeypatch.setattr(catalog_snapshot, "SNAPSHOT_VERSION", catalog_snapshot.SNAPSHOT_VERSION + 1)
+    assert catalog_snapshot.read(catalog) is None
+
+    with open(snap, "wb") as f:
+        f.write(b"not a pickle")
+    assert catalog_snapshot.read(catalog) is None
+
+
+def test_load_json_serves_fresh_copies_from_snapshot(snap):
+    path = os.path.join(catalog_snapshot.CATALOG_DIR, "exercises", "v1", "exercises.json")
+    assert catalog_snapshot.warm() == "built"
+
+    first = catalog_snapshot.load_json(path)
+    with open(path, encoding="utf-8") as f:
+        assert first == json.load(f)
+    first["exercises"].clear()
+    assert catalog_snapshot.load_json(path)["exercises"]
+
+
+def test_disabled_snapshot_reads_sources(monkeypatch):
+    monkeypatch.setenv("CATALOG_SNAPSHOT_PATH", "")
+    catalog_snapshot.reset()
+    try:
+        assert catalog_snapshot.warm() == "disabled"
+        path = os.path.join(catalog_snapshot.CATALOG_DIR, "exercises", "v1", "exercises.json")
+        assert catalog_snapshot.load_json(path)["exercises"]
+    finally:
+        catalog_snapshot.reset()
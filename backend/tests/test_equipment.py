@@ -0,0 +1,68 @@
+"""Tests for the equipment bitmask model (backend/engine/equipment.py)."""
+
+from __future__ import annotations
+
+from backend.engine import equipment
+from backend.engine.equipment import EquipmentProfile, covers, location_mask, mask, names, with_implied
+
+
+def test_vocabulary_bits_are_distinct_and_stable():
+    bits = [equipment.bit(name) for name in equipment.VOCABULARY]
+    assert len(set(bits)) == len(bits)
+    assert equipment.bit("hangboard") == 1
+    assert equipment.bit(" Hangboard ") == 1
+
+
+def test_unknown_names_share_one_unsatisfiable_bit():
+    unknown = mask(["a_machine_nobody_has"])
+    assert unknown == equipment.UNKNOWN_BIT == mask(["another_one", "a_machine_nobody_has"])
+    assert not unknown & mask(equipment.VOCABULARY)
+    assert not covers(mask(equipment.VOCABULARY), unknown)
+    # Listing the same unknown item at a place does not satisfy it either
+    assert not covers(location_mask(["a_machine_nobody_has"], "home"), unknown)
+    assert not equipment.covers_any(unknown, unknown | mask(["rings"]))
+    assert equipment.covers_any(mask(["rings"]), unknown | mask(["rings"]))
+    assert mask(["", "hangboard"]) == mask(["hangboard"])
+    assert names(unknown) == ["unknown"]
+
+
+def test_implications_applied_once_per_place():
+    home = location_mask(["loading_pin", "kettlebell"], "home")
+    assert covers(home, mask(["hangboard", "weight"]))
+    assert not covers(home, mask(["pullup_bar"]))
+
+    gym = location_mask(["gym_boulder"], "gym")
+    assert covers(gym, mask(["pullup_bar", "gym_boulder"]))
+    assert names(gym) == ["gym_boulder", "pullup_bar"]
+
+
+def test_with_implied_keeps_listed_order():
+    assert with_implied(["dumbbell", "loading_pin"], "gym") == [
+        "dumbbell", "loading_pin", "weight", "hangboard", "pullup_bar",
+    ]
+    assert with_implied(["hangboard", "pullup_bar"], "gym") == ["hangboard", "pullup_bar"]
+
+
+def test_profile_gym_lookup():
+    profile = EquipmentProfile(
+        None,
+        [
+            {"gym_id": "b", "priority": 2, "equipment": ["gym_routes"]},
+            {"gym_id": "a", "priority": 1, "equipment": ["gym_boulder"]},
+        ],
+    )
+    assert profile.home is None and profile.at("home") is None
+    assert [gym_id for gym_id, _ in profile.gyms] == ["a", "b"]
+    assert profile.gym("missing") is None
+    assert profile.at("gym", "missing") == profile.gym("a")
+    assert profile.first_gym_with(mask(["gym_routes"])) == "b"
+    assert profile.any_gym_covers(mask(["gym_boulder", "pullup_bar"]))
+    assert not profile.any_gym_covers(mask(["gym_routes", "gym_boulder"]))
+
+
+def test_profile_from_state():
+    state = {"equipment": {"home": ["hangboard"], "gyms": [{"gym_id": "g", "equipment": []}]}}
+    profile = EquipmentProfile.from_state(state)
+    assert profile.home == mask(["hangboard"])
+    assert profile.gym("g") == mask(["pullup_bar"])
+    assert EquipmentProfile.from_state({}).gyms == ()
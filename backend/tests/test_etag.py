@@ -0,0 +1,113 @@
+"""Tests for conditional GET (ETag / If-None-Match) on read endpoints."""
+
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.api import deps
+from backend.api.etag import _matches, make_etag
+from backend.api.main import app
+from backend.api.routers import outdoor as outdoor_router
+from backend.api.routers import week as week_router
+
+client = TestClient(app)
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+REAL_STATE_PATH = REPO_ROOT / "backend" / "tests" / "fixtures" / "test_user_state.json"
+
+
+@pytest.fixture(autouse=True)
+def isolate(tmp_path, monkeypatch):
+    state_path = tmp_path / "user_state.json"
+    shutil.copy2(REAL_STATE_PATH, state_path)
+    log_dir = tmp_path / "logs"
+    log_dir.mkdir()
+    monkeypatch.setattr(deps, "STATE_PATH", state_path)
+    monkeypatch.setattr(outdoor_router, "_FALLBACK_LOG_DIR", str(log_dir))
+    yield tmp_path
+
+
+def _revalidate(url: str, etag: str):
+    return client.get(url, headers={"If-None-Match": etag})
+
+
+def test_matches_handles_weak_lists_and_star():
+    tag = make_etag("a")
+    assert _matches(tag, tag)
+    assert _matches(tag[2:], tag)
+    assert _matches(f'"other", {tag}', tag)
+    assert _matches("*", tag)
+    assert not _matches('"other"', tag)
+
+
+def test_state_304_until_write():
+    r = client.get("/api/state")
+    etag = r.headers["etag"]
+    assert r.headers["cache-control"] == "no-cache"
+
+    again = _revalidate("/api/state", etag)
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+
+    client.put("/api/state?response=minimal", json={"user": {"preferred_name": "X"}})
+    changed = _revalidate("/api/state", etag)
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["user"]["preferred_name"] == "X"
+
+
+def test_same_size_rewrites_change_etag():
+    client.put("/api/state?response=minimal", json={"user": {"preferred_name": "A"}})
+    first = client.get("/api/state").headers["etag"]
+    client.put("/api/state?response=minimal", json={"user": {"preferred_name": "B"}})
+    assert _revalidate("/api/state", first).status_code == 200
+
+
+def test_catalog_etags_are_stable():
+    for url in ("/api/catalog/exercises", "/api/catalog/sessions"):
+        etag = client.get(url).headers["etag"]
+        assert _revalidate(url, etag).status_code == 304
+    assert (
+        client.get("/api/catalog/exercises").headers["etag"]
+        != client.get("/api/catalog/sessions").headers["etag"]
+    )
+
+
+def test_outdoor_sessions_etag_follows_log(isolate):
+    r = client.get("/api/outdoor/sessions")
+    etag = r.headers["etag"]
+    assert _revalidate("/api/outdoor/sessions", etag).status_code == 304
+
+    client.post("/api/outdoor/log", json={
+        "date": "2026-03-14",
+        "spot_name": "Crag",
+        "discipline": "lead",
+        "duration_minutes": 120,
+        "routes": [{"name": "R1", "grade": "6a", "attempts": [{"result": "sent"}]}],
+    })
+    assert _revalidate("/api/outdoor/sessions", etag).status_code == 200
+    assert _revalidate("/api/outdoor/sessions?since=2026-01-01", etag).status_code == 200
+
+
+def test_week_304_skips_generation(monkeypatch):
+    r = client.get("/api/week/1")
+    assert r.status_code == 200
+    etag = r.headers["etag"]
+
+    def _fail(*args, **kwargs):
+        raise AssertionError("week must not be regenerated on 304")
+
+    monkeypatch.setattr(week_router, "load_state", _fail)
+    monkeypatch.setattr(week_router, "generate_phase_week", _fail)
+    assert _revalidate("/api/week/1", etag).status_code == 304
+
+
+def test_week_force_ignores_etag():
+    etag = client.get("/api/week/1").headers["etag"]
+    r = _revalidate("/api/week/1?force=true", etag)
+    assert r.status_code == 200
@@ -0,0 +1,74 @@
+"""Tests for the pluggable JSON codec (orjson with stdlib fallback)."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from backend.engine import json_codec
+
+SAMPLE = {
+    "b": [1, 2.5, None, True],
+    "a": {"nome": "Fontainebleau — Bas Cuvier", "z": {}, "y": []},
+}
+
+
+@pytest.fixture(params=["default", "stdlib"])
+def codec(request, monkeypatch):
+    if request.param == "stdlib":
+        monkeypatch.setattr(json_codec, "_orjson", None)
+    return json_codec
+
+
+def test_roundtrip(codec):
+    assert codec.loads(codec.dumps(SAMPLE)) == SAMPLE
+    assert codec.loads(codec.dumps_bytes(SAMPLE)) == SAMPLE
+
+
+def test_line_is_compact_single_line_utf8(codec):
+    line = codec.dumps_line(SAMPLE, sort_keys=True)
+    assert "\n" not in line
+    assert "—" in line
+    assert line.startswith('{"a":')
+
+
+def test_state_pretty_matches_stdlib_layout(codec, monkeypatch):
+    monkeypatch.setattr(json_codec, "STATE_FORMAT", "pretty")
+    expected = json.dumps(SAMPLE, ensure_ascii=False, indent=2, sort_keys=True) + "\n"
+    assert codec.dumps_state(SAMPLE).decode("utf-8") == expected
+
+
+def test_state_compact(codec, monkeypatch):
+    monkeypatch.setattr(json_codec, "STATE_FORMAT", "compact")
+    raw = codec.dumps_state(SAMPLE)
+    assert raw.count(b"\n") == 1
+    assert json.loads(raw) == SAMPLE
+
+
+def test_non_string_keys_fall_back_to_stdlib(codec):
+    assert json.loads(codec.dumps({1: "x"})) == {"1": "x"}
+
+
+def test_falls_back_to_stdlib_without_orjson(monkeypatch):
+    import importlib
+    import sys
+
+    monkeypatch.setitem(sys.modules, "orjson", None)  # import raises ImportError
+    monkeypatch.setenv("CLIMB_JSON_BACKEND", "auto")
+    try:
+        fallback = importlib.reload(json_codec)
+        assert fallback.BACKEND == "stdlib"
+        assert fallback.loads(fallback.dumps_state(SAMPLE)) == SAMPLE
+
+        monkeypatch.setenv("CLIMB_JSON_BACKEND", "orjson")
+        with pytest.raises(ImportError):
+            importlib.reload(json_codec)
+    finally:
+        monkeypatch.undo()
+        importlib.reload(json_codec)
+
+
+def test_decode_error_is_stdlib_type(codec):
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads("{broken")
@@ -0,0 +1,47 @@
+"""Tests for the newest-first JSONL reader (backend/engine/jsonl_tail.py)."""
+
+from __future__ import annotations
+
+import json
+
+from backend.engine import jsonl_tail
+from backend.engine.jsonl_tail import iter_lines_reverse, read_tail
+
+
+def _write(path, entries, trailer=""):
+    path.write_text("".join(json.dumps(e) + "\n" for e in entries) + trailer, encoding="utf-8")
+
+
+def test_reverse_lines_across_block_boundaries(tmp_path):
+    path = tmp_path / "log.jsonl"
+    lines = [f"line-{i}-" + "x" * (i % 7) for i in range(50)]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    for block_size in (1, 3, 16, 1 << 16):
+        got = [ln.decode() for ln in iter_lines_reverse(str(path), block_size) if ln]
+        assert got == lines[::-1]
+
+
+def test_read_tail_stops_at_cutoff_and_limit(tmp_path):
+    path = tmp_path / "sessions_2026.jsonl"
+    entries = [{"date": f"2026-03-{d:02d}", "n": d} for d in range(1, 11)]
+    _write(path, entries, trailer="not json\n\n")
+
+    assert [e["n"] for e in read_tail(str(path), since_date="2026-03-08")] == [10, 9, 8]
+    assert [e["n"] for e in read_tail(str(path), limit=2)] == [10, 9]
+    assert len(list(read_tail(str(path)))) == 10
+
+
+def test_read_tail_reads_past_late_logged_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(jsonl_tail, "SINCE_MARGIN", 3)
+    path = tmp_path / "sessions_2026.jsonl"
+    dates = ["2026-03-01", "2026-03-02", "2026-03-09", "2026-03-03", "2026-03-04", "2026-03-10", "2026-03-05"]
+    _write(path, [{"date": d} for d in dates])
+
+    # Two older entries in a row do not end the read; three do
+    assert [e["date"] for e in read_tail(str(path), since_date="2026-03-08")] == ["2026-03-10", "2026-03-09"]
+    monkeypatch.setattr(jsonl_tail, "SINCE_MARGIN", 1)
+    assert [e["date"] for e in read_tail(str(path), since_date="2026-03-08")] == []
+
+
+def test_read_tail_missing_file(tmp_path):
+    assert list(read_tail(str(tmp_path / "missing.jsonl"))) == []
@@ -0,0 +1,86 @@
+"""Tests for the in-process metrics registry and the /metrics endpoint."""
+
+from __future__ import annotations
+
+import shutil
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.api import deps, resolution_cache
+from backend.api.main import app
+from backend.engine import metrics
+from backend.engine.metrics import Registry
+
+client = TestClient(app)
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+REAL_STATE_PATH = REPO_ROOT / "backend" / "tests" / "fixtures" / "test_user_state.json"
+
+
+@pytest.fixture(autouse=True)
+def isolate(tmp_path, monkeypatch):
+    state_path = tmp_path / "user_state.json"
+    shutil.copy2(REAL_STATE_PATH, state_path)
+    monkeypatch.setattr(deps, "STATE_PATH", state_path)
+    yield tmp_path
+
+
+def test_counter_render():
+    reg = Registry()
+    c = reg.counter("t_total", "Test counter.", ("kind",))
+    c.inc(kind="a")
+    c.inc(2, kind="a")
+    c.inc(kind='b"x')
+    text = reg.render()
+    assert "# TYPE t_total counter" in text
+    assert 't_total{kind="a"} 3' in text
+    assert 't_total{kind="b\\"x"} 1' in text
+
+
+def test_histogram_buckets_are_cumulative():
+    reg = Registry()
+    h = reg.histogram("t_seconds", "Test histogram.", buckets=(0.1, 1.0))
+    for v in (0.05, 0.5, 5.0):
+        h.observe(v)
+    text = reg.render()
+    assert 't_seconds_bucket{le="0.1"} 1' in text
+    assert 't_seconds_bucket{le="1"} 2' in text
+    assert 't_seconds_bucket{le="+Inf"} 3' in text
+    assert "t_seconds_count 3" in text
+    assert "t_seconds_sum 5.55" in text
+
+
+def test_wrong_labels_rejected():
+    reg = Registry()
+    c = reg.counter("t_total", "x", ("a",))
+    with pytest.raises(ValueError):
+        c.inc(b="1")
+    with pytest.raises(ValueError):
+        reg.counter("t_total", "dup")
+
+
+def test_metrics_endpoint_uses_route_templates():
+    client.get("/api/week/1")
+    r = client.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    assert 'route="/api/week/{week_num}"' in r.text
+    assert 'route="/api/week/1"' not in r.text
+
+
+def test_hot_path_metrics_recorded():
+    resolution_cache.clear()
+    before_p0 = metrics.RESOLVER_P0_CANDIDATES.count(stage="start")
+    before_loads = metrics.STATE_IO_SECONDS.count(op="load")
+    before_weeks = metrics.PLANNER_SECONDS.count()
+    before_resolves = metrics.RESOLVER_CALLS.value()
+    client.get("/api/week/1?force=true")
+    assert metrics.STATE_IO_SECONDS.count(op="load") > before_loads
+    assert metrics.STATE_IO_BYTES.count(op="save") > 0
+    assert metrics.PLANNER_SECONDS.count() > before_weeks
+    assert metrics.RESOLVER_CALLS.value() > before_resolves
+    assert metrics.RESOLVER_P0_CANDIDATES.count(stage="start") > before_p0
+    text = client.get("/metrics").text
+    assert "climb_cache_requests_total" in text
@@ -16,6 +16,7 @@ from backend.engine.outdoor_log import (
     compute_outdoor_load_score,
     compute_outdoor_stats,
     load_outdoor_sessions,
+    outdoor_stats,
     remove_outdoor_session,
     validate_outdoor_entry,
 )
@@ -859,3 +860,202 @@ class TestRemoveOutdoorSession:
         assert len(sessions) == 1
         assert len(sessions[0]["routes"]) == 2
         assert sessions[0]["routes"][0]["name"] == "R2"
+
+
+class TestOutdoorTombstones:
+    """Undo appends a tombstone; compaction folds tombstones away."""
+
+    @staticmethod
+    def _entry(date, name="R"):
+        return {
+            "log_version": "outdoor.v1", "date": date,
+            "spot_name": "Spot", "discipline": "boulder", "duration_minutes": 60,
+            "routes": [{"name": name, "grade": "5a", "attempts": [{"result": "sent"}]}],
+        }
+
+    def test_remove_appends_without_rewriting(self, tmp_path):
+        log_dir = str(tmp_path / "logs")
+        path = append_outdoor_session(self._entry("2026-03-01"), log_dir)
+        append_outdoor_session(self._entry("2026-03-02"), log_dir)
+        before = open(path, encoding="utf-8").read()
+
+        assert remove_outdoor_session(log_dir, "2026-03-01") == 1
+        after = open(path, encoding="utf-8").read()
+        assert after.startswith(before)
+        assert json.loads(after.splitlines()[-1])["tombstone"] is True
+        assert [e["date"] for e in load_outdoor_sessions(log_dir)] == ["2026-03-02"]
+
+    def test_compaction_threshold_and_result(self, tmp_path):
+        from backend.engine.outdoor_log import compact_outdoor_log
+
+        log_dir = str(tmp_path / "logs")
+        for d in ("2026-03-01", "2026-03-02", "2026-03-03", "2026-03-04", "2026-03-05"):
+            path = append_outdoor_session(self._entry(d), log_dir)
+        remove_outdoor_session(log_dir, "2026-03-02")
+        # 1 tombstone in 6 lines: below the default 20% threshold.
+        assert compact_outdoor_log(log_dir)["files_rewritten"] == 0
+
+        remove_outdoor_session(log_dir, "2026-03-04")
+        append_outdoor_session(self._entry("2026-03-04", name="again"), log_dir)
+        visible = load_outdoor_sessions(log_dir)
+
+        result = compact_outdoor_log(log_dir)
+        assert result == {"files_rewritten": 1, "lines_dropped": 4}
+        assert load_outdoor_sessions(log_dir) == visible
+        assert "tombstone" not in open(path, encoding="utf-8").read()
+        assert [e["routes"][0]["name"] for e in visible if e["date"] == "2026-03-04"] == ["again"]
+
+
+class TestOutdoorAggregates:
+    """Stats come from per-year aggregates kept in step with the log."""
+
+    @staticmethod
+    def _seed(log_dir):
+        routes = [
+            {"name": "A", "grade": "6b", "style": "onsight", "attempts": [{"result": "sent"}]},
+            {"name": "B", "grade": "6c", "attempts": [{"result": "sent"}]},
+            {"name": "C", "grade": "7a", "style": "flash", "attempts": [{"result": "sent"}]},
+            {"name": "D", "grade": "7a+", "attempts": [{"result": "fell"}, {"result": "fell"}]},
+        ]
+        for i, d in enumerate(["2025-12-20", "2026-01-05", "2026-01-20", "2026-02-03", "2026-02-14", "2026-03-01"]):
+            append_outdoor_session(
+                _make_entry(date=d, spot_name=f"Spot{i % 3}", duration_minutes=60 + 20 * i, routes=routes[: 1 + i % 4]),
+                log_dir,
+            )
+
+    @staticmethod
+    def _expected(log_dir, since=None):
+        return compute_outdoor_stats(load_outdoor_sessions(log_dir, since_date=since))
+
+    def test_matches_full_recompute(self, tmp_log_dir):
+        self._seed(tmp_log_dir)
+        for since in (None, "2025-01-01", "2026-01-01", "2026-01-10", "2026-02-14", "2026-03-02"):
+            assert outdoor_stats(tmp_log_dir, since) == self._expected(tmp_log_dir, since)
+
+    def test_removal_reverses_day(self, tmp_log_dir):
+        self._seed(tmp_log_dir)
+        remove_outdoor_session(tmp_log_dir, "2026-01-20")
+        remove_outdoor_session(tmp_log_dir, "2026-03-01")
+        append_outdoor_session(_make_entry(date="2026-03-01", spot_name="Again"), tmp_log_dir)
+        for since in (None, "2026-01-15"):
+            assert outdoor_stats(tmp_log_dir, since) == self._expected(tmp_log_dir, since)
+        assert outdoor_stats(tmp_log_dir)["total_sessions"] == 5
+
+    def test_reads_without_scanning_logs(self, tmp_log_dir):
+        from backend.engine.metrics import JSONL_LINES_SCANNED
+
+        self._seed(tmp_log_dir)
+        before = JSONL_LINES_SCANNED.value(loader="outdoor_index")
+        outdoor_stats(tmp_log_dir, "2026-01-10")
+        assert JSONL_LINES_SCANNED.value(loader="outdoor_index") == before
+
+    def test_stale_aggregate_is_rebuilt(self, tmp_log_dir):
+        self._seed(tmp_log_dir)
+        path = os.path.join(tmp_log_dir, "outdoor_sessions_2026.jsonl")
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(_make_entry(date="2026-02-20")) + "\n")
+        assert outdoor_stats(tmp_log_dir) == self._expected(tmp_log_dir)
+
+        os.remove(os.path.join(tmp_log_dir, "outdoor_index_2026.json"))
+        append_outdoor_session(_make_entry(date="2026-02-21"), tmp_log_dir)
+        assert outdoor_stats(tmp_log_dir) == self._expected(tmp_log_dir)
+
+    def test_compaction_keeps_aggregate_in_sync(self, tmp_log_dir):
+        from backend.engine.outdoor_log import compact_outdoor_log
+
+        self._seed(tmp_log_dir)
+        remove_outdoor_session(tmp_log_dir, "2026-02-03")
+        compact_outdoor_log(tmp_log_dir, min_ratio=0.0)
+        assert outdoor_stats(tmp_log_dir) == self._expected(tmp_log_dir)
+
+
+class TestOutdoorSessionListing:
+    """GET /api/outdoor/sessions filters and pages on the per-year index."""
+
+    @staticmethod
+    def _seed(log_dir):
+        days = ["2026-03-05", "2025-11-02", "2026-03-05", "2026-01-10", "2026-03-05", "2026-02-01"]
+        for i, d in enumerate(days):
+            append_outdoor_session(
+                _make_entry(
+                    date=d,
+                    spot_id=f"spot_{i % 2}",
+                    discipline="lead" if i % 3 == 0 else "boulder",
+                    routes=[{"name": f"R{i}", "grade": ["5c", "6b", "7a"][i % 3], "attempts": [{"result": "sent"}]}],
+                ),
+                log_dir,
+            )
+
+    def test_load_score_stored_at_write(self, tmp_log_dir):
+        entry = _make_entry()
+        path = append_outdoor_session(entry, tmp_log_dir)
+        stored = json.loads(open(path, encoding="utf-8").read())
+        assert stored["load_score"] == compute_outdoor_load_score(entry)
+        assert "load_score" not in entry
+
+    def test_pages_follow_cursor_in_date_order(self, tmp_log_dir):
+        from backend.engine.outdoor_log import list_outdoor_sessions
+
+        self._seed(tmp_log_dir)
+        names, cursor = [], None
+        while True:
+            page, cursor = list_outdoor_sessions(tmp_log_dir, cursor=cursor, limit=2)
+            names += [s["routes"][0]["name"] for s in page]
+            if cursor is None:
+                break
+        assert names == ["R1", "R3", "R5", "R0", "R2", "R4"]
+
+    def test_filters(self, tmp_log_dir):
+        from backend.engine.outdoor_log import list_outdoor_sessions
+
+        self._seed(tmp_log_dir)
+
+        def names(**kw):
+            return [s["routes"][0]["name"] for s in list_outdoor_sessions(tmp_log_dir, **kw)[0]]
+
+        assert names(spot_id="spot_0") == ["R0", "R2", "R4"]
+        assert names(discipline="lead") == ["R3", "R0"]
+        assert names(grade_min="6a", grade_max="6c") == ["R1", "R4"]
+        assert names(since_date="2026-02-01", until_date="2026-02-28") == ["R5"]
+
+    def test_tombstone_and_compaction_keep_offsets_valid(self, tmp_log_dir):
+        from backend.engine.outdoor_log import compact_outdoor_log, list_outdoor_sessions
+
+        self._seed(tmp_log_dir)
+        remove_outdoor_session(tmp_log_dir, "2026-01-10")
+        expected = sorted(load_outdoor_sessions(tmp_log_dir), key=lambda s: s["date"])
+        assert list_outdoor_sessions(tmp_log_dir)[0] == expected
+        compact_outdoor_log(tmp_log_dir, min_ratio=0.0)
+        assert list_outdoor_sessions(tmp_log_dir)[0] == expected
+
+    def test_latest_session_for_date_respects_tombstones(self, tmp_log_dir):
+        from backend.engine.outdoor_log import latest_outdoor_session
+
+        self._seed(tmp_log_dir)
+        assert latest_outdoor_session(tmp_log_dir, "2026-03-05")["routes"][0]["name"] == "R4"
+        remove_outdoor_session(tmp_log_dir, "2026-03-05")
+        assert latest_outdoor_session(tmp_log_dir, "2026-03-05") is None
+        append_outdoor_session(_make_entry(date="2026-03-05", spot_name="Again"), tmp_log_dir)
+        assert latest_outdoor_session(tmp_log_dir, "2026-03-05")["spot_name"] == "Again"
+        assert latest_outdoor_session(tmp_log_dir, "2024-01-01") is None
+
+    def test_endpoint_pagination_and_errors(self, tmp_path, monkeypatch):
+        from fastapi.testclient import TestClient
+
+        from backend.api.main import app
+        from backend.api.routers import outdoor as outdoor_router
+
+        log_dir = str(tmp_path / "logs")
+        monkeypatch.setattr(outdoor_router, "_FALLBACK_LOG_DIR", log_dir)
+        self._seed(log_dir)
+        client = TestClient(app)
+
+        r = client.get("/api/outdoor/sessions", params={"limit": 4})
+        body = r.json()
+        assert body["count"] == 4 and body["next_cursor"] == "2026-03-05:1"
+        r = client.get("/api/outdoor/sessions", params={"limit": 4, "cursor": body["next_cursor"]})
+        assert r.json()["count"] == 2 and r.json()["next_cursor"] is None
+        assert all("load_score" in s for s in r.json()["sessions"])
+
+        assert client.get("/api/outdoor/sessions", params={"cursor": "nope"}).status_code == 400
+        assert client.get("/api/outdoor/sessions", params={"grade_min": "V5"}).status_code == 422
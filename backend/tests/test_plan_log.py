@@ -0,0 +1,135 @@
+"""Tests for event-sourced week plans (plan_log.py)."""
+
+from __future__ import annotations
+
+from copy import deepcopy
+
+import pytest
+
+from backend.engine import plan_log
+from backend.engine.macrocycle_v1 import _BASE_WEIGHTS, _build_session_pool
+from backend.engine.planner_v2 import generate_phase_week
+
+
+def _plan():
+    return generate_phase_week(
+        phase_id="base",
+        domain_weights=_BASE_WEIGHTS["base"],
+        session_pool=_build_session_pool("base"),
+        start_date="2026-01-05",
+        planning_prefs={"target_training_days_per_week": 5},
+    )
+
+
+def _first_session(plan):
+    day = next(d for d in plan["weeks"][0]["days"] if d.get("sessions"))
+    return day["date"], day["sessions"][0]
+
+
+def _sessions(plan):
+    return [[(s["session_id"], s.get("status")) for s in d.get("sessions", [])] for d in plan["weeks"][0]["days"]]
+
+
+def _mark_done(date, session):
+    return {"events": [{"event_type": "mark_done", "date": date, "slot": session["slot"],
+                        "session_ref": session["session_id"]}]}
+
+
+def test_append_edits_in_place_and_undo_restores():
+    plan = _plan()
+    before = deepcopy(plan)
+    log = plan_log.start(plan)
+    date, session = _first_session(plan)
+
+    updated, _ = plan_log.append(log, plan, "events", _mark_done(date, session))
+    assert updated is plan
+    assert plan_log.is_head(log, updated)
+    assert plan_log.materialize(log) == updated
+    assert [e["op"] for e in plan_log.history(log)] == ["events"]
+
+    restored = plan_log.undo(log)
+    assert _sessions(restored) == _sessions(before)
+    assert restored["plan_revision"] > updated["plan_revision"]
+    assert plan_log.is_head(log, restored)
+    with pytest.raises(ValueError):
+        plan_log.undo(log)
+
+
+def test_every_edit_makes_earlier_versions_stale():
+    plan = _plan()
+    log = plan_log.start(plan)
+    date, session = _first_session(plan)
+    stale = deepcopy(plan)
+
+    # apply_day_override does not bump plan_revision itself
+    override = {"target_date": date, "reference_date": date, "slot": session["slot"],
+                "intent": "recovery", "location": "home"}
+    updated, _ = plan_log.append(log, plan, "override", override)
+    assert plan_log.is_head(log, updated)
+    assert not plan_log.is_head(log, stale)
+    assert plan_log.materialize(log) == updated
+
+    before = deepcopy(updated)
+    updated, _ = plan_log.append(log, updated, "events", _mark_done(*_first_session(updated)))
+    assert updated["plan_revision"] > before["plan_revision"]
+    assert not plan_log.is_head(log, before)
+
+
+def test_edits_with_outside_side_effects_are_not_undone():
+    plan = _plan()
+    log = plan_log.start(plan)
+    date, session = _first_session(plan)
+    plan, _ = plan_log.append(log, plan, "events", _mark_done(date, session))
+    plan, _ = plan_log.append(log, plan, "events", {"events": [{"event_type": "undo_outdoor", "date": date}]})
+
+    assert not plan_log.can_undo(log)
+    with pytest.raises(ValueError):
+        plan_log.undo(log)
+    assert len(log["entries"]) == 2 and plan_log.is_head(log, plan)
+
+
+def test_replay_uses_the_recorded_inputs():
+    plan = _plan()
+    log = plan_log.start(plan)
+    availability = {"mon": {"evening": {"available": True, "locations": ["home"]}}}
+    event = {"event_type": "set_availability", "date": "2026-01-05",
+             "availability": {"slot": "evening", "available": False}}
+    updated, _ = plan_log.append(log, plan, "events", {"events": [event], "availability": availability})
+    # apply_events edits the availability it is given; the log kept the original
+    assert availability["mon"]["evening"]["available"] is False
+    assert plan_log.materialize(log)["weeks"] == updated["weeks"]
+    assert "availability" not in plan_log.history(log)[0]["args"]
+
+    quick = {"session_id": "yoga_recovery", "target_date": "2026-01-11", "slot": "morning", "location": "home"}
+    updated, warnings = plan_log.append(log, updated, "quick_add", quick)
+    assert isinstance(warnings, list)
+    assert plan_log.materialize(log)["weeks"] == updated["weeks"]
+
+
+def test_snapshots_bound_the_log(monkeypatch):
+    monkeypatch.setattr(plan_log, "SNAPSHOT_EVERY", 2)
+    monkeypatch.setattr(plan_log, "KEEP_SNAPSHOTS", 2)
+    plan = _plan()
+    log = plan_log.start(plan)
+    date, session = _first_session(plan)
+    for _ in range(7):
+        plan, _ = plan_log.append(log, plan, "events", _mark_done(date, session))
+
+    assert [s["seq"] for s in log["snapshots"]] == [4, 6]
+    assert [e["seq"] for e in log["entries"]] == [5, 6, 7]
+    assert plan_log.materialize(log)["weeks"] == plan["weeks"]
+    for _ in range(3):
+        plan_log.undo(log)
+    assert [s["seq"] for s in log["snapshots"]] == [4]
+    with pytest.raises(ValueError):
+        plan_log.undo(log)
+
+
+def test_failed_edit_is_not_recorded():
+    plan = _plan()
+    log = plan_log.start(plan)
+    with pytest.raises(ValueError):
+        plan_log.append(log, plan, "events", {"events": [{"event_type": "mark_done", "date": "1999-01-01"}]})
+    with pytest.raises(ValueError):
+        plan_log.append(log, plan, "rewrite", {})
+    assert log["entries"] == [] and log["seq"] == 0
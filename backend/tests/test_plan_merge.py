@@ -0,0 +1,52 @@
+"""Tests for plan_merge.py (in-place merges and the slot diff)."""
+
+from __future__ import annotations
+
+from backend.engine.plan_merge import diff_slots, preserve_by_weekday, preserve_completed
+
+
+def _plan(days):
+    return {
+        "start_date": "2026-03-02",
+        "plan_revision": 2,
+        "weeks": [{"days": [
+            {"date": f"2026-03-0{2 + i}", "sessions": sessions} for i, sessions in enumerate(days)
+        ]}],
+    }
+
+
+def test_merge_in_place_when_caller_owns_the_plan():
+    old = _plan([[{"session_id": "strength_long", "slot": "evening", "status": "done"}], []])
+    new = _plan([[{"session_id": "technique_focus_gym", "slot": "evening"}], []])
+
+    copied = preserve_completed(old, new)
+    assert copied is not new
+    assert new["weeks"][0]["days"][0]["sessions"][0]["session_id"] == "technique_focus_gym"
+
+    merged = preserve_completed(old, new, copy=False)
+    assert merged is new
+    assert merged["weeks"][0]["days"][0]["sessions"][0]["session_id"] == "strength_long"
+    assert merged["weeks"][0]["days"][0]["status"] == "done"
+    assert merged["plan_revision"] == 3
+
+
+def test_weekday_merge_without_anything_to_keep_is_a_no_op():
+    new = _plan([[{"session_id": "technique_focus_gym", "slot": "evening"}]])
+    assert preserve_by_weekday(_plan([[{"session_id": "yoga_recovery", "slot": "morning"}]]), new, copy=False) is new
+    assert new["plan_revision"] == 2
+
+
+def test_diff_slots_lists_changed_slots_in_order():
+    old = _plan([
+        [{"session_id": "strength_long", "slot": "evening"}],
+        [{"session_id": "yoga_recovery", "slot": "morning"}],
+    ])
+    new = _plan([
+        [{"session_id": "strength_long", "slot": "evening"}, {"session_id": "prehab_maintenance", "slot": "morning"}],
+        [{"session_id": "yoga_recovery", "slot": "morning", "status": "done"}],
+    ])
+    assert diff_slots(old, new) == [
+        {"date": "2026-03-02", "slot": "morning", "before": [], "after": ["prehab_maintenance"]},
+        {"date": "2026-03-03", "slot": "morning", "before": ["yoga_recovery"], "after": ["yoga_recovery"]},
+    ]
+    assert diff_slots(new, new) == []
@@ -0,0 +1,82 @@
+"""Tests for the generate_phase_week memo (planner_memo.py)."""
+
+from __future__ import annotations
+
+import pytest
+
+from backend.engine import planner_memo
+from backend.engine.metrics import CACHE_REQUESTS
+from backend.engine.planner_v2 import generate_phase_week
+
+AVAILABILITY = {
+    "mon": {"evening": {"available": True, "preferred_location": "home"}},
+    "wed": {"evening": {"available": True, "preferred_location": "gym"}},
+    "sat": {"morning": {"available": True, "preferred_location": "gym"}},
+}
+GYMS = [{"gym_id": "wall", "priority": 1, "equipment": ["gym_boulder", "hangboard"]}]
+
+
+@pytest.fixture(autouse=True)
+def _fresh_memo():
+    planner_memo.clear()
+    yield
+    planner_memo.clear()
+
+
+def _week(start_date="2026-03-02", **kwargs):
+    params = dict(
+        phase_id="base",
+        domain_weights={"technique": 0.4, "finger_strength": 0.3, "core_prehab": 0.3},
+        session_pool=["technique_focus_gym", "strength_long", "prehab_maintenance", "flexibility_full"],
+        start_date=start_date,
+        availability=AVAILABILITY,
+        gyms=GYMS,
+        home_equipment=["hangboard", "pullup_bar"],
+    )
+    params.update(kwargs)
+    return generate_phase_week(**params)
+
+
+def _hits():
+    return CACHE_REQUESTS.value(cache="phase_week", result="hit")
+
+
+def _sessions(plan):
+    return [[s["session_id"] for s in d["sessions"]] for d in plan["weeks"][0]["days"]]
+
+
+def test_same_weekday_later_week_is_a_shifted_copy():
+    first = _week("2026-03-02")
+    hits = _hits()
+    later = _week("2026-04-13")
+    assert _hits() == hits + 1
+    assert later["start_date"] == "2026-04-13"
+    assert [d["date"] for d in later["weeks"][0]["days"]][::6] == ["2026-04-13", "2026-04-19"]
+    assert _sessions(later) == _sessions(first)
+
+    later["weeks"][0]["days"][0]["sessions"].clear()
+    assert _sessions(_week("2026-04-20")) == _sessions(first)
+
+
+def test_inputs_that_change_the_week_miss():
+    _week()
+    hits = _hits()
+    _week(gyms=[{"gym_id": "wall", "priority": 1, "equipment": ["gym_boulder"]}])
+    _week(start_date="2026-03-03")  # availability lands on other days
+    _week(pretrip_dates=["2026-03-07"])
+    assert _hits() == hits
+
+    # Equivalent inputs normalize to the same key
+    _week(gyms=[{"gym_id": "wall", "priority": 1, "equipment": ["hangboard", "gym_boulder", "pullup_bar"]}])
+    _week(pretrip_dates=["2026-02-20", "2026-03-20"], today="2026-02-01")
+    assert _hits() == hits + 2
+
+
+def test_memo_is_bounded(monkeypatch):
+    monkeypatch.setattr(planner_memo, "MAX_ENTRIES", 2)
+    for cap in (1, 2, 3):
+        _week(hard_cap_per_week=cap)
+    assert len(planner_memo._cache) == 2
+    hits = _hits()
+    _week(hard_cap_per_week=1)
+    assert _hits() == hits
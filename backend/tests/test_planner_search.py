@@ -0,0 +1,88 @@
+"""Tests for the bounded week search (planner_search.py, planner_mode="search")."""
+
+from __future__ import annotations
+
+import pytest
+
+from backend.engine.planner_search import Candidate, search_week
+from backend.engine.planner_v2 import generate_phase_week
+
+FINGER = Candidate("finger", hard=True, finger=True, domains=(0,))
+TECH = Candidate("tech", domains=(1,))
+EASY = Candidate("easy")
+
+
+def _ids(result):
+    return {day: c.session_id for day, c in result.choice.items()}
+
+
+def test_search_fills_every_day_it_can():
+    found = search_week({0: [FINGER, TECH], 1: [FINGER, EASY], 2: [FINGER]}, [0.5, 0.5], hard_cap=3)
+    assert _ids(found) == {0: "tech", 1: "easy", 2: "finger"}
+    assert found.days_trained == 3 and not found.exhausted
+
+
+def test_search_respects_weekly_rules():
+    # Two finger days in a row and a second use of a max_per_week=1 session are never picked
+    found = search_week({0: [FINGER], 1: [FINGER], 2: [FINGER]}, [1.0, 0.0], hard_cap=3)
+    assert _ids(found) == {0: "finger"}
+
+    repeatable = Candidate("finger", hard=True, finger=True, max_per_week=2, domains=(0,))
+    found = search_week({0: [repeatable], 1: [repeatable], 2: [repeatable]}, [1.0, 0.0], hard_cap=3)
+    assert _ids(found) == {0: "finger", 2: "finger"}
+    found = search_week({0: [repeatable], 2: [repeatable]}, [1.0, 0.0], hard_cap=1)
+    assert _ids(found) == {0: "finger"}
+
+
+def test_search_prefers_domain_coverage_then_pool_order():
+    other = Candidate("other_tech", domains=(1,))
+    found = search_week({0: [TECH, other], 1: [other, TECH, EASY]}, [0.0, 1.0], hard_cap=0)
+    assert _ids(found) == {0: "tech", 1: "other_tech"}
+    assert found.coverage == pytest.approx(0.75)
+
+
+def test_search_is_deterministic_and_budgeted():
+    cands = {d: [Candidate(f"s{i}", domains=(i % 3,), max_per_week=2) for i in range(6)] for d in range(7)}
+    first = search_week(cands, [0.5, 0.3, 0.2], hard_cap=2)
+    assert _ids(first) == _ids(search_week(cands, [0.5, 0.3, 0.2], hard_cap=2))
+
+    bounded = search_week(cands, [0.5, 0.3, 0.2], hard_cap=2, node_budget=3)
+    assert bounded.exhausted and bounded.nodes == 3
+    assert bounded.days_trained == 7
+
+
+def _three_day_week():
+    off = {"available": False}
+    home = {"evening": {"available": True, "locations": ["home"], "preferred_location": "home"}}
+    gym = {"evening": {"available": True, "locations": ["gym"], "preferred_location": "gym"}}
+    return {"mon": home, "tue": gym, "wed": off, "thu": off, "fri": off, "sat": off, "sun": home}
+
+
+def _plan(mode, **kwargs):
+    params = dict(
+        phase_id="base",
+        domain_weights={"core_prehab": 0.5, "technique": 0.5},
+        session_pool=["lower_body_gym", "regeneration_easy", "handstand_practice"],
+        start_date="2026-03-02",
+        availability=_three_day_week(),
+        allowed_locations=["home", "gym"],
+        planning_prefs={"target_training_days_per_week": 3},
+    )
+    params.update(kwargs)
+    plan = generate_phase_week(planner_mode=mode, **params)
+    return [[s["session_id"] for s in d["sessions"]] for d in plan["weeks"][0]["days"]]
+
+
+def test_search_mode_places_what_the_greedy_misses():
+    # The greedy spends handstand_practice on the gym day, leaving the home-only
+    # Sunday with only lower_body_gym (gym-only) to try.
+    assert _plan("greedy")[6] == []
+    days = _plan("search")
+    assert days[0] and days[1] and days[6]
+    assert days[1] == ["lower_body_gym"]
+
+
+def test_planner_mode_from_prefs_and_validation():
+    assert _plan(None, planning_prefs={"target_training_days_per_week": 3, "planner_mode": "search"}) == _plan("search")
+    with pytest.raises(ValueError):
+        _plan("exhaustive")
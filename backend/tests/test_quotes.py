@@ -5,9 +5,12 @@ from __future__ import annotations
 import pytest
 
 from backend.engine.quotes_engine import (
+    _load_index,
+    advance_quote_cursor,
     detect_quote_context,
     get_quote_for_session,
-    update_quote_history,
+    next_quote,
+    quote_cursors_from_history,
 )
 
 
@@ -88,23 +91,44 @@ class TestGetQuoteForSession:
         # Should fall back to "general" context quotes
 
 
-class TestUpdateQuoteHistory:
-    def test_append_to_history(self):
-        state = {"quote_history": []}
-        update_quote_history(state, "q001")
-        assert state["quote_history"] == ["q001"]
-
-    def test_trim_at_max(self):
-        state = {"quote_history": [f"q{i:03d}" for i in range(30)]}
-        update_quote_history(state, "q999")
-        assert len(state["quote_history"]) == 30
-        assert state["quote_history"][-1] == "q999"
-        assert state["quote_history"][0] == "q001"
+class TestQuoteCursor:
+    def test_cursor_matches_history_rotation(self):
+        """Within the old 30-quote history, the cursor serves the same sequence."""
+        state = {}
+        recent = []
+        for _ in range(30):
+            quote, key = next_quote("hard_day", state.get("quote_cursors"))
+            assert quote["id"] == get_quote_for_session("hard_day", recent_quote_ids=recent[-30:])["id"]
+            advance_quote_cursor(state, key)
+            recent.append(quote["id"])
 
-    def test_creates_history_if_missing(self):
+    def test_cursor_wraps_around(self):
+        size = len(_load_index().pool("success"))
         state = {}
-        update_quote_history(state, "q001")
-        assert state["quote_history"] == ["q001"]
+        seen = []
+        for _ in range(2 * size):
+            quote, key = next_quote("success", state.get("quote_cursors"))
+            seen.append(quote["id"])
+            advance_quote_cursor(state, key)
+        assert len(set(seen)) == size
+        assert seen[:size] == seen[size:]
+        assert seen == sorted(seen[:size]) * 2
+
+    def test_unknown_context_uses_general_cursor(self):
+        quote, key = next_quote("nonexistent_context_xyz", {"general": 3})
+        assert key == "general"
+        assert quote["context"] == "nonexistent_context_xyz"
+        assert quote["id"] == next_quote("general", {"general": 3})[0]["id"]
+
+    def test_cursors_from_history_resume_after_last_seen(self):
+        served = []
+        state = {}
+        for _ in range(5):
+            quote, key = next_quote("deload", state.get("quote_cursors"))
+            served.append(quote["id"])
+            advance_quote_cursor(state, key)
+        assert quote_cursors_from_history(served)["deload"] == 5
+        assert quote_cursors_from_history([]) == {}
 
 
 class TestQuotesAPI:
@@ -116,7 +140,7 @@ class TestQuotesAPI:
         state_path = tmp_path / "user_state.json"
         state_path.write_text(json.dumps({
             "schema_version": "1.5",
-            "quote_history": [],
+            "quote_cursors": {},
         }))
         monkeypatch.setattr(deps, "STATE_PATH", state_path)
 
@@ -138,7 +162,7 @@ class TestQuotesAPI:
         data = r.json()
         assert data["context"] == "hard_day"
 
-    def test_quote_history_updated(self):
+    def test_quote_cursor_advanced(self):
         import json
         from backend.api import deps
 
@@ -146,6 +170,9 @@ class TestQuotesAPI:
         assert r.status_code == 200
         quote_id = r.json()["id"]
 
-        # Read state and verify history
-        state = json.loads(deps.STATE_PATH.read_text())
-        assert quote_id in state.get("quote_history", [])
+        # The GET records the advance in the side log, not in the state file
+        assert json.loads(deps.STATE_PATH.read_text())["quote_cursors"] == {}
+        assert deps.load_state()["quote_cursors"] == {"general": 1}
+
+        # The next quote skips it
+        assert self.client.get("/api/quotes/daily").json()["id"] != quote_id
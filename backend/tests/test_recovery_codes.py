@@ -0,0 +1,99 @@
+"""Tests for the recovery-code store and /api/user/recovery-code, /api/user/recover."""
+
+from __future__ import annotations
+
+import json
+import threading
+import uuid as _uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from backend.api import recovery_codes
+from backend.api.main import app
+from backend.api.recovery_codes import RecoveryCodeStore
+from backend.api.routers import user as user_router
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def codes_path(tmp_path, monkeypatch):
+    path = tmp_path / "recovery_codes.json"
+    monkeypatch.setattr(user_router, "_CODES_PATH", path)
+    return path
+
+
+def test_endpoints_roundtrip(codes_path):
+    uid = str(_uuid.uuid4())
+    r = client.post("/api/user/recovery-code", headers={"X-User-ID": uid})
+    assert r.status_code == 200
+    code = r.json()["recovery_code"]
+    assert code.startswith("CLIMB-")
+
+    again = client.post("/api/user/recovery-code", headers={"X-User-ID": uid})
+    assert again.json()["recovery_code"] == code
+
+    r = client.post("/api/user/recover", json={"recovery_code": code.lower()})
+    assert r.json() == {"uuid": uid}
+    assert client.post("/api/user/recover", json={"recovery_code": "CLIMB-0000-0000"}).status_code == 404
+
+
+def test_reads_legacy_snapshot(tmp_path):
+    path = tmp_path / "recovery_codes.json"
+    path.write_text(json.dumps({"CLIMB-AAAA-BBBB": {"uuid": "u1", "created_at": "2026-01-01"}}))
+    store = RecoveryCodeStore(path)
+    assert store.lookup("CLIMB-AAAA-BBBB") == "u1"
+    assert store.get_or_create("u1") == "CLIMB-AAAA-BBBB"
+    assert not store.journal_path.exists()
+
+
+def test_insert_appends_one_journal_line(tmp_path):
+    path = tmp_path / "recovery_codes.json"
+    store = RecoveryCodeStore(path)
+    code = store.get_or_create("u1")
+    assert not path.exists()
+    lines = store.journal_path.read_text().splitlines()
+    assert len(lines) == 1
+    assert json.loads(lines[0])["code"] == code
+
+
+def test_second_store_sees_appends_from_another_writer(tmp_path):
+    path = tmp_path / "recovery_codes.json"
+    a = RecoveryCodeStore(path)
+    b = RecoveryCodeStore(path)
+    assert b.lookup("missing") is None  # b has loaded its (empty) view
+    code = a.get_or_create("u1")
+    assert b.lookup(code) == "u1"
+    assert b.get_or_create("u1") == code
+
+
+def test_compaction_folds_journal_into_snapshot(tmp_path, monkeypatch):
+    monkeypatch.setattr(recovery_codes, "COMPACT_EVERY", 3)
+    path = tmp_path / "recovery_codes.json"
+    store = RecoveryCodeStore(path)
+    reader = RecoveryCodeStore(path)
+    codes = {f"u{i}": store.get_or_create(f"u{i}") for i in range(4)}
+
+    snapshot = json.loads(path.read_text())
+    assert {info["uuid"] for info in snapshot.values()} == {"u0", "u1", "u2"}
+    assert len(store.journal_path.read_text().splitlines()) == 1
+    for uid, code in codes.items():
+        assert reader.lookup(code) == uid
+        assert reader.code_for(uid) == code
+
+
+def test_concurrent_get_or_create_is_idempotent(tmp_path):
+    store = RecoveryCodeStore(tmp_path / "recovery_codes.json")
+    results = []
+
+    def worker():
+        results.append(store.get_or_create("same-user"))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(set(results)) == 1
+    assert len(store.journal_path.read_text().splitlines()) == 1
@@ -11,6 +11,7 @@ from backend.engine.replanner_v1 import (
     COMPLEMENTARY_LOAD_MAP,
     COMPLEMENTARY_LOAD_OK,
     INTENT_TO_SESSION,
+    WeekConstraintState,
     apply_day_override,
     apply_events,
 )
@@ -1407,3 +1408,55 @@ def test_b48_ripple_fires_after_single_session_override():
                    f"Session {s['session_id']} should be downgraded by ripple"
     except StopIteration:
         pass  # next day not in plan — ok
+
+
+def _tagged_week(tags_by_day, hard_cap=2):
+    start = datetime(2026, 3, 2)
+    days = []
+    for i in range(7):
+        sessions = [
+            {"session_id": sid, "slot": "evening", "tags": {"hard": "h" in flags, "finger": "f" in flags},
+             **({"status": "done"} if "d" in flags else {})}
+            for sid, flags in tags_by_day.get(i, [])
+        ]
+        days.append({"date": (start + timedelta(days=i)).strftime("%Y-%m-%d"), "sessions": sessions})
+    return {"start_date": "2026-03-02", "weeks": [{"days": days}], "profile_snapshot": {"hard_cap_per_week": hard_cap}}
+
+
+def test_week_constraint_state_tracks_edits():
+    plan = _tagged_week({0: [("strength_long", "hf")], 2: [("finger_maintenance_home", "f")], 4: [("power_contact_gym", "h")]})
+    state = WeekConstraintState(plan)
+    assert state.hard_days == 2 and not state.over_hard_cap
+    assert not state.has_finger_conflict
+    assert state.session_counts == {"strength_long": 1, "finger_maintenance_home": 1, "power_contact_gym": 1}
+
+    tue = plan["weeks"][0]["days"][1]
+    tue["sessions"].append({"session_id": "strength_long", "slot": "evening", "tags": {"hard": True, "finger": True}})
+    state.refresh(tue)
+    assert state.hard_days == 3 and state.over_hard_cap
+    assert state.finger_conflicts == 2
+    assert state.session_counts["strength_long"] == 2
+
+    tue["sessions"][0]["status"] = "done"
+    state.refresh(tue)
+    assert state.hard_days == 2 and not state.has_finger_conflict
+    assert state.session_counts["strength_long"] == 1
+    # Done finger work still counts for the 48h compensation rule
+    assert state.finger_within(datetime(2026, 3, 4).toordinal(), include_self=False)
+
+
+def test_events_reconcile_from_tracked_state():
+    plan = _tagged_week({
+        0: [("finger_maintenance_home", "f")],
+        2: [("strength_long", "hf")],
+        4: [("power_contact_gym", "h")],
+    }, hard_cap=1)
+    updated = apply_events(plan, [{
+        "event_type": "move_session", "from_date": "2026-03-04", "to_date": "2026-03-03",
+        "from_slot": "evening", "to_slot": "evening", "session_ref": "strength_long",
+    }])
+    days = updated["weeks"][0]["days"]
+    # Moved next to Monday's finger day: downshifted, which also brings the week under the cap
+    assert days[1]["sessions"][0]["constraints_applied"] == ["finger_spacing_downshift"]
+    assert days[4]["sessions"][0]["session_id"] == "power_contact_gym"
+    assert not WeekConstraintState(updated).over_hard_cap
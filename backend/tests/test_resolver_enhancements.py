@@ -4,15 +4,23 @@ from __future__ import annotations
 
 import os
 import json
+from copy import deepcopy
 from typing import Any, Dict, List
 
 import pytest
 
+from backend.api import resolution_cache
 from backend.engine.resolve_session import (
     pick_best_exercise_p0,
     score_exercise,
 )
 from backend.engine.planner_v2 import generate_phase_week, _SESSION_META
+from backend.engine.session_history import (
+    RECENCY_LEDGER_SIZE,
+    RecentExercises,
+    feedback_exercise_ids,
+    record_exercise_recency,
+)
 from backend.engine.macrocycle_v1 import _build_session_pool, DELOAD_SESSION_POOL
 
 
@@ -132,6 +140,70 @@ class TestScoreExercise:
         assert penalized == base - 25.0
 
 
+class TestRecencyLedger:
+    def test_distance_matches_list_slices(self):
+        ids = ["a", "b", "a", "c"] + [f"x{i}" for i in range(12)] + ["d"]
+        recent = RecentExercises(ids)
+        for ex_id in ("a", "b", "c", "d", "x0", "x11", "missing"):
+            ex = {"exercise_id": ex_id}
+            assert score_exercise(ex, {}, recent) == score_exercise(ex, {}, ids)
+        assert "a" in recent and "missing" not in recent
+        assert len(recent) == len(ids)
+
+    def test_record_keeps_date_order_and_bound(self):
+        state: Dict[str, Any] = {}
+        record_exercise_recency(state, "2026-03-05", ["late"])
+        record_exercise_recency(state, "2026-03-02", ["early"], {"early": {"domain": ["finger_strength"]}})
+        rows = state["exercise_recency"]
+        assert [r[1] for r in rows] == ["early", "late"]
+        assert rows[0][2].startswith("domain=finger_strength|")
+
+        record_exercise_recency(state, "2026-03-06", [f"ex{i}" for i in range(RECENCY_LEDGER_SIZE)])
+        assert len(state["exercise_recency"]) == RECENCY_LEDGER_SIZE
+        assert state["exercise_recency"][0][1] == "ex0"
+
+    def test_resolver_reads_ledger_from_state(self):
+        state = {"exercise_recency": [["2026-03-01", "pullup", ""], ["2026-03-02", "plank", ""]]}
+        recent = RecentExercises.from_state(state)
+        assert list(recent) == ["pullup", "plank"]
+        assert recent.distance("plank") == 0
+
+    def test_ledger_cut_off_before_session_date(self):
+        state = {"exercise_recency": [["2026-03-01", "pullup", ""], ["2026-03-02", "plank", ""]]}
+        assert list(RecentExercises.from_state(state, before="2026-03-02")) == ["pullup"]
+        assert list(RecentExercises.from_state(state, before="2026-03-01")) == []
+
+    def test_resolution_unchanged_by_own_feedback(self):
+        fixture = os.path.join(os.path.dirname(__file__), "fixtures", "test_user_state.json")
+        with open(fixture) as f:
+            state = json.load(f)
+        entry = {"session_id": "strength_long", "location": "gym"}
+
+        def selected(resolved):
+            return [
+                ex["exercise_id"]
+                for block in resolved["resolved_session"].get("blocks", [])
+                for ex in block.get("selected_exercises") or []
+            ]
+
+        resolution_cache.clear()
+        before = selected(resolution_cache.resolve_entry(entry, state, session_date="2026-03-04"))
+        assert before
+
+        done = deepcopy(state)
+        record_exercise_recency(done, "2026-03-04", before)
+        after = selected(resolution_cache.resolve_entry(entry, done, session_date="2026-03-04"))
+        assert after == before
+
+        # the same feedback does count for the sessions that follow it
+        later = selected(resolution_cache.resolve_entry(entry, done, session_date="2026-03-05"))
+        assert later != before
+
+    def test_feedback_exercise_ids(self):
+        entry = {"actual": {"exercise_feedback_v1": [{"exercise_id": "Pullup "}, {"exercise_id": "pullup"}, {}]}}
+        assert feedback_exercise_ids(entry) == ["pullup"]
+
+
 # ── NEW-F8: Easy climbing in deload pool ────────────────────────────────
 
 class TestDeloadEasyClimbing:
@@ -0,0 +1,43 @@
+"""Tests for the session metadata compiled from the catalog (session_meta.py)."""
+
+from __future__ import annotations
+
+import os
+
+from backend.engine import session_meta
+from backend.engine.equipment import mask
+from backend.engine.session_meta import SESSION_META, fits, required_equipment
+
+
+def test_every_catalog_session_has_planner_metadata():
+    ids = {name[:-5] for name in os.listdir(session_meta.SESSIONS_DIR) if name.endswith(".json")}
+    assert set(SESSION_META) == ids
+
+
+def test_rows_compiled_from_planner_block():
+    meta = SESSION_META["strength_long"]
+    assert meta["hard"] and meta["finger"] and meta["climbing"]
+    assert meta["intensity"] == "max"
+    assert meta["location"] == ("gym", "home")
+    assert meta["required_equipment"] == ["hangboard"]
+    assert meta["domains"] == ("finger_strength", "pulling_strength")
+    assert meta["max_per_week"] == 1
+    assert "test" not in meta
+
+    assert SESSION_META["core_training"]["max_per_week"] == 3
+    assert SESSION_META["test_max_hang_5s"]["test"] is True
+
+
+def test_planner_block_overrides_required_equipment():
+    meta = SESSION_META["regeneration_easy"]
+    assert meta["required_equipment"] == []
+    assert meta["location"] == ("home", "gym", "outdoor")
+
+
+def test_equipment_masks():
+    assert fits("technique_focus_gym", mask(["gym_boulder", "hangboard"]))
+    assert not fits("power_endurance_gym", mask(["gym_boulder", "hangboard"]))
+    assert fits("core_training", 0)
+    assert fits("unknown_session", 0)
+    assert SESSION_META["strength_long"]["required_mask"] == mask(["hangboard"])
+    assert required_equipment("unknown_session") == []
@@ -0,0 +1,117 @@
+"""Tests for side-effect-free reads: the state side log and state migrations."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from backend.api import deps, side_log
+
+
+@pytest.fixture
+def state_path(tmp_path, monkeypatch):
+    path = tmp_path / "user_state.json"
+    path.write_text(json.dumps({"schema_version": "1.5", "quote_cursors": {}}))
+    monkeypatch.setattr(deps, "STATE_PATH", path)
+    return path
+
+
+def test_appends_replay_on_load_without_rewriting(state_path):
+    before = state_path.read_bytes()
+    deps.append_side_log(None, "quote_advance", "general")
+    deps.append_side_log(None, "quote_advance", "hard_day")
+
+    assert state_path.read_bytes() == before
+    assert deps.load_state()["quote_cursors"] == {"general": 1, "hard_day": 1}
+
+
+def test_save_folds_and_truncates(state_path):
+    deps.append_side_log(None, "quote_advance", "general")
+    state = deps.load_state()
+    deps.append_side_log(None, "quote_advance", "hard_day")  # after the load
+    deps.save_state(state)
+
+    saved = json.loads(state_path.read_text())
+    assert saved["quote_cursors"] == {"general": 1, "hard_day": 1}
+    assert side_log.path_for(state_path).read_bytes() == b""
+    # Folded records are not replayed again
+    assert deps.load_state()["quote_cursors"] == {"general": 1, "hard_day": 1}
+
+
+def test_records_after_fold_keep_increasing(state_path):
+    deps.append_side_log(None, "quote_advance", "general")
+    deps.save_state(deps.load_state())
+    deps.append_side_log(None, "quote_advance", "hard_day")
+    assert deps.load_state()["quote_cursors"] == {"general": 1, "hard_day": 1}
+
+
+def test_clear_discards_pending(state_path):
+    deps.append_side_log(None, "quote_advance", "general")
+    deps.clear_side_log(None)
+    assert deps.load_state()["quote_cursors"] == {}
+
+
+def test_unknown_op_rejected(state_path):
+    with pytest.raises(ValueError):
+        deps.append_side_log(None, "nope", 1)
+
+
+def test_etag_version_tracks_side_log(state_path):
+    from backend.api.etag import state_version
+
+    before = state_version(None)
+    deps.append_side_log(None, "quote_advance", "general")
+    assert state_version(None) != before
+
+
+def test_migrations_apply_in_memory_deterministically(state_path):
+    state_path.write_text(json.dumps({"equipment": {"gyms": [{"name": "A"}, {"name": "B", "gym_id": "b"}]}}))
+    before = state_path.read_bytes()
+
+    first = deps.load_state()
+    second = deps.load_state()
+    assert state_path.read_bytes() == before
+    assert first["equipment"]["gyms"][0]["gym_id"] == second["equipment"]["gyms"][0]["gym_id"]
+    assert first["migration_version"] == len(deps.STATE_MIGRATIONS)
+
+    deps.save_state(first)
+    saved = json.loads(state_path.read_text())
+    assert saved["migration_version"] == len(deps.STATE_MIGRATIONS)
+    assert not deps.migrate_state(saved)
+
+
+def test_quote_history_migrates_to_cursors(state_path):
+    state_path.write_text(json.dumps({"quote_history": ["q001"]}))
+    state = deps.load_state()
+    assert "quote_history" not in state
+    assert state["quote_cursors"]
+
+
+def test_queued_followups_wait_for_the_state_lock(state_path):
+    from backend.api.routers.feedback import run_feedback_followups
+    from backend.api.tasks import task_queue
+
+    with deps.state_lock(None):
+        task_queue.submit("legacy", "feedback_followups", run_feedback_followups, None, "2026-01-05")
+        assert not task_queue.wait_idle("legacy", timeout=0.2)
+    assert task_queue.wait_idle("legacy", timeout=10)
+
+
+def test_fold_does_not_overwrite_a_concurrent_save(state_path):
+    import threading
+
+    deps.append_side_log(None, "quote_advance", "general")
+    with deps.state_lock(None):
+        fold = threading.Thread(target=deps._fold_side_log, args=(None,))
+        fold.start()
+        fold.join(0.2)
+        assert fold.is_alive()
+        state = deps.load_state()
+        state["goal"] = {"current_grade": "7a"}
+        deps.save_state(state)
+    fold.join(10)
+
+    saved = json.loads(state_path.read_text())
+    assert saved["goal"] == {"current_grade": "7a"}
+    assert saved["quote_cursors"] == {"general": 1}
@@ -0,0 +1,79 @@
+"""Tests for the in-process background task queue (per-user ordering)."""
+
+from __future__ import annotations
+
+import threading
+import time
+
+from backend.api.tasks import TaskQueue, task_key
+
+
+def test_task_key_legacy():
+    assert task_key(None) == "legacy"
+    assert task_key("abc") == "abc"
+
+
+def test_same_key_runs_in_submission_order():
+    q = TaskQueue(max_workers=4)
+    seen = []
+
+    def work(i):
+        time.sleep(0.002 * (5 - i))  # earlier tasks are slower
+        seen.append(i)
+
+    for i in range(5):
+        q.submit("u1", "work", work, i)
+    assert q.wait_idle("u1", timeout=5)
+    assert seen == [0, 1, 2, 3, 4]
+
+
+def test_same_key_never_overlaps():
+    q = TaskQueue(max_workers=4)
+    running = []
+    overlap = []
+    lock = threading.Lock()
+
+    def work():
+        with lock:
+            running.append(1)
+            if len(running) > 1:
+                overlap.append(True)
+        time.sleep(0.005)
+        with lock:
+            running.pop()
+
+    for _ in range(6):
+        q.submit("u1", "work", work)
+    assert q.wait_idle(timeout=5)
+    assert overlap == []
+
+
+def test_different_keys_run_in_parallel():
+    q = TaskQueue(max_workers=2)
+    gate = threading.Event()
+    q.submit("blocked", "wait", gate.wait, 5)
+    done = []
+    q.submit("other", "work", done.append, 1)
+    assert q.wait_idle("other", timeout=5)
+    assert done == [1]
+    assert not q.is_idle("blocked")
+    gate.set()
+    assert q.wait_idle(timeout=5)
+
+
+def test_status_records():
+    q = TaskQueue(max_workers=1)
+
+    def boom():
+        raise RuntimeError("nope")
+
+    ok_id = q.submit("u1", "ok", lambda: None)
+    bad_id = q.submit("u1", "boom", boom)
+    assert q.wait_idle(timeout=5)
+    assert q.get(ok_id)["status"] == "done"
+    bad = q.get(bad_id)
+    assert bad["status"] == "failed"
+    assert bad["error"] == "nope"
+    assert bad["finished_at"] is not None
+    assert [r["task_id"] for r in q.list_for("u1")] == [ok_id, bad_id]
+    assert q.get("missing") is None
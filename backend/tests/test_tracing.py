@@ -0,0 +1,140 @@
+"""Tests for engine tracing spans (backend/engine/tracing.py)."""
+
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+import pytest
+
+from backend.engine import planner_memo, tracing
+from backend.engine.macrocycle_v1 import _build_session_pool
+from backend.engine.planner_v2 import generate_phase_week
+from backend.engine.tracing import collect, sequence, span, traced
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats():
+    tracing.reset_timing_table()
+    yield
+    tracing.reset_timing_table()
+
+
+def _names(node):
+    return [c["name"] for c in node.get("children", [])]
+
+
+def test_disabled_spans_are_shared_noops():
+    assert not tracing.enabled()
+    assert span("a") is span("b")
+    assert sequence("a") is span("a")
+
+    @traced("f")
+    def f(x):
+        return x + 1
+
+    assert f(1) == 2
+    assert tracing.timing_table() == {"traces": 0, "spans": []}
+
+
+def test_nested_spans_and_decorator():
+    @traced("inner")
+    def inner():
+        return "ok"
+
+    with collect("root") as trace:
+        with span("outer", kind="test"):
+            assert inner() == "ok"
+            assert inner() == "ok"
+        with span("sibling"):
+            pass
+
+    tree = trace.to_dict()
+    assert tree["name"] == "root"
+    assert _names(tree) == ["outer", "sibling"]
+    outer = tree["children"][0]
+    assert outer["attrs"] == {"kind": "test"}
+    assert _names(outer) == ["inner", "inner"]
+    assert tree["span_count"] == 4
+    assert not tracing.enabled()
+
+
+def test_sequence_ends_previous_and_unwinds_with_parent():
+    with collect() as trace:
+        with span("loop"):
+            seq = sequence("item")
+            for i in range(3):
+                seq.next(i=i)
+                with span("work"):
+                    pass
+        with span("after"):
+            pass
+
+    loop, after = trace.to_dict()["children"]
+    assert _names(loop) == ["item", "item", "item"]
+    assert [c["attrs"]["i"] for c in loop["children"]] == [0, 1, 2]
+    assert all(_names(c) == ["work"] for c in loop["children"])
+    # The last item was closed by leaving "loop", so "after" is a root child.
+    assert after["name"] == "after"
+
+
+def test_exception_unwinds_open_spans():
+    with collect() as trace:
+        with pytest.raises(ValueError):
+            with span("failing"):
+                sequence("step").next()
+                raise ValueError("boom")
+        with span("next"):
+            pass
+
+    assert _names(trace.to_dict()) == ["failing", "next"]
+
+
+def test_span_cap_drops_extra_spans(monkeypatch):
+    monkeypatch.setattr(tracing, "MAX_SPANS", 3)
+    with collect() as trace:
+        for _ in range(5):
+            with span("s"):
+                pass
+    tree = trace.to_dict()
+    assert tree["span_count"] == 3
+    assert tree["dropped_spans"] == 2
+
+
+def test_timing_table_aggregates_self_time():
+    for _ in range(2):
+        with collect():
+            with span("parent"):
+                with span("child"):
+                    pass
+
+    table = tracing.timing_table()
+    assert table["traces"] == 2
+    rows = {r["name"]: r for r in table["spans"]}
+    assert rows["parent"]["count"] == 2
+    assert rows["child"]["count"] == 2
+    assert rows["parent"]["self_ms"] <= rows["parent"]["total_ms"]
+    assert rows["parent"]["total_ms"] >= rows["child"]["total_ms"]
+
+
+def test_planner_passes_are_traced():
+    monday = date(2026, 3, 2)
+    pool = _build_session_pool("base")
+    kwargs = dict(
+        phase_id="base",
+        domain_weights={},
+        session_pool=pool,
+        start_date=monday.isoformat(),
+        today=(monday - timedelta(days=1)).isoformat(),
+    )
+    untraced = generate_phase_week(**kwargs)
+    planner_memo.clear()  # trace a real run, not a memo hit
+    with collect() as trace:
+        traced_plan = generate_phase_week(**kwargs)
+
+    assert traced_plan == untraced
+    planner = trace.to_dict()["children"][0]
+    assert planner["name"] == "planner.generate_phase_week"
+    names = _names(planner)
+    assert names[0] == "planner.setup"
+    assert "planner.pass_1" in names
+    assert names[-1] == "planner.build_days"
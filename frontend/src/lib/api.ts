@@ -50,7 +50,7 @@ async function request<T>(path: string, options?: RequestInit): Promise<T> {
 // State
 export const getState = () => request<UserState>("/api/state");
 export const putState = (patch: Record<string, unknown>) =>
-  request<UserState>("/api/state", { method: "PUT", body: JSON.stringify(patch) });
+  request<{ status: string }>("/api/state?response=minimal", { method: "PUT", body: JSON.stringify(patch) });
 export const deleteState = () =>
   request<{ status: string; state: UserState }>("/api/state", { method: "DELETE" });
 export const getStateStatus = () =>
@@ -189,7 +189,7 @@ export const postFeedback = (data: {
   resolved_day?: Record<string, unknown>;
   status?: string;
 }) =>
-  request<{ status: string; state: UserState }>("/api/feedback", {
+  request<{ status: string; task_id: string }>("/api/feedback?response=minimal", {
     method: "POST",
     body: JSON.stringify(data),
   });
@@ -222,7 +222,7 @@ export const postOutdoorLog = (session: Omit<OutdoorSession, "log_version">) =>
   });
 
 export const getOutdoorSessions = (since?: string) =>
-  request<{ sessions: OutdoorSession[]; count: number }>(
+  request<{ sessions: OutdoorSession[]; count: number; next_cursor: string | null }>(
     `/api/outdoor/sessions${since ? `?since=${since}` : ""}`
   );
 
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Benchmark time-to-first-/api/week of a cold API process.
+
+Usage:
+    python scripts/bench_cold_start.py [--repeat 5]
+
+Each run starts a fresh interpreter that imports the app, runs its startup
+(lifespan) and serves ``GET /api/week/1`` for the test fixture user, and
+reports the wall time from interpreter start to the response. Runs are made
+with the catalog snapshot disabled (every catalog read parses the source
+JSON) and with a prebuilt snapshot, as after a deploy-time
+``python -m backend.engine.catalog_snapshot build``. DATA_DIR is a temporary
+directory, so nothing real is touched.
+"""
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+FIXTURE_STATE = os.path.join(REPO_ROOT, "backend", "tests", "fixtures", "test_user_state.json")
+
+_CHILD = """
+import time
+t0 = time.perf_counter()
+from fastapi.testclient import TestClient
+from backend.api.main import app
+with TestClient(app) as client:
+    t_ready = time.perf_counter()
+    r = client.get("/api/week/1")
+    assert r.status_code == 200, r.text
+    t_first = time.perf_counter()
+    client.get("/api/week/1")
+    t_second = time.perf_counter()
+print(f"{t_ready - t0:.4f} {t_first - t_ready:.4f} {t_second - t_first:.4f}")
+"""
+
+
+def _run(env: dict) -> tuple:
+    start = time.perf_counter()
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD], cwd=REPO_ROOT, env=env, check=True, capture_output=True, text=True
+    ).stdout.split()
+    total = time.perf_counter() - start
+    startup, first, second = (float(x) for x in out[-3:])
+    return total, startup, first, second
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="cold starts per mode (best is reported)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = os.path.join(tmp, "data")
+        os.makedirs(data_dir)
+        snapshot = os.path.join(tmp, "catalog_snapshot.pickle")
+        base_env = {**os.environ, "DATA_DIR": data_dir, "PYTHONDONTWRITEBYTECODE": "1"}
+
+        subprocess.run(
+            [sys.executable, "-m", "backend.engine.catalog_snapshot", "build"],
+            cwd=REPO_ROOT, env={**base_env, "CATALOG_SNAPSHOT_PATH": snapshot}, check=True,
+        )
+
+        modes = [("source JSON", ""), ("snapshot", snapshot)]
+        print(f"{'catalogs':<12} {'process ms':>11} {'startup ms':>11} {'1st week ms':>12} {'2nd week ms':>12}")
+        for label, path in modes:
+            best = None
+            for _ in range(args.repeat):
+                # Fresh legacy state each run so no week plan is cached yet
+                shutil.copy(FIXTURE_STATE, os.path.join(data_dir, "user_state.json"))
+                shutil.rmtree(os.path.join(data_dir, "users"), ignore_errors=True)
+                result = _run({**base_env, "CATALOG_SNAPSHOT_PATH": path})
+                best = result if best is None or result[0] < best[0] else best
+            total, startup, first, second = (x * 1000.0 for x in best)
+            print(f"{label:<12} {total:>11.1f} {startup:>11.1f} {first:>12.1f} {second:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
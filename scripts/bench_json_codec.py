@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""Benchmark the JSON codec backends on large synthetic user states.
+
+Usage:
+    python scripts/bench_json_codec.py [--weeks 52] [--repeat 20]
+
+Builds a state shaped like a long-lived user (many cached week plans with
+resolved sessions, a full working_loads table, feedback log) and times
+parse/dump for stdlib and orjson in the pretty (indent=2) and compact on-disk
+formats. orjson rows are skipped when it is not installed.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from backend.engine import json_codec  # noqa: E402
+
+
+def _synthetic_state(weeks: int) -> dict:
+    start = date(2026, 1, 5)
+    week_plans = {}
+    for w in range(weeks):
+        ws = start + timedelta(weeks=w)
+        days = []
+        for d in range(7):
+            sessions = []
+            for slot in ("morning", "evening"):
+                instances = [
+                    {
+                        "exercise_id": f"ex_{w}_{d}_{i}",
+                        "block_id": f"block_{i % 4}",
+                        "prescription": {"sets": 4, "reps": 6, "rest_s": 180, "load_kg": 12.5 + i},
+                        "suggested": {"total_load_kg": 82.5, "source": "working_loads"},
+                        "notes": "Progressione — mantenere la qualità",
+                    }
+                    for i in range(10)
+                ]
+                sessions.append({
+                    "slot": slot,
+                    "session_id": "strength_long",
+                    "location": "gym",
+                    "gym_id": "a1b2c3d4",
+                    "status": "planned",
+                    "tags": {"hard": True, "finger": True},
+                    "explain": ["phase=base", "domain=finger_strength"],
+                    "resolved": {"resolved_session": {"exercise_instances": instances}},
+                })
+            days.append({"date": (ws + timedelta(days=d)).isoformat(), "sessions": sessions})
+        week_plans[ws.isoformat()] = {"start_date": ws.isoformat(), "weeks": [{"days": days}]}
+    return {
+        "schema_version": "1.5",
+        "user": {"preferred_name": "Bench", "bodyweight_kg": 70.0},
+        "working_loads": {
+            "entries": [
+                {"exercise_id": f"ex_{i}", "load_kg": 20.0 + i * 0.5, "updated_at": "2026-02-01"}
+                for i in range(400)
+            ],
+            "rules": {},
+        },
+        "feedback_log": [{"date": "2026-02-01", "session_id": "s", "difficulty": "ok"}] * 7,
+        "week_plans": week_plans,
+        "current_week_plan": week_plans[start.isoformat()],
+    }
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--weeks", type=int, default=52, help="cached week plans in the state")
+    parser.add_argument("--repeat", type=int, default=20, help="runs per measurement (best is reported)")
+    args = parser.parse_args()
+
+    state = _synthetic_state(args.weeks)
+    pretty = json.dumps(state, ensure_ascii=False, indent=2, sort_keys=True)
+    compact = json.dumps(state, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    print(f"state: {args.weeks} weeks, pretty {len(pretty) / 1e6:.1f} MB, compact {len(compact) / 1e6:.1f} MB")
+    print(f"codec backend in use: {json_codec.BACKEND}\n")
+
+    rows = [
+        ("stdlib", "pretty", "parse", lambda: json.loads(pretty)),
+        ("stdlib", "pretty", "dump", lambda: json.dumps(state, ensure_ascii=False, indent=2, sort_keys=True)),
+        ("stdlib", "compact", "parse", lambda: json.loads(compact)),
+        ("stdlib", "compact", "dump",
+         lambda: json.dumps(state, ensure_ascii=False, sort_keys=True, separators=(",", ":"))),
+    ]
+    try:
+        import orjson
+    except ImportError:
+        orjson = None
+    if orjson is not None:
+        pretty_b = pretty.encode("utf-8")
+        compact_b = compact.encode("utf-8")
+        rows += [
+            ("orjson", "pretty", "parse", lambda: orjson.loads(pretty_b)),
+            ("orjson", "pretty", "dump",
+             lambda: orjson.dumps(state, option=orjson.OPT_INDENT_2 | orjson.OPT_SORT_KEYS)),
+            ("orjson", "compact", "parse", lambda: orjson.loads(compact_b)),
+            ("orjson", "compact", "dump", lambda: orjson.dumps(state, option=orjson.OPT_SORT_KEYS)),
+        ]
+
+    print(f"{'backend':<8} {'format':<8} {'op':<6} {'best ms':>9}")
+    for backend, fmt, op, fn in rows:
+        print(f"{backend:<8} {fmt:<8} {op:<6} {_time(fn, args.repeat):>9.2f}")
+    if orjson is None:
+        print("\norjson not installed — only stdlib measured (pip install orjson)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Compare the greedy and search planner modes on random weeks.
+
+Usage:
+    python scripts/bench_planner_search.py [--scenarios 200] [--seed 7]
+
+Each scenario draws an availability grid (slots, home/gym, a few days off),
+home and gym equipment, a pre-trip window and a weekly target, then plans
+the same week of every macrocycle phase with ``planner_mode="greedy"`` and
+``planner_mode="search"``. Reported per phase and mode: median and p95
+latency, mean days trained, mean domain coverage (the search objective,
+``planner_search.coverage`` over the phase weights), and how many scenarios
+the search planned better / equal / worse than the greedy (days trained,
+then coverage). Scenarios are seeded, so runs are comparable.
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import date, timedelta
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from backend.engine.macrocycle_v1 import _BASE_WEIGHTS, _build_session_pool  # noqa: E402
+from backend.engine.planner_search import coverage  # noqa: E402
+from backend.engine.planner_v2 import SLOTS, WEEKDAYS, _SESSION_META, generate_phase_week  # noqa: E402
+
+START = date(2026, 3, 2)
+HOME_ITEMS = ["hangboard", "pullup_bar", "band", "dumbbell", "kettlebell", "ab_wheel", "rings", "foam_roller"]
+GYM_ITEMS = ["gym_boulder", "gym_routes", "hangboard", "spraywall", "board_kilter", "campus_board", "barbell", "dumbbell"]
+
+
+def _scenario(rng: random.Random) -> dict:
+    availability = {}
+    for wd in WEEKDAYS:
+        if rng.random() < 0.2:
+            availability[wd] = {"available": False}
+            continue
+        day = {}
+        for slot in SLOTS:
+            if rng.random() < 0.5:
+                day[slot] = {"available": True, "preferred_location": rng.choice(["home", "gym", None])}
+        availability[wd] = day
+    gyms = [
+        {"gym_id": f"gym_{i}", "priority": i, "equipment": rng.sample(GYM_ITEMS, rng.randint(1, 5))}
+        for i in range(rng.randint(0, 2))
+    ]
+    pretrip = []
+    if rng.random() < 0.2:
+        first = rng.randint(0, 6)
+        pretrip = [(START + timedelta(days=d)).isoformat() for d in range(first, 7)]
+    return {
+        "availability": availability,
+        "gyms": gyms,
+        "home_equipment": rng.sample(HOME_ITEMS, rng.randint(0, 5)),
+        "pretrip_dates": pretrip,
+        "planning_prefs": {"target_training_days_per_week": rng.randint(3, 6)},
+    }
+
+
+def _quality(plan: dict, weights: dict) -> tuple:
+    keys = sorted(weights)
+    counts = [0] * len(keys)
+    days_trained = 0
+    for day in plan["weeks"][0]["days"]:
+        if day["sessions"]:
+            days_trained += 1
+        for s in day["sessions"]:
+            for d in _SESSION_META.get(s["session_id"], {}).get("domains", ()):
+                if d in weights:
+                    counts[keys.index(d)] += 1
+    return days_trained, coverage(counts, [weights[k] for k in keys])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    scenarios = [_scenario(rng) for _ in range(args.scenarios)]
+
+    print(f"{'phase':<16} {'mode':<7} {'p50 ms':>7} {'p95 ms':>7} {'days':>6} {'coverage':>9} {'better/equal/worse':>19}")
+    for phase_id, weights in _BASE_WEIGHTS.items():
+        pool = _build_session_pool(phase_id)
+        results = {}
+        for mode in ("greedy", "search"):
+            times, quality = [], []
+            for sc in scenarios:
+                t0 = time.perf_counter()
+                plan = generate_phase_week(
+                    phase_id=phase_id, domain_weights=weights, session_pool=pool,
+                    start_date=START.isoformat(), allowed_locations=["home", "gym"],
+                    planner_mode=mode, **sc,
+                )
+                times.append((time.perf_counter() - t0) * 1000.0)
+                quality.append(_quality(plan, weights))
+            results[mode] = (times, quality)
+
+        greedy_q = results["greedy"][1]
+        for mode, (times, quality) in results.items():
+            times.sort()
+            p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+            cmp = ""
+            if mode == "search":
+                better = sum(1 for s, g in zip(quality, greedy_q) if (s[0], round(s[1], 9)) > (g[0], round(g[1], 9)))
+                worse = sum(1 for s, g in zip(quality, greedy_q) if (s[0], round(s[1], 9)) < (g[0], round(g[1], 9)))
+                cmp = f"{better}/{len(quality) - better - worse}/{worse}"
+            print(
+                f"{phase_id:<16} {mode:<7} {statistics.median(times):>7.2f} {p95:>7.2f} "
+                f"{statistics.mean(q[0] for q in quality):>6.2f} {statistics.mean(q[1] for q in quality):>9.3f} {cmp:>19}"
+            )
+
+
+if __name__ == "__main__":
+    main()
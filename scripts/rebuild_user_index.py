@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""Rebuild the admin user-summary index from the user directories.
+
+Usage:
+    DATA_DIR=/path/to/data python scripts/rebuild_user_index.py [--check]
+
+Re-parses every ``users/<uuid>/user_state.json`` and its session logs into
+``DATA_DIR/admin_index.sqlite3`` and prints how many rows were added, updated
+(the index disagreed with the disk), removed or skipped (unreadable state).
+With ``--check`` the exit status is 1 when any row had drifted, for use in
+consistency checks.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+
+from backend.api import user_index  # noqa: E402
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--check", action="store_true", help="exit 1 if the index had drifted from disk")
+    args = parser.parse_args()
+
+    print(f"index: {user_index.index_path()}")
+    result = user_index.rebuild()
+    print(json.dumps(result, indent=2))
+    drifted = result["added"] + result["updated"] + result["removed"]
+    return 1 if args.check and drifted else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())